@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قراءة الصور مباشرة من أرشيفات ZIP وTAR دون استخراجها إلى القرص
+Reading Images Directly From ZIP/TAR Archives
+"""
+
+import os
+import time
+import zlib
+import struct
+import tarfile
+import zipfile
+import weakref
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from image_discovery import DiscoveredImage, SUPPORTED_FORMATS
+
+# مسار صورة داخل أرشيف: archive.zip!folder/scan_001.png
+ARCHIVE_SEPARATOR = '!'
+ARCHIVE_FORMATS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+_ZIP_LOCAL_HEADER = struct.Struct('<4s22xHH')
+
+def is_archive(path) -> bool:
+    """هل المسار ملف أرشيف مدعوم (حسب الامتداد)"""
+    return os.fspath(path).lower().endswith(ARCHIVE_FORMATS)
+
+def split_archive_path(path) -> Optional[Tuple[str, str]]:
+    """
+    تقسيم archive!member إلى (مسار الأرشيف، اسم العضو)
+
+    Returns:
+        Optional[Tuple[str, str]]: None إذا لم يكن المسار داخل أرشيف
+    """
+    path = os.fspath(path)
+    start = 0
+    while True:
+        index = path.find(ARCHIVE_SEPARATOR, start)
+        if index < 0:
+            return None
+        archive = path[:index]
+        if is_archive(archive) and os.path.isfile(archive):
+            return archive, path[index + 1:]
+        start = index + 1
+
+def archive_member_path(archive, member: str) -> str:
+    return f"{os.fspath(archive)}{ARCHIVE_SEPARATOR}{member}"
+
+def image_name(path) -> str:
+    """اسم الملف (اسم العضو دون مجلداته لمسارات الأرشيف)"""
+    parts = split_archive_path(path) if ARCHIVE_SEPARATOR in os.fspath(path) else None
+    return os.path.basename(parts[1] if parts else os.fspath(path))
+
+class ArchiveReader:
+    """
+    قارئ أرشيف آمن للاستخدام من عدة خيوط
+
+    فهرس الأعضاء مشترك ويُبنى مرة واحدة أثناء التعداد. أعضاء ZIP (المخزنة أو
+    المضغوطة بـ deflate) وTAR غير المضغوط تُقرأ بـ os.pread من واصف ملف مشترك
+    دون قفل، فتتوازى القراءة فعلاً. TAR المضغوط لا يدعم الوصول العشوائي، فلكل
+    خيط مقبض خاص يتقدم للأمام في التدفق.
+    """
+
+    def __init__(self, archive_path):
+        self.archive_path = os.fspath(archive_path)
+        self.is_zip = self.archive_path.lower().endswith('.zip')
+        self.is_plain_tar = self.archive_path.lower().endswith('.tar')
+        self._fd = os.open(self.archive_path, os.O_RDONLY)
+        # الواصف يُغلق عند close() أو عندما لا يبقى أي خيط يستخدم القارئ
+        self._closer = weakref.finalize(self, os.close, self._fd)
+        stat = os.fstat(self._fd)
+        self.signature = (stat.st_size, stat.st_mtime_ns)
+        self._index: Dict[str, object] = {}
+        self._index_complete = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._handles = []
+
+    def _open_handle(self):
+        """مقبض خاص بالخيط الحالي (للصيغ التي لا تُقرأ بـ pread)"""
+        handle = getattr(self._local, 'handle', None)
+        if handle is None:
+            handle = zipfile.ZipFile(self.archive_path) if self.is_zip else tarfile.open(self.archive_path)
+            self._local.handle = handle
+            with self._lock:
+                self._handles.append(handle)
+        return handle
+
+    def members(self, extensions: Iterable[str] = SUPPORTED_FORMATS) -> Iterator[DiscoveredImage]:
+        """
+        تعداد الصور في الأرشيف (مولّد)
+
+        ZIP يُقرأ دليله المركزي من نهاية الملف؛ TAR يُقرأ ترويسة بعد ترويسة
+        فتظهر الصور الأولى قبل قراءة الأرشيف كاملاً.
+        """
+        extensions = tuple(ext.lower() for ext in extensions)
+        if self.is_zip:
+            with zipfile.ZipFile(self.archive_path) as archive:
+                infos = archive.infolist()
+            for info in infos:
+                if info.is_dir():
+                    continue
+                self._index[info.filename] = info
+                if info.filename.lower().endswith(extensions):
+                    mtime_ns = int(time.mktime(info.date_time + (0, 0, -1))) * 10**9
+                    yield DiscoveredImage(archive_member_path(self.archive_path, info.filename),
+                                          info.file_size, mtime_ns)
+        else:
+            with tarfile.open(self.archive_path) as archive:
+                while True:
+                    info = archive.next()
+                    if info is None:
+                        break
+                    # عدم الاحتفاظ بكل TarInfo داخل الكائن؛ الفهرس يكفي
+                    archive.members = []
+                    if not info.isreg():
+                        continue
+                    self._index[info.name] = info
+                    if info.name.lower().endswith(extensions):
+                        yield DiscoveredImage(archive_member_path(self.archive_path, info.name),
+                                              info.size, int(info.mtime) * 10**9)
+        self._index_complete = True
+
+    def _lookup(self, member: str):
+        info = self._index.get(member)
+        if info is None and not self._index_complete:
+            with self._lock:
+                if not self._index_complete:
+                    for _ in self.members(extensions=()):
+                        pass
+            info = self._index.get(member)
+        if info is None:
+            raise FileNotFoundError(f"العضو غير موجود في {self.archive_path}: {member}")
+        return info
+
+    def stat(self, member: str) -> Tuple[int, int]:
+        """(الحجم، تاريخ التعديل بالنانوثانية) لعضو في الأرشيف"""
+        info = self._lookup(member)
+        if self.is_zip:
+            return info.file_size, int(time.mktime(info.date_time + (0, 0, -1))) * 10**9
+        return info.size, int(info.mtime) * 10**9
+
+    def read(self, member: str) -> bytes:
+        """قراءة محتوى عضو كاملاً (بايتات مضغوطة للصورة، لا تُستخرج إلى القرص)"""
+        info = self._lookup(member)
+        if self.is_zip:
+            if not info.flag_bits & 0x1 and info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                return self._read_zip_member(info)
+            return self._open_handle().read(info)
+        if self.is_plain_tar:
+            return os.pread(self._fd, info.size, info.offset_data)
+        fileobj = self._open_handle().extractfile(info)
+        return fileobj.read()
+
+    def _read_zip_member(self, info: zipfile.ZipInfo) -> bytes:
+        header = os.pread(self._fd, _ZIP_LOCAL_HEADER.size, info.header_offset)
+        signature, name_length, extra_length = _ZIP_LOCAL_HEADER.unpack(header)
+        if signature != b'PK\x03\x04':
+            raise zipfile.BadZipFile(f"ترويسة عضو غير صالحة: {info.filename}")
+        offset = info.header_offset + _ZIP_LOCAL_HEADER.size + name_length + extra_length
+        data = os.pread(self._fd, info.compress_size, offset)
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -15)
+        if zlib.crc32(data) != info.CRC:
+            raise zipfile.BadZipFile(f"CRC غير مطابق: {info.filename}")
+        return data
+
+    def close(self):
+        with self._lock:
+            for handle in self._handles:
+                handle.close()
+            self._handles = []
+        self._closer()
+
+_readers: Dict[str, ArchiveReader] = {}
+_readers_lock = threading.Lock()
+
+def get_archive_reader(archive_path) -> ArchiveReader:
+    """قارئ مشترك لكل أرشيف (يُعاد استخدامه بين الخيوط ويُفتح من جديد إذا تغير الأرشيف)"""
+    key = os.path.abspath(archive_path)
+    stat = os.stat(key)
+    with _readers_lock:
+        reader = _readers.get(key)
+        if reader is None or reader.signature != (stat.st_size, stat.st_mtime_ns):
+            # القارئ القديم لا يُغلق هنا: خيوط أخرى قد تقرأ منه الآن، ويُغلق واصفه
+            # تلقائياً عند انتهاء آخر استخدام له
+            reader = _readers[key] = ArchiveReader(key)
+        return reader
+
+def close_archive_readers():
+    """إغلاق جميع القراء المفتوحة"""
+    with _readers_lock:
+        for reader in _readers.values():
+            reader.close()
+        _readers.clear()
+
+def iter_archive_images(archive_path, extensions: Iterable[str] = SUPPORTED_FORMATS) -> Iterator[DiscoveredImage]:
+    """تعداد الصور داخل أرشيف بمسارات archive!member"""
+    reader = get_archive_reader(archive_path)
+    prefix_length = len(reader.archive_path)
+    for image in reader.members(extensions):
+        # الحفاظ على مسار الأرشيف كما مُرر (نسبي أو مطلق)
+        yield image._replace(path=archive_member_path(archive_path, image.path[prefix_length + 1:]))
+
+def read_archive_member(path) -> bytes:
+    """قراءة بايتات صورة من مسار archive!member"""
+    parts = split_archive_path(path)
+    if parts is None:
+        raise FileNotFoundError(f"ليس مساراً داخل أرشيف: {path}")
+    return get_archive_reader(parts[0]).read(parts[1])
+
+def stat_image(path) -> Tuple[int, int]:
+    """
+    (الحجم، تاريخ التعديل بالنانوثانية) لملف عادي أو لعضو في أرشيف
+
+    Raises:
+        OSError: إذا لم يوجد الملف أو العضو
+    """
+    parts = split_archive_path(path) if ARCHIVE_SEPARATOR in os.fspath(path) else None
+    if parts is None:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+    return get_archive_reader(parts[0]).stat(parts[1])
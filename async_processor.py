@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+معالج الصور غير المتزامن (asyncio)
+Asyncio-Native Image Processor
+"""
+
+import asyncio
+import time
+import logging
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, AsyncIterator, Iterable, Iterator, Union, AsyncIterable
+import pytesseract
+from image_enhancer import ImageEnhancer
+from shared_frames import SharedFramePool
+from binary_image import encode_enhanced_image, write_enhanced_image
+from image_discovery import walk_images, SUPPORTED_FORMATS
+from archive_input import is_archive, iter_archive_images
+from document_pages import expand_pages, image_name, pdf_supported
+
+class AsyncBatchProcessor:
+    """
+    واجهة asyncio للمعالجة لتضمين المحسن في الخدمات (مثل aiohttp)
+
+    العمل الحسابي (التحميل والتحسين وEasyOCR) يُنفذ في مجمّعات مُدارة،
+    وTesseract يُشغّل كعملية فرعية عبر asyncio.create_subprocess_exec
+    فلا تُحجب حلقة الأحداث.
+    """
+
+    def __init__(self, max_concurrency: int = 8, cpu_workers: int = 4,
+                 use_multiprocessing: bool = False, ocr_workers: int = 1,
+                 tesseract_config: str = '--oem 3 --psm 6 -l ara+eng'):
+        """
+        Args:
+            max_concurrency: الحد الأقصى للصور قيد المعالجة في نفس الوقت
+            cpu_workers: عدد عمال التحميل والتحسين
+            use_multiprocessing: تحسين الصور في عمليات منفصلة عبر الذاكرة المشتركة
+            ocr_workers: عدد threads الخاصة بـ EasyOCR
+            tesseract_config: خيارات سطر أوامر Tesseract
+        """
+        self.max_concurrency = max_concurrency
+        self.tesseract_config = tesseract_config
+        self.enhancer = ImageEnhancer()
+        self.logger = logging.getLogger(__name__)
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cpu_executor = ThreadPoolExecutor(max_workers=cpu_workers)
+        self._ocr_executor = ThreadPoolExecutor(max_workers=ocr_workers)
+        self._frame_pool = SharedFramePool(cpu_workers) if use_multiprocessing else None
+
+    async def _enhance(self, image):
+        """تحسين الصورة في المجمّع المناسب"""
+        if self._frame_pool is not None:
+            return await asyncio.wrap_future(self._frame_pool.submit_enhance(image))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._cpu_executor, self.enhancer.enhance_image_pipeline, image)
+
+    async def extract_text_tesseract(self, image) -> List[Dict]:
+        """
+        استخراج النص باستخدام Tesseract كعملية فرعية غير متزامنة
+
+        Args:
+            image: الصورة المحسنة
+
+        Returns:
+            List[Dict]: النصوص بنفس شكل ImageEnhancer.extract_text_tesseract
+        """
+        loop = asyncio.get_running_loop()
+        # الصور الثنائية تُرسل PNG بعمق 1 بت (أصغر عبر الأنبوب)
+        encoded = await loop.run_in_executor(self._cpu_executor, encode_enhanced_image, image)
+
+        tesseract_cmd = getattr(pytesseract.pytesseract, 'tesseract_cmd', 'tesseract')
+        try:
+            process = await asyncio.create_subprocess_exec(
+                tesseract_cmd, 'stdin', 'stdout', *self.tesseract_config.split(), 'tsv',
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await process.communicate(encoded)
+        except OSError as e:
+            self.logger.error(f"خطأ في تشغيل Tesseract: {e}")
+            return []
+
+        if process.returncode != 0:
+            self.logger.error(f"خطأ في Tesseract: {stderr.decode('utf-8', 'replace').strip()}")
+            return []
+
+        return self.parse_tesseract_tsv(stdout.decode('utf-8', 'replace'))
+
+    @staticmethod
+    def parse_tesseract_tsv(tsv: str) -> List[Dict]:
+        """تحويل مخرجات TSV من Tesseract إلى قائمة نصوص"""
+        extracted_text = []
+        lines = tsv.splitlines()
+        if not lines:
+            return extracted_text
+
+        header = lines[0].split('\t')
+        for line in lines[1:]:
+            row = dict(zip(header, line.split('\t')))
+            text = row.get('text', '')
+            try:
+                confidence = int(float(row.get('conf', -1)))
+            except ValueError:
+                continue
+            if confidence > 30 and text.strip():
+                extracted_text.append({
+                    'text': text,
+                    'confidence': confidence / 100.0,
+                    'bbox': (int(row['left']), int(row['top']),
+                             int(row['width']), int(row['height']))
+                })
+        return extracted_text
+
+    async def process(self, image_path, output_dir=None, save_enhanced: bool = True) -> Dict:
+        """
+        معالجة صورة واحدة دون حجب حلقة الأحداث
+
+        Args:
+            image_path: مسار الصورة
+            output_dir: مجلد الحفظ (اختياري)
+            save_enhanced: حفظ الصورة المحسنة
+
+        Returns:
+            dict: نتائج المعالجة (بنفس شكل BatchProcessor.process_single_image)
+        """
+        image_path = Path(image_path)
+        loop = asyncio.get_running_loop()
+
+        async with self._semaphore:
+            try:
+                start_time = time.time()
+
+                image = await loop.run_in_executor(self._cpu_executor, self.enhancer.load_image, str(image_path))
+                if image is None:
+                    return {
+                        'image_path': str(image_path),
+                        'status': 'failed',
+                        'error': 'لا يمكن تحميل الصورة',
+                        'processing_time': 0
+                    }
+
+                enhanced_image = await self._enhance(image)
+                del image
+
+                # EasyOCR و Tesseract يعملان بالتوازي
+                easyocr_results, tesseract_results = await asyncio.gather(
+                    loop.run_in_executor(self._ocr_executor, self.enhancer.extract_text_easyocr, enhanced_image),
+                    self.extract_text_tesseract(enhanced_image)
+                )
+
+                enhanced_path = None
+                if save_enhanced and output_dir:
+                    output_dir = Path(output_dir)
+                    output_dir.mkdir(parents=True, exist_ok=True)
+                    enhanced_path = output_dir / f"enhanced_{image_name(image_path)}"
+                    await loop.run_in_executor(self._cpu_executor, write_enhanced_image, enhanced_path, enhanced_image)
+
+                processing_time = time.time() - start_time
+                self.logger.info(f"تمت معالجة الصورة: {image_name(image_path)} في {processing_time:.2f} ثانية")
+
+                return {
+                    'image_path': str(image_path),
+                    'enhanced_path': str(enhanced_path) if enhanced_path else None,
+                    'status': 'success',
+                    'processing_time': processing_time,
+                    'easyocr_results': easyocr_results,
+                    'tesseract_results': tesseract_results,
+                    'total_texts_found': len(easyocr_results) + len(tesseract_results),
+                    'timestamp': datetime.now().isoformat()
+                }
+
+            except Exception as e:
+                self.logger.error(f"خطأ في معالجة الصورة {image_path}: {str(e)}")
+                return {
+                    'image_path': str(image_path),
+                    'status': 'failed',
+                    'error': str(e),
+                    'processing_time': 0,
+                    'timestamp': datetime.now().isoformat()
+                }
+
+    async def process_stream(self, image_paths: Union[Iterable, AsyncIterable],
+                             output_dir=None, save_enhanced: bool = True) -> AsyncIterator[Dict]:
+        """
+        معالجة تدفق من الصور وإرجاع النتائج حسب ترتيب الاكتمال
+
+        لا يُسحب مسار جديد من المدخلات إلا عند وجود مكان في نافذة التزامن،
+        فيبقى الضغط الخلفي (backpressure) على المنتج.
+
+        Args:
+            image_paths: مسارات الصور (iterable عادي أو غير متزامن)
+            output_dir: مجلد الحفظ
+            save_enhanced: حفظ الصور المحسنة
+
+        Yields:
+            dict: نتيجة كل صورة
+        """
+        pending = set()
+        try:
+            async for image_path in _as_async_iter(image_paths):
+                if len(pending) >= self.max_concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+                pending.add(asyncio.ensure_future(self.process(image_path, output_dir, save_enhanced)))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # إلغاء المهام المتبقية إذا توقف المستهلك مبكراً
+            for task in pending:
+                task.cancel()
+
+    async def close(self):
+        """إيقاف المجمّعات"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def _shutdown(self):
+        self._cpu_executor.shutdown(wait=True)
+        self._ocr_executor.shutdown(wait=True)
+        if self._frame_pool is not None:
+            self._frame_pool.shutdown()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+async def _as_async_iter(items):
+    """توحيد المدخلات المتزامنة وغير المتزامنة"""
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+def iter_input_images(input_path, recursive: bool = False) -> Iterator[Path]:
+    """
+    مسارات الصور للمدخل بنفس اكتشاف BatchProcessor (مولّد)
+
+    المجلد يُمسح بـ walk_images، والأرشيف ZIP/TAR يُعدّد أعضاؤه (archive!member)،
+    والمستندات متعددة الصفحات تُوسع إلى صفحاتها (doc.tif#page=N).
+    """
+    input_path = Path(input_path)
+    formats = SUPPORTED_FORMATS + (('.pdf',) if pdf_supported() else ())
+    if is_archive(input_path) and input_path.is_file():
+        images = (Path(image.path) for image in iter_archive_images(input_path, formats))
+    elif input_path.is_dir():
+        images = (Path(image.path) for image in walk_images(input_path, recursive, formats, with_stat=False))
+    else:
+        images = [input_path]
+    return expand_pages(images)
+
+async def _main(args):
+    async with AsyncBatchProcessor(max_concurrency=args.concurrency, cpu_workers=args.workers) as processor:
+        paths = iter_input_images(args.input, args.recursive)
+        async for result in processor.process_stream(paths, args.output, not args.no_save):
+            print(f"{result['status']}: {result['image_path']} ({result['processing_time']:.2f}s)")
+
+def main():
+    """الدالة الرئيسية"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='معالج الصور غير المتزامن')
+    parser.add_argument('input', help='مسار الصورة أو المستند أو المجلد أو أرشيف ZIP/TAR')
+    parser.add_argument('-r', '--recursive', action='store_true', help='البحث في المجلدات الفرعية')
+    parser.add_argument('-o', '--output', help='مجلد الحفظ')
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='الحد الأقصى للتزامن')
+    parser.add_argument('-w', '--workers', type=int, default=4, help='عدد عمال المعالجة')
+    parser.add_argument('--no-save', action='store_true', help='عدم حفظ الصور المحسنة')
+
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+if __name__ == "__main__":
+    main()
@@ -11,26 +11,109 @@ import os
 import json
 import csv
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 import threading
 import time
 from datetime import datetime
 import argparse
 from image_enhancer import ImageEnhancer
+from performance_optimizer import AdaptiveWorkerController
+from supervised_pool import SupervisedPool
+from folder_watcher import FolderWatcher
+from image_discovery import find_images, walk_images
+from archive_input import is_archive, iter_archive_images
+from document_pages import assemble_documents, expand_pages, image_name, pdf_supported, stat_image
+from frame_cache import FrameCache, DEFAULT_CACHE_BYTES
+from prefetch import Prefetcher, DEFAULT_READAHEAD, DEFAULT_IO_THREADS
+from image_dedup import DuplicateDetector, HASH_METHODS
+from shard_output import ShardWriter, DEFAULT_SHARD_BYTES
+from results_store import ResultsStore
+from result_records import compact_result, export_default, export_result
+from image_writer import AsyncImageWriter, ENCODER_PRESETS, encode_with_preset, preset_extension, write_with_preset
+from scheduling import order_by_policy, summarize_completion_times, SCHEDULING_POLICIES, COST_ESTIMATES
 import logging
 
 class BatchProcessor:
-    def __init__(self, max_workers=4, use_multiprocessing=False):
+    def __init__(self, max_workers=4, use_multiprocessing=False, adaptive_workers=False,
+                 min_workers=1, scaling_interval=5.0, scheduling_policy='path',
+                 cost_estimate='file_size', image_timeout=None, memory_limit_mb=None,
+                 max_retries=1, quarantine_file=None, output_format='files',
+                 shard_max_bytes=DEFAULT_SHARD_BYTES, enhanced_format=None, writer_threads=2,
+                 split_pages=True, frame_cache_dir=None, frame_cache_bytes=DEFAULT_CACHE_BYTES,
+                 readahead=DEFAULT_READAHEAD, io_threads=DEFAULT_IO_THREADS,
+                 dedup_distance=None, dedup_hash='dhash', results_db=None,
+                 compact_results=True):
         """
         تهيئة معالج الصور المجمعة
         
         Args:
-            max_workers: عدد العمال المتوازيين
+            max_workers: عدد العمال المتوازيين (الحد الأقصى عند التحجيم التكيفي)
             use_multiprocessing: استخدام multiprocessing بدلاً من threading
+            adaptive_workers: تعديل عدد العمال الفعّال أثناء التشغيل حسب الموارد
+            min_workers: الحد الأدنى للعمال عند التحجيم التكيفي
+            scaling_interval: الفترة بين قرارات التحجيم (ثانية)
+            scheduling_policy: ترتيب إرسال الصور ("path", "largest_first", "shortest_first")
+            cost_estimate: تقدير تكلفة الصورة للجدولة ("file_size" أو "pixels")
+            image_timeout: المهلة القصوى لكل صورة (ثانية)؛ تفعّل العمال المُراقَبين
+            memory_limit_mb: الحد الأقصى لذاكرة كل عامل (MB)؛ يفعّل العمال المُراقَبين
+            max_retries: عدد إعادة محاولة الصورة بعد تجاوز المهلة أو الذاكرة
+            quarantine_file: ملف JSONL للصور المعزولة (تُتخطى في التشغيلات اللاحقة)
+            output_format: "files" (ملف لكل صورة) أو "shards" (أجزاء TAR مع فهرس)
+            shard_max_bytes: الحد الأقصى لحجم الجزء عند output_format="shards"
+            enhanced_format: إعداد ترميز الصور المحسنة (ENCODER_PRESETS: "png-fast" أو "png"
+                             أو "png-small" أو "webp" أو "tiff" (CCITT G4))؛ الصور الثنائية
+                             تُكتب بعمق 1 بت. None يحافظ على امتداد الصورة الأصلية (PNG في الأجزاء)
+            writer_threads: خيوط كتابة الصور في الخلفية (0 للكتابة داخل العامل)؛
+                            مع العمليات أو العمال المُراقَبين تبقى الكتابة داخل العامل
+            split_pages: معالجة كل صفحة من TIFF/PDF متعدد الصفحات كمهمة مستقلة
+                         (doc.tif#page=N) وتجميع النتائج لكل مستند في document_results
+            frame_cache_dir: مجلد تخزين الإطارات الرمادية المفكوكة (.npy مربوط بالذاكرة)
+                             لتخطي فك الترميز عند إعادة المعالجة؛ يمكن مشاركته بين العمليات
+            frame_cache_bytes: الحد الأقصى لحجم تخزين الإطارات
+            readahead: عدد الصور التالية التي تُقرأ بايتاتها مسبقاً في خيوط الإدخال/الإخراج
+                       أثناء المعالجة (0 للتعطيل)؛ مع الخيوط فقط ودون تخزين الإطارات
+            io_threads: عدد خيوط القراءة المسبقة
+            dedup_distance: أقصى مسافة هامنغ بين بصمتين إدراكيتين لاعتبار الصورة نسخة
+                            من صورة سابقة في الدفعة فتُعاد نتائجها دون معالجة (None للتعطيل)؛
+                            مع الخيوط فقط لأن سجل البصمات مشترك في العملية
+            dedup_hash: نوع البصمة ("dhash" أو "phash")
+            results_db: قاعدة SQLite تُكتب فيها النتائج أثناء المعالجة (صف لكل صورة وكلمة
+                        مع فهرس FTS5) للبحث بـ results_store.py search
+            compact_results: حفظ النتائج في self.results كسجلات ImageResult (كلمات OCR
+                             كمصفوفات NumPy) بدلاً من قواميس؛ تُحوّل للشكل الأصلي عند الحفظ فقط
         """
         self.max_workers = max_workers
         self.use_multiprocessing = use_multiprocessing
-        self.enhancer = ImageEnhancer()
+        self.adaptive_workers = adaptive_workers
+        self.min_workers = min_workers
+        self.scaling_interval = scaling_interval
+        self.scaling_history = []
+        self.scheduling_policy = scheduling_policy
+        self.cost_estimate = cost_estimate
+        self.run_metrics = {}
+        self.image_timeout = image_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_retries = max_retries
+        self.quarantine_file = quarantine_file
+        self.output_format = output_format
+        self.shard_max_bytes = shard_max_bytes
+        self.enhanced_format = enhanced_format
+        self.writer_threads = writer_threads
+        self.split_pages = split_pages
+        self.readahead = readahead
+        self.io_threads = io_threads
+        self.prefetcher = None
+        self.dedup_distance = dedup_distance
+        self.dedup_hash = dedup_hash
+        self.deduplicator = None
+        self.results_db = results_db
+        self.results_store = None
+        self.compact_results = compact_results
+        self.document_results = []
+        self.image_writer = None
+        self.shard_writer = None
+        self.enhancer = ImageEnhancer(
+            frame_cache=FrameCache(frame_cache_dir, frame_cache_bytes) if frame_cache_dir else None)
         self.results = []
         self.progress_callback = None
         self.total_images = 0
@@ -47,33 +130,59 @@ class BatchProcessor:
         )
         self.logger = logging.getLogger(__name__)
     
+    def __getstate__(self):
+        # كاتب الأجزاء (خيط وطابور) يبقى في العملية الرئيسية
+        state = self.__dict__.copy()
+        state['shard_writer'] = None
+        state['image_writer'] = None
+        state['prefetcher'] = None
+        state['deduplicator'] = None
+        state['results_store'] = None
+        return state
+    
     def set_progress_callback(self, callback):
         """تعيين دالة callback لتتبع التقدم"""
         self.progress_callback = callback
     
     def get_supported_formats(self):
-        """الحصول على صيغ الصور المدعومة"""
-        return ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']
+        """الحصول على صيغ الصور المدعومة (PDF فقط إذا توفرت مكتبة التحويل)"""
+        formats = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']
+        if self.split_pages and pdf_supported():
+            formats.append('.pdf')
+        return formats
     
     def find_images_in_directory(self, directory, recursive=True):
-        """البحث عن الصور في مجلد"""
+        """البحث عن الصور في مجلد أو أرشيف ZIP/TAR (مسارات archive!member)"""
         directory = Path(directory)
         if not directory.exists():
             raise ValueError(f"المجلد غير موجود: {directory}")
         
-        supported_formats = self.get_supported_formats()
-        images = []
-        
-        if recursive:
-            pattern = "**/*"
+        if is_archive(directory) and directory.is_file():
+            images = sorted(Path(image.path) for image in
+                            iter_archive_images(directory, self.get_supported_formats()))
         else:
-            pattern = "*"
+            images = find_images(directory, recursive, self.get_supported_formats())
+        return list(expand_pages(images)) if self.split_pages else images
+    
+    def iter_images_in_directory(self, directory, recursive=True):
+        """
+        البحث عن الصور في مجلد كمولّد يبث المسارات أثناء المسح
         
-        for file_path in directory.glob(pattern):
-            if file_path.is_file() and file_path.suffix.lower() in supported_formats:
-                images.append(file_path)
+        الصور مرتبة داخل كل مجلد، ولا يُنتظر انتهاء المسح الكامل قبل إرجاع أول مسار.
+        الأرشيفات تُعدّد أعضاؤها بترتيبها داخل الأرشيف. المستندات متعددة الصفحات
+        تُوسع إلى صفحاتها (doc.tif#page=N) بالترتيب.
+        """
+        directory = Path(directory)
+        if not directory.exists():
+            raise ValueError(f"المجلد غير موجود: {directory}")
         
-        return sorted(images)
+        if is_archive(directory) and directory.is_file():
+            images = (Path(image.path) for image in
+                      iter_archive_images(directory, self.get_supported_formats()))
+        else:
+            images = (Path(image.path) for image in
+                      walk_images(directory, recursive, self.get_supported_formats(), with_stat=False))
+        return expand_pages(images) if self.split_pages else images
     
     def process_single_image(self, image_path, output_dir=None, save_enhanced=True):
         """
@@ -91,8 +200,10 @@ class BatchProcessor:
             image_path = Path(image_path)
             start_time = time.time()
             
-            # تحميل الصورة
-            image = self.enhancer.load_image(str(image_path))
+            # تحميل الإطار الرمادي (من التخزين المؤقت للإطارات إن وُجد، أو من البايتات
+            # المقروءة مسبقاً فلا ينتظر العامل القرص)
+            data = self.prefetcher.take(image_path) if self.prefetcher is not None else None
+            image = self.enhancer.load_frame(str(image_path), data)
             if image is None:
                 return {
                     'image_path': str(image_path),
@@ -101,6 +212,24 @@ class BatchProcessor:
                     'processing_time': 0
                 }
             
+            if self.deduplicator is not None:
+                # بصمة من الإطار المحمل يؤكدها إطار متوسط الحجم؛ النسخة تأخذ نتائج
+                # الأصل بعد انتهاء الدفعة
+                match = self.deduplicator.match_image(image, str(image_path))
+                if match is not None:
+                    file_size, file_mtime_ns = stat_image(image_path)
+                    return {
+                        'image_path': str(image_path),
+                        'status': 'duplicate',
+                        'duplicate_of': match[0],
+                        'hash_distance': match[1],
+                        'processing_time': time.time() - start_time,
+                        'file_size': file_size,
+                        'file_mtime_ns': file_mtime_ns,
+                        'pipeline_fingerprint': self.enhancer.pipeline_fingerprint(),
+                        'timestamp': datetime.now().isoformat()
+                    }
+            
             # تحسين الصورة
             enhanced_image = self.enhancer.enhance_image_pipeline(image)
             
@@ -110,14 +239,25 @@ class BatchProcessor:
             
             # حفظ الصورة المحسنة
             enhanced_path = None
-            if save_enhanced and output_dir:
+            enhanced_data = None
+            if save_enhanced and output_dir and self.output_format == 'shards':
+                # الترميز في العامل (1 بت للصور الثنائية)؛ الكتابة في خيط الأجزاء عند تسجيل النتيجة
+                enhanced_data = encode_with_preset(enhanced_image, self.enhanced_format or 'png')
+            elif save_enhanced and output_dir:
                 output_dir = Path(output_dir)
                 output_dir.mkdir(parents=True, exist_ok=True)
-                enhanced_filename = f"enhanced_{image_path.name}"
+                enhanced_filename = f"enhanced_{image_name(image_path)}"
+                if self.enhanced_format:
+                    enhanced_filename = os.path.splitext(enhanced_filename)[0] + self._enhanced_extension()
                 enhanced_path = output_dir / enhanced_filename
-                cv2.imwrite(str(enhanced_path), enhanced_image)
+                if self.image_writer is not None:
+                    # الترميز والكتابة في الخلفية؛ العامل يعود فوراً للصورة التالية
+                    self.image_writer.submit(enhanced_path, enhanced_image)
+                else:
+                    write_with_preset(enhanced_path, enhanced_image, self.enhanced_format)
             
             processing_time = time.time() - start_time
+            file_size, file_mtime_ns = stat_image(image_path)
             
             result = {
                 'image_path': str(image_path),
@@ -127,8 +267,13 @@ class BatchProcessor:
                 'easyocr_results': easyocr_results,
                 'tesseract_results': tesseract_results,
                 'total_texts_found': len(easyocr_results) + len(tesseract_results),
+                'file_size': file_size,
+                'file_mtime_ns': file_mtime_ns,
+                'pipeline_fingerprint': self.enhancer.pipeline_fingerprint(),
                 'timestamp': datetime.now().isoformat()
             }
+            if enhanced_data is not None:
+                result['enhanced_data'] = enhanced_data
             
             self.logger.info(f"تمت معالجة الصورة: {image_path.name} في {processing_time:.2f} ثانية")
             return result
@@ -144,70 +289,283 @@ class BatchProcessor:
                 'timestamp': datetime.now().isoformat()
             }
     
+    def _enhanced_extension(self):
+        return preset_extension(self.enhanced_format or 'png')
+    
     def process_images_batch(self, image_paths, output_dir=None, save_enhanced=True):
         """
         معالجة مجموعة من الصور
         
         Args:
-            image_paths: قائمة مسارات الصور
+            image_paths: قائمة مسارات الصور أو مولّد (مثل iter_images_in_directory)؛
+                         المولّد يُستهلك أثناء المعالجة فتبدأ النتائج قبل انتهاء المسح
             output_dir: مجلد الحفظ
             save_enhanced: حفظ الصور المحسنة
         
         Returns:
             list: قائمة النتائج
         """
-        self.total_images = len(image_paths)
         self.processed_images = 0
         self.results = []
+        self.run_metrics = {}
+        batch_start = time.time()
         
-        self.logger.info(f"بدء معالجة {self.total_images} صورة")
+        if self.split_pages:
+            # الصفحات مهام مستقلة؛ المسارات الموسعة مسبقاً تمر كما هي
+            image_paths = list(expand_pages(image_paths)) if hasattr(image_paths, '__len__') \
+                else expand_pages(image_paths)
         
-        # اختيار نوع المعالجة المتوازية
-        if self.use_multiprocessing:
-            executor_class = ProcessPoolExecutor
+        if self.scheduling_policy != 'path' or hasattr(image_paths, '__len__'):
+            # ترتيب الإرسال حسب التكلفة المقدرة يتطلب القائمة كاملة
+            image_paths = order_by_policy(image_paths, self.scheduling_policy, self.cost_estimate)
+            self.total_images = len(image_paths)
+            self.run_metrics['discovery_time'] = time.time() - batch_start
+            self.logger.info(f"بدء معالجة {self.total_images} صورة")
         else:
-            executor_class = ThreadPoolExecutor
-        
-        with executor_class(max_workers=self.max_workers) as executor:
-            # إرسال المهام
-            future_to_path = {
-                executor.submit(
-                    self.process_single_image, 
-                    path, 
-                    output_dir, 
-                    save_enhanced
-                ): path for path in image_paths
-            }
+            # بث المسارات: العدد الكلي يزداد مع تقدم المسح
+            self.total_images = 0
+            image_paths = self._count_discovered(image_paths, batch_start)
+            self.logger.info("بدء معالجة الصور أثناء المسح")
+        
+        completion_times = []
+        
+        if self.output_format == 'shards' and save_enhanced and output_dir:
+            self.shard_writer = ShardWriter(output_dir, max_shard_bytes=self.shard_max_bytes)
+        elif (save_enhanced and output_dir and self.writer_threads > 0 and not self.use_multiprocessing
+              and not (self.image_timeout or self.memory_limit_mb)):
+            # الكتابة خلف العمال ممكنة فقط مع الخيوط (نفس العملية)
+            self.image_writer = AsyncImageWriter(self.writer_threads, queue_size=self.max_workers * 4,
+                                                 preset=self.enhanced_format)
+        if (self.readahead > 0 and not self.use_multiprocessing and self.enhancer.frame_cache is None
+                and not (self.image_timeout or self.memory_limit_mb)):
+            # القراءة المسبقة تسلم البايتات لعمال في العملية نفسها
+            self.prefetcher = image_paths = Prefetcher(image_paths, self.readahead, self.io_threads)
+        if (self.dedup_distance is not None and not self.use_multiprocessing
+                and not (self.image_timeout or self.memory_limit_mb)):
+            self.deduplicator = DuplicateDetector(self.dedup_distance, self.dedup_hash)
+        if self.results_db:
+            # النتائج تُسجل في العملية الرئيسية، فالمخزن يعمل مع كل أنواع العمال
+            self.results_store = ResultsStore(self.results_db)
+        try:
+            self._run_batch(image_paths, output_dir, save_enhanced, completion_times, batch_start)
+            if self.deduplicator:
+                # قبل إغلاق الكتّاب: النسخ التي فشل أصلها تُعالج وتُحفظ كالمعتاد
+                self._resolve_duplicates(output_dir, save_enhanced)
+        finally:
+            if self.prefetcher:
+                self.prefetcher.close()
+                self.run_metrics.update(self.prefetcher.stats())
+                self.prefetcher = None
+            if self.shard_writer:
+                self.shard_writer.close()
+                self.run_metrics['shards_written'] = self.shard_writer.shards_written
+                self.shard_writer = None
+            if self.image_writer:
+                self.image_writer.close()
+                self.run_metrics.update(self.image_writer.stats())
+                self._mark_write_failures(self.image_writer.failed)
+                self.image_writer = None
+            self.deduplicator = None
+            if self.results_store:
+                self.results_store.close()
+                self.run_metrics.update(self.results_store.stats())
+                self.results_store = None
+        
+        self.run_metrics.update(summarize_completion_times(completion_times))
+        self.run_metrics['scheduling_policy'] = self.scheduling_policy
+        if self.enhancer.frame_cache is not None:
+            # الإصابات في هذه العملية فقط (العمال في عمليات منفصلة يحسبون لأنفسهم)
+            self.run_metrics.update(self.enhancer.frame_cache.stats())
+        self.document_results = assemble_documents(self.results)
+        self.logger.info(f"تمت معالجة {self.processed_images} من {self.total_images} صورة")
+        return self.results
+    
+    def _run_batch(self, image_paths, output_dir, save_enhanced, completion_times, batch_start):
+        """تشغيل المعالجة بالعمال المناسبين"""
+        if self.image_timeout or self.memory_limit_mb:
+            # العمال المُراقَبون: عمليات منفصلة يمكن قتلها عند تجاوز المهلة أو الذاكرة
+            self._run_supervised(image_paths, output_dir, save_enhanced, completion_times, batch_start)
+        else:
+            # اختيار نوع المعالجة المتوازية
+            if self.use_multiprocessing:
+                executor_class = ProcessPoolExecutor
+            else:
+                executor_class = ThreadPoolExecutor
+            
+            controller = None
+            if self.adaptive_workers:
+                controller = AdaptiveWorkerController(
+                    self.min_workers, self.max_workers,
+                    scaling_interval=self.scaling_interval
+                )
+                controller.start()
+            
+            try:
+                with executor_class(max_workers=self.max_workers) as executor:
+                    self._run_windowed(executor, image_paths, output_dir, save_enhanced,
+                                       controller, completion_times, batch_start)
+            finally:
+                if controller:
+                    controller.stop()
+                    self.scaling_history = controller.history
+    
+    def _resolve_duplicates(self, output_dir, save_enhanced):
+        """
+        نسخ نتائج الأصل إلى الصور شبه المتطابقة (الصورة المحسنة المحفوظة هي صورة الأصل)
+        
+        إذا فشلت معالجة الأصل تُعالج النسخة كالمعتاد.
+        """
+        self.run_metrics['hashed_originals'] = self.deduplicator.originals
+        self.run_metrics['dedup_rejected'] = self.deduplicator.rejected
+        self.deduplicator = None
+        originals = {result['image_path']: result for result in self.results
+                     if result['status'] == 'success' and 'duplicate_of' not in result}
+        duplicates = time_saved = 0
+        for index, result in enumerate(self.results):
+            if result['status'] != 'duplicate':
+                continue
+            original = originals.get(result['duplicate_of'])
+            if original is None:
+                retried = self.process_single_image(result['image_path'], output_dir, save_enhanced)
+                self.write_shard(retried)
+                retried = self._compact(retried)
+                self._store_result(retried)
+                self.results[index] = retried
+                continue
+            for key in ('easyocr_results', 'tesseract_results', 'total_texts_found', 'enhanced_path'):
+                result[key] = original.get(key)
+            result['status'] = 'success'
+            self._store_result(result)
+            duplicates += 1
+            time_saved += max(original['processing_time'] - result['processing_time'], 0)
+        self.run_metrics['duplicates'] = duplicates
+        self.run_metrics['dedup_ratio'] = duplicates / len(self.results) if self.results else 0
+        self.run_metrics['dedup_time_saved'] = time_saved
+    
+    def _mark_write_failures(self, failed):
+        """إزالة مسار الصورة المحسنة من النتائج التي فشلت كتابتها في الخلفية"""
+        if not failed:
+            return
+        for result in self.results:
+            error = failed.get(result.get('enhanced_path'))
+            if error is not None:
+                result['enhanced_path'] = None
+                result['enhanced_error'] = error
+                self._store_result(result)
+    
+    def _count_discovered(self, image_paths, batch_start):
+        """تمرير المسارات مع تحديث العدد الكلي وتسجيل زمن انتهاء المسح"""
+        for image_path in image_paths:
+            self.total_images += 1
+            yield image_path
+        self.run_metrics['discovery_time'] = time.time() - batch_start
+        self.logger.info(f"انتهى المسح: {self.total_images} صورة")
+    
+    def _run_supervised(self, image_paths, output_dir, save_enhanced, completion_times, batch_start):
+        """المعالجة في عمال مُراقَبين مع مهلة لكل صورة وحد للذاكرة وعزل الصور المعطوبة"""
+        pool = SupervisedPool(
+            _SupervisedImageTask(self, output_dir, save_enhanced),
+            workers=self.max_workers,
+            timeout=self.image_timeout,
+            memory_limit_mb=self.memory_limit_mb,
+            max_retries=self.max_retries,
+            quarantine_file=self.quarantine_file
+        )
+        for _, result in pool.run(image_paths):
+            self._record_result(result, None, completion_times, batch_start)
+        self.run_metrics['workers_recycled'] = pool.workers_recycled
+    
+    def _run_windowed(self, executor, image_paths, output_dir, save_enhanced, controller=None,
+                      completion_times=None, batch_start=None):
+        """
+        إرسال المهام على دفعات بحيث لا يتجاوز عدد المهام الجارية عدد العمال الفعّال
+        
+        عند التحجيم التكيفي يحدد المتحكم عدد العمال الفعّال، ويبقى المنفذ
+        مهيأً بالحد الأقصى.
+        """
+        paths_iter = iter(image_paths)
+        future_to_path = {}
+        exhausted = False
+        
+        while True:
+            # تعبئة النافذة حتى عدد العمال الفعّال
+            limit = controller.current_workers if controller else self.max_workers
+            while not exhausted and len(future_to_path) < limit:
+                try:
+                    path = next(paths_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                future = executor.submit(self.process_single_image, path, output_dir, save_enhanced)
+                future_to_path[future] = path
+            
+            if not future_to_path:
+                break
+            
+            # انتظار اكتمال مهمة واحدة على الأقل (أو انتهاء فترة التحجيم)
+            timeout = self.scaling_interval if controller else None
+            done, _ = wait(future_to_path, timeout=timeout, return_when=FIRST_COMPLETED)
             
             # جمع النتائج
-            for future in as_completed(future_to_path):
-                path = future_to_path[future]
+            for future in done:
+                path = future_to_path.pop(future)
                 try:
                     result = future.result()
-                    self.results.append(result)
-                    self.processed_images += 1
-                    
-                    # تحديث التقدم
-                    if self.progress_callback:
-                        progress = (self.processed_images / self.total_images) * 100
-                        self.progress_callback(progress, self.processed_images, self.total_images)
-                    
                 except Exception as e:
-                    error_result = {
+                    result = {
                         'image_path': str(path),
                         'status': 'failed',
                         'error': str(e),
                         'processing_time': 0,
                         'timestamp': datetime.now().isoformat()
                     }
-                    self.results.append(error_result)
-                    self.processed_images += 1
                     self.logger.error(f"خطأ في معالجة {path}: {e}")
+                
+                self._record_result(result, controller, completion_times, batch_start)
+    
+    def _record_result(self, result, controller=None, completion_times=None, batch_start=None):
+        """تسجيل نتيجة صورة مكتملة وتحديث التقدم"""
+        self.write_shard(result)
+        result = self._compact(result)
+        if result['status'] != 'duplicate':
+            # النسخ تُسجل بعد نسخ نتائج أصلها
+            self._store_result(result)
+        self.results.append(result)
+        self.processed_images += 1
+        if completion_times is not None:
+            completion_times.append(time.time() - batch_start)
+        if controller:
+            controller.record_completion(result.get('processing_time', 0))
         
-        self.logger.info(f"تمت معالجة {self.processed_images} من {self.total_images} صورة")
-        return self.results
+        # تحديث التقدم
+        if self.progress_callback:
+            progress = (self.processed_images / self.total_images) * 100
+            self.progress_callback(progress, self.processed_images, self.total_images)
+    
+    def write_shard(self, result):
+        """
+        إرسال الصورة المحسنة المرمزة في العامل إلى كاتب الأجزاء
+        
+        تستدعيها الدفعات ومراقب المجلد لكل نتيجة قبل تسجيلها؛ لا تفعل شيئاً
+        إن لم يكن output_format="shards"
+        """
+        enhanced_data = result.pop('enhanced_data', None)
+        if enhanced_data is not None and self.shard_writer:
+            metadata = {key: value for key, value in result.items() if key != 'enhanced_path'}
+            result['enhanced_path'] = self.shard_writer.write(result['image_path'], enhanced_data,
+                                                              self._enhanced_extension(), metadata)
     
-    def process_directory(self, input_dir, output_dir=None, recursive=True, save_enhanced=True):
+    def _compact(self, result):
+        """تحويل النتيجة إلى سجل مضغوط عند تفعيل compact_results"""
+        return compact_result(result) if self.compact_results else result
+    
+    def _store_result(self, result):
+        """إرسال النتيجة لمخزن SQLite (يستبدل سجل الصورة إن وُجد)"""
+        if self.results_store:
+            self.results_store.add(result)
+    
+    def process_directory(self, input_dir, output_dir=None, recursive=True, save_enhanced=True,
+                          previous_results=None):
         """
         معالجة جميع الصور في مجلد
         
@@ -216,21 +574,117 @@ class BatchProcessor:
             output_dir: مجلد الحفظ
             recursive: البحث في المجلدات الفرعية
             save_enhanced: حفظ الصور المحسنة
+            previous_results: ملف نتائج سابق (JSON أو JSONL) لإعادة استخدام نتائج
+                              الصور التي لم تتغير (معالجة تزايدية)
         
         Returns:
             list: قائمة النتائج
         """
-        # البحث عن الصور
-        image_paths = self.find_images_in_directory(input_dir, recursive)
+        # البحث عن الصور كمولّد: المعالجة تبدأ قبل انتهاء المسح
+        image_paths = self.iter_images_in_directory(input_dir, recursive)
+        
+        carried_over = []
+        if previous_results:
+            image_paths = self._iter_changed_images(
+                image_paths, self.load_previous_results(previous_results), carried_over
+            )
         
-        if not image_paths:
+        # معالجة الصور
+        results = self.process_images_batch(image_paths, output_dir, save_enhanced)
+        
+        if previous_results:
+            self.logger.info(
+                f"معالجة تزايدية: {len(carried_over)} صورة لم تتغير، {len(results)} صورة للمعالجة"
+            )
+        if not results and not carried_over:
             self.logger.warning(f"لم يتم العثور على صور في {input_dir}")
             return []
         
-        self.logger.info(f"تم العثور على {len(image_paths)} صورة")
+        self.results = carried_over + results
+        if carried_over:
+            self.document_results = assemble_documents(self.results)
+        return self.results
+    
+    def load_previous_results(self, results_file):
+        """
+        تحميل النتائج الناجحة من ملف نتائج سابق
         
-        # معالجة الصور
-        return self.process_images_batch(image_paths, output_dir, save_enhanced)
+        Args:
+            results_file: ملف JSON (قائمة) أو JSONL (سجل في كل سطر)
+        
+        Returns:
+            dict: السجلات الناجحة حسب مسار الصورة
+        """
+        results_file = Path(results_file)
+        if not results_file.exists():
+            self.logger.warning(f"ملف النتائج السابق غير موجود: {results_file}")
+            return {}
+        
+        with open(results_file, 'r', encoding='utf-8') as f:
+            if results_file.suffix.lower() == '.jsonl':
+                records = (json.loads(line) for line in f if line.strip())
+                return {r['image_path']: r for r in records if r.get('status') == 'success'}
+            records = json.load(f)
+        return {r['image_path']: r for r in records if r.get('status') == 'success'}
+    
+    def split_unchanged_images(self, image_paths, previous):
+        """
+        فصل الصور التي تطابق سجلاً سابقاً ناجحاً (المسار والحجم وتاريخ التعديل وبصمة
+        خط الأنابيب) عن الصور الجديدة أو المعدلة أو التي فشلت سابقاً
+        
+        Returns:
+            tuple: (الصور المطلوب معالجتها، السجلات المعاد استخدامها)
+        """
+        carried_over = []
+        to_process = list(self._iter_changed_images(image_paths, previous, carried_over))
+        return to_process, carried_over
+    
+    def _iter_changed_images(self, image_paths, previous, carried_over):
+        """تمرير الصور الجديدة أو المعدلة فقط وإضافة السجلات المعاد استخدامها إلى carried_over"""
+        fingerprint = self.enhancer.pipeline_fingerprint()
+        
+        for image_path in image_paths:
+            record = previous.get(str(image_path))
+            if record is not None and record.get('pipeline_fingerprint') == fingerprint:
+                try:
+                    file_size, file_mtime_ns = stat_image(image_path)
+                except OSError:
+                    # الصورة المحذوفة أو غير المقروءة تمر للمعالجة فتُسجل كفشل ولا تختفي من النتائج
+                    yield image_path
+                    continue
+                if (record.get('file_size') == file_size
+                        and record.get('file_mtime_ns') == file_mtime_ns):
+                    carried_over.append(self._compact(record))
+                    continue
+            yield image_path
+    
+    def watch_directory(self, input_dir, output_dir=None, recursive=True, save_enhanced=True,
+                        settle_seconds=2.0, poll_interval=2.0):
+        """
+        مراقبة مجلد ومعالجة الصور الجديدة أو المعدلة فقط حتى الإيقاف (Ctrl+C)
+        
+        Args:
+            input_dir: المجلد المراقب
+            output_dir: مجلد الحفظ
+            recursive: مراقبة المجلدات الفرعية
+            save_enhanced: حفظ الصور المحسنة
+            settle_seconds: مدة استقرار الملف قبل معالجته (ثانية)
+            poll_interval: فترة الفحص عند عدم توفر inotify (ثانية)
+        """
+        watcher = FolderWatcher(self, input_dir, output_dir, recursive, save_enhanced,
+                                settle_seconds, poll_interval)
+        if self.output_format == 'shards' and save_enhanced and output_dir:
+            # المراقب يسلم كل نتيجة لـ write_shard فتُلحق الصورة بالأجزاء كما في الدفعات
+            self.shard_writer = ShardWriter(output_dir, max_shard_bytes=self.shard_max_bytes)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            watcher.stop()
+            self.logger.info("تم إيقاف المراقبة")
+        finally:
+            if self.shard_writer:
+                self.shard_writer.close()
+                self.shard_writer = None
     
     def save_results(self, results, output_file, format='json'):
         """
@@ -239,21 +693,26 @@ class BatchProcessor:
         Args:
             results: قائمة النتائج
             output_file: مسار ملف الحفظ
-            format: تنسيق الحفظ ('json', 'csv', 'txt')
+            format: تنسيق الحفظ ('json', 'jsonl', 'csv', 'txt')
         """
         output_path = Path(output_file)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         if format.lower() == 'json':
             with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(results, f, ensure_ascii=False, indent=2)
+                json.dump(results, f, ensure_ascii=False, indent=2, default=export_default)
+        
+        elif format.lower() == 'jsonl':
+            with open(output_path, 'w', encoding='utf-8') as f:
+                for result in results:
+                    f.write(json.dumps(result, ensure_ascii=False, default=export_default) + '\n')
         
         elif format.lower() == 'csv':
             with open(output_path, 'w', newline='', encoding='utf-8') as f:
                 if results:
-                    writer = csv.DictWriter(f, fieldnames=results[0].keys())
+                    writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
                     writer.writeheader()
-                    writer.writerows(results)
+                    writer.writerows(export_result(result) for result in results)
         
         elif format.lower() == 'txt':
             with open(output_path, 'w', encoding='utf-8') as f:
@@ -297,11 +756,13 @@ class BatchProcessor:
         avg_processing_time = total_processing_time / total_images if total_images > 0 else 0
         
         total_texts = sum(r.get('total_texts_found', 0) for r in results if r['status'] == 'success')
+        quarantined = sum(1 for r in results if r['status'] in ('timeout', 'oom', 'crashed'))
         
         return {
             'total_images': total_images,
             'successful': successful,
             'failed': failed,
+            'quarantined': quarantined,
             'success_rate': (successful / total_images) * 100 if total_images > 0 else 0,
             'total_processing_time': total_processing_time,
             'average_processing_time': avg_processing_time,
@@ -319,13 +780,61 @@ class BatchProcessor:
         print(f"Total images: {stats['total_images']}")
         print(f"Successful: {stats['successful']}")
         print(f"Failed: {stats['failed']}")
+        if stats['quarantined']:
+            print(f"Quarantined (timeout/oom): {stats['quarantined']}")
         print(f"Success rate: {stats['success_rate']:.1f}%")
         print(f"Total processing time: {stats['total_processing_time']:.2f} seconds")
         print(f"Average processing time: {stats['average_processing_time']:.2f} seconds")
         print(f"Total texts found: {stats['total_texts_found']}")
         print(f"Average texts per image: {stats['average_texts_per_image']:.1f}")
+        if self.run_metrics.get('makespan') is not None:
+            print(f"Scheduling policy: {self.run_metrics['scheduling_policy']}")
+            print(f"Makespan: {self.run_metrics['makespan']:.2f} seconds")
+            print(f"Time to first result: {self.run_metrics['time_to_first_result']:.2f} seconds")
+            if self.run_metrics.get('discovery_time') is not None:
+                print(f"Discovery time: {self.run_metrics['discovery_time']:.2f} seconds")
+            if self.run_metrics.get('images_written'):
+                print(f"Writer: encode {self.run_metrics['encode_time']:.2f} s, "
+                      f"write {self.run_metrics['write_time']:.2f} s, "
+                      f"max backlog {self.run_metrics['writer_max_backlog']}, "
+                      f"failures {self.run_metrics['write_failures']}")
+            if self.run_metrics.get('duplicates') is not None:
+                print(f"Near-duplicates: {self.run_metrics['duplicates']} "
+                      f"({self.run_metrics['dedup_ratio']:.1%}), "
+                      f"time saved {self.run_metrics['dedup_time_saved']:.2f} seconds, "
+                      f"rejected hash matches {self.run_metrics['dedup_rejected']}")
+            if self.run_metrics.get('results_db_images'):
+                print(f"Results DB: {self.run_metrics['results_db_images']} images, "
+                      f"{self.run_metrics['results_db_words']} words "
+                      f"({self.run_metrics['results_db_write_time']:.2f} s)")
+            if self.run_metrics.get('prefetch_bytes'):
+                print(f"Readahead: {self.run_metrics['prefetch_bytes'] / (1024 * 1024):.1f} MB read in "
+                      f"{self.run_metrics['prefetch_read_time']:.2f} s, workers waited "
+                      f"{self.run_metrics['prefetch_wait_time']:.2f} s")
+            if self.run_metrics.get('frame_cache_hits') is not None:
+                print(f"Frame cache: {self.run_metrics['frame_cache_hits']} hits, "
+                      f"{self.run_metrics['frame_cache_misses']} misses, "
+                      f"{self.run_metrics['frame_cache_bytes'] / (1024 * 1024):.1f} MB")
+            if self.document_results:
+                print(f"Multi-page documents: {len(self.document_results)} "
+                      f"({sum(d['pages'] for d in self.document_results)} pages)")
+            if self.run_metrics.get('shards_written'):
+                print(f"Output shards written: {self.run_metrics['shards_written']}")
+            print(f"p50 / p99 result latency: {self.run_metrics['p50_latency']:.2f} / "
+                  f"{self.run_metrics['p99_latency']:.2f} seconds")
         print("=" * 60)
 
+class _SupervisedImageTask:
+    """مهمة معالجة صورة قابلة للنقل إلى العمال المُراقَبين"""
+    
+    def __init__(self, processor, output_dir, save_enhanced):
+        self.processor = processor
+        self.output_dir = output_dir
+        self.save_enhanced = save_enhanced
+    
+    def __call__(self, image_path):
+        return self.processor.process_single_image(image_path, self.output_dir, self.save_enhanced)
+
 def progress_callback(progress, processed, total):
     """دالة callback لتتبع التقدم"""
     print(f"\rProgress: {progress:.1f}% ({processed}/{total})", end='', flush=True)
@@ -341,9 +850,56 @@ def main():
                        help='عدد العمال المتوازيين')
     parser.add_argument('--multiprocessing', action='store_true',
                        help='استخدام multiprocessing بدلاً من threading')
+    parser.add_argument('--adaptive', action='store_true',
+                       help='تعديل عدد العمال تلقائياً أثناء التشغيل (حتى --workers)')
+    parser.add_argument('--min-workers', type=int, default=1,
+                       help='الحد الأدنى للعمال عند التحجيم التكيفي')
+    parser.add_argument('--schedule', choices=SCHEDULING_POLICIES, default='path',
+                       help='ترتيب إرسال الصور حسب التكلفة المقدرة')
+    parser.add_argument('--cost', choices=COST_ESTIMATES, default='file_size',
+                       help='طريقة تقدير تكلفة الصورة للجدولة')
+    parser.add_argument('--timeout', type=float,
+                       help='المهلة القصوى لكل صورة (ثانية) مع إعادة تشغيل العامل عند تجاوزها')
+    parser.add_argument('--memory-limit', type=float,
+                       help='الحد الأقصى لذاكرة كل عامل (MB)')
+    parser.add_argument('--max-retries', type=int, default=1,
+                       help='عدد إعادة المحاولات قبل عزل الصورة')
+    parser.add_argument('--quarantine', help='ملف JSONL للصور المعزولة')
+    parser.add_argument('--watch', action='store_true',
+                       help='مراقبة المجلد ومعالجة الصور الجديدة باستمرار')
+    parser.add_argument('--settle', type=float, default=2.0,
+                       help='مدة استقرار الملف قبل معالجته في وضع المراقبة (ثانية)')
     parser.add_argument('--no-save', action='store_true',
                        help='عدم حفظ الصور المحسنة')
-    parser.add_argument('--format', choices=['json', 'csv', 'txt'], 
+    parser.add_argument('--incremental', metavar='PREVIOUS_RESULTS',
+                       help='ملف نتائج سابق (JSON/JSONL)؛ تُعاد نتائج الصور التي لم تتغير دون معالجتها')
+    parser.add_argument('--output-format', choices=['files', 'shards'], default='files',
+                       help='حفظ الصور المحسنة كملفات منفصلة أو في أجزاء TAR مع فهرس')
+    parser.add_argument('--shard-size', type=float, default=DEFAULT_SHARD_BYTES / (1024 * 1024),
+                       help='الحد الأقصى لحجم الجزء (MB)')
+    parser.add_argument('--enhanced-format', choices=list(ENCODER_PRESETS),
+                       help='إعداد ترميز الصور المحسنة (PNG بمستويات ضغط، WebP دون فقد، TIFF بضغط G4)')
+    parser.add_argument('--writer-threads', type=int, default=2,
+                       help='خيوط كتابة الصور في الخلفية (0 للكتابة داخل العامل)')
+    parser.add_argument('--frame-cache', metavar='DIR',
+                       help='تخزين الإطارات الرمادية المفكوكة لتخطي فك الترميز في التشغيلات اللاحقة')
+    parser.add_argument('--frame-cache-size', type=float, default=DEFAULT_CACHE_BYTES / (1024 * 1024),
+                       help='الحد الأقصى لحجم تخزين الإطارات (MB)')
+    parser.add_argument('--readahead', type=int, default=DEFAULT_READAHEAD,
+                       help='عدد الصور التي تُقرأ مسبقاً أثناء المعالجة (0 للتعطيل)')
+    parser.add_argument('--io-threads', type=int, default=DEFAULT_IO_THREADS,
+                       help='عدد خيوط القراءة المسبقة')
+    parser.add_argument('--dedup-distance', type=int,
+                       help='إعادة نتائج الصور شبه المتطابقة (أقصى مسافة هامنغ، مثلاً 4) دون معالجتها')
+    parser.add_argument('--dedup-hash', choices=list(HASH_METHODS), default='dhash',
+                       help='نوع البصمة الإدراكية لاكتشاف النسخ')
+    parser.add_argument('--results-db', metavar='DB',
+                       help='كتابة النتائج والكلمات في قاعدة SQLite مع فهرس نصي (results_store.py search)')
+    parser.add_argument('--no-compact-results', action='store_true',
+                       help='حفظ النتائج في الذاكرة كقواميس بدلاً من السجلات المضغوطة')
+    parser.add_argument('--no-split-pages', action='store_true',
+                       help='معالجة الصفحة الأولى فقط من TIFF متعدد الصفحات بدلاً من كل صفحة')
+    parser.add_argument('--format', choices=['json', 'jsonl', 'csv', 'txt'], 
                        default='json', help='تنسيق ملف النتائج')
     
     args = parser.parse_args()
@@ -351,7 +907,28 @@ def main():
     # إنشاء معالج الصور المجمعة
     processor = BatchProcessor(
         max_workers=args.workers,
-        use_multiprocessing=args.multiprocessing
+        use_multiprocessing=args.multiprocessing,
+        adaptive_workers=args.adaptive,
+        min_workers=args.min_workers,
+        scheduling_policy=args.schedule,
+        cost_estimate=args.cost,
+        image_timeout=args.timeout,
+        memory_limit_mb=args.memory_limit,
+        max_retries=args.max_retries,
+        quarantine_file=args.quarantine,
+        output_format=args.output_format,
+        shard_max_bytes=int(args.shard_size * 1024 * 1024),
+        enhanced_format=args.enhanced_format,
+        writer_threads=args.writer_threads,
+        split_pages=not args.no_split_pages,
+        frame_cache_dir=args.frame_cache,
+        frame_cache_bytes=int(args.frame_cache_size * 1024 * 1024),
+        readahead=args.readahead,
+        io_threads=args.io_threads,
+        dedup_distance=args.dedup_distance,
+        dedup_hash=args.dedup_hash,
+        results_db=args.results_db,
+        compact_results=not args.no_compact_results
     )
     
     # تعيين callback للتقدم
@@ -360,7 +937,30 @@ def main():
     # تحديد نوع المدخل
     input_path = Path(args.input)
     
-    if input_path.is_file():
+    if args.watch:
+        if not input_path.is_dir():
+            print(f"خطأ: وضع المراقبة يتطلب مجلداً: {input_path}")
+            return
+        print(f"مراقبة مجلد: {input_path}")
+        processor.watch_directory(input_path, args.output, args.recursive,
+                                  not args.no_save, args.settle)
+        return
+    
+    if is_archive(input_path) and input_path.is_file():
+        # معالجة أرشيف ZIP/TAR دون استخراجه
+        print(f"معالجة أرشيف: {input_path}")
+        results = processor.process_directory(
+            input_path,
+            args.output,
+            args.recursive,
+            not args.no_save,
+            previous_results=args.incremental
+        )
+    elif input_path.is_file() and processor.split_pages and input_path.suffix.lower() in ('.tif', '.tiff', '.pdf'):
+        # مستند قد يكون متعدد الصفحات: الصفحات تُعالج بالتوازي
+        print(f"معالجة مستند: {input_path}")
+        results = processor.process_images_batch([input_path], args.output, not args.no_save)
+    elif input_path.is_file():
         # معالجة صورة واحدة
         print(f"معالجة صورة واحدة: {input_path}")
         results = [processor.process_single_image(
@@ -375,7 +975,8 @@ def main():
             input_path,
             args.output,
             args.recursive,
-            not args.no_save
+            not args.no_save,
+            previous_results=args.incremental
         )
     else:
         print(f"خطأ: المسار غير صحيح: {input_path}")
@@ -390,6 +991,10 @@ def main():
         results_file = output_dir / f"results.{args.format}"
         processor.save_results(results, results_file, args.format)
         print(f"\nتم حفظ النتائج في: {results_file}")
+        if processor.document_results:
+            documents_file = output_dir / "documents.json"
+            processor.save_results(processor.document_results, documents_file, 'json')
+            print(f"تم حفظ نتائج المستندات في: {documents_file}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,693 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قياسات الأداء للمعالجة المجمعة
+Batch Processing Benchmarks
+"""
+
+import io
+import json
+import pickle
+import contextlib
+import os
+import shutil
+import cv2
+import numpy as np
+import time
+import tempfile
+import tracemalloc
+import argparse
+import tarfile
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from batch_processor import BatchProcessor
+from scheduling import SCHEDULING_POLICIES
+from shared_frames import SharedFrameRing, frame_from_descriptor, write_frame
+from image_discovery import walk_images, SUPPORTED_FORMATS
+from file_index import FileIndex
+from image_probe import probe_image, clear_probe_cache
+from PIL import Image
+from archive_input import iter_archive_images, read_archive_member, close_archive_readers
+from image_enhancer import ImageEnhancer
+from binary_image import BinaryImage, encode_enhanced_image
+from image_writer import ENCODER_PRESETS, encode_with_preset
+from frame_cache import FrameCache
+from prefetch import Prefetcher, read_image_bytes
+from image_dedup import BKTree, HASH_METHODS, hamming
+from results_store import ResultsStore
+from result_records import compact_result, export_default
+
+def create_mixed_dataset(directory, num_images=40, large_ratio=0.2, seed=0):
+    """
+    إنشاء مجموعة صور بأحجام مختلطة (صفحات صغيرة وعدد قليل من المسوحات الكبيرة)
+
+    Args:
+        directory: مجلد الحفظ
+        num_images: عدد الصور
+        large_ratio: نسبة الصور الكبيرة
+        seed: بذرة العشوائية
+
+    Returns:
+        Path: مسار المجلد
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    num_large = int(num_images * large_ratio)
+
+    for i in range(num_images):
+        if i < num_large:
+            height, width = 3000, 4000
+        else:
+            height, width = 400, 600
+
+        img = np.ones((height, width, 3), dtype=np.uint8) * 255
+        scale = width / 600
+        for line in range(max(1, height // 100)):
+            cv2.putText(img, f"Document {i:04d} line {line}", (int(20 * scale), 60 + line * 90),
+                        cv2.FONT_HERSHEY_SIMPLEX, scale * 0.8, (0, 0, 0), max(1, int(scale * 2)))
+        noise = rng.integers(0, 30, img.shape, dtype=np.uint8)
+        img = cv2.add(img, noise)
+
+        # الصور الكبيرة في نهاية الترتيب لمحاكاة أسوأ حالة
+        cv2.imwrite(str(directory / f"scan_{num_images - i:04d}.png"), img)
+
+    return directory
+
+def run_batch(image_paths, **processor_kwargs):
+    """تشغيل دفعة واحدة وإرجاع الزمن الكلي والنتائج"""
+    processor = BatchProcessor(**processor_kwargs)
+    start = time.perf_counter()
+    results = processor.process_images_batch(image_paths, save_enhanced=False)
+    elapsed = time.perf_counter() - start
+    return elapsed, results, processor
+
+def benchmark_scaling(args):
+    """مقارنة عدد العمال الثابت بالتحجيم التكيفي"""
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = create_mixed_dataset(tmp, args.images, args.large_ratio)
+        image_paths = sorted(dataset.glob("*.png"))
+
+        print(f"Mixed dataset: {len(image_paths)} images")
+        print(f"{'mode':<12}{'workers':>10}{'seconds':>12}{'images/s':>12}")
+
+        for mode in ('fixed', 'adaptive'):
+            elapsed, results, processor = run_batch(
+                image_paths,
+                max_workers=args.workers,
+                adaptive_workers=(mode == 'adaptive'),
+                min_workers=1,
+                scaling_interval=args.interval
+            )
+            if mode == 'adaptive' and processor.scaling_history:
+                counts = [h['workers'] for h in processor.scaling_history]
+                workers = f"{min(counts)}-{max(counts)}"
+            else:
+                workers = str(args.workers)
+            print(f"{mode:<12}{workers:>10}{elapsed:>12.2f}{len(results) / elapsed:>12.2f}")
+
+def benchmark_scheduling(args):
+    """مقارنة سياسات الجدولة: الزمن الكلي وزمن أول نتيجة و p99"""
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = create_mixed_dataset(tmp, args.images, args.large_ratio)
+        image_paths = sorted(dataset.glob("*.png"))
+
+        print(f"Mixed dataset: {len(image_paths)} images, {args.workers} workers")
+        print(f"{'policy':<16}{'makespan':>10}{'first':>10}{'p50':>10}{'p99':>10}")
+
+        for policy in SCHEDULING_POLICIES:
+            _, _, processor = run_batch(
+                image_paths,
+                max_workers=args.workers,
+                scheduling_policy=policy,
+                cost_estimate=args.cost
+            )
+            metrics = processor.run_metrics
+            print(f"{policy:<16}{metrics['makespan']:>10.2f}{metrics['time_to_first_result']:>10.2f}"
+                  f"{metrics['p50_latency']:>10.2f}{metrics['p99_latency']:>10.2f}")
+
+def _gray_pickled(image):
+    """عامل القياس: تحويل إلى grayscale مع النقل عبر pickle"""
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+def _gray_shared(descriptor):
+    """عامل القياس: تحويل إلى grayscale مع النقل عبر الذاكرة المشتركة"""
+    gray = cv2.cvtColor(frame_from_descriptor(descriptor), cv2.COLOR_BGR2GRAY)
+    return write_frame(descriptor, gray)
+
+def benchmark_shared_memory(args):
+    """مقارنة نقل الإطارات عبر pickle مقابل الذاكرة المشتركة"""
+    height, width = args.height, args.width
+    frames = [np.random.default_rng(i).integers(0, 255, (height, width, 3), dtype=np.uint8)
+              for i in range(args.workers * 2)]
+    frame_mb = frames[0].nbytes / (1024 * 1024)
+
+    print(f"{args.frames} frames of {width}x{height} ({frame_mb:.1f} MB), {args.workers} processes")
+    print(f"{'transport':<16}{'seconds':>10}{'frames/s':>10}{'MB/s':>10}")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(_gray_pickled, frames[:args.workers]))  # تسخين العمليات
+        start = time.perf_counter()
+        futures = [executor.submit(_gray_pickled, frames[i % len(frames)]) for i in range(args.frames)]
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+    print(f"{'pickle':<16}{elapsed:>10.2f}{args.frames / elapsed:>10.1f}"
+          f"{args.frames * frame_mb / elapsed:>10.0f}")
+
+    slot_bytes = frames[0].nbytes
+    with SharedFrameRing(args.workers * 2, slot_bytes) as ring:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            list(executor.map(abs, range(args.workers)))  # تسخين العمليات
+            start = time.perf_counter()
+            pending = []
+            for i in range(args.frames):
+                # put تنتظر عند امتلاء الحلقة، لذا تُجمع أقدم نتيجة أولاً
+                if len(pending) == ring.slots:
+                    descriptor, future = pending.pop(0)
+                    frame_from_descriptor(future.result(), copy=True)
+                    ring.release(descriptor)
+                descriptor = ring.put(frames[i % len(frames)])
+                pending.append((descriptor, executor.submit(_gray_shared, descriptor)))
+            for descriptor, future in pending:
+                frame_from_descriptor(future.result(), copy=True)
+                ring.release(descriptor)
+            elapsed = time.perf_counter() - start
+    print(f"{'shared_memory':<16}{elapsed:>10.2f}{args.frames / elapsed:>10.1f}"
+          f"{args.frames * frame_mb / elapsed:>10.0f}")
+
+def create_file_tree(directory, num_files=1_000_000, files_per_dir=1000, fanout=32):
+    """
+    إنشاء شجرة ملفات فارغة للقياس (صور وملفات أخرى بنسبة 9:1)
+
+    Returns:
+        Path: مسار الجذر
+    """
+    directory = Path(directory)
+    marker = directory / f".tree_{num_files}_{files_per_dir}"
+    if marker.exists():
+        return directory
+
+    num_dirs = max(1, num_files // files_per_dir)
+    for d in range(num_dirs):
+        subdir = directory / f"batch_{d // fanout:04d}" / f"folder_{d:06d}"
+        subdir.mkdir(parents=True, exist_ok=True)
+        for i in range(files_per_dir):
+            extension = '.txt' if i % 10 == 9 else '.png'
+            open(subdir / f"page_{i:05d}{extension}", 'wb').close()
+    marker.touch()
+    return directory
+
+def _glob_images(directory):
+    return [p for p in Path(directory).glob('**/*')
+            if p.is_file() and p.suffix.lower() in SUPPORTED_FORMATS]
+
+def benchmark_discovery(args):
+    """مقارنة glob + is_file بالمسح المتوازي عبر scandir"""
+    tree_dir = args.tree or os.path.join(tempfile.gettempdir(), 'discovery_benchmark_tree')
+    print(f"إنشاء/استخدام شجرة {args.files} ملف في {tree_dir}...")
+    start = time.perf_counter()
+    create_file_tree(tree_dir, args.files, args.per_dir)
+    print(f"جاهزة خلال {time.perf_counter() - start:.1f} ثانية\n")
+
+    variants = [
+        ('glob + is_file', lambda: _glob_images(tree_dir)),
+        ('scandir x1', lambda: list(walk_images(tree_dir, workers=1, with_stat=False))),
+        (f'scandir x{args.workers}', lambda: list(walk_images(tree_dir, workers=args.workers,
+                                                               with_stat=False))),
+        (f'scandir x{args.workers} +stat', lambda: list(walk_images(tree_dir, workers=args.workers))),
+    ]
+
+    print(f"{'method':<24}{'time (s)':>10}{'files/s':>12}{'found':>10}")
+    for name, run in variants:
+        start = time.perf_counter()
+        found = len(run())
+        elapsed = time.perf_counter() - start
+        print(f"{name:<24}{elapsed:>10.2f}{found / elapsed:>12.0f}{found:>10}")
+
+def benchmark_streaming(args):
+    """زمن أول نتيجة: مسح كامل ثم معالجة مقابل بث المسارات أثناء المسح"""
+    tree_dir = args.tree or os.path.join(tempfile.gettempdir(), 'discovery_benchmark_tree')
+    create_file_tree(tree_dir, args.files, args.per_dir)
+
+    def materialized(processor):
+        return processor.process_images_batch(processor.find_images_in_directory(tree_dir),
+                                              save_enhanced=False)
+
+    def streaming(processor):
+        return processor.process_directory(tree_dir, save_enhanced=False)
+
+    print(f"{'mode':<14}{'first (s)':>10}{'total (s)':>10}{'results':>10}")
+    for name, run in (('materialized', materialized), ('streaming', streaming)):
+        processor = BatchProcessor(max_workers=args.workers)
+        first_result = []
+        processor.set_progress_callback(
+            lambda *_: first_result or first_result.append(time.perf_counter()))
+        start = time.perf_counter()
+        results = run(processor)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<14}{first_result[0] - start:>10.2f}{elapsed:>10.2f}{len(results):>10}")
+
+def benchmark_index(args):
+    """بناء الفهرس وتحديثه والاستعلام منه مقارنة بإعادة المسح"""
+    tree_dir = args.tree or os.path.join(tempfile.gettempdir(), 'discovery_benchmark_tree')
+    create_file_tree(tree_dir, args.files, args.per_dir)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with FileIndex(os.path.join(tmp, 'index.db')) as index:
+            print(f"{'operation':<28}{'time (s)':>10}{'images':>10}")
+            for name in ('build', 'refresh (no changes)'):
+                start = time.perf_counter()
+                index.refresh(tree_dir, workers=args.workers)
+                print(f"{name:<28}{time.perf_counter() - start:>10.2f}{index.count():>10}")
+
+            queries = [
+                ('rescan + name filter', lambda: [i for i in walk_images(tree_dir, with_stat=False)
+                                                   if '_00042' in os.path.basename(i.path)]),
+                ('query name', lambda: index.select(tree_dir, pattern='_00042')),
+                ('query size', lambda: index.select(tree_dir, min_size=1)),
+                ('query date', lambda: index.select(tree_dir, start_date=datetime.now())),
+                ('query name + date', lambda: index.select(tree_dir, pattern='page_001',
+                                                           end_date=datetime.now())),
+            ]
+            for name, run in queries:
+                start = time.perf_counter()
+                found = len(run())
+                print(f"{name:<28}{time.perf_counter() - start:>10.2f}{found:>10}")
+
+def benchmark_probe(args):
+    """قراءة الأبعاد من الترويسة مقابل PIL وفك الترميز الكامل"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = np.random.default_rng(0)
+        sources = []
+        for extension in ('.png', '.jpg', '.bmp', '.tif'):
+            source = os.path.join(tmp, f"source{extension}")
+            cv2.imwrite(source, rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8))
+            sources.append(source)
+        # روابط صلبة: عدد كبير من الملفات دون مساحة إضافية
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(tmp, f"image_{i:06d}{os.path.splitext(sources[i % 4])[1]}")
+            os.link(sources[i % 4], path)
+            paths.append(path)
+
+        def probe_all(subset):
+            clear_probe_cache()
+            return [probe_image(p) for p in subset]
+
+        def pil_all(subset):
+            sizes = []
+            for p in subset:
+                with Image.open(p) as image:
+                    sizes.append(image.size)
+            return sizes
+
+        variants = [('image_probe', probe_all, paths), ('PIL.Image.open', pil_all, paths),
+                    ('cv2.imread', lambda s: [cv2.imread(p).shape for p in s], paths[:args.decode_files])]
+        print(f"{'method':<18}{'files':>8}{'time (s)':>10}{'files/s':>12}")
+        for name, run, subset in variants:
+            start = time.perf_counter()
+            run(subset)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<18}{len(subset):>8}{elapsed:>10.2f}{len(subset) / elapsed:>12.0f}")
+
+def benchmark_archive(args):
+    """استخراج الأرشيف ثم القراءة مقابل فك الترميز مباشرة من الأرشيف"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+        data = cv2.imencode('.jpg', image)[1].tobytes()
+        archives = [os.path.join(tmp, 'scans.tar'), os.path.join(tmp, 'scans.zip')]
+        with tarfile.open(archives[0], 'w') as tar, zipfile.ZipFile(archives[1], 'w') as archive:
+            for i in range(args.images):
+                name = f"batch_{i // 500:03d}/scan_{i:06d}.jpg"
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+                archive.writestr(name, data)
+
+        def decode_all(paths, load):
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                return sum(1 for decoded in executor.map(load, paths) if decoded is not None)
+
+        print(f"{'method':<22}{'images':>8}{'time (s)':>10}{'written (MB)':>14}")
+        for archive_path in archives:
+            target = os.path.join(tmp, 'extracted')
+            start = time.perf_counter()
+            with (tarfile.open(archive_path) if archive_path.endswith('.tar')
+                  else zipfile.ZipFile(archive_path)) as archive:
+                archive.extractall(target)
+            paths = [image.path for image in walk_images(target, with_stat=False)]
+            decoded = decode_all(paths, cv2.imread)
+            extract_time = time.perf_counter() - start
+            written = sum(os.path.getsize(path) for path in paths) / (1024 * 1024)
+            print(f"{'extract ' + Path(archive_path).suffix:<22}{decoded:>8}{extract_time:>10.2f}{written:>14.0f}")
+            shutil.rmtree(target)
+
+            start = time.perf_counter()
+            paths = [image.path for image in iter_archive_images(archive_path)]
+            decoded = decode_all(paths, lambda path: cv2.imdecode(
+                np.frombuffer(read_archive_member(path), dtype=np.uint8), cv2.IMREAD_COLOR))
+            print(f"{'direct ' + Path(archive_path).suffix:<22}{decoded:>8}{time.perf_counter() - start:>10.2f}{0:>14}")
+        close_archive_readers()
+
+def benchmark_binary(args):
+    """الذاكرة وبايتات النقل بين العمليات وحجم القرص: uint8 مقابل 1 بت"""
+    enhancer = ImageEnhancer(lazy_reader=True)
+    paths = [image.path for image in walk_images(args.directory, with_stat=False)][:args.images]
+    totals = dict.fromkeys(['uint8', 'packed', 'ipc_uint8', 'ipc_packed', 'png8', 'png1', 'g4'], 0)
+    times = dict.fromkeys(['pack', 'png8', 'png1', 'g4'], 0.0)
+    for path in paths:
+        with contextlib.redirect_stdout(io.StringIO()):
+            enhanced = enhancer.enhance_image_pipeline(enhancer.load_image(path))
+        start = time.perf_counter()
+        packed = BinaryImage.from_array(enhanced)
+        times['pack'] += time.perf_counter() - start
+        assert np.array_equal(packed.to_array(), enhanced)
+
+        totals['uint8'] += enhanced.nbytes
+        totals['packed'] += packed.nbytes
+        totals['ipc_uint8'] += len(pickle.dumps(enhanced, protocol=pickle.HIGHEST_PROTOCOL))
+        totals['ipc_packed'] += len(pickle.dumps(packed, protocol=pickle.HIGHEST_PROTOCOL))
+        for key, encode in (('png8', lambda: cv2.imencode('.png', enhanced)[1]),
+                            ('png1', lambda: encode_enhanced_image(packed, '.png')),
+                            ('g4', lambda: encode_enhanced_image(packed, '.tif'))):
+            start = time.perf_counter()
+            totals[key] += len(encode())
+            times[key] += time.perf_counter() - start
+
+    mb = lambda value: value / (1024 * 1024)
+    print(f"images: {len(paths)}")
+    print(f"in-memory     uint8 {mb(totals['uint8']):9.2f} MB   packed {mb(totals['packed']):9.2f} MB"
+          f"   pack time {times['pack']:.2f} s")
+    print(f"IPC (pickle)  uint8 {mb(totals['ipc_uint8']):9.2f} MB   packed {mb(totals['ipc_packed']):9.2f} MB")
+    print(f"disk          8-bit PNG {mb(totals['png8']):7.2f} MB ({times['png8']:.2f} s)"
+          f"   1-bit PNG {mb(totals['png1']):7.2f} MB ({times['png1']:.2f} s)"
+          f"   G4 TIFF {mb(totals['g4']):7.2f} MB ({times['g4']:.2f} s)")
+
+def benchmark_writer(args):
+    """زمن الترميز والحجم لكل إعداد، ثم الكتابة داخل العامل مقابل الكتابة في الخلفية"""
+    enhancer = ImageEnhancer(lazy_reader=True)
+    paths = [image.path for image in walk_images(args.directory, with_stat=False)][:args.images]
+    enhanced = []
+    for path in paths:
+        with contextlib.redirect_stdout(io.StringIO()):
+            enhanced.append(BinaryImage.from_array(enhancer.enhance_image_pipeline(enhancer.load_image(path))))
+
+    print(f"images: {len(paths)}")
+    print(f"{'preset':<12}{'encode (s)':>12}{'size (MB)':>12}")
+    for preset in ENCODER_PRESETS:
+        start = time.perf_counter()
+        size = sum(len(encode_with_preset(image, preset)) for image in enhanced)
+        print(f"{preset:<12}{time.perf_counter() - start:>12.2f}{size / (1024 * 1024):>12.2f}")
+
+    print(f"\n{'writer':<28}{'total (s)':>10}{'encode (s)':>12}{'max backlog':>13}")
+    for writer_threads in (0, args.writer_threads):
+        with tempfile.TemporaryDirectory() as output_dir, contextlib.redirect_stdout(io.StringIO()):
+            processor = BatchProcessor(max_workers=args.workers, enhanced_format=args.preset,
+                                       writer_threads=writer_threads)
+            start = time.perf_counter()
+            processor.process_images_batch([Path(path) for path in paths], output_dir)
+            elapsed = time.perf_counter() - start
+        label = 'in worker' if writer_threads == 0 else f'write-behind ({writer_threads} threads)'
+        metrics = processor.run_metrics
+        print(f"{label:<28}{elapsed:>10.2f}{metrics.get('encode_time', 0):>12.2f}"
+              f"{metrics.get('writer_max_backlog', 0):>13}")
+
+def benchmark_frame_cache(args):
+    """تحميل الإطارات الرمادية: فك الترميز مقابل التخزين المؤقت البارد والدافئ"""
+    paths = [image.path for image in walk_images(args.directory, with_stat=False)][:args.images]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        runs = [('decode', ImageEnhancer(lazy_reader=True)),
+                ('cache (cold)', ImageEnhancer(lazy_reader=True, frame_cache=FrameCache(cache_dir))),
+                ('cache (warm)', ImageEnhancer(lazy_reader=True, frame_cache=FrameCache(cache_dir)))]
+        print(f"images: {len(paths)}")
+        print(f"{'load':<16}{'time (s)':>10}{'images/s':>10}")
+        for label, enhancer in runs:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                frames = sum(frame is not None for frame in executor.map(enhancer.load_frame, paths))
+            elapsed = time.perf_counter() - start
+            print(f"{label:<16}{elapsed:>10.2f}{frames / elapsed:>10.0f}")
+        print(f"cache size: {FrameCache(cache_dir).size / (1024 * 1024):.1f} MB")
+
+def _drop_page_cache(paths):
+    """إخراج الملفات من ذاكرة نظام التشغيل (قراءة باردة دون صلاحيات الجذر)"""
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fdatasync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+def benchmark_readahead(args):
+    """القراءة داخل العامل مقابل القراءة المسبقة على ذاكرة باردة أو قرص بطيء"""
+    paths = [image.path for image in walk_images(args.directory, with_stat=False)][:args.images]
+    enhancer = ImageEnhancer(lazy_reader=True)
+
+    def throttled_read(path):
+        # محاكاة قرص دوّار أو مشاركة شبكية: زمن ثابت لكل ملف
+        time.sleep(args.latency / 1000)
+        return read_image_bytes(path)
+
+    def process(path, data):
+        return enhancer.enhance_image_pipeline(enhancer.load_frame(path, data)) is not None
+
+    print(f"images: {len(paths)}, workers: {args.workers}, simulated latency: {args.latency} ms")
+    print(f"{'reader':<24}{'time (s)':>10}{'images/s':>10}{'worker wait (s)':>17}")
+    for depth in [0] + args.depth:
+        if hasattr(os, 'posix_fadvise'):
+            _drop_page_cache(paths)
+        start = time.perf_counter()
+        # redirect_stdout يغير sys.stdout لكل الخيوط فيُطبق مرة حول الدفعة كلها
+        with ThreadPoolExecutor(max_workers=args.workers) as executor, contextlib.redirect_stdout(io.StringIO()):
+            if depth == 0:
+                done = sum(executor.map(lambda path: process(path, throttled_read(path)), paths))
+                wait_time = None
+            else:
+                prefetcher = Prefetcher(paths, depth, args.io_threads, reader=throttled_read)
+                done = sum(executor.map(lambda path: process(path, prefetcher.take(path)), prefetcher))
+                prefetcher.close()
+                wait_time = prefetcher.wait_time
+        elapsed = time.perf_counter() - start
+        label = 'in worker' if depth == 0 else f'readahead {depth}'
+        waited = f"{wait_time:>17.2f}" if wait_time is not None else f"{'-':>17}"
+        print(f"{label:<24}{elapsed:>10.2f}{done / elapsed:>10.0f}{waited}")
+
+def benchmark_dedup(args):
+    """زمن البصمة لكل صورة، والبحث في شجرة BK مقابل المقارنة الخطية"""
+    paths = [image.path for image in walk_images(args.directory, with_stat=False)][:args.images]
+    frames = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in paths]
+    for method, hash_function in HASH_METHODS.items():
+        start = time.perf_counter()
+        for frame in frames:
+            hash_function(frame)
+        print(f"{method}: {(time.perf_counter() - start) / len(frames) * 1000:.3f} ms/image")
+
+    rng = np.random.default_rng(0)
+    values = [int(value) for value in rng.integers(0, 2**63, args.hashes, dtype=np.int64)]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+    queries = values[:200]
+    start = time.perf_counter()
+    for query in queries:
+        tree.search(query, args.distance)
+    tree_time = (time.perf_counter() - start) / len(queries)
+    start = time.perf_counter()
+    for query in queries[:20]:
+        [i for i, value in enumerate(values) if hamming(query, value) <= args.distance]
+    linear_time = (time.perf_counter() - start) / 20
+    print(f"lookup in {args.hashes} hashes (distance {args.distance}): "
+          f"BK-tree {tree_time * 1000:.2f} ms, linear {linear_time * 1000:.2f} ms")
+
+def benchmark_results_store(args):
+    """الكتابة في مخزن SQLite، والبحث بالفهرس النصي مقابل المرور على ملف JSONL"""
+    rng = np.random.default_rng(0)
+    vocabulary = [f"word{i}" for i in range(5000)]
+
+    def result(i):
+        words = [{'text': vocabulary[j], 'confidence': 0.9, 'bbox': (int(j), 10, 40, 12)}
+                 for j in rng.integers(0, len(vocabulary), args.words - 1)]
+        words.append({'text': f"INV-{i:07d}", 'confidence': 0.8, 'bbox': (5, 5, 80, 12)})
+        return {'image_path': f"scans/{i:07d}.png", 'status': 'success', 'processing_time': 1.0,
+                'easyocr_results': [], 'tesseract_results': words, 'total_texts_found': len(words)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path = Path(tmp) / 'results.jsonl'
+        store = ResultsStore(Path(tmp) / 'results.db')
+        start = time.perf_counter()
+        with open(jsonl_path, 'w', encoding='utf-8') as f:
+            for i in range(args.images):
+                record = result(i)
+                store.add(record)
+                f.write(json.dumps(record) + '\n')
+        store.flush()
+        elapsed = time.perf_counter() - start
+        print(f"stored {args.images} images ({args.images * args.words} words) in {elapsed:.1f} s: "
+              f"{os.path.getsize(store.db_path) / (1024 * 1024):.0f} MB SQLite, "
+              f"{jsonl_path.stat().st_size / (1024 * 1024):.0f} MB JSONL")
+
+        queries = [f"INV-{i:07d}" for i in rng.integers(0, args.images, 50)]
+        start = time.perf_counter()
+        for query in queries:
+            assert store.search_images(query)
+        search_time = (time.perf_counter() - start) / len(queries)
+        start = time.perf_counter()
+        with open(jsonl_path, encoding='utf-8') as f:
+            [record['image_path'] for record in map(json.loads, f)
+             if any(word['text'] == queries[0] for word in record['tesseract_results'])]
+        scan_time = time.perf_counter() - start
+        print(f"search: FTS5 {search_time * 1000:.2f} ms, JSONL scan {scan_time * 1000:.0f} ms")
+        store.close()
+
+def benchmark_result_records(args):
+    """ذاكرة النتائج: قواميس وقوائم مقابل سجلات مضغوطة، وزمن التصدير إلى JSON"""
+    def result(i):
+        rng = np.random.default_rng(i)
+        xs = rng.integers(0, 2000, args.words).tolist()
+        easyocr = [{'text': f"كلمة{x}", 'confidence': float(rng.random()),
+                    'bbox': [[x, 10], [x + 80, 10], [x + 80, 40], [x, 40]]} for x in xs]
+        tesseract = [{'text': f"word{x}", 'confidence': int(rng.integers(30, 100)) / 100.0,
+                      'bbox': (x, 10, 80, 30)} for x in xs]
+        return {'image_path': f"scans/{i:07d}.png", 'enhanced_path': f"out/enhanced_{i:07d}.png",
+                'status': 'success', 'processing_time': 1.0, 'easyocr_results': easyocr,
+                'tesseract_results': tesseract, 'total_texts_found': 2 * args.words,
+                'file_size': 123456, 'file_mtime_ns': 1700000000000000000 + i,
+                'pipeline_fingerprint': 'f' * 16, 'timestamp': f"2026-01-01T00:00:{i % 60:02d}"}
+
+    measured = {}
+    for name, make in (('dicts', result), ('records', lambda i: compact_result(result(i)))):
+        tracemalloc.start()
+        results = [make(i) for i in range(args.images)]
+        measured[name] = (results, tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+    words = args.images * args.words * 2
+    for name, (results, size) in measured.items():
+        start = time.perf_counter()
+        exported = json.dumps(results, ensure_ascii=False, default=export_default)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {size / (1024 * 1024):.1f} MB ({size / words:.0f} bytes/word), "
+              f"JSON export {elapsed:.2f} s")
+        measured[name] += (json.loads(exported),)
+    assert measured['dicts'][2] == measured['records'][2]
+    print(f"memory reduction: {measured['dicts'][1] / measured['records'][1]:.1f}x "
+          f"for {args.images} images x {2 * args.words} words (identical JSON)")
+
+def main():
+    """الدالة الرئيسية"""
+    parser = argparse.ArgumentParser(description='قياسات أداء المعالجة المجمعة')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    scaling = subparsers.add_parser('scaling', help='العمال الثابتون مقابل التحجيم التكيفي')
+    scaling.add_argument('--images', type=int, default=40, help='عدد الصور')
+    scaling.add_argument('--large-ratio', type=float, default=0.2, help='نسبة الصور الكبيرة')
+    scaling.add_argument('-w', '--workers', type=int, default=8, help='الحد الأقصى للعمال')
+    scaling.add_argument('--interval', type=float, default=2.0, help='فترة التحجيم (ثانية)')
+    scaling.set_defaults(func=benchmark_scaling)
+
+    scheduling = subparsers.add_parser('scheduling', help='مقارنة سياسات الجدولة حسب الحجم')
+    scheduling.add_argument('--images', type=int, default=40, help='عدد الصور')
+    scheduling.add_argument('--large-ratio', type=float, default=0.1, help='نسبة الصور الكبيرة')
+    scheduling.add_argument('-w', '--workers', type=int, default=4, help='عدد العمال')
+    scheduling.add_argument('--cost', choices=['file_size', 'pixels'], default='pixels',
+                            help='طريقة تقدير التكلفة')
+    scheduling.set_defaults(func=benchmark_scheduling)
+
+    shm = subparsers.add_parser('shm', help='نقل الإطارات: pickle مقابل الذاكرة المشتركة')
+    shm.add_argument('--frames', type=int, default=200, help='عدد الإطارات')
+    shm.add_argument('--width', type=int, default=4000, help='عرض الإطار')
+    shm.add_argument('--height', type=int, default=3000, help='ارتفاع الإطار')
+    shm.add_argument('-w', '--workers', type=int, default=4, help='عدد العمليات')
+    shm.set_defaults(func=benchmark_shared_memory)
+
+    discovery = subparsers.add_parser('discovery', help='اكتشاف الصور: glob مقابل scandir المتوازي')
+    discovery.add_argument('--files', type=int, default=1_000_000, help='عدد الملفات في الشجرة')
+    discovery.add_argument('--per-dir', type=int, default=1000, help='عدد الملفات في كل مجلد')
+    discovery.add_argument('--tree', help='مسار الشجرة (يُعاد استخدامها إن وُجدت)')
+    discovery.add_argument('-w', '--workers', type=int, default=8, help='عدد خيوط المسح')
+    discovery.set_defaults(func=benchmark_discovery)
+
+    streaming = subparsers.add_parser('streaming', help='زمن أول نتيجة مع بث المسح')
+    streaming.add_argument('--files', type=int, default=200_000, help='عدد الملفات في الشجرة')
+    streaming.add_argument('--per-dir', type=int, default=1000, help='عدد الملفات في كل مجلد')
+    streaming.add_argument('--tree', help='مسار الشجرة (يُعاد استخدامها إن وُجدت)')
+    streaming.add_argument('-w', '--workers', type=int, default=4, help='عدد العمال')
+    streaming.set_defaults(func=benchmark_streaming)
+
+    index = subparsers.add_parser('index', help='فهرس SQLite الدائم مقابل إعادة المسح')
+    index.add_argument('--files', type=int, default=1_000_000, help='عدد الملفات في الشجرة')
+    index.add_argument('--per-dir', type=int, default=1000, help='عدد الملفات في كل مجلد')
+    index.add_argument('--tree', help='مسار الشجرة (يُعاد استخدامها إن وُجدت)')
+    index.add_argument('-w', '--workers', type=int, default=8, help='عدد خيوط الفحص')
+    index.set_defaults(func=benchmark_index)
+
+    probe = subparsers.add_parser('probe', help='قراءة الترويسة مقابل فك الترميز')
+    probe.add_argument('--files', type=int, default=20000, help='عدد الملفات')
+    probe.add_argument('--decode-files', type=int, default=200, help='عدد الملفات لفك الترميز الكامل')
+    probe.add_argument('--width', type=int, default=2480, help='عرض الصورة')
+    probe.add_argument('--height', type=int, default=3508, help='ارتفاع الصورة')
+    probe.set_defaults(func=benchmark_probe)
+
+    archive = subparsers.add_parser('archive', help='القراءة من الأرشيف مقابل الاستخراج')
+    archive.add_argument('--images', type=int, default=2000, help='عدد الصور')
+    archive.add_argument('--workers', type=int, default=4, help='عدد خيوط القراءة')
+    archive.add_argument('--width', type=int, default=1240, help='عرض الصورة')
+    archive.add_argument('--height', type=int, default=1754, help='ارتفاع الصورة')
+    archive.set_defaults(func=benchmark_archive)
+
+    binary = subparsers.add_parser('binary', help='الصور الثنائية: uint8 مقابل 1 بت')
+    binary.add_argument('directory', nargs='?', default='large_test_dataset', help='مجلد الصور')
+    binary.add_argument('--images', type=int, default=100, help='الحد الأقصى لعدد الصور')
+    binary.set_defaults(func=benchmark_binary)
+
+    writer = subparsers.add_parser('writer', help='إعدادات الترميز والكتابة في الخلفية')
+    writer.add_argument('directory', nargs='?', default='large_test_dataset', help='مجلد الصور')
+    writer.add_argument('--images', type=int, default=100, help='الحد الأقصى لعدد الصور')
+    writer.add_argument('-w', '--workers', type=int, default=4, help='عدد العمال')
+    writer.add_argument('--writer-threads', type=int, default=2, help='خيوط الكتابة في الخلفية')
+    writer.add_argument('--preset', choices=list(ENCODER_PRESETS), default='png-small',
+                        help='إعداد الترميز لمقارنة الكتابة')
+    writer.set_defaults(func=benchmark_writer)
+
+    cache = subparsers.add_parser('cache', help='التخزين المؤقت للإطارات المفكوكة')
+    cache.add_argument('directory', nargs='?', default='large_test_dataset', help='مجلد الصور')
+    cache.add_argument('--images', type=int, default=1000, help='الحد الأقصى لعدد الصور')
+    cache.add_argument('-w', '--workers', type=int, default=4, help='عدد خيوط التحميل')
+    cache.set_defaults(func=benchmark_frame_cache)
+
+    readahead = subparsers.add_parser('readahead', help='القراءة المسبقة مقابل القراءة داخل العامل')
+    readahead.add_argument('directory', nargs='?', default='large_test_dataset', help='مجلد الصور')
+    readahead.add_argument('--images', type=int, default=200, help='الحد الأقصى لعدد الصور')
+    readahead.add_argument('-w', '--workers', type=int, default=4, help='عدد العمال')
+    readahead.add_argument('--io-threads', type=int, default=4, help='عدد خيوط القراءة المسبقة')
+    readahead.add_argument('--depth', type=int, nargs='+', default=[4, 16], help='أعماق القراءة المسبقة')
+    readahead.add_argument('--latency', type=float, default=20.0,
+                           help='زمن قراءة مُحاكى لكل ملف (ms)؛ 0 للقرص الفعلي بذاكرة باردة')
+    readahead.set_defaults(func=benchmark_readahead)
+
+    dedup = subparsers.add_parser('dedup', help='البصمة الإدراكية وشجرة BK')
+    dedup.add_argument('directory', nargs='?', default='large_test_dataset', help='مجلد الصور')
+    dedup.add_argument('--images', type=int, default=100, help='الحد الأقصى لعدد الصور')
+    dedup.add_argument('--hashes', type=int, default=100_000, help='عدد البصمات في الشجرة')
+    dedup.add_argument('--distance', type=int, default=4, help='أقصى مسافة هامنغ')
+    dedup.set_defaults(func=benchmark_dedup)
+
+    results = subparsers.add_parser('results', help='مخزن النتائج SQLite والبحث النصي')
+    results.add_argument('--images', type=int, default=20_000, help='عدد الصور')
+    results.add_argument('--words', type=int, default=30, help='عدد الكلمات في كل صورة')
+    results.set_defaults(func=benchmark_results_store)
+
+    records = subparsers.add_parser('records', help='ذاكرة النتائج: قواميس مقابل سجلات مضغوطة')
+    records.add_argument('--images', type=int, default=10_000, help='عدد الصور')
+    records.add_argument('--words', type=int, default=30, help='عدد الكلمات لكل محرك في كل صورة')
+    records.set_defaults(func=benchmark_result_records)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
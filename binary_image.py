@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+تخزين الصور الثنائية (أبيض وأسود) بكثافة 1 بت للبكسل
+Bit-Packed Binary Images With 1-Bit PNG and CCITT G4 TIFF Writers
+"""
+
+import io
+import os
+import cv2
+import numpy as np
+from PIL import Image
+from typing import Optional, Tuple, Union
+
+# الامتدادات التي تُكتب بعمق 1 بت؛ غيرها (مثل JPEG) يُكتب بـ OpenCV كالمعتاد
+BILEVEL_FORMATS = {'.png': ('PNG', {}), '.tif': ('TIFF', {'compression': 'group4'}),
+                   '.tiff': ('TIFF', {'compression': 'group4'})}
+
+class BinaryImage:
+    """
+    صورة ثنائية مضغوطة بـ np.packbits (8 بكسل في البايت، أصغر بـ 8 مرات من uint8)
+
+    كل صف يُحزم مستقلاً (مبطن إلى بايت كامل)، وهو نفس تخطيط نمط '1' في PIL،
+    فتُكتب الصورة بعمق 1 بت دون فك الحزم. البت 1 يعني أبيض (255).
+    """
+
+    __slots__ = ('bits', 'width')
+
+    def __init__(self, bits: np.ndarray, width: int):
+        self.bits = bits
+        self.width = width
+
+    @classmethod
+    def from_array(cls, image: np.ndarray, threshold: int = 127) -> 'BinaryImage':
+        """حزم صورة رمادية (البكسل أكبر من threshold يصبح أبيض)"""
+        if image.ndim != 2:
+            raise ValueError(f"الصورة الثنائية يجب أن تكون ثنائية الأبعاد: {image.shape}")
+        return cls(np.packbits(image > threshold, axis=1), image.shape[1])
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.bits.shape[0], self.width
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def to_array(self) -> np.ndarray:
+        """فك الحزم إلى uint8 بقيم 0/255 (لـ OpenCV وOCR)"""
+        return np.unpackbits(self.bits, axis=1, count=self.width) * np.uint8(255)
+
+    def to_pil(self) -> Image.Image:
+        """صورة PIL بنمط '1' مباشرة من البتات المحزومة"""
+        height, width = self.shape
+        return Image.frombytes('1', (width, height), np.ascontiguousarray(self.bits).tobytes())
+
+    def __reduce__(self):
+        return (BinaryImage, (self.bits, self.width))
+
+    def __eq__(self, other):
+        return (isinstance(other, BinaryImage) and self.width == other.width
+                and np.array_equal(self.bits, other.bits))
+
+def is_binary(image: np.ndarray) -> bool:
+    """هل الصورة رمادية بقيمتين فقط 0 و255"""
+    if image.ndim != 2 or image.dtype != np.uint8:
+        return False
+    # مرور واحد في OpenCV دون مصفوفات مؤقتة بحجم الصورة
+    return cv2.countNonZero(cv2.inRange(image, 1, 254)) == 0
+
+def _as_binary(image: Union[np.ndarray, BinaryImage]):
+    if isinstance(image, BinaryImage):
+        return image
+    return BinaryImage.from_array(image) if is_binary(image) else None
+
+def encode_enhanced_image(image: Union[np.ndarray, BinaryImage], extension: str = '.png',
+                          png_compression: Optional[int] = None) -> bytes:
+    """
+    ترميز الصورة المحسنة؛ الصور الثنائية تُرمز PNG بعمق 1 بت أو TIFF بضغط CCITT G4
+
+    Args:
+        image: الصورة (مصفوفة أو BinaryImage)
+        extension: امتداد الصيغة ('.png' أو '.tif' أو '.webp' (دون فقد) أو غيرها عبر OpenCV)
+        png_compression: مستوى ضغط PNG من 0 (أسرع) إلى 9 (أصغر)؛ None للافتراضي
+    """
+    extension = extension.lower()
+    binary = _as_binary(image) if extension in BILEVEL_FORMATS else None
+    if binary is None:
+        if isinstance(image, BinaryImage):
+            image = image.to_array()
+        params = []
+        if extension == '.png' and png_compression is not None:
+            params = [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+        elif extension == '.webp':
+            # الجودة فوق 100 تعني WebP دون فقد في OpenCV
+            params = [cv2.IMWRITE_WEBP_QUALITY, 101]
+        ok, encoded = cv2.imencode(extension, image, params)
+        if not ok:
+            raise ValueError(f"تعذر ترميز الصورة بصيغة {extension}")
+        return encoded.tobytes()
+
+    format_name, options = BILEVEL_FORMATS[extension]
+    if format_name == 'PNG' and png_compression is not None:
+        options = dict(options, compress_level=png_compression)
+    buffer = io.BytesIO()
+    binary.to_pil().save(buffer, format_name, **options)
+    return buffer.getvalue()
+
+def write_enhanced_image(path, image: Union[np.ndarray, BinaryImage],
+                         png_compression: Optional[int] = None) -> None:
+    """حفظ الصورة المحسنة (1 بت للصور الثنائية بصيغة PNG أو TIFF)"""
+    path = os.fspath(path)
+    data = encode_enhanced_image(image, os.path.splitext(path)[1] or '.png', png_compression)
+    with open(path, 'wb') as f:
+        f.write(data)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قراءة المستندات متعددة الصفحات (TIFF وPDF) صفحة صفحة
+Multi-Page TIFF and PDF Input With Per-Page Streaming
+"""
+
+import io
+import os
+import re
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import cv2
+import numpy as np
+from PIL import Image
+from archive_input import ARCHIVE_SEPARATOR, read_archive_member, split_archive_path
+from archive_input import image_name as _member_name, stat_image as _stat_file
+from image_probe import probe_image
+
+# مسار صفحة داخل مستند: scan.tif#page=3 (الترقيم من 1)
+PAGE_SEPARATOR = '#page='
+MULTIPAGE_FORMATS = ('.tif', '.tiff', '.pdf')
+PDF_DPI = 200
+
+_PAGE_PATTERN = re.compile(r'^(.*)#page=(\d+)$', re.DOTALL)
+# pdfium وMuPDF غير آمنين للاستخدام من عدة خيوط
+_pdf_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+def page_path(document, page: int) -> str:
+    return f"{os.fspath(document)}{PAGE_SEPARATOR}{page}"
+
+def split_page_path(path) -> Optional[Tuple[str, int]]:
+    """
+    تقسيم doc#page=N إلى (مسار المستند، رقم الصفحة)
+
+    Returns:
+        Optional[Tuple[str, int]]: None إذا لم يكن المسار صفحة في مستند متعدد الصفحات
+    """
+    path = os.fspath(path)
+    if PAGE_SEPARATOR not in path:
+        return None
+    match = _PAGE_PATTERN.match(path)
+    if match is None or not match.group(1).lower().endswith(MULTIPAGE_FORMATS):
+        return None
+    return match.group(1), int(match.group(2))
+
+def document_path(path) -> str:
+    """مسار المستند لصفحة، أو المسار نفسه لغير الصفحات"""
+    parts = split_page_path(path)
+    return parts[0] if parts else os.fspath(path)
+
+def image_name(path) -> str:
+    """اسم ملف صالح للحفظ: scan.tif#page=3 يصبح scan_page0003.tif"""
+    parts = split_page_path(path)
+    if parts is None:
+        return _member_name(path)
+    stem, extension = os.path.splitext(_member_name(parts[0]))
+    # صفحات PDF تُحفظ كصور
+    return f"{stem}_page{parts[1]:04d}{'.png' if extension.lower() == '.pdf' else extension}"
+
+def stat_image(path) -> Tuple[int, int]:
+    """(الحجم، تاريخ التعديل) للصورة أو للمستند الذي تنتمي إليه الصفحة"""
+    return _stat_file(document_path(path))
+
+def _in_archive(path: str) -> bool:
+    return ARCHIVE_SEPARATOR in path and split_archive_path(path) is not None
+
+def _pdf_backend():
+    """المكتبة المتاحة لتحويل PDF إلى صور: pypdfium2 ثم PyMuPDF"""
+    try:
+        import pypdfium2
+        return 'pdfium', pypdfium2
+    except ImportError:
+        pass
+    try:
+        import fitz
+        return 'mupdf', fitz
+    except ImportError:
+        raise RuntimeError("قراءة PDF تتطلب pypdfium2 أو PyMuPDF")
+
+def pdf_supported() -> bool:
+    """هل تتوفر مكتبة لتحويل صفحات PDF إلى صور"""
+    try:
+        _pdf_backend()
+        return True
+    except RuntimeError:
+        return False
+
+def _open_pdf(path: str):
+    name, module = _pdf_backend()
+    source = read_archive_member(path) if _in_archive(path) else path
+    if name == 'pdfium':
+        return name, module.PdfDocument(source)
+    if isinstance(source, bytes):
+        return name, module.open(stream=source, filetype='pdf')
+    return name, module.open(source)
+
+def count_pages(path) -> int:
+    """
+    عدد صفحات المستند (1 للصور العادية)
+
+    TIFF على القرص يُعد من الترويسة دون فك الترميز (مع التخزين المؤقت للفحص).
+
+    Raises:
+        RuntimeError: لملفات PDF إذا لم تتوفر مكتبة التحويل
+    """
+    path = os.fspath(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in MULTIPAGE_FORMATS:
+        return 1
+    if extension == '.pdf':
+        with _pdf_lock:
+            _, document = _open_pdf(path)
+            try:
+                return len(document)
+            finally:
+                document.close()
+    if not _in_archive(path):
+        info = probe_image(path)
+        if info is not None:
+            return info.pages
+    # TIFF داخل أرشيف: عدّ الصفحات من البايتات
+    with Image.open(io.BytesIO(read_archive_member(path)) if _in_archive(path) else path) as image:
+        return getattr(image, 'n_frames', 1)
+
+def iter_pages(path) -> Iterator[str]:
+    """
+    مسارات صفحات المستند (مولّد)؛ الصورة أحادية الصفحة تُعاد كما هي
+
+    كل صفحة مهمة مستقلة: لا تُحوّل أي صفحة إلى صورة هنا.
+    """
+    path = os.fspath(path)
+    if not path.lower().endswith(MULTIPAGE_FORMATS) or split_page_path(path) is not None:
+        yield path
+        return
+    try:
+        pages = count_pages(path)
+    except Exception as e:
+        # المستند يُمرر كما هو ويفشل عند التحميل بخطأ واضح
+        logger.warning(f"تعذر عد صفحات {path}: {e}")
+        yield path
+        return
+    if pages == 1:
+        yield path
+        return
+    for page in range(1, pages + 1):
+        yield page_path(path, page)
+
+def expand_pages(image_paths: Iterable) -> Iterator[Path]:
+    """توسيع المستندات متعددة الصفحات إلى صفحات أثناء البث (الصفحات تُمرر كما هي)"""
+    for image_path in image_paths:
+        for path in iter_pages(image_path):
+            yield Path(path)
+
+def load_page(path, dpi: int = PDF_DPI) -> np.ndarray:
+    """
+    تحميل صفحة واحدة فقط كصورة BGR (مثل cv2.imread)
+
+    TIFF: الانتقال إلى الصفحة المطلوبة بـ seek وفك ترميزها وحدها.
+    PDF: تحويل الصفحة المطلوبة فقط بالدقة المحددة.
+    """
+    path = os.fspath(path)
+    document, page = split_page_path(path) or (path, 1)
+    if document.lower().endswith('.pdf'):
+        return _render_pdf_page(document, page, dpi)
+
+    source = io.BytesIO(read_archive_member(document)) if _in_archive(document) else document
+    with Image.open(source) as image:
+        try:
+            image.seek(page - 1)
+        except EOFError:
+            raise ValueError(f"الصفحة {page} غير موجودة في {document}")
+        if image.mode.startswith('I;16'):
+            # 16 بت تُنقل إلى 8 بت كما يفعل cv2.imread؛ convert('L') يقص القيم فتبيض الصفحة
+            array = (np.asarray(image) >> 8).astype(np.uint8)
+        elif image.mode in ('I', 'F'):
+            array = _scale_to_uint8(np.asarray(image))
+        else:
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('L' if image.mode == '1' else 'RGB')
+            array = np.asarray(image)
+    if array.ndim == 2:
+        return cv2.cvtColor(array, cv2.COLOR_GRAY2BGR)
+    return cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
+
+def _scale_to_uint8(array: np.ndarray) -> np.ndarray:
+    """صفحة 32 بت (I أو F) إلى 8 بت: نطاق 16 بت يُقسم على 256، ونطاق F بين 0 و1 يُضرب في 255"""
+    if array.dtype.kind == 'f' and array.size and array.max() <= 1.0:
+        array = array * 255
+    elif array.size and array.max() > 255:
+        array = array / 256
+    return np.clip(array, 0, 255).astype(np.uint8)
+
+def _render_pdf_page(document: str, page: int, dpi: int) -> np.ndarray:
+    with _pdf_lock:
+        name, pdf = _open_pdf(document)
+        try:
+            if not 1 <= page <= len(pdf):
+                raise ValueError(f"الصفحة {page} غير موجودة في {document}")
+            if name == 'pdfium':
+                # pdfium يرسم بترتيب BGR مباشرة
+                return np.ascontiguousarray(pdf[page - 1].render(scale=dpi / 72).to_numpy()[:, :, :3])
+            pixmap = pdf[page - 1].get_pixmap(dpi=dpi, alpha=False)
+            array = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.width, pixmap.n)
+            return cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
+        finally:
+            pdf.close()
+
+def assemble_documents(results: Iterable[Dict]) -> List[Dict]:
+    """
+    تجميع نتائج الصفحات في نتيجة لكل مستند (بترتيب الصفحات)
+
+    نتائج الصور أحادية الصفحة لا تدخل في التجميع.
+    """
+    documents: Dict[str, List[Tuple[int, Dict]]] = {}
+    for result in results:
+        parts = split_page_path(result['image_path'])
+        if parts is not None:
+            documents.setdefault(parts[0], []).append((parts[1], result))
+
+    assembled = []
+    for document, pages in documents.items():
+        pages.sort(key=lambda item: item[0])
+        page_results = [result for _, result in pages]
+        failed_pages = [page for page, result in pages if result['status'] != 'success']
+        assembled.append({
+            'document_path': document,
+            'status': 'success' if not failed_pages else ('failed' if len(failed_pages) == len(pages) else 'partial'),
+            'pages': len(pages),
+            'failed_pages': failed_pages,
+            'processing_time': sum(result.get('processing_time', 0) for result in page_results),
+            'total_texts_found': sum(result.get('total_texts_found', 0) for result in page_results),
+            'page_results': page_results,
+        })
+    return assembled
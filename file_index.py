@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+فهرس ملفات دائم لاختيار الصور دون إعادة المسح
+Persistent SQLite File Index for Image Selection
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+import argparse
+import logging
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from image_probe import probe_image
+from image_discovery import SUPPORTED_FORMATS, DEFAULT_DISCOVERY_WORKERS
+
+# اسم مجلد الفهرس في الإصدارات السابقة (كان داخل المجلد المفهرس)؛ يُتخطى أثناء المسح
+INDEX_DIRNAME = '.image_index'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    content_hash TEXT,
+    channels INTEGER,
+    bit_depth INTEGER,
+    dpi_x REAL,
+    dpi_y REAL,
+    pages INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS files_size ON files (size);
+CREATE INDEX IF NOT EXISTS files_mtime ON files (mtime_ns);
+CREATE INDEX IF NOT EXISTS files_dimensions ON files (width, height);
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+"""
+
+# المجلد الذي عُدل خلال هذه المدة قبل المسح يُعاد مسحه في التحديث التالي،
+# لأن تعديلاً آخر في نفس اللحظة قد لا يغير mtime
+_RACY_WINDOW_NS = 2_000_000_000
+
+class IndexedImage(NamedTuple):
+    """سجل صورة في الفهرس"""
+    path: str
+    size: int
+    mtime_ns: int
+    width: Optional[int]
+    height: Optional[int]
+    content_hash: Optional[str]
+    dpi_x: Optional[float] = None
+    pages: Optional[int] = None
+
+def default_index_path(directory) -> Path:
+    """
+    مسار الفهرس الافتراضي في مجلد التخزين المؤقت للمستخدم ($XDG_CACHE_HOME أو ~/.cache)
+    بمفتاح من المسار المطلق للمجلد المفهرس
+
+    لا يُكتب شيء داخل مجلد الصور: قد يكون للقراءة فقط (مشاركة شبكية) أو بيانات عميل.
+    """
+    root = os.path.abspath(os.fspath(directory))
+    cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    key = hashlib.sha1(root.encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+    return Path(cache) / 'image_index' / key / 'index.db'
+
+# أعمدة أُضيفت بعد الإصدار الأول من المخطط (تُضاف للقواعد القديمة عند الفتح)
+_ADDED_COLUMNS = (('channels', 'INTEGER'), ('bit_depth', 'INTEGER'), ('dpi_x', 'REAL'),
+                  ('dpi_y', 'REAL'), ('pages', 'INTEGER'))
+
+def _hash_contents(path: str) -> Optional[str]:
+    """بصمة محتوى الملف"""
+    digest = hashlib.sha1()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def _list_directory(directory: str, known_mtime: Optional[int], extensions: frozenset):
+    """
+    فحص مجلد واحد: stat للمجلد فقط إذا لم يتغير، وإلا قراءة محتواه
+
+    Returns:
+        tuple: (mtime_ns أو None إذا اختفى المجلد، قائمة الصور أو None إذا لم يتغير، المجلدات الفرعية)
+    """
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+    except OSError:
+        return None, None, []
+    if known_mtime is not None and mtime_ns == known_mtime:
+        return mtime_ns, None, []
+
+    images = []
+    subdirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != INDEX_DIRNAME:
+                            subdirs.append(entry.path)
+                    elif (os.path.splitext(entry.name)[1].lower() in extensions
+                          and entry.is_file()):
+                        stat = entry.stat()
+                        images.append((entry.path, entry.name, stat.st_size, stat.st_mtime_ns))
+                except OSError:
+                    continue
+    except OSError:
+        return None, None, []
+    return mtime_ns, images, subdirs
+
+class FileIndex:
+    """
+    فهرس SQLite للصور مع الحجم وتاريخ التعديل والأبعاد وبصمة المحتوى
+
+    التحديث تزايدي: يُقرأ محتوى المجلد فقط إذا تغير mtime الخاص به (إضافة أو
+    حذف أو إعادة تسمية)، وإلا يُكتفى بـ stat واحد للمجلد. التعديل داخل ملف
+    موجود لا يغير mtime المجلد، لذا استخدم refresh(full=True) لإعادة فحص كاملة.
+    """
+
+    def __init__(self, db_path, timeout: float = 30.0):
+        """
+        Args:
+            db_path: مسار قاعدة البيانات
+            timeout: مهلة انتظار أقفال القاعدة (ثانية)
+        """
+        self.db_path = str(db_path)
+        self.logger = logging.getLogger(__name__)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path, timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=wal")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(files)")}
+        with self.connection:
+            for name, kind in _ADDED_COLUMNS:
+                if name not in columns:
+                    self.connection.execute(f"ALTER TABLE files ADD COLUMN {name} {kind}")
+
+    @classmethod
+    def for_directory(cls, directory, db_path=None) -> 'FileIndex':
+        """فتح فهرس المجلد (افتراضياً في مجلد التخزين المؤقت للمستخدم)"""
+        return cls(db_path or default_index_path(directory))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def refresh(self, directory, recursive: bool = True, extensions: Iterable[str] = SUPPORTED_FORMATS,
+                workers: int = DEFAULT_DISCOVERY_WORKERS, probe_dimensions: bool = True,
+                hash_contents: bool = False, full: bool = False) -> Dict[str, int]:
+        """
+        تحديث الفهرس لمجلد
+
+        Args:
+            directory: المجلد الجذر
+            recursive: فهرسة المجلدات الفرعية
+            extensions: الامتدادات المقبولة
+            workers: عدد خيوط الفحص
+            probe_dimensions: قراءة الأبعاد من ترويسة الصور الجديدة أو المعدلة
+            hash_contents: حساب بصمة محتوى الصور الجديدة أو المعدلة
+            full: تجاهل mtime المجلدات وإعادة قراءة كل شيء
+
+        Returns:
+            dict: إحصائيات التحديث (directories_scanned, added, updated, removed)
+        """
+        root = os.path.abspath(os.fspath(directory))
+        extensions = frozenset(ext.lower() for ext in extensions)
+        stats = {'directories_scanned': 0, 'directories_skipped': 0, 'added': 0, 'updated': 0, 'removed': 0}
+        start = time.time()
+
+        known = {}
+        children = {}
+        for path, parent, mtime_ns in self.connection.execute(
+                "SELECT path, parent, mtime_ns FROM directories WHERE path = ? OR path > ? AND path < ?",
+                (root, root + os.sep, root + chr(ord(os.sep) + 1))):
+            known[path] = None if full else mtime_ns
+            children.setdefault(parent, []).append(path)
+
+        seen = set()
+        changed = []
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            def submit(path, parent):
+                seen.add(path)
+                future = executor.submit(_list_directory, path, known.get(path), extensions)
+                pending[future] = (path, parent)
+
+            pending = {}
+            submit(root, None)
+            with self.connection:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path, parent = pending.pop(future)
+                        mtime_ns, images, subdirs = future.result()
+                        if mtime_ns is None:
+                            seen.discard(path)
+                            continue
+
+                        if images is None:
+                            # المجلد لم يتغير: المجلدات الفرعية من الفهرس
+                            stats['directories_skipped'] += 1
+                            subdirs = children.get(path, []) if recursive else []
+                        else:
+                            stats['directories_scanned'] += 1
+                            changed.extend(self._update_directory(path, images, stats))
+                            # المجلد المعدل للتو قد يتغير مجدداً دون تغير mtime، والمسح غير
+                            # التكراري لا يسجل المجلدات الفرعية، لذا يُعاد قراءتهما لاحقاً
+                            if not recursive:
+                                subdirs = []
+                                mtime_ns = None
+                            elif time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+                                mtime_ns = None
+                            self.connection.execute(
+                                "INSERT OR REPLACE INTO directories (path, parent, mtime_ns) VALUES (?, ?, ?)",
+                                (path, parent, mtime_ns)
+                            )
+
+                        for subdir in subdirs:
+                            submit(subdir, path)
+
+                if recursive:
+                    for path in set(known) - seen:
+                        self._remove_directory(path, stats)
+
+            if changed and (probe_dimensions or hash_contents):
+                self._update_metadata(executor, changed, probe_dimensions, hash_contents)
+
+        stats['elapsed'] = time.time() - start
+        self.logger.info(
+            f"تحديث الفهرس {root}: {stats['directories_scanned']} مجلد مقروء، "
+            f"{stats['directories_skipped']} دون تغيير، +{stats['added']} ~{stats['updated']} "
+            f"-{stats['removed']} خلال {stats['elapsed']:.2f} ثانية"
+        )
+        return stats
+
+    def _update_directory(self, directory: str, images: List[Tuple], stats: Dict) -> List[Tuple]:
+        """مزامنة صور مجلد واحد وإرجاع (المسار، الحجم، تاريخ التعديل) للصور الجديدة أو المعدلة"""
+        existing = {
+            path: (size, mtime_ns) for path, size, mtime_ns in self.connection.execute(
+                "SELECT path, size, mtime_ns FROM files WHERE dir = ?", (directory,))
+        }
+        changed = []
+        for path, name, size, mtime_ns in images:
+            previous = existing.pop(path, None)
+            if previous == (size, mtime_ns):
+                continue
+            stats['updated' if previous else 'added'] += 1
+            changed.append((path, size, mtime_ns))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files (path, dir, name, extension, size, mtime_ns) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (path, directory, name, os.path.splitext(name)[1].lower(), size, mtime_ns)
+            )
+        if existing:
+            stats['removed'] += len(existing)
+            self.connection.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in existing))
+        return changed
+
+    def _remove_directory(self, directory: str, stats: Dict):
+        """حذف مجلد اختفى من القرص مع صوره"""
+        cursor = self.connection.execute("DELETE FROM files WHERE dir = ?", (directory,))
+        stats['removed'] += cursor.rowcount
+        self.connection.execute("DELETE FROM directories WHERE path = ?", (directory,))
+
+    def _update_metadata(self, executor, images: List[Tuple], probe_dimensions: bool, hash_contents: bool):
+        """قراءة معلومات الترويسة وبصمة المحتوى بالتوازي للصور الجديدة أو المعدلة"""
+        def probe(image):
+            path, size, mtime_ns = image
+            info = probe_image(path, size, mtime_ns) if probe_dimensions else None
+            content_hash = _hash_contents(path) if hash_contents else None
+            if info is None:
+                return None, None, None, None, None, None, None, content_hash, path
+            return (info.width, info.height, info.channels, info.bit_depth, info.dpi_x, info.dpi_y,
+                    info.pages, content_hash, path)
+
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE files SET width = ?, height = ?, channels = ?, bit_depth = ?, dpi_x = ?, "
+                "dpi_y = ?, pages = ?, content_hash = ? WHERE path = ?",
+                executor.map(probe, images)
+            )
+
+    def query(self, directory=None, recursive: bool = True, pattern: Optional[str] = None,
+              min_size: Optional[int] = None, max_size: Optional[int] = None,
+              start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+              min_width: Optional[int] = None, max_width: Optional[int] = None,
+              min_height: Optional[int] = None, max_height: Optional[int] = None,
+              extensions: Optional[Iterable[str]] = None,
+              limit: Optional[int] = None) -> List[IndexedImage]:
+        """
+        اختيار الصور من الفهرس باستعلام SQL
+
+        Args:
+            directory: تقييد النتائج بمجلد (وفروعه عند recursive)
+            pattern: جزء من اسم الملف (دون تمييز حالة الأحرف اللاتينية)
+            min_size / max_size: حدود الحجم بالبايت
+            start_date / end_date: حدود تاريخ التعديل
+            min_width / max_width / min_height / max_height: حدود الأبعاد
+            extensions: الامتدادات المقبولة
+            limit: الحد الأقصى للنتائج
+
+        Returns:
+            List[IndexedImage]: الصور المطابقة مرتبة حسب المسار
+        """
+        clause, params = self._where(directory, recursive, pattern, min_size, max_size, start_date,
+                                     end_date, min_width, max_width, min_height, max_height,
+                                     extensions, limit)
+        sql = "SELECT path, size, mtime_ns, width, height, content_hash, dpi_x, pages FROM files" + clause
+        return [IndexedImage(*row) for row in self.connection.execute(sql, params)]
+
+    def select(self, directory=None, recursive: bool = True, pattern: Optional[str] = None,
+               min_size: Optional[int] = None, max_size: Optional[int] = None,
+               start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+               min_width: Optional[int] = None, max_width: Optional[int] = None,
+               min_height: Optional[int] = None, max_height: Optional[int] = None,
+               extensions: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> List[Path]:
+        """مثل query لكن يُرجع المسارات فقط"""
+        clause, params = self._where(directory, recursive, pattern, min_size, max_size, start_date,
+                                     end_date, min_width, max_width, min_height, max_height,
+                                     extensions, limit)
+        return [Path(row[0]) for row in self.connection.execute("SELECT path FROM files" + clause, params)]
+
+    def select_matching(self, query, directory=None, recursive: bool = True,
+                        extensions: Optional[Iterable[str]] = None,
+                        limit: Optional[int] = None) -> List[Path]:
+        """
+        اختيار الصور المطابقة لاستعلام SelectionQuery بشرط SQL واحد
+
+        Returns:
+            List[Path]: الصور المطابقة مرتبة حسب المسار
+        """
+        clause, params = self._where(directory, recursive, None, None, None, None, None, None,
+                                     None, None, None, extensions, limit, where=query.to_sql())
+        return [Path(row[0]) for row in self.connection.execute("SELECT path FROM files" + clause, params)]
+
+    def _where(self, directory, recursive, pattern, min_size, max_size, start_date, end_date,
+               min_width, max_width, min_height, max_height, extensions, limit, where=None):
+        """بناء شروط الاستعلام وترتيبه"""
+        conditions = []
+        params = []
+
+        if directory is not None:
+            root = os.path.abspath(os.fspath(directory))
+            upper = root + chr(ord(os.sep) + 1)
+            if recursive:
+                # إذا كان الفهرس كله تحت هذا المجلد فالشرط لا يستبعد شيئاً، وتركه يسمح
+                # لـ SQLite باستخدام فهارس الحجم والتاريخ بدلاً من مسح نطاق المسار كاملاً
+                outside = self.connection.execute(
+                    "SELECT 1 FROM directories WHERE path < ? OR path >= ? LIMIT 1", (root, upper)
+                ).fetchone()
+                if outside is not None:
+                    # نطاق على المفتاح الأساسي بدلاً من LIKE
+                    conditions.append("path > ? AND path < ?")
+                    params += [root + os.sep, upper]
+            else:
+                conditions.append("dir = ?")
+                params.append(root)
+        if pattern:
+            escaped = pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        ranged = False
+        for column, operator, value in (
+                ('size', '>=', min_size), ('size', '<=', max_size),
+                ('mtime_ns', '>=', int(start_date.timestamp() * 1e9) if start_date else None),
+                ('mtime_ns', '<=', int(end_date.timestamp() * 1e9) if end_date else None),
+                ('width', '>=', min_width), ('width', '<=', max_width),
+                ('height', '>=', min_height), ('height', '<=', max_height)):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+                ranged = True
+        if extensions:
+            extensions = [ext.lower() for ext in extensions]
+            conditions.append(f"extension IN ({', '.join('?' * len(extensions))})")
+            params += extensions
+        if where is not None:
+            conditions.append(where[0])
+            params += where[1]
+            ranged = True
+
+        clause = ""
+        if conditions:
+            clause += " WHERE " + " AND ".join(conditions)
+        # مع شرط نطاق يُمنع استخدام المفتاح الأساسي للترتيب (+path) فيبحث SQLite
+        # في فهرس العمود ثم يرتب النتائج، بدلاً من مسح الجدول كاملاً بترتيب المسار
+        clause += " ORDER BY +path" if ranged else " ORDER BY path"
+        if limit is not None:
+            clause += " LIMIT ?"
+            params.append(limit)
+        return clause, params
+
+    def count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+def main():
+    """الدالة الرئيسية"""
+    parser = argparse.ArgumentParser(description='فهرس ملفات الصور')
+    parser.add_argument('--db', help='مسار قاعدة الفهرس (افتراضياً في ~/.cache/image_index)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    refresh = subparsers.add_parser('refresh', help='بناء الفهرس أو تحديثه')
+    refresh.add_argument('directory', help='مجلد الصور')
+    refresh.add_argument('--no-recursive', action='store_true', help='عدم فهرسة المجلدات الفرعية')
+    refresh.add_argument('--hash', action='store_true', help='حساب بصمة محتوى الصور')
+    refresh.add_argument('--no-dimensions', action='store_true', help='عدم قراءة أبعاد الصور')
+    refresh.add_argument('--full', action='store_true', help='إعادة فحص كاملة')
+
+    query = subparsers.add_parser('query', help='اختيار الصور من الفهرس')
+    query.add_argument('directory', help='مجلد الصور')
+    query.add_argument('-p', '--pattern', help='جزء من اسم الملف')
+    query.add_argument('--min-size', type=int, help='الحد الأدنى للحجم (بايت)')
+    query.add_argument('--max-size', type=int, help='الحد الأقصى للحجم (بايت)')
+    query.add_argument('--min-width', type=int, help='الحد الأدنى للعرض')
+    query.add_argument('--min-height', type=int, help='الحد الأدنى للارتفاع')
+    query.add_argument('--limit', type=int, help='الحد الأقصى للنتائج')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    with FileIndex.for_directory(args.directory, args.db) as index:
+        if args.command == 'refresh':
+            stats = index.refresh(args.directory, recursive=not args.no_recursive,
+                                  probe_dimensions=not args.no_dimensions,
+                                  hash_contents=args.hash, full=args.full)
+            print(f"Indexed images: {index.count()} ({stats})")
+        else:
+            start = time.perf_counter()
+            paths = index.select(args.directory, pattern=args.pattern, min_size=args.min_size,
+                                 max_size=args.max_size, min_width=args.min_width,
+                                 min_height=args.min_height, limit=args.limit)
+            elapsed = time.perf_counter() - start
+            for path in paths:
+                print(path)
+            print(f"{len(paths)} images in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
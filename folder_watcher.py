@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مراقبة مجلد ومعالجة الصور الجديدة تلقائياً
+Watch-Folder Daemon with Incremental Processing
+"""
+
+import os
+import sys
+import json
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set, Tuple
+from image_discovery import walk_images, SUPPORTED_FORMATS
+
+# ثوابت inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+class InotifySource:
+    """مصدر أحداث inotify (Linux) عبر ctypes دون مكتبات إضافية"""
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+
+    def __init__(self, directory: Path, recursive: bool = True):
+        self.directory = Path(directory)
+        self.recursive = recursive
+        self.logger = logging.getLogger(__name__)
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._watches = {}
+        self._add_tree(self.directory)
+
+    @staticmethod
+    def available() -> bool:
+        return sys.platform.startswith('linux') and ctypes.util.find_library('c') is not None
+
+    def _add_watch(self, directory: Path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), self.MASK)
+        if wd < 0:
+            self.logger.warning(f"تعذرت مراقبة المجلد {directory}: {os.strerror(ctypes.get_errno())}")
+            return
+        self._watches[wd] = directory
+
+    def _add_tree(self, directory: Path):
+        self._add_watch(directory)
+        if not self.recursive:
+            return
+        for root, dirs, _ in os.walk(directory):
+            for name in dirs:
+                self._add_watch(Path(root) / name)
+
+    def wait(self, timeout: Optional[float]) -> Optional[Set[Path]]:
+        """
+        انتظار الأحداث
+
+        Returns:
+            Optional[Set[Path]]: المسارات المتغيرة، أو None عند الحاجة لإعادة فحص كاملة
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                return None
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    # الملفات التي أُنشئت قبل إضافة المراقبة تُلتقط بفحص المجلد الجديد
+                    self._add_tree(path)
+                    changed.update(Path(image.path) for image in
+                                   walk_images(path, with_stat=False, workers=1))
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingSource:
+    """مصدر بديل: مقارنة لقطات المجلد كل فترة"""
+
+    def __init__(self, directory: Path, recursive: bool = True, interval: float = 2.0):
+        self.directory = Path(directory)
+        self.recursive = recursive
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        stack = [self.directory]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive:
+                                stack.append(entry.path)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            snapshot[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+                    except OSError:
+                        continue
+        return snapshot
+
+    def wait(self, timeout: Optional[float]) -> Optional[Set[Path]]:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {path for path, signature in snapshot.items() if self._snapshot.get(path) != signature}
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+class FolderWatcher:
+    """
+    مراقبة مجلد ساخن ومعالجة الصور الجديدة أو المعدلة فقط
+
+    يُنتظر حتى يستقر حجم الملف وتاريخ تعديله لمدة settle_seconds قبل المعالجة
+    (لتجنب الملفات قيد الكتابة)، وتُحفظ حالة الصور المعالجة في ملف JSONL
+    فلا يُعاد معالجتها بعد إعادة التشغيل. العمال يبقون جاهزين بين الدفعات.
+    """
+
+    def __init__(self, processor, input_dir, output_dir=None, recursive: bool = True,
+                 save_enhanced: bool = True, settle_seconds: float = 2.0,
+                 poll_interval: float = 2.0, state_file=None, use_inotify: Optional[bool] = None):
+        """
+        Args:
+            processor: معالج يوفر process_single_image (مثل BatchProcessor)، ويُستدعى
+                write_shard(result) إن وفرها قبل تسجيل كل نتيجة
+            input_dir: المجلد المراقب
+            output_dir: مجلد الحفظ
+            recursive: مراقبة المجلدات الفرعية
+            save_enhanced: حفظ الصور المحسنة
+            settle_seconds: مدة استقرار الملف قبل معالجته (ثانية)
+            poll_interval: فترة الفحص في وضع polling (ثانية)
+            state_file: ملف حالة الصور المعالجة (افتراضياً داخل مجلد الإخراج)
+            use_inotify: فرض استخدام inotify أو polling (افتراضياً تلقائي)
+        """
+        self.processor = processor
+        self.input_dir = Path(input_dir)
+        self.output_dir = Path(output_dir) if output_dir else None
+        # مجلد الإخراج قد يقع داخل المجلد المراقب: مخرجاته لا تُعامل كصور جديدة
+        self._output_root = self.output_dir.resolve() if self.output_dir else None
+        self.recursive = recursive
+        self.save_enhanced = save_enhanced
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger(__name__)
+
+        if state_file is None:
+            state_dir = self.output_dir or self.input_dir
+            state_file = state_dir / '.watch_state.jsonl'
+        self.state_file = Path(state_file)
+        self.results_file = (self.output_dir or self.input_dir) / 'watch_results.jsonl'
+
+        if use_inotify is None:
+            use_inotify = InotifySource.available()
+        self.use_inotify = use_inotify
+
+        self.processed = self._load_state()
+        self.pending = {}
+        self.in_flight = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=getattr(processor, 'max_workers', 4))
+
+    def _load_state(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        if self.state_file.exists():
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        state[entry['path']] = (entry['size'], entry['mtime_ns'])
+        return state
+
+    def _is_image(self, path: Path) -> bool:
+        if path.suffix.lower() not in SUPPORTED_FORMATS or path.name.startswith('.'):
+            return False
+        return self._output_root is None or not path.resolve().is_relative_to(self._output_root)
+
+    def _catch_up(self):
+        """إضافة الصور الموجودة التي لم تُعالج بعد (عند البدء أو بعد فقد أحداث)"""
+        for image in walk_images(self.input_dir, self.recursive, SUPPORTED_FORMATS, with_stat=False):
+            path = Path(image.path)
+            if self._is_image(path):
+                self.pending.setdefault(path, None)
+
+    def _check_pending(self):
+        """إرسال الملفات التي استقرت ولم تُعالج بنسختها الحالية"""
+        now = time.monotonic()
+        for path in list(self.pending):
+            try:
+                stat = path.stat()
+            except OSError:
+                del self.pending[path]
+                continue
+
+            signature = (stat.st_size, stat.st_mtime_ns)
+            record = self.pending[path]
+            if record is None or record[0] != signature:
+                self.pending[path] = (signature, now)
+                continue
+            if now - record[1] < self.settle_seconds:
+                continue
+
+            del self.pending[path]
+            key = str(path)
+            with self._lock:
+                if self.processed.get(key) == signature or key in self.in_flight:
+                    continue
+                self.in_flight.add(key)
+            future = self.executor.submit(self.processor.process_single_image, path,
+                                          self.output_dir, self.save_enhanced)
+            future.add_done_callback(lambda f, key=key, signature=signature: self._on_done(key, signature, f))
+
+    def _on_done(self, key: str, signature: Tuple[int, int], future):
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {'image_path': key, 'status': 'failed', 'error': str(e), 'processing_time': 0}
+
+        # الصورة المرمزة للأجزاء (output_format="shards") تُكتب قبل تسجيل النتيجة؛
+        # البايتات لا تدخل سطر JSON أبداً
+        write_shard = getattr(self.processor, 'write_shard', None)
+        try:
+            if write_shard is not None:
+                write_shard(result)
+        except Exception as e:
+            result = {'image_path': key, 'status': 'failed', 'error': str(e), 'processing_time': 0}
+        result.pop('enhanced_data', None)
+
+        with self._lock:
+            self.in_flight.discard(key)
+            if self.results_file.parent.exists():
+                with open(self.results_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(result, ensure_ascii=False, default=_json_default) + '\n')
+            if result.get('status') == 'success':
+                self.processed[key] = signature
+                with open(self.state_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'path': key, 'size': signature[0], 'mtime_ns': signature[1]}) + '\n')
+
+        self.logger.info(f"[watch] {result.get('status')}: {key}")
+
+    def run(self):
+        """تشغيل المراقبة حتى استدعاء stop()"""
+        if self.output_dir:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+
+        if self.use_inotify:
+            source = InotifySource(self.input_dir, self.recursive)
+            self.logger.info(f"مراقبة {self.input_dir} باستخدام inotify")
+        else:
+            source = PollingSource(self.input_dir, self.recursive, self.poll_interval)
+            self.logger.info(f"مراقبة {self.input_dir} بالفحص الدوري كل {self.poll_interval} ثانية")
+
+        self._catch_up()
+        try:
+            while not self._stop_event.is_set():
+                # بدون ملفات معلقة ينتظر inotify الحدث التالي دون استهلاك المعالج
+                if self.pending:
+                    timeout = self.settle_seconds / 2
+                elif self.use_inotify:
+                    timeout = 1.0
+                else:
+                    timeout = None
+
+                changed = source.wait(timeout)
+                if changed is None:
+                    self.logger.warning("فقدت بعض الأحداث، إعادة فحص المجلد")
+                    self._catch_up()
+                else:
+                    for path in changed:
+                        if self._is_image(path):
+                            self.pending[path] = None
+                self._check_pending()
+        finally:
+            source.close()
+            self.executor.shutdown(wait=True)
+
+    def stop(self):
+        """إيقاف المراقبة"""
+        self._stop_event.set()
+
+def _json_default(value):
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
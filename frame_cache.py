@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+تخزين مؤقت للإطارات الرمادية المفكوكة بملفات .npy تُفتح بربط الذاكرة
+Memory-Mapped Decoded-Frame Cache
+"""
+
+import os
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+from archive_input import ARCHIVE_SEPARATOR, read_archive_member, split_archive_path
+from document_pages import split_page_path, stat_image
+
+DEFAULT_CACHE_BYTES = 4 * 1024 * 1024 * 1024
+# الإخلاء ينزل بالحجم إلى هذه النسبة من الحد حتى لا يتكرر مع كل إضافة
+_EVICT_TO = 0.9
+_HASH_CHUNK = 1024 * 1024
+
+class FrameCache:
+    """
+    إطار رمادي (uint8) لكل صورة في ملف .npy مفتاحه بصمة محتوى المصدر
+
+    الملفات تُقرأ بـ np.load(mmap_mode='r') فلا يُفك أي ترميز عند إعادة التشغيل،
+    وتتشارك العمليات الصفحات نفسها عبر ذاكرة نظام التشغيل. الكتابة ذرية (ملف مؤقت
+    ثم os.replace) فيمكن لعدة عمليات استخدام المجلد نفسه. عند تجاوز الحد الأقصى
+    تُحذف الإطارات الأقدم استخداماً (تاريخ التعديل يُحدث عند كل إصابة).
+    """
+
+    def __init__(self, directory, max_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        Args:
+            directory: مجلد التخزين المؤقت
+            max_bytes: الحد الأقصى لحجم الإطارات المخزنة
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._keys: Dict[Tuple[str, int, int], str] = {}
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def __getstate__(self):
+        # القفل لا يُنقل بين العمليات؛ كل عملية تحسب حجم المجلد من جديد
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_keys'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _entries(self):
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith('.npy'):
+                        yield entry
+
+    def source_key(self, image_path) -> str:
+        """
+        بصمة محتوى المصدر (blake2b)؛ صفحات المستند تضيف رقم الصفحة
+
+        البصمة تُحفظ في الذاكرة حسب (المسار، الحجم، تاريخ التعديل) فلا يُقرأ
+        المستند مرة لكل صفحة.
+        """
+        path = os.fspath(image_path)
+        parts = split_page_path(path)
+        document = parts[0] if parts else path
+        signature = (document,) + stat_image(document)
+        key = self._keys.get(signature)
+        if key is None:
+            digest = hashlib.blake2b(digest_size=16)
+            if ARCHIVE_SEPARATOR in document and split_archive_path(document) is not None:
+                digest.update(read_archive_member(document))
+            else:
+                with open(document, 'rb') as f:
+                    for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                        digest.update(chunk)
+            key = self._keys[signature] = digest.hexdigest()
+        return f"{key}-p{parts[1]}" if parts else key
+
+    def _frame_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.npy"
+
+    def get(self, image_path) -> Optional[np.ndarray]:
+        """الإطار المخزن (مصفوفة للقراءة فقط مربوطة بالملف) أو None"""
+        frame_path = self._frame_path(self.source_key(image_path))
+        try:
+            frame = np.load(frame_path, mmap_mode='r')
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(frame_path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return frame
+
+    def put(self, image_path, frame: np.ndarray) -> None:
+        """تخزين إطار (كتابة ذرية ثم إخلاء الأقدم عند تجاوز الحد)"""
+        frame_path = self._frame_path(self.source_key(image_path))
+        frame_path.parent.mkdir(exist_ok=True)
+        temporary = frame_path.with_name(f".{frame_path.name}.{os.getpid()}.{threading.get_ident()}")
+        with open(temporary, 'wb') as f:
+            np.save(f, np.ascontiguousarray(frame), allow_pickle=False)
+        os.replace(temporary, frame_path)
+        with self._lock:
+            self._size += frame_path.stat().st_size
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def get_or_decode(self, image_path, decode: Callable[[], Optional[np.ndarray]]) -> Optional[np.ndarray]:
+        """الإطار من التخزين المؤقت، أو فك ترميزه بـ decode وتخزينه"""
+        frame = self.get(image_path)
+        if frame is not None:
+            return frame
+        frame = decode()
+        if frame is not None:
+            self.put(image_path, frame)
+        return frame
+
+    def evict(self, target_bytes: Optional[int] = None) -> int:
+        """
+        حذف الإطارات الأقدم استخداماً حتى ينزل الحجم إلى target_bytes
+
+        Returns:
+            int: عدد الإطارات المحذوفة
+        """
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * _EVICT_TO)
+        with self._lock:
+            # المجلد قد تشاركه عمليات أخرى؛ الحجم الفعلي من القرص
+            entries = []
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            size = sum(entry[1] for entry in entries)
+            removed = 0
+            for _, entry_size, path in sorted(entries):
+                if size <= target_bytes:
+                    break
+                try:
+                    # الحذف آمن حتى لو كانت عملية أخرى تقرأ الإطار (الربط يبقى صالحاً)
+                    os.unlink(path)
+                except OSError:
+                    continue
+                size -= entry_size
+                removed += 1
+            self._size = size
+            self.evictions += removed
+        return removed
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'frame_cache_hits': self.hits, 'frame_cache_misses': self.misses,
+                    'frame_cache_evictions': self.evictions, 'frame_cache_bytes': self._size}
+
+def main():
+    """الدالة الرئيسية"""
+    parser = argparse.ArgumentParser(description='إدارة التخزين المؤقت للإطارات المفكوكة')
+    parser.add_argument('directory', help='مجلد التخزين المؤقت')
+    parser.add_argument('--max-size', type=float, help='تقليص التخزين إلى هذا الحجم (MB)')
+    args = parser.parse_args()
+
+    cache = FrameCache(args.directory)
+    if args.max_size is not None:
+        removed = cache.evict(int(args.max_size * 1024 * 1024))
+        print(f"تم حذف {removed} إطار")
+    print(f"حجم التخزين المؤقت: {cache.size / (1024 * 1024):.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ import threading
 import os
 from pathlib import Path
 from image_enhancer import ImageEnhancer
+from binary_image import write_enhanced_image
 
 class ImageEnhancerGUI:
     def __init__(self, root):
@@ -302,7 +303,7 @@ class ImageEnhancerGUI:
         
         if file_path:
             try:
-                cv2.imwrite(file_path, self.enhanced_image)
+                write_enhanced_image(file_path, self.enhanced_image)
                 messagebox.showinfo("نجح", f"تم حفظ الصورة في: {file_path}")
                 self.status_label.config(text=f"تم حفظ الصورة: {Path(file_path).name}")
             except Exception as e:
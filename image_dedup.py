@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اكتشاف الصور شبه المتطابقة ببصمة إدراكية وشجرة BK
+Perceptual-Hash Near-Duplicate Detection With a BK-Tree
+"""
+
+import argparse
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import cv2
+import numpy as np
+
+DEFAULT_MAX_DISTANCE = 4
+# تأكيد المرشحين: الضلع الأطول لإطار المقارنة، وأقصى متوسط فرق رمادي في كتلة 8×8
+VERIFY_SIZE = 512
+VERIFY_MAX_DIFF = 16
+_VERIFY_BLOCK = 8
+
+def dhash(gray: np.ndarray, size: int = 8) -> int:
+    """
+    بصمة الفروق (dHash): مقارنة كل بكسل بجاره في صورة مصغرة (size+1)×size
+
+    Returns:
+        int: بصمة من size*size بت
+    """
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def phash(gray: np.ndarray, size: int = 8) -> int:
+    """
+    البصمة الإدراكية (pHash): مقارنة معاملات DCT المنخفضة في صورة 32×32 بوسيطها
+
+    Returns:
+        int: بصمة من size*size بت
+    """
+    small = cv2.resize(gray, (size * 4, size * 4), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:size, :size].ravel()
+    # المعامل الثابت (السطوع العام) لا يدخل في الوسيط
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+HASH_METHODS: Dict[str, Callable[[np.ndarray], int]] = {'dhash': dhash, 'phash': phash}
+
+def verification_frame(gray: np.ndarray, size: int = VERIFY_SIZE) -> np.ndarray:
+    """إطار رمادي متوسط الحجم (الضلع الأطول size دون تكبير) لتأكيد تطابق البصمات"""
+    height, width = gray.shape[:2]
+    scale = min(1.0, size / max(height, width))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+    return cv2.GaussianBlur(gray, (3, 3), 0)
+
+def frames_match(a: np.ndarray, b: np.ndarray, max_diff: int = VERIFY_MAX_DIFF) -> bool:
+    """
+    مقارنة إطاري تأكيد كتلة كتلة
+
+    بصمة 64 بت لا تميز النص: فاتورتان بنفس القالب وأرقام مختلفة تتطابق بصمتاهما،
+    بينما يرفع الرقم المختلف متوسط فرق كتلته فوق ضوضاء إعادة الترميز.
+    """
+    if a.shape != b.shape:
+        # نفس الصفحة بدقة مسح أخرى قد تختلف ببكسل في التقريب؛ نسبة أبعاد مختلفة ليست نسخة
+        if abs(a.shape[0] / a.shape[1] - b.shape[0] / b.shape[1]) > 0.02 * a.shape[0] / a.shape[1]:
+            return False
+        b = cv2.resize(b, (a.shape[1], a.shape[0]), interpolation=cv2.INTER_AREA)
+    difference = cv2.absdiff(a, b)
+    height, width = difference.shape
+    blocks = cv2.resize(difference, (max(1, width // _VERIFY_BLOCK), max(1, height // _VERIFY_BLOCK)),
+                        interpolation=cv2.INTER_AREA)
+    return int(blocks.max()) <= max_diff
+
+def hamming(a: int, b: int) -> int:
+    # bin().count بدلاً من int.bit_count التي تتطلب Python 3.10+
+    return bin(a ^ b).count('1')
+
+class BKTree:
+    """
+    شجرة BK للبحث عن البصمات ضمن مسافة هامنغ محددة
+
+    كل عقدة تحفظ أبناءها حسب المسافة إليها، والبحث يتخطى الفروع خارج
+    [d - max_distance, d + max_distance] (متباينة المثلث) فلا يقارن كل البصمات.
+    """
+
+    def __init__(self):
+        self._root = None
+        self.size = 0
+
+    def add(self, value: int, item) -> None:
+        node = [value, item, {}]
+        self.size += 1
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            distance = hamming(value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, object]]:
+        """كل العناصر ضمن max_distance مرتبة حسب المسافة"""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node_value, item, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= max_distance:
+                found.append((distance, item))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(found, key=lambda entry: entry[0])
+
+    def nearest(self, value: int, max_distance: int) -> Optional[Tuple[int, object]]:
+        found = self.search(value, max_distance)
+        return found[0] if found else None
+
+class DuplicateDetector:
+    """
+    سجل البصمات للدفعة الجارية (آمن للاستخدام من عدة خيوط)
+
+    أول صورة بكل بصمة هي الأصل؛ الصورة التي تقع بصمتها ضمن max_distance من
+    أصل مسجل مرشحة فقط، وتُعد نسخة منه بعد تأكيد إطاريهما بـ frames_match. إطارات
+    الأصول تُحفظ مضغوطة PNG (صفحات النص تنضغط جيداً).
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE, method: str = 'dhash'):
+        if method not in HASH_METHODS:
+            raise ValueError(f"طريقة بصمة غير مدعومة: {method}")
+        self.max_distance = max_distance
+        self.method = method
+        self.duplicates = 0
+        self.rejected = 0
+        self._hash = HASH_METHODS[method]
+        self._tree = BKTree()
+        self._frames: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def image_hash(self, gray: np.ndarray) -> int:
+        return self._hash(gray)
+
+    def match_image(self, gray: np.ndarray, path: str) -> Optional[Tuple[str, int]]:
+        """البحث عن أصل للصورة الرمادية مع تأكيد المرشحين (انظر match_or_add)"""
+        return self.match_or_add(self.image_hash(gray), path, verification_frame(gray))
+
+    def match_or_add(self, image_hash: int, path: str,
+                     frame: Optional[np.ndarray] = None) -> Optional[Tuple[str, int]]:
+        """
+        البحث عن أصل قريب أو تسجيل الصورة كأصل
+
+        Args:
+            image_hash: بصمة الصورة
+            path: مسار الصورة
+            frame: إطار التأكيد (verification_frame)؛ بدونه تكفي البصمة وحدها
+
+        Returns:
+            Optional[Tuple[str, int]]: (مسار الأصل، المسافة) أو None إذا سُجلت كأصل جديد
+        """
+        with self._lock:
+            for distance, original in self._tree.search(image_hash, self.max_distance):
+                stored = self._frames.get(original)
+                if frame is not None and stored is not None and not frames_match(
+                        cv2.imdecode(np.frombuffer(stored, np.uint8), cv2.IMREAD_GRAYSCALE), frame):
+                    self.rejected += 1
+                    continue
+                self.duplicates += 1
+                return original, distance
+            self._tree.add(image_hash, path)
+            if frame is not None:
+                self._frames[path] = cv2.imencode('.png', frame)[1].tobytes()
+            return None
+
+    @property
+    def originals(self) -> int:
+        return self._tree.size
+
+def find_duplicates(paths: Iterable[str], max_distance: int = DEFAULT_MAX_DISTANCE,
+                    method: str = 'dhash') -> Dict[str, List[str]]:
+    """
+    تجميع الصور شبه المتطابقة (تُقرأ رمادية مصغرة بمعامل 2 حيث تدعم الصيغة ذلك)
+
+    Returns:
+        Dict[str, List[str]]: الأصل ← نسخه (للأصول التي لها نسخ فقط)
+    """
+    detector = DuplicateDetector(max_distance, method)
+    groups: Dict[str, List[str]] = {}
+    for path in paths:
+        gray = cv2.imread(str(path), cv2.IMREAD_REDUCED_GRAYSCALE_2)
+        if gray is None:
+            continue
+        match = detector.match_image(gray, str(path))
+        if match is not None:
+            groups.setdefault(match[0], []).append(str(path))
+    return groups
+
+def main():
+    """الدالة الرئيسية"""
+    from image_discovery import walk_images
+    parser = argparse.ArgumentParser(description='اكتشاف الصور شبه المتطابقة')
+    parser.add_argument('directory', help='مجلد الصور')
+    parser.add_argument('--distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                        help='أقصى مسافة هامنغ بين بصمتين متطابقتين (من 64 بت)')
+    parser.add_argument('--hash', choices=list(HASH_METHODS), default='dhash', help='نوع البصمة')
+    args = parser.parse_args()
+
+    groups = find_duplicates((image.path for image in walk_images(args.directory, with_stat=False)),
+                             args.distance, args.hash)
+    for original, copies in sorted(groups.items()):
+        print(original)
+        for copy in copies:
+            print(f"  = {copy}")
+    print(f"{sum(len(copies) for copies in groups.values())} نسخة من {len(groups)} صورة")
+
+if __name__ == "__main__":
+    main()
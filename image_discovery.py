@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اكتشاف الصور في المجلدات باستخدام os.scandir وعمال متوازيين
+Parallel scandir-Based Image Discovery
+"""
+
+import os
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+SUPPORTED_FORMATS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif')
+
+# المسح مقيد بزمن انتظار نظام الملفات (خاصة NFS) لا بالمعالج
+DEFAULT_DISCOVERY_WORKERS = 8
+
+logger = logging.getLogger(__name__)
+
+class DiscoveredImage(NamedTuple):
+    """صورة مكتشفة مع معلومات stat المخزنة (None إذا لم تُطلب)"""
+    path: str
+    size: Optional[int] = None
+    mtime_ns: Optional[int] = None
+
+def _scan_directory(directory: str, extensions: frozenset, recursive: bool,
+                    with_stat: bool) -> Tuple[List[DiscoveredImage], List[str]]:
+    """
+    مسح مجلد واحد
+
+    نوع المدخل يأتي من DirEntry (d_type) دون استدعاء stat، ولا يُستدعى
+    stat إلا للصور عند طلب الحجم وتاريخ التعديل.
+    """
+    images = []
+    subdirs = []
+    try:
+        entries = os.scandir(directory)
+    except OSError as e:
+        logger.warning(f"تعذر قراءة المجلد {directory}: {e}")
+        return images, subdirs
+
+    with entries:
+        for entry in entries:
+            try:
+                # الروابط الرمزية للمجلدات لا تُتبع لتجنب الحلقات
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        subdirs.append(entry.path)
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in extensions:
+                    continue
+                if not entry.is_file():
+                    continue
+                if with_stat:
+                    stat = entry.stat()
+                    images.append(DiscoveredImage(entry.path, stat.st_size, stat.st_mtime_ns))
+                else:
+                    images.append(DiscoveredImage(entry.path))
+            except OSError:
+                continue
+    # ترتيب كل مجلد على حدة يتيح بث النتائج مرتبة جزئياً قبل انتهاء المسح
+    images.sort()
+    subdirs.sort()
+    return images, subdirs
+
+def walk_images(directory, recursive: bool = True, extensions: Iterable[str] = SUPPORTED_FORMATS,
+                workers: int = DEFAULT_DISCOVERY_WORKERS,
+                with_stat: bool = True) -> Iterator[DiscoveredImage]:
+    """
+    اكتشاف الصور بمسح المجلدات الفرعية بالتوازي
+
+    Args:
+        directory: المجلد الجذر
+        recursive: البحث في المجلدات الفرعية
+        extensions: الامتدادات المقبولة
+        workers: عدد خيوط المسح (1 للمسح التسلسلي)
+        with_stat: قراءة الحجم وتاريخ التعديل لكل صورة
+
+    Yields:
+        DiscoveredImage: الصور بترتيب الاكتشاف (مرتبة داخل كل مجلد فقط)
+    """
+    root = os.fspath(directory)
+    extensions = frozenset(ext.lower() for ext in extensions)
+
+    if workers <= 1:
+        stack = [root]
+        while stack:
+            images, subdirs = _scan_directory(stack.pop(), extensions, recursive, with_stat)
+            stack.extend(reversed(subdirs))
+            yield from images
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_scan_directory, root, extensions, recursive, with_stat)}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    images, subdirs = future.result()
+                    for subdir in subdirs:
+                        pending.add(executor.submit(_scan_directory, subdir, extensions,
+                                                    recursive, with_stat))
+                    yield from images
+        finally:
+            # عند إيقاف المستهلك مبكراً لا تُمسح المجلدات المتبقية
+            for future in pending:
+                future.cancel()
+
+def find_images(directory, recursive: bool = True, extensions: Iterable[str] = SUPPORTED_FORMATS,
+                workers: int = DEFAULT_DISCOVERY_WORKERS) -> List[Path]:
+    """
+    البحث عن الصور وإرجاعها مرتبة
+
+    Returns:
+        List[Path]: مسارات الصور مرتبة
+    """
+    return sorted(Path(image.path) for image in
+                  walk_images(directory, recursive, extensions, workers, with_stat=False))
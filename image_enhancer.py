@@ -13,19 +13,91 @@ from skimage import filters, restoration, exposure
 import easyocr
 import pytesseract
 import os
+import json
+import hashlib
+import threading
 from pathlib import Path
 import argparse
+from archive_input import ARCHIVE_SEPARATOR, read_archive_member, split_archive_path
+from binary_image import BinaryImage, write_enhanced_image
+from document_pages import PAGE_SEPARATOR, load_page, split_page_path
 
 class ImageEnhancer:
-    def __init__(self):
-        """تهيئة معزز الصور"""
-        self.reader = easyocr.Reader(['ar', 'en'])  # دعم العربية والإنجليزية
-        
-    def load_image(self, image_path):
-        """تحميل الصورة"""
+    # إعدادات خط الأنابيب؛ أي تغيير في المعالجة يجب أن ينعكس هنا
+    # لأن البصمة الناتجة تُستخدم لتحديد النتائج السابقة القابلة لإعادة الاستخدام
+    PIPELINE_CONFIG = {
+        'version': 1,
+        'grayscale': 'COLOR_BGR2GRAY',
+        'denoise': {'gaussian': [3, 3], 'median': 3},
+        'clahe': {'clip_limit': 2.0, 'tile_grid': [8, 8]},
+        'threshold': {'method': 'adaptive', 'block_size': 11, 'c': 2},
+        'sharpen': [[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]],
+        'easyocr': {'languages': ['ar', 'en'], 'min_confidence': 0.5},
+        'tesseract': {'config': '--oem 3 --psm 6 -l ara+eng', 'min_confidence': 30}
+    }
+    
+    def __init__(self, lazy_reader=False, frame_cache=None):
+        """
+        تهيئة معزز الصور
+        
+        Args:
+            lazy_reader: تأجيل تحميل نموذج EasyOCR حتى أول استخدام
+                         (مفيد للعمال الذين يحسنون الصور فقط)
+            frame_cache: FrameCache اختياري تُحفظ فيه الإطارات الرمادية المفكوكة
+                         فتتخطى التشغيلات اللاحقة فك الترميز (انظر load_frame)
+        """
+        self.frame_cache = frame_cache
+        self._reader = None
+        self._reader_lock = threading.Lock()
+        if not lazy_reader:
+            self._reader = easyocr.Reader(['ar', 'en'])  # دعم العربية والإنجليزية
+    
+    @property
+    def reader(self):
+        """قارئ EasyOCR (يُحمّل عند أول استخدام في الوضع المؤجل)"""
+        if self._reader is None:
+            with self._reader_lock:
+                if self._reader is None:
+                    self._reader = easyocr.Reader(['ar', 'en'])
+        return self._reader
+
+    def __getstate__(self):
+        # القفل لا يُنقل بين العمليات
+        state = self.__dict__.copy()
+        del state['_reader_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reader_lock = threading.Lock()
+
+    def pipeline_fingerprint(self):
+        """بصمة إعدادات خط الأنابيب (تتغير عند تغيير أي مرحلة أو إعداد)"""
+        config = json.dumps(self.PIPELINE_CONFIG, sort_keys=True).encode('utf-8')
+        return hashlib.sha1(config).hexdigest()[:16]
+    
+    def load_image(self, image_path, data=None):
+        """
+        تحميل الصورة (ملف عادي أو archive!member يُفك ترميزه من الذاكرة دون استخراج،
+        أو صفحة واحدة doc.tif#page=N / doc.pdf#page=N من مستند متعدد الصفحات)
+        
+        Args:
+            image_path: مسار الصورة
+            data: بايتات الصورة المرمزة إن قُرئت مسبقاً (Prefetcher)؛ تُفك دون قراءة الملف
+        """
         try:
-            # تحميل الصورة باستخدام OpenCV
-            image = cv2.imread(image_path)
+            image_path = str(image_path)
+            if data is not None:
+                image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            elif (PAGE_SEPARATOR in image_path and split_page_path(image_path) is not None) \
+                    or image_path.lower().endswith('.pdf'):
+                image = load_page(image_path)
+            elif ARCHIVE_SEPARATOR in image_path and split_archive_path(image_path) is not None:
+                data = np.frombuffer(read_archive_member(image_path), dtype=np.uint8)
+                image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            else:
+                # تحميل الصورة باستخدام OpenCV
+                image = cv2.imread(image_path)
             if image is None:
                 raise ValueError(f"لا يمكن تحميل الصورة: {image_path}")
             return image
@@ -33,6 +105,25 @@ class ImageEnhancer:
             print(f"خطأ في تحميل الصورة: {e}")
             return None
     
+    def load_frame(self, image_path, data=None):
+        """
+        تحميل الإطار الرمادي للمعالجة (الخطوة الأولى في خط الأنابيب)
+        
+        مع frame_cache يُعاد الإطار المخزن مربوطاً بالذاكرة للقراءة فقط دون فك ترميز،
+        والنتيجة مطابقة لـ preprocess_image(load_image(path, data)).
+        """
+        def decode():
+            image = self.load_image(image_path, data)
+            return self.preprocess_image(image) if image is not None else None
+        
+        if self.frame_cache is None:
+            return decode()
+        try:
+            return self.frame_cache.get_or_decode(image_path, decode)
+        except OSError as e:
+            print(f"خطأ في التخزين المؤقت للإطارات: {e}")
+            return decode()
+    
     def preprocess_image(self, image):
         """معالجة أولية للصورة"""
         # تحويل إلى grayscale
@@ -93,8 +184,13 @@ class ImageEnhancer:
         
         return sharpened
     
-    def enhance_image_pipeline(self, image):
-        """خط أنابيب تحسين الصورة الكامل"""
+    def enhance_image_pipeline(self, image, packed=False):
+        """
+        خط أنابيب تحسين الصورة الكامل
+        
+        الناتج ثنائي (0/255) بعد thresholding، والتوضيح يحافظ على ذلك لأن مجموع
+        معاملات kernel يساوي 1. مع packed=True يُعاد BinaryImage (1 بت للبكسل).
+        """
         print("بدء معالجة الصورة...")
         
         # 1. معالجة أولية
@@ -117,7 +213,7 @@ class ImageEnhancer:
         processed = self.sharpen_image(processed)
         print("✓ توضيح الصورة")
         
-        return processed
+        return BinaryImage.from_array(processed) if packed else processed
     
     def extract_text_easyocr(self, image):
         """استخراج النص باستخدام EasyOCR"""
@@ -243,7 +339,7 @@ class ImageEnhancer:
     def save_enhanced_image(self, enhanced_image, output_path):
         """حفظ الصورة المحسنة"""
         try:
-            cv2.imwrite(output_path, enhanced_image)
+            write_enhanced_image(output_path, enhanced_image)
             print(f"✓ تم حفظ الصورة المحسنة في: {output_path}")
         except Exception as e:
             print(f"خطأ في حفظ الصورة: {e}")
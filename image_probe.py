@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قراءة أبعاد الصور ودقتها وعدد صفحاتها من الترويسة دون فك الترميز
+Header-Only Image Probing (PNG, JPEG, BMP, TIFF)
+"""
+
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional, Tuple
+from PIL import Image
+
+# حجم القراءة الأولى؛ يكفي لترويسة PNG وBMP وبداية JPEG وTIFF
+HEAD_BYTES = 4096
+CACHE_SIZE = 100_000
+_MAX_TIFF_PAGES = 100_000
+
+class ImageInfo(NamedTuple):
+    """معلومات الصورة من الترويسة"""
+    format: str
+    width: int
+    height: int
+    channels: Optional[int] = None
+    bit_depth: Optional[int] = None
+    dpi_x: Optional[float] = None
+    dpi_y: Optional[float] = None
+    pages: int = 1
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+    @property
+    def decoded_bytes(self) -> int:
+        """الذاكرة المتوقعة للصفحة الأولى بعد فك الترميز"""
+        bytes_per_sample = 2 if (self.bit_depth or 8) > 8 else 1
+        return self.pixels * (self.channels or 3) * bytes_per_sample
+
+    @property
+    def dpi(self) -> Optional[Tuple[float, float]]:
+        return (self.dpi_x, self.dpi_y) if self.dpi_x else None
+
+class ProbeError(ValueError):
+    """ترويسة غير صالحة أو صيغة غير مدعومة"""
+
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+
+def _round_dpi(value: float) -> Optional[float]:
+    return round(value, 2) if value and value > 0 else None
+
+def _probe_png(f, head: bytes) -> ImageInfo:
+    if len(head) < 33 or head[12:16] != b'IHDR':
+        raise ProbeError("PNG دون IHDR")
+    width, height, bit_depth, color_type = struct.unpack('>IIBB', head[16:26])
+    dpi_x = dpi_y = None
+
+    # pHYs يأتي قبل IDAT إن وُجد
+    offset = 33
+    f.seek(offset)
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        length, chunk_type = struct.unpack('>I4s', header)
+        if chunk_type in (b'IDAT', b'IEND'):
+            break
+        if chunk_type == b'pHYs' and length >= 9:
+            ppu_x, ppu_y, unit = struct.unpack('>IIB', f.read(9))
+            if unit == 1:
+                dpi_x, dpi_y = _round_dpi(ppu_x * 0.0254), _round_dpi(ppu_y * 0.0254)
+            break
+        offset += 12 + length
+        f.seek(offset)
+
+    return ImageInfo('PNG', width, height, _PNG_CHANNELS.get(color_type), bit_depth, dpi_x, dpi_y)
+
+def _parse_tiff(read: Callable[[int, int], bytes], count_pages: bool = True) -> dict:
+    """
+    تحليل TIFF (ملف أو كتلة EXIF داخل JPEG) عبر دالة قراءة (offset, size)
+
+    Returns:
+        dict: الوسوم المطلوبة وعدد الصفحات
+    """
+    header = read(0, 8)
+    if header[:4] == b'II*\x00':
+        endian = '<'
+    elif header[:4] == b'MM\x00*':
+        endian = '>'
+    else:
+        raise ProbeError("ترويسة TIFF غير صالحة")
+
+    def value_of(entry: bytes):
+        tag, kind, count = struct.unpack(endian + 'HHI', entry[:8])
+        size = _TIFF_TYPE_SIZES.get(kind, 1) * count
+        data = entry[8:12] if size <= 4 else read(struct.unpack(endian + 'I', entry[8:12])[0], size)
+        if kind == 3:
+            return tag, struct.unpack(endian + 'H', data[:2])[0]
+        if kind == 4:
+            return tag, struct.unpack(endian + 'I', data[:4])[0]
+        if kind == 5:
+            numerator, denominator = struct.unpack(endian + 'II', data[:8])
+            return tag, numerator / denominator if denominator else 0.0
+        if kind == 1:
+            return tag, data[0]
+        return tag, None
+
+    tags = {}
+    offset = struct.unpack(endian + 'I', header[4:8])[0]
+    pages = 0
+    visited = set()
+    while offset and offset not in visited and pages < _MAX_TIFF_PAGES:
+        visited.add(offset)
+        raw_count = read(offset, 2)
+        if len(raw_count) < 2:
+            break
+        count = struct.unpack(endian + 'H', raw_count)[0]
+        if pages == 0:
+            entries = read(offset + 2, count * 12)
+            for i in range(0, len(entries) - 11, 12):
+                tag, value = value_of(entries[i:i + 12])
+                if tag in (256, 257, 258, 277, 282, 283, 296):
+                    tags[tag] = value
+        pages += 1
+        if not count_pages:
+            break
+        next_offset = read(offset + 2 + count * 12, 4)
+        if len(next_offset) < 4:
+            break
+        offset = struct.unpack(endian + 'I', next_offset)[0]
+
+    tags['pages'] = max(pages, 1)
+    return tags
+
+def _resolution_dpi(tags: dict) -> Tuple[Optional[float], Optional[float]]:
+    unit = tags.get(296, 2)
+    scale = {2: 1.0, 3: 2.54}.get(unit)
+    if scale is None or 282 not in tags:
+        return None, None
+    return _round_dpi(tags[282] * scale), _round_dpi(tags.get(283, tags[282]) * scale)
+
+def _probe_tiff(f, head: bytes) -> ImageInfo:
+    def read(offset, size):
+        if offset + size <= len(head):
+            return head[offset:offset + size]
+        f.seek(offset)
+        return f.read(size)
+
+    tags = _parse_tiff(read)
+    if 256 not in tags or 257 not in tags:
+        raise ProbeError("TIFF دون أبعاد")
+    dpi_x, dpi_y = _resolution_dpi(tags)
+    return ImageInfo('TIFF', tags[256], tags[257], tags.get(277, 1), tags.get(258, 1),
+                     dpi_x, dpi_y, tags['pages'])
+
+def _probe_jpeg(f, head: bytes) -> ImageInfo:
+    dpi_x = dpi_y = None
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        if not byte:
+            break
+        if byte != b'\xff':
+            continue
+        marker = f.read(1)
+        while marker == b'\xff':
+            marker = f.read(1)
+        if not marker:
+            break
+        code = marker[0]
+        if code in (0x01, 0xD8) or 0xD0 <= code <= 0xD7:
+            continue
+        if code == 0xD9:
+            break
+        length = struct.unpack('>H', f.read(2))[0]
+
+        if code in _JPEG_SOF:
+            precision, height, width, components = struct.unpack('>BHHB', f.read(6))
+            return ImageInfo('JPEG', width, height, components, precision, dpi_x, dpi_y)
+
+        segment = f.read(length - 2)
+        if code == 0xE0 and segment[:5] == b'JFIF\x00' and len(segment) >= 12 and dpi_x is None:
+            units, density_x, density_y = struct.unpack('>BHH', segment[7:12])
+            scale = {1: 1.0, 2: 2.54}.get(units)
+            if scale and density_x:
+                dpi_x, dpi_y = _round_dpi(density_x * scale), _round_dpi(density_y * scale)
+        elif code == 0xE1 and segment[:6] == b'Exif\x00\x00':
+            exif = segment[6:]
+            try:
+                tags = _parse_tiff(lambda offset, size: exif[offset:offset + size], count_pages=False)
+            except (ProbeError, struct.error):
+                continue
+            exif_dpi = _resolution_dpi(tags)
+            if exif_dpi[0]:
+                dpi_x, dpi_y = exif_dpi
+    raise ProbeError("JPEG دون SOF")
+
+def _probe_bmp(f, head: bytes) -> ImageInfo:
+    header_size = struct.unpack('<I', head[14:18])[0]
+    if header_size == 12:
+        width, height, _, bit_count = struct.unpack('<HHHH', head[18:26])
+        dpi_x = dpi_y = None
+    else:
+        width, height, _, bit_count = struct.unpack('<iiHH', head[18:30])
+        ppm_x, ppm_y = struct.unpack('<ii', head[38:46])
+        dpi_x, dpi_y = _round_dpi(ppm_x * 0.0254), _round_dpi(ppm_y * 0.0254)
+    channels = bit_count // 8 if bit_count >= 24 else 1
+    return ImageInfo('BMP', abs(width), abs(height), channels,
+                     8 if bit_count >= 24 else bit_count, dpi_x, dpi_y)
+
+def _probe_with_pil(path: str) -> ImageInfo:
+    """بديل للصيغ الأخرى أو الترويسات غير المألوفة (PIL يقرأ الترويسة فقط أيضاً)"""
+    with Image.open(path) as image:
+        dpi = image.info.get('dpi') or (None, None)
+        return ImageInfo(image.format or '', image.width, image.height, len(image.getbands()), None,
+                         _round_dpi(float(dpi[0])) if dpi[0] else None,
+                         _round_dpi(float(dpi[1])) if dpi[1] else None,
+                         getattr(image, 'n_frames', 1))
+
+def read_image_header(path) -> ImageInfo:
+    """
+    قراءة معلومات الصورة من الترويسة دون تخزين مؤقت
+
+    Raises:
+        ProbeError: إذا تعذر التعرف على الصيغة
+        OSError: إذا تعذرت قراءة الملف
+    """
+    path = os.fspath(path)
+    with open(path, 'rb') as f:
+        head = f.read(HEAD_BYTES)
+        try:
+            if head[:8] == b'\x89PNG\r\n\x1a\n':
+                return _probe_png(f, head)
+            if head[:2] == b'\xff\xd8':
+                return _probe_jpeg(f, head)
+            if head[:4] in (b'II*\x00', b'MM\x00*'):
+                return _probe_tiff(f, head)
+            if head[:2] == b'BM' and len(head) >= 26:
+                return _probe_bmp(f, head)
+        except struct.error:
+            pass
+    try:
+        return _probe_with_pil(path)
+    except Exception as e:
+        raise ProbeError(f"تعذر قراءة ترويسة {path}: {e}")
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def probe_image(path, size: Optional[int] = None, mtime_ns: Optional[int] = None) -> Optional[ImageInfo]:
+    """
+    معلومات الصورة مع تخزين مؤقت حسب (المسار، الحجم، تاريخ التعديل)
+
+    يمكن تمرير الحجم وتاريخ التعديل المعروفين من الاكتشاف أو الفهرس لتجنب stat.
+
+    Returns:
+        Optional[ImageInfo]: المعلومات، أو None إذا تعذرت القراءة
+    """
+    path = os.fspath(path)
+    if size is None or mtime_ns is None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        size, mtime_ns = stat.st_size, stat.st_mtime_ns
+
+    signature = (size, mtime_ns)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == signature:
+            _cache.move_to_end(path)
+            return cached[1]
+
+    try:
+        info = read_image_header(path)
+    except (ProbeError, OSError):
+        info = None
+
+    with _cache_lock:
+        _cache[path] = (signature, info)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return info
+
+def clear_probe_cache():
+    """مسح التخزين المؤقت"""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختيار عينة عشوائية أو طبقية من الصور أثناء المسح دون الاحتفاظ بالقائمة كاملة
+Streaming Reservoir and Stratified Image Sampling
+"""
+
+import os
+import heapq
+import hashlib
+import random
+from itertools import count
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, TypeVar
+from image_discovery import DiscoveredImage
+
+T = TypeVar('T')
+
+def _size_bucket(image: DiscoveredImage) -> int:
+    """فئة الحجم: عدد خانات الحجم بالبايت (أقل من 100KB، حتى 1MB، حتى 10MB...)"""
+    size = image.size if image.size is not None else os.stat(image.path).st_size
+    return len(str(size))
+
+# معايير التقسيم إلى طبقات
+STRATA: Dict[str, Callable[[DiscoveredImage], Hashable]] = {
+    'folder': lambda image: os.path.dirname(image.path),
+    'extension': lambda image: os.path.splitext(image.path)[1].lower(),
+    'size': _size_bucket,
+}
+
+def _equal_share(counts: Iterable[int], k: int) -> Optional[int]:
+    """
+    أصغر حصة c بحيث مجموع min(عدد الطبقة، c) لا يقل عن k
+
+    الطبقات الصغيرة تدخل كاملة ويُوزع الباقي بالتساوي على الطبقات الأكبر.
+    تزداد الأعداد أثناء المسح فتتناقص الحصة فقط، لذا لا يُحذف عنصر قد يُحتاج لاحقاً.
+
+    Returns:
+        Optional[int]: الحصة، أو None إذا كانت كل العناصر تتسع في العينة
+    """
+    counts = sorted(counts)
+    remaining, strata = k, len(counts)
+    for n in counts:
+        share = -(-remaining // strata)
+        if n >= share:
+            return share
+        remaining -= n
+        strata -= 1
+    return None
+
+def stratified_sample(items: Iterable[T], k: int, stratum: Optional[Callable[[T], Hashable]] = None,
+                      seed=None, name: Callable[[T], str] = str) -> List[T]:
+    """
+    عينة من k عنصراً في مرور واحد بذاكرة O(k + عدد الطبقات)
+
+    لكل عنصر أولوية عشوائية، وتحتفظ كل طبقة بأصغر الأولويات ضمن حصتها
+    (عينة خزان). مع بذرة تُشتق الأولوية من اسم العنصر، فتتكرر العينة نفسها
+    بغض النظر عن ترتيب المسح أو عدد خيوطه، وعينة k صغيرة جزء من عينة أكبر.
+
+    Args:
+        items: العناصر (مولّد)
+        k: حجم العينة
+        stratum: دالة الطبقة (None لعينة عشوائية بسيطة)
+        seed: بذرة لإعادة الإنتاج
+        name: اسم العنصر المستخدم مع البذرة
+
+    Returns:
+        List[T]: العينة (حصص متساوية بين الطبقات قدر الإمكان)
+    """
+    if k <= 0:
+        return []
+
+    if seed is None:
+        rng = random.Random()
+        priority_of = lambda item: rng.getrandbits(64)
+    else:
+        key = str(seed).encode('utf-8')[:64]
+        priority_of = lambda item: int.from_bytes(hashlib.blake2b(
+            name(item).encode('utf-8', 'surrogateescape'), digest_size=8, key=key).digest(), 'big')
+
+    heaps: Dict[Hashable, list] = {}
+    counts: Dict[Hashable, int] = {}
+    order = count()
+    cap = k if stratum is None else None
+    kept = 0
+    # حد إعادة التقليص: مع طبقات كثيرة قد يبقى المحتفظ به فوق 2k بعد التقليص، لذا
+    # يُضاعف الحد بعد كل تقليص فتبقى كلفة المسح خطية (وإلا أُعيد الحساب لكل عنصر)
+    limit = 2 * k
+
+    def trim():
+        nonlocal kept
+        for heap in heaps.values():
+            while len(heap) > cap:
+                heapq.heappop(heap)
+        kept = sum(len(heap) for heap in heaps.values())
+
+    for item in items:
+        label = stratum(item) if stratum is not None else None
+        counts[label] = counts.get(label, 0) + 1
+        heap = heaps.setdefault(label, [])
+        # كومة عظمى بالأولوية السالبة: الجذر هو أسوأ عنصر محتفظ به
+        priority = -priority_of(item)
+        if cap is None or len(heap) < cap:
+            heapq.heappush(heap, (priority, next(order), item))
+            kept += 1
+        elif priority > heap[0][0]:
+            heapq.heapreplace(heap, (priority, next(order), item))
+
+        if kept > limit:
+            cap = _equal_share(counts.values(), k)
+            trim()
+            limit = 2 * max(k, kept)
+
+    cap = _equal_share(counts.values(), k)
+    if cap is not None:
+        trim()
+        # الحصة مقربة للأعلى: يُحذف الفائض من طبقات بلغت الحصة بترتيب الأولوية
+        full = sorted((heap for heap in heaps.values() if len(heap) == cap), key=lambda h: h[0][:2])
+        for heap in full[:kept - k]:
+            heapq.heappop(heap)
+
+    return [entry[2] for heap in heaps.values() for entry in heap]
+
+def sample_images(images: Iterable[DiscoveredImage], k: int, by: Optional[str] = None,
+                  seed=None) -> List[Path]:
+    """
+    عينة من الصور المكتشفة
+
+    Args:
+        images: الصور (من walk_images أو الفهرس)
+        k: حجم العينة
+        by: التقسيم إلى طبقات: 'folder' أو 'extension' أو 'size' (None لعينة بسيطة)
+        seed: بذرة لإعادة الإنتاج
+
+    Returns:
+        List[Path]: مسارات العينة مرتبة
+    """
+    if by is not None and by not in STRATA:
+        raise ValueError(f"تقسيم غير مدعوم: {by}")
+    sample = stratified_sample(images, k, STRATA.get(by), seed, name=lambda image: image.path)
+    return sorted(Path(image.path) for image in sample)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+كتابة الصور المحسنة في الخلفية مع إعدادات مسبقة لسرعة الترميز
+Write-Behind Image Writer With Encoder Presets
+"""
+
+import os
+import queue
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+from binary_image import BinaryImage, encode_enhanced_image, write_enhanced_image, is_binary
+
+# إعدادات الترميز: (الامتداد، مستوى ضغط PNG)
+#   png-fast: أسرع ترميز بحجم أكبر قليلاً
+#   png: افتراضي OpenCV
+#   png-small: أصغر حجم بترميز أبطأ
+#   webp: WebP دون فقد (للصور غير الثنائية غالباً)
+#   tiff: CCITT G4 للصور الثنائية (الأصغر عادة للمستندات)
+ENCODER_PRESETS: Dict[str, Tuple[str, Optional[int]]] = {
+    'png-fast': ('.png', 1),
+    'png': ('.png', None),
+    'png-small': ('.png', 9),
+    'webp': ('.webp', None),
+    'tiff': ('.tif', None),
+}
+
+logger = logging.getLogger(__name__)
+
+def encode_with_preset(image: Union[np.ndarray, BinaryImage], preset: str) -> bytes:
+    """ترميز صورة حسب الإعداد المسبق"""
+    extension, png_compression = ENCODER_PRESETS[preset]
+    return encode_enhanced_image(image, extension, png_compression)
+
+def preset_extension(preset: str) -> str:
+    return ENCODER_PRESETS[preset][0]
+
+def write_with_preset(path, image: Union[np.ndarray, BinaryImage], preset: Optional[str] = None):
+    """حفظ متزامن؛ الصيغة من امتداد المسار ومستوى الضغط من الإعداد المسبق"""
+    write_enhanced_image(path, image, ENCODER_PRESETS[preset][1] if preset else None)
+
+class AsyncImageWriter:
+    """
+    مجمّع خيوط لترميز الصور وكتابتها خلف العمال
+
+    العامل يسلم الصورة ويعود فوراً للمعالجة؛ الطابور محدود فيُحجب العامل إذا
+    تأخر الكتّاب (ضغط عكسي يحد الذاكرة). الصور الثنائية تُحزم قبل الانتظار في
+    الطابور فتشغل ثُمن الذاكرة. الترميز في OpenCV وPIL يحرر GIL.
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 32, preset: Optional[str] = None,
+                 fsync: bool = False):
+        """
+        Args:
+            workers: عدد خيوط الكتابة
+            queue_size: الحد الأقصى للصور المنتظرة
+            preset: إعداد الترميز (None: الصيغة من امتداد المسار)
+            fsync: مزامنة كل ملف مع القرص قبل اعتباره مكتوباً
+        """
+        if preset is not None and preset not in ENCODER_PRESETS:
+            raise ValueError(f"إعداد ترميز غير مدعوم: {preset}")
+        self.preset = preset
+        self.fsync = fsync
+        self.images_written = 0
+        self.bytes_written = 0
+        self.encode_time = 0.0
+        self.write_time = 0.0
+        self.max_backlog = 0
+        self.failed: Dict[str, str] = {}
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = [threading.Thread(target=self._worker, name=f'image-writer-{i}', daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def output_path(self, path) -> str:
+        """المسار النهائي (امتداد الإعداد المسبق إن وُجد)"""
+        path = os.fspath(path)
+        if self.preset is None:
+            return path
+        return os.path.splitext(path)[0] + preset_extension(self.preset)
+
+    def submit(self, path, image: Union[np.ndarray, BinaryImage]) -> str:
+        """
+        تسليم صورة للكتابة (يُحجب فقط إذا امتلأ الطابور)
+
+        Returns:
+            str: المسار الذي ستُكتب إليه الصورة
+        """
+        path = self.output_path(path)
+        if isinstance(image, np.ndarray) and is_binary(image):
+            image = BinaryImage.from_array(image)
+        self._queue.put((path, image))
+        with self._stats_lock:
+            self.max_backlog = max(self.max_backlog, self._queue.qsize())
+        return path
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            path, image = item
+            try:
+                start = time.perf_counter()
+                if self.preset is not None:
+                    data = encode_with_preset(image, self.preset)
+                else:
+                    data = encode_enhanced_image(image, os.path.splitext(path)[1] or '.png')
+                encoded = time.perf_counter()
+                with open(path, 'wb') as f:
+                    f.write(data)
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                written = time.perf_counter()
+                with self._stats_lock:
+                    self.images_written += 1
+                    self.bytes_written += len(data)
+                    self.encode_time += encoded - start
+                    self.write_time += written - encoded
+            except Exception as e:
+                logger.error(f"تعذر كتابة الصورة {path}: {e}")
+                with self._stats_lock:
+                    self.failed[path] = str(e)
+
+    @property
+    def backlog(self) -> int:
+        """عدد الصور المنتظرة حالياً"""
+        return self._queue.qsize()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                'writer_backlog': self._queue.qsize(),
+                'writer_max_backlog': self.max_backlog,
+                'images_written': self.images_written,
+                'bytes_written': self.bytes_written,
+                'encode_time': self.encode_time,
+                'write_time': self.write_time,
+                'write_failures': len(self.failed),
+            }
+
+    def close(self):
+        """انتظار كتابة كل الصور المسلمة وإيقاف الخيوط"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+خادم استدلال محلي مع تجميع الطلبات ونماذج محملة مسبقاً
+Local Inference Server with Micro-Batching and Warm Models
+"""
+
+import cv2
+import numpy as np
+import os
+import json
+import time
+import queue
+import threading
+import logging
+import argparse
+import socketserver
+from datetime import datetime
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional
+from image_enhancer import ImageEnhancer
+
+def to_jsonable(value):
+    """تحويل أنواع NumPy (مثل إحداثيات EasyOCR) إلى أنواع JSON"""
+    if isinstance(value, dict):
+        return {key: to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+class EasyOCRMicroBatcher:
+    """
+    تجميع طلبات EasyOCR المتزامنة في دفعات
+
+    يجمع الطلبات حتى max_batch_size أو حتى انقضاء max_wait من أول طلب،
+    ثم يشغّل الصور متطابقة الأبعاد عبر readtext_batched دفعة واحدة.
+    """
+
+    def __init__(self, reader, max_batch_size: int = 8, max_wait: float = 0.01,
+                 min_confidence: float = 0.5):
+        """
+        Args:
+            reader: قارئ EasyOCR محمّل
+            max_batch_size: الحد الأقصى لحجم الدفعة
+            max_wait: أقصى انتظار لتجميع الدفعة (ثانية)
+            min_confidence: أقل ثقة مقبولة (مثل extract_text_easyocr)
+        """
+        self.reader = reader
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.min_confidence = min_confidence
+        self.logger = logging.getLogger(__name__)
+        self.batches_run = 0
+        self.images_run = 0
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, image: np.ndarray) -> Future:
+        """إضافة صورة إلى الدفعة التالية"""
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def _collect_batch(self) -> List:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                self.logger.error(f"خطأ في دفعة EasyOCR: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _run_batch(self, batch: List):
+        # readtext_batched تتطلب أبعاداً متطابقة، لذا تُجمّع الصور حسب الأبعاد
+        groups = {}
+        for image, future in batch:
+            groups.setdefault(image.shape, []).append((image, future))
+
+        for items in groups.values():
+            images = [image for image, _ in items]
+            if len(images) == 1:
+                outputs = [self.reader.readtext(images[0])]
+            else:
+                outputs = self.reader.readtext_batched(images, batch_size=len(images))
+
+            for (_, future), output in zip(items, outputs):
+                future.set_result([
+                    {'text': text, 'confidence': confidence, 'bbox': bbox}
+                    for bbox, text, confidence in output
+                    if confidence > self.min_confidence
+                ])
+
+        self.batches_run += 1
+        self.images_run += len(batch)
+
+class InferenceService:
+    """منطق المعالجة المشترك لجميع طلبات الخادم"""
+
+    def __init__(self, max_batch_size: int = 8, max_wait: float = 0.01):
+        self.logger = logging.getLogger(__name__)
+        start = time.time()
+        self.enhancer = ImageEnhancer()
+        self.batcher = EasyOCRMicroBatcher(self.enhancer.reader, max_batch_size, max_wait)
+        self.logger.info(f"تم تحميل النماذج في {time.time() - start:.1f} ثانية")
+
+    def process(self, image: np.ndarray, image_path: Optional[str] = None,
+                use_tesseract: bool = True) -> Dict:
+        """
+        معالجة صورة مفكوكة الترميز
+
+        Returns:
+            Dict: نتائج بنفس شكل BatchProcessor.process_single_image
+        """
+        start_time = time.time()
+        enhanced_image = self.enhancer.enhance_image_pipeline(image)
+
+        # EasyOCR في الدفعة المشتركة بينما يعمل Tesseract في thread الطلب
+        easyocr_future = self.batcher.submit(enhanced_image)
+        tesseract_results = self.enhancer.extract_text_tesseract(enhanced_image) if use_tesseract else []
+        easyocr_results = easyocr_future.result()
+
+        return to_jsonable({
+            'image_path': image_path,
+            'status': 'success',
+            'processing_time': time.time() - start_time,
+            'easyocr_results': easyocr_results,
+            'tesseract_results': tesseract_results,
+            'total_texts_found': len(easyocr_results) + len(tesseract_results),
+            'timestamp': datetime.now().isoformat()
+        })
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health  حالة الخادم
+    POST /ocr     جسم الطلب إما بايتات الصورة، أو JSON بالشكل {"path": "..."}
+                  (?tesseract=0 لتعطيل Tesseract)
+    """
+
+    service = None
+
+    def address_string(self):
+        # client_address فارغ مع Unix sockets
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/health':
+            batcher = self.service.batcher
+            self._send_json(200, {
+                'status': 'ok',
+                'batches_run': batcher.batches_run,
+                'images_run': batcher.images_run
+            })
+        else:
+            self._send_json(404, {'status': 'failed', 'error': 'not found'})
+
+    def do_POST(self):
+        route, _, query = self.path.partition('?')
+        if route.rstrip('/') != '/ocr':
+            self._send_json(404, {'status': 'failed', 'error': 'not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length)
+            image_path = None
+
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                image_path = json.loads(body)['path']
+                image = cv2.imread(image_path)
+            else:
+                image = cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_COLOR)
+
+            if image is None:
+                self._send_json(400, {'image_path': image_path, 'status': 'failed',
+                                      'error': 'لا يمكن تحميل الصورة'})
+                return
+
+            use_tesseract = 'tesseract=0' not in query
+            self._send_json(200, self.service.process(image, image_path, use_tesseract))
+
+        except Exception as e:
+            self._send_json(500, {'status': 'failed', 'error': str(e)})
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """خادم HTTP على Unix socket"""
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+def serve(host: str = '127.0.0.1', port: int = 8765, unix_socket: Optional[str] = None,
+          max_batch_size: int = 8, max_wait_ms: float = 10.0):
+    """
+    تشغيل خادم الاستدلال
+
+    Args:
+        host: عنوان الاستماع
+        port: المنفذ
+        unix_socket: مسار Unix socket (بدلاً من TCP)
+        max_batch_size: الحد الأقصى لدفعة EasyOCR
+        max_wait_ms: أقصى انتظار لتجميع الدفعة (ملي ثانية)
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    InferenceRequestHandler.service = InferenceService(max_batch_size, max_wait_ms / 1000.0)
+
+    if unix_socket:
+        server = ThreadingUnixHTTPServer(unix_socket, InferenceRequestHandler)
+        logger.info(f"الخادم يستمع على unix:{unix_socket}")
+    else:
+        server = ThreadingHTTPServer((host, port), InferenceRequestHandler)
+        logger.info(f"الخادم يستمع على http://{host}:{port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+
+def main():
+    """الدالة الرئيسية"""
+    parser = argparse.ArgumentParser(description='خادم الاستدلال المحلي')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='تشغيل الخادم')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='عنوان الاستماع')
+    serve_parser.add_argument('--port', type=int, default=8765, help='المنفذ')
+    serve_parser.add_argument('--unix-socket', help='مسار Unix socket بدلاً من TCP')
+    serve_parser.add_argument('--max-batch', type=int, default=8, help='الحد الأقصى لدفعة EasyOCR')
+    serve_parser.add_argument('--max-wait-ms', type=float, default=10.0,
+                              help='أقصى انتظار لتجميع الدفعة (ملي ثانية)')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.host, args.port, args.unix_socket, args.max_batch, args.max_wait_ms)
+
+if __name__ == "__main__":
+    main()
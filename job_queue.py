@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+طابور مهام دائم مبني على SQLite لعدة عمال وعدة أجهزة
+Crash-Safe SQLite Job Queue for Multi-Process and Multi-Node Workers
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+import logging
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Optional, Callable, Iterable
+from image_discovery import find_images, SUPPORTED_FORMATS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    image_path TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    worker_id TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, id);
+"""
+
+def _json_default(value):
+    """تحويل أنواع NumPy داخل النتائج إلى JSON"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class JobQueue:
+    """
+    طابور مهام في قاعدة SQLite
+
+    كل صورة مهمة واحدة. يحصل العامل على عقد إيجار (lease) مؤقت للمهمة
+    ويجدده بنبضات دورية؛ إذا توقف العامل تنتهي صلاحية العقد وتعود المهمة
+    للطابور حتى max_attempts محاولة.
+
+    ملاحظة: وضع WAL يتطلب ذاكرة مشتركة بين العمليات على نفس الجهاز، لذا
+    عند مشاركة القاعدة بين عدة أجهزة عبر NFS استخدم journal_mode='delete'.
+    """
+
+    def __init__(self, db_path, journal_mode: str = 'wal', timeout: float = 30.0):
+        """
+        Args:
+            db_path: مسار قاعدة البيانات
+            journal_mode: وضع السجل ('wal' لجهاز واحد، 'delete' لأنظمة الملفات الشبكية)
+            timeout: مهلة انتظار أقفال القاعدة (ثانية)
+        """
+        self.db_path = str(db_path)
+        self.logger = logging.getLogger(__name__)
+        # المعاملات تُدار يدوياً (BEGIN IMMEDIATE) لضمان الحجز الذري
+        self.connection = sqlite3.connect(self.db_path, timeout=timeout, isolation_level=None)
+        self.connection.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def enqueue(self, image_paths: Iterable, max_attempts: int = 3) -> int:
+        """
+        إضافة صور إلى الطابور (المسارات الموجودة مسبقاً تُتجاهل)
+
+        Returns:
+            int: عدد المهام الجديدة
+        """
+        now = time.time()
+        rows = ((str(path), max_attempts, now, now) for path in image_paths)
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO jobs (image_path, max_attempts, enqueued_at, updated_at) "
+                "VALUES (?, ?, ?, ?)", rows
+            )
+            return self.connection.total_changes - before
+
+    def lease(self, worker_id: str, lease_seconds: float = 300.0) -> Optional[Dict]:
+        """
+        حجز المهمة التالية المتاحة (جديدة أو انتهت صلاحية عقدها)
+
+        Returns:
+            Optional[Dict]: المهمة المحجوزة أو None إذا لا توجد مهام
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+
+            # المهام التي انتهى عقدها واستنفدت محاولاتها تُعلَّم كفاشلة
+            self.connection.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired', updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now)
+            )
+
+            # استعلامان يقرأ كل منهما أول صف من فهرس بدلاً من ترتيب كل المهام المعلقة
+            # مع كل حجز (jobs_queue لرأس الطابور، وjobs_status للعقود المنتهية)
+            pending = self.connection.execute(
+                "SELECT id, image_path, attempts FROM jobs "
+                "WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            expired = self.connection.execute(
+                "SELECT id, image_path, attempts FROM jobs "
+                "WHERE status = 'leased' AND lease_expires < ? ORDER BY id LIMIT 1", (now,)
+            ).fetchone()
+            candidates = [row for row in (pending, expired) if row is not None]
+            if not candidates:
+                return None
+            row = min(candidates)
+
+            job_id, image_path, attempts = row
+            self.connection.execute(
+                "UPDATE jobs SET status = 'leased', worker_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, job_id)
+            )
+
+        return {'id': job_id, 'image_path': image_path, 'attempt': attempts + 1}
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float = 300.0) -> bool:
+        """
+        تجديد عقد المهمة
+
+        Returns:
+            bool: False إذا فقد العامل العقد (انتهى وحجزه عامل آخر)
+        """
+        now = time.time()
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (now + lease_seconds, now, job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Dict) -> bool:
+        """تعليم المهمة كمكتملة مع حفظ النتيجة"""
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_expires = NULL, "
+                "updated_at = ? WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (json.dumps(result, ensure_ascii=False, default=_json_default),
+                 time.time(), job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """تسجيل فشل المحاولة (تعود المهمة للطابور إذا بقيت محاولات)"""
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END, "
+                "error = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (error, time.time(), job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def get_status(self) -> Dict:
+        """عدد المهام حسب الحالة"""
+        rows = self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        status = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        status.update(dict(rows))
+        return status
+
+    def get_results(self) -> List[Dict]:
+        """نتائج المهام المكتملة والفاشلة"""
+        results = []
+        for image_path, status, result, error in self.connection.execute(
+                "SELECT image_path, status, result, error FROM jobs "
+                "WHERE status IN ('done', 'failed') ORDER BY id"):
+            if result:
+                results.append(json.loads(result))
+            else:
+                results.append({'image_path': image_path, 'status': 'failed',
+                                'error': error, 'processing_time': 0})
+        return results
+
+class _Heartbeat:
+    """تجديد عقد المهمة في thread منفصل أثناء المعالجة"""
+
+    def __init__(self, db_path, job_id, worker_id, lease_seconds, interval, journal_mode):
+        self.args = (job_id, worker_id, lease_seconds)
+        self.db_path = db_path
+        self.interval = interval
+        self.journal_mode = journal_mode
+        self.lost = False
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        # اتصال SQLite لا يُشارك بين threads
+        with JobQueue(self.db_path, self.journal_mode) as queue:
+            while not self._stop_event.wait(self.interval):
+                if not queue.heartbeat(*self.args):
+                    self.lost = True
+                    return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop_event.set()
+        self._thread.join()
+
+def run_worker(db_path, output_dir=None, worker_id: Optional[str] = None,
+               lease_seconds: float = 300.0, heartbeat_interval: float = 30.0,
+               process_fn: Optional[Callable] = None, exit_when_empty: bool = False,
+               poll_interval: float = 5.0, journal_mode: str = 'wal',
+               save_enhanced: bool = True) -> int:
+    """
+    تشغيل عامل يعالج المهام المحجوزة من الطابور
+
+    Args:
+        db_path: مسار قاعدة الطابور
+        output_dir: مجلد حفظ الصور المحسنة
+        worker_id: معرف العامل (افتراضياً host:pid)
+        lease_seconds: مدة عقد المهمة
+        heartbeat_interval: الفترة بين نبضات التجديد
+        process_fn: دالة المعالجة (افتراضياً SelectiveProcessor.process_single_image)
+        exit_when_empty: الخروج عند فراغ الطابور بدلاً من الانتظار
+        poll_interval: فترة الانتظار عند فراغ الطابور
+        journal_mode: وضع سجل SQLite
+        save_enhanced: حفظ الصور المحسنة
+
+    Returns:
+        int: عدد المهام التي عالجها العامل
+    """
+    logger = logging.getLogger(__name__)
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    if process_fn is None:
+        from selective_processor import SelectiveProcessor
+        processor = SelectiveProcessor(max_workers=1)
+        process_fn = lambda path: processor.process_single_image(Path(path), output_dir, save_enhanced)
+
+    processed = 0
+    with JobQueue(db_path, journal_mode) as queue:
+        while True:
+            job = queue.lease(worker_id, lease_seconds)
+            if job is None:
+                if exit_when_empty and queue.get_status()['leased'] == 0:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            with _Heartbeat(db_path, job['id'], worker_id, lease_seconds,
+                            heartbeat_interval, journal_mode) as heartbeat:
+                try:
+                    result = process_fn(job['image_path'])
+                    error = None if result.get('status') == 'success' else result.get('error', 'failed')
+                except Exception as e:
+                    result, error = None, str(e)
+
+            if heartbeat.lost:
+                logger.warning(f"فقد العامل {worker_id} عقد المهمة: {job['image_path']}")
+                continue
+
+            if error is None:
+                queue.complete(job['id'], worker_id, result)
+            else:
+                logger.error(f"فشلت المحاولة {job['attempt']} للصورة {job['image_path']}: {error}")
+                queue.fail(job['id'], worker_id, error)
+            processed += 1
+
+    return processed
+
+def _find_images(input_path: Path, recursive: bool) -> List[Path]:
+    if input_path.is_file():
+        return [input_path]
+    return find_images(input_path, recursive, SUPPORTED_FORMATS)
+
+def main():
+    """الدالة الرئيسية"""
+    parser = argparse.ArgumentParser(description='طابور مهام معالجة الصور')
+    parser.add_argument('--journal-mode', default='wal', choices=['wal', 'delete'],
+                        help="وضع سجل SQLite ('delete' عند المشاركة عبر NFS)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='إضافة صور إلى الطابور')
+    enqueue_parser.add_argument('db', help='مسار قاعدة الطابور')
+    enqueue_parser.add_argument('inputs', nargs='+', help='صور أو مجلدات')
+    enqueue_parser.add_argument('-r', '--recursive', action='store_true', help='البحث في المجلدات الفرعية')
+    enqueue_parser.add_argument('--max-attempts', type=int, default=3, help='الحد الأقصى للمحاولات')
+
+    worker_parser = subparsers.add_parser('worker', help='تشغيل عامل')
+    worker_parser.add_argument('db', help='مسار قاعدة الطابور')
+    worker_parser.add_argument('-o', '--output', help='مجلد الحفظ')
+    worker_parser.add_argument('--lease', type=float, default=300.0, help='مدة عقد المهمة (ثانية)')
+    worker_parser.add_argument('--heartbeat', type=float, default=30.0, help='فترة النبضات (ثانية)')
+    worker_parser.add_argument('--exit-when-empty', action='store_true', help='الخروج عند فراغ الطابور')
+    worker_parser.add_argument('--no-save', action='store_true', help='عدم حفظ الصور المحسنة')
+
+    status_parser = subparsers.add_parser('status', help='حالة الطابور')
+    status_parser.add_argument('db', help='مسار قاعدة الطابور')
+
+    export_parser = subparsers.add_parser('export', help='تصدير النتائج إلى JSON')
+    export_parser.add_argument('db', help='مسار قاعدة الطابور')
+    export_parser.add_argument('output', help='ملف JSON')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'enqueue':
+        images = [image for item in args.inputs for image in _find_images(Path(item).resolve(), args.recursive)]
+        with JobQueue(args.db, args.journal_mode) as queue:
+            added = queue.enqueue(images, args.max_attempts)
+        print(f"تمت إضافة {added} مهمة جديدة من {len(images)} صورة")
+
+    elif args.command == 'worker':
+        processed = run_worker(args.db, args.output, lease_seconds=args.lease,
+                               heartbeat_interval=args.heartbeat,
+                               exit_when_empty=args.exit_when_empty,
+                               journal_mode=args.journal_mode,
+                               save_enhanced=not args.no_save)
+        print(f"عالج العامل {processed} مهمة")
+
+    elif args.command == 'status':
+        with JobQueue(args.db, args.journal_mode) as queue:
+            for status, count in queue.get_status().items():
+                print(f"{status}: {count}")
+
+    elif args.command == 'export':
+        with JobQueue(args.db, args.journal_mode) as queue:
+            results = queue.get_results()
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"تم تصدير {len(results)} نتيجة إلى: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ import os
 from pathlib import Path
 import argparse
 import time
+from image_discovery import find_images
+from binary_image import write_enhanced_image
 
 class LightweightProcessor:
     def __init__(self):
@@ -127,7 +129,7 @@ class LightweightProcessor:
         
         # حفظ الصورة المحسنة
         if output_path:
-            cv2.imwrite(output_path, enhanced)
+            write_enhanced_image(output_path, enhanced)
             print(f"تم حفظ الصورة المحسنة في: {output_path}")
         
         # طباعة النتائج
@@ -171,12 +173,7 @@ class LightweightProcessor:
             output_path.mkdir(exist_ok=True)
         
         # البحث عن الصور
-        supported_formats = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']
-        images = []
-        
-        for file_path in input_path.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in supported_formats:
-                images.append(file_path)
+        images = find_images(input_path, recursive=True)
         
         if not images:
             print("لم يتم العثور على صور في المجلد")
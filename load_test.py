@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار الحمل لخادم الاستدلال
+Load Test for the Inference Server
+"""
+
+import json
+import time
+import socket
+import argparse
+import http.client
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from scheduling import percentile
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """اتصال HTTP عبر Unix socket"""
+
+    def __init__(self, socket_path, timeout=300):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+def make_connection(args):
+    if args.unix_socket:
+        return UnixHTTPConnection(args.unix_socket)
+    return http.client.HTTPConnection(args.host, args.port, timeout=300)
+
+def send_request(args, payload, content_type):
+    """إرسال طلب واحد وإرجاع زمن الاستجابة والحالة"""
+    connection = make_connection(args)
+    start = time.perf_counter()
+    try:
+        connection.request('POST', '/ocr' + ('' if args.tesseract else '?tesseract=0'),
+                           body=payload, headers={'Content-Type': content_type})
+        response = connection.getresponse()
+        result = json.loads(response.read())
+        ok = response.status == 200 and result.get('status') == 'success'
+    except (OSError, ValueError):
+        ok = False
+    finally:
+        connection.close()
+    return time.perf_counter() - start, ok
+
+def run_level(args, payloads, concurrency):
+    """تشغيل مستوى تزامن واحد"""
+    jobs = [payloads[i % len(payloads)] for i in range(args.requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda job: send_request(args, *job), jobs))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, ok in outcomes if ok]
+    return {
+        'concurrency': concurrency,
+        'requests': len(outcomes),
+        'errors': sum(1 for _, ok in outcomes if not ok),
+        'throughput': len(latencies) / elapsed if elapsed > 0 else 0,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99)
+    }
+
+def main():
+    """الدالة الرئيسية"""
+    parser = argparse.ArgumentParser(description='اختبار الحمل لخادم الاستدلال')
+    parser.add_argument('images', nargs='+', help='صور الاختبار')
+    parser.add_argument('--host', default='127.0.0.1', help='عنوان الخادم')
+    parser.add_argument('--port', type=int, default=8765, help='المنفذ')
+    parser.add_argument('--unix-socket', help='مسار Unix socket')
+    parser.add_argument('-n', '--requests', type=int, default=64, help='عدد الطلبات لكل مستوى')
+    parser.add_argument('-c', '--concurrency', default='1,4,16',
+                        help='مستويات التزامن مفصولة بفواصل')
+    parser.add_argument('--by-path', action='store_true',
+                        help='إرسال مسارات الصور بدلاً من رفع البايتات')
+    parser.add_argument('--no-tesseract', dest='tesseract', action='store_false',
+                        help='قياس EasyOCR فقط')
+
+    args = parser.parse_args()
+
+    if args.by_path:
+        payloads = [(json.dumps({'path': str(Path(image).resolve())}).encode('utf-8'), 'application/json')
+                    for image in args.images]
+    else:
+        payloads = [(Path(image).read_bytes(), 'application/octet-stream') for image in args.images]
+
+    print(f"{'concurrency':>12}{'requests':>10}{'errors':>8}{'req/s':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for level in [int(value) for value in args.concurrency.split(',')]:
+        stats = run_level(args, payloads, level)
+        print(f"{stats['concurrency']:>12}{stats['requests']:>10}{stats['errors']:>8}"
+              f"{stats['throughput']:>10.2f}{stats['p50'] * 1000:>10.0f}"
+              f"{stats['p95'] * 1000:>10.0f}{stats['p99'] * 1000:>10.0f}")
+
+if __name__ == "__main__":
+    main()
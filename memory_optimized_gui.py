@@ -15,6 +15,7 @@ import os
 from pathlib import Path
 import gc
 import psutil
+from binary_image import write_enhanced_image
 
 class MemoryOptimizedGUI:
     def __init__(self, root):
@@ -474,7 +475,7 @@ class MemoryOptimizedGUI:
         
         if file_path:
             try:
-                cv2.imwrite(file_path, self.enhanced_image)
+                write_enhanced_image(file_path, self.enhanced_image)
                 messagebox.showinfo("نجح", f"تم حفظ الصورة في: {file_path}")
                 self.status_label.config(text=f"تم حفظ الصورة: {Path(file_path).name}")
             except Exception as e:
@@ -316,12 +316,16 @@ class PerformanceOptimizer:
         
         return recommendations
     
-    def monitor_processing_performance(self, callback: Callable = None) -> Dict:
+    def monitor_processing_performance(self, callback: Callable = None,
+                                     interval: float = 1.0,
+                                     stop_event: Optional[threading.Event] = None) -> Dict:
         """
         مراقبة أداء المعالجة
         
         Args:
             callback: دالة callback للنتائج
+            interval: فترة أخذ العينات (ثانية)
+            stop_event: حدث لإيقاف المراقبة (اختياري)
         
         Returns:
             Dict: مقاييس الأداء
@@ -332,7 +336,7 @@ class PerformanceOptimizer:
         
         # مراقبة مستمرة
         def monitor():
-            while True:
+            while stop_event is None or not stop_event.is_set():
                 current_time = time.time()
                 elapsed_time = current_time - start_time
                 
@@ -350,7 +354,10 @@ class PerformanceOptimizer:
                 if callback:
                     callback(metrics)
                 
-                time.sleep(1)
+                if stop_event is not None:
+                    stop_event.wait(interval)
+                else:
+                    time.sleep(interval)
         
         # تشغيل المراقبة في thread منفصل
         monitor_thread = threading.Thread(target=monitor, daemon=True)
@@ -378,6 +385,147 @@ class PerformanceOptimizer:
         except Exception as e:
             self.logger.error(f"خطأ في تنظيف الموارد: {e}")
 
+class AdaptiveWorkerController:
+    """
+    متحكم التزامن التكيفي أثناء المعالجة المجمعة
+    
+    يجمع عينات المعالج والذاكرة وزمن معالجة كل صورة، ويعيد حساب
+    عدد العمال الفعّال كل فترة باستخدام adaptive_worker_scaling ضمن الحدود.
+    """
+    
+    def __init__(self, min_workers: int, max_workers: int,
+                 initial_workers: Optional[int] = None,
+                 scaling_interval: float = 5.0,
+                 sample_interval: float = 1.0,
+                 optimizer: Optional[PerformanceOptimizer] = None):
+        """
+        Args:
+            min_workers: الحد الأدنى للعمال
+            max_workers: الحد الأقصى للعمال
+            initial_workers: العدد الابتدائي (افتراضياً حسب calculate_optimal_workers)
+            scaling_interval: الفترة بين قرارات التحجيم (ثانية)
+            sample_interval: فترة أخذ عينات الموارد (ثانية)
+            optimizer: محسن الأداء المستخدم (اختياري)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.optimizer = optimizer or PerformanceOptimizer()
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.scaling_interval = scaling_interval
+        self.sample_interval = sample_interval
+        
+        if initial_workers is None:
+            initial_workers = self.optimizer.calculate_optimal_workers("cpu_intensive")
+        self.current_workers = self._clamp(initial_workers)
+        
+        self.history = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._cpu_samples = []
+        self._memory_samples = []
+        self._latencies = []
+        self._completed = 0
+        self._window_start = time.time()
+        self._last_throughput = None
+        self._last_change = 0
+        self._hold_windows = 0
+    
+    def _clamp(self, workers: int) -> int:
+        return max(self.min_workers, min(self.max_workers, workers))
+    
+    def start(self):
+        """بدء أخذ العينات وحلقة القرارات"""
+        self._stop_event.clear()
+        self._window_start = time.time()
+        self.optimizer.monitor_processing_performance(
+            self._on_sample, self.sample_interval, self._stop_event
+        )
+        threading.Thread(target=self._scaling_loop, daemon=True).start()
+        self.logger.info(
+            f"التحجيم التكيفي: البداية بـ {self.current_workers} عامل "
+            f"(الحدود {self.min_workers}-{self.max_workers})"
+        )
+    
+    def stop(self):
+        """إيقاف المراقبة"""
+        self._stop_event.set()
+    
+    def _on_sample(self, metrics: Dict):
+        with self._lock:
+            self._cpu_samples.append(metrics['cpu_usage'])
+            self._memory_samples.append(metrics['memory_usage'])
+    
+    def record_completion(self, processing_time: float):
+        """تسجيل زمن معالجة صورة مكتملة"""
+        with self._lock:
+            self._latencies.append(processing_time)
+            self._completed += 1
+    
+    def _scaling_loop(self):
+        while not self._stop_event.wait(self.scaling_interval):
+            self.rescale()
+    
+    def rescale(self) -> int:
+        """
+        إعادة حساب عدد العمال من عينات النافذة الحالية
+        
+        Returns:
+            int: عدد العمال الفعّال الجديد
+        """
+        with self._lock:
+            now = time.time()
+            elapsed = max(now - self._window_start, 1e-6)
+            metrics = {
+                'cpu_usage': self._cpu_samples or [0],
+                'memory_usage': self._memory_samples or [0],
+            }
+            latencies = self._latencies
+            throughput = self._completed / elapsed
+            self._cpu_samples, self._memory_samples, self._latencies = [], [], []
+            self._completed = 0
+            self._window_start = now
+        
+        # لا قرار بدون صور مكتملة في النافذة
+        if not latencies:
+            return self.current_workers
+        
+        previous = self.current_workers
+        suggested = self._clamp(self.optimizer.adaptive_worker_scaling(previous, metrics))
+        
+        # إذا لم تحسّن الزيادة السابقة الإنتاجية فارجع عنها وثبّت العدد لبضع نوافذ
+        if (self._last_change > 0 and self._last_throughput is not None
+                and throughput < self._last_throughput * 1.05):
+            suggested = self._clamp(previous - self._last_change)
+            self._hold_windows = 3
+        elif self._hold_windows > 0:
+            self._hold_windows -= 1
+            suggested = min(suggested, previous)
+        
+        avg_cpu = sum(metrics['cpu_usage']) / len(metrics['cpu_usage'])
+        avg_memory = sum(metrics['memory_usage']) / len(metrics['memory_usage'])
+        avg_latency = sum(latencies) / len(latencies)
+        
+        self._last_change = suggested - previous
+        self._last_throughput = throughput
+        self.current_workers = suggested
+        self.history.append({
+            'timestamp': now,
+            'workers': suggested,
+            'cpu_usage': avg_cpu,
+            'memory_usage': avg_memory,
+            'average_latency': avg_latency,
+            'throughput': throughput
+        })
+        
+        if suggested != previous:
+            self.logger.info(
+                f"التحجيم التكيفي: {previous} -> {suggested} عامل "
+                f"(CPU {avg_cpu:.0f}%, ذاكرة {avg_memory:.0f}%, "
+                f"زمن الصورة {avg_latency:.2f}s, إنتاجية {throughput:.2f} صورة/ث)"
+            )
+        return suggested
+
+
 def main():
     """مثال على الاستخدام"""
     import argparse
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قراءة مسبقة لبايتات الصور التالية بالتوازي مع المعالجة
+Readahead Prefetcher Overlapping Disk Reads With Compute
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+from archive_input import ARCHIVE_SEPARATOR, read_archive_member, split_archive_path
+from document_pages import split_page_path
+
+DEFAULT_READAHEAD = 8
+DEFAULT_IO_THREADS = 4
+
+def read_image_bytes(path) -> Optional[bytes]:
+    """
+    قراءة بايتات الصورة المرمزة كاملة (ملف عادي أو archive!member)
+
+    على الأنظمة التي تدعم posix_fadvise يُطلب من النواة قراءة الملف كاملاً مسبقاً
+    (WILLNEED) فيُجلب بطلبات كبيرة بدلاً من صفحات متتابعة.
+
+    Returns:
+        Optional[bytes]: None لصفحات المستندات (تُحمّل صفحة صفحة بـ load_page)
+    """
+    path = os.fspath(path)
+    if split_page_path(path) is not None or path.lower().endswith('.pdf'):
+        return None
+    if ARCHIVE_SEPARATOR in path and split_archive_path(path) is not None:
+        return read_archive_member(path)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        size = os.fstat(fd).st_size
+        chunks = []
+        while size > 0:
+            chunk = os.read(fd, size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+    finally:
+        os.close(fd)
+
+class Prefetcher:
+    """
+    مغلف لمولّد المسارات يقرأ بايتات الصور K التالية في مجمّع خيوط إدخال/إخراج
+
+    المعالج يسحب المسارات كالمعتاد؛ عند سحب مسار تكون قراءة الصور التالية قد
+    بدأت، والعامل يأخذ البايتات بـ take() ويفك ترميزها بـ cv2.imdecode. عدد
+    المخازن المقروءة مسبقاً محدود بعمق القراءة المسبقة مضافاً إليه المهام الجارية.
+    """
+
+    def __init__(self, image_paths: Iterable, depth: int = DEFAULT_READAHEAD,
+                 io_threads: int = DEFAULT_IO_THREADS, reader: Callable = read_image_bytes):
+        """
+        Args:
+            image_paths: مسارات الصور (قائمة أو مولّد)
+            depth: عدد الصور المقروءة مسبقاً قبل سحبها
+            io_threads: خيوط القراءة
+            reader: دالة قراءة البايتات (للاختبار والقياس)
+        """
+        self.depth = depth
+        self.reader = reader
+        self.bytes_read = 0
+        self.read_time = 0.0
+        self.wait_time = 0.0
+        self._paths = iter(image_paths)
+        self._ahead = deque()
+        self._started = False
+        self._pending: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix='prefetch')
+
+    def _read(self, path):
+        start = time.perf_counter()
+        data = self.reader(path)
+        with self._lock:
+            self.read_time += time.perf_counter() - start
+            self.bytes_read += len(data) if data else 0
+        return data
+
+    def _fill(self, target: int):
+        while len(self._ahead) < target:
+            try:
+                path = next(self._paths)
+            except StopIteration:
+                return
+            with self._lock:
+                self._pending[os.fspath(path)] = self._executor.submit(self._read, path)
+            self._ahead.append(path)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        # أول مسار يُسلّم فور اكتشافه: مع مسح بطيء لا تنتظر المعالجة امتلاء نافذة القراءة
+        self._fill(self.depth + 1 if self._started else 1)
+        self._started = True
+        if not self._ahead:
+            raise StopIteration
+        return self._ahead.popleft()
+
+    def take(self, path) -> Optional[bytes]:
+        """
+        بايتات الصورة المقروءة مسبقاً (تنتظر انتهاء القراءة إن لزم)
+
+        Returns:
+            Optional[bytes]: None إذا لم تُقرأ الصورة مسبقاً أو فشلت قراءتها
+        """
+        with self._lock:
+            future = self._pending.pop(os.fspath(path), None)
+        if future is None:
+            return None
+        start = time.perf_counter()
+        try:
+            data = future.result()
+        except Exception:
+            # التحميل العادي يعيد المحاولة ويسجل الخطأ
+            data = None
+        with self._lock:
+            self.wait_time += time.perf_counter() - start
+        return data
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'prefetch_bytes': self.bytes_read, 'prefetch_read_time': self.read_time,
+                    'prefetch_wait_time': self.wait_time}
+
+    def close(self):
+        """إلغاء القراءات التي لم تبدأ وإيقاف الخيوط"""
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+سجلات نتائج مضغوطة: كلمات OCR كمصفوفات NumPy ونص متصل بفهارس إزاحة
+Compact Typed Result Records With Struct-of-Arrays Word Storage
+"""
+
+import sys
+from collections.abc import MutableMapping, Sequence
+from typing import Dict, Iterator, List
+import numpy as np
+
+# حقول نتيجة process_single_image بترتيب التصدير؛ المفاتيح الأخرى (error وduplicate_of
+# وenhanced_error...) نادرة فتُحفظ في قاموس إضافي لا يُنشأ إلا عند الحاجة
+RESULT_FIELDS = ('image_path', 'enhanced_path', 'status', 'processing_time', 'easyocr_results',
+                 'tesseract_results', 'total_texts_found', 'file_size', 'file_mtime_ns',
+                 'pipeline_fingerprint', 'timestamp')
+WORD_FIELDS = frozenset(('easyocr_results', 'tesseract_results'))
+_FIELD_SET = frozenset(RESULT_FIELDS)
+_WORD_KEYS = frozenset(('text', 'confidence', 'bbox'))
+_INT32 = np.iinfo(np.int32)
+
+class WordArray(Sequence):
+    """
+    كلمات محرك OCR واحد لصورة كمصفوفات بدلاً من قائمة قواميس
+
+    النصوص متصلة في نص واحد مع مصفوفة إزاحات (n+1)، والثقة مصفوفة float64،
+    والصناديق مصفوفة واحدة بشكلها الأصلي ((n, 4, 2) نقاط EasyOCR أو (n, 4) صناديق
+    Tesseract) بنوع int32 إذا كانت الإحداثيات صحيحة. الوصول بالفهرس أو التكرار
+    يعيد قواميس بالشكل الأصلي، فالكود الذي يقرأ word['text'] يعمل دون تغيير.
+    """
+
+    __slots__ = ('_text', '_offsets', 'confidences', 'boxes')
+
+    def __init__(self, text: str, offsets: np.ndarray, confidences: np.ndarray, boxes: np.ndarray):
+        self._text = text
+        self._offsets = offsets
+        self.confidences = confidences
+        self.boxes = boxes
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        ضغط قائمة كلمات (قواميس text/confidence/bbox)
+
+        Returns:
+            WordArray، أو القيمة نفسها إذا كانت فارغة أو بشكل غير متجانس لا يمكن ضغطه
+        """
+        if not isinstance(words, list) or not words:
+            return words
+        texts = []
+        for word in words:
+            if not isinstance(word, dict) or word.keys() != _WORD_KEYS or not isinstance(word['text'], str):
+                return words
+            texts.append(word['text'])
+        try:
+            boxes = np.asarray([word['bbox'] for word in words])
+            confidences = np.asarray([word['confidence'] for word in words], dtype=np.float64)
+        except (TypeError, ValueError):
+            return words
+        if boxes.dtype.kind in 'iu':
+            if boxes.size and (boxes.min() < _INT32.min or boxes.max() > _INT32.max):
+                return words
+            boxes = boxes.astype(np.int32)
+        elif boxes.dtype.kind == 'f':
+            boxes = boxes.astype(np.float64)
+        else:
+            return words
+        offsets = np.zeros(len(texts) + 1, dtype=np.int32)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+        return cls(''.join(texts), offsets, confidences, boxes)
+
+    def text(self, index: int) -> str:
+        return self._text[self._offsets[index]:self._offsets[index + 1]]
+
+    def __len__(self) -> int:
+        return len(self.confidences)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return {'text': self.text(index), 'confidence': float(self.confidences[index]),
+                'bbox': self.boxes[index].tolist()}
+
+    def __iter__(self) -> Iterator[Dict]:
+        offsets = self._offsets.tolist()
+        for i, (confidence, bbox) in enumerate(zip(self.confidences.tolist(), self.boxes.tolist())):
+            yield {'text': self._text[offsets[i]:offsets[i + 1]], 'confidence': confidence, 'bbox': bbox}
+
+    def to_list(self) -> List[Dict]:
+        """الكلمات بالشكل الأصلي (للتصدير)"""
+        return list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, WordArray):
+            return (self._text == other._text and np.array_equal(self._offsets, other._offsets)
+                    and np.array_equal(self.confidences, other.confidences)
+                    and np.array_equal(self.boxes, other.boxes))
+        if isinstance(other, list):
+            # المقارنة بعد الضغط: صندوق Tesseract الأصلي tuple والمُصدر قائمة
+            other = WordArray.from_words(other)
+            return isinstance(other, WordArray) and self == other
+        return NotImplemented
+
+    __hash__ = None
+
+    @property
+    def nbytes(self) -> int:
+        return (sys.getsizeof(self._text) + self._offsets.nbytes + self.confidences.nbytes
+                + self.boxes.nbytes)
+
+    def __repr__(self):
+        return f"WordArray({len(self)} words)"
+
+class ImageResult(MutableMapping):
+    """
+    نتيجة صورة كسجل بحقول ثابتة (__slots__) بدلاً من قاموس
+
+    يتصرف كقاموس (result['status'] وget وin والتعديل بالمفتاح) فلا يتغير الكود
+    الذي يقرأ النتائج؛ قوائم الكلمات تُضغط إلى WordArray عند الإسناد، وبصمة خط
+    الأنابيب المتكررة في كل النتائج تُحفظ مرة واحدة (sys.intern). الحقل الغائب في
+    النتيجة الأصلية يبقى غائباً فيطابق التصدير شكلها.
+    """
+
+    __slots__ = RESULT_FIELDS + ('_extra',)
+
+    def __init__(self, result=()):
+        self._extra = None
+        for key, value in dict(result).items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            if key in WORD_FIELDS:
+                value = WordArray.from_words(value)
+            elif key == 'pipeline_fingerprint' and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __iter__(self):
+        for key in RESULT_FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict:
+        """النتيجة بالشكل الأصلي (قواميس وقوائم) للتصدير"""
+        return {key: value.to_list() if isinstance(value, WordArray) else value
+                for key, value in self.items()}
+
+    def __repr__(self):
+        return f"ImageResult({self.get('image_path')!r}, status={self.get('status')!r})"
+
+def compact_result(result):
+    """تحويل نتيجة قاموس إلى ImageResult (السجل المضغوط يُعاد كما هو)"""
+    if isinstance(result, ImageResult) or not isinstance(result, dict):
+        return result
+    return ImageResult(result)
+
+def export_result(result):
+    """النتيجة كقاموس عادي بالشكل الأصلي"""
+    return result.to_dict() if isinstance(result, ImageResult) else result
+
+def export_default(value):
+    """
+    دالة default لـ json.dump: تحوّل السجلات المضغوطة عند الكتابة فقط، فلا تُنشأ
+    نسخة قواميس من كل النتائج في الذاكرة قبل التصدير
+    """
+    if isinstance(value, ImageResult):
+        return value.to_dict()
+    if isinstance(value, WordArray):
+        return value.to_list()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
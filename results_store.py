@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مخزن نتائج SQLite مع فهرس نصي كامل (FTS5) للبحث في الكلمات المستخرجة
+SQLite Results Store With FTS5 Full-Text Search
+"""
+
+import json
+import time
+import queue
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+ENGINES = (('easyocr', 'easyocr_results'), ('tesseract', 'tesseract_results'))
+
+# الكلمات في جدول عادي والفهرس النصي يشير إليها (external content) فلا يُخزن النص مرتين.
+# الكلمات الجديدة تُفهرس دفعة واحدة قبل تثبيت كل معاملة (INSERT ... SELECT أسرع بنحو
+# ست مرات من مشغل لكل صف)، لذا المعرفات تصاعدية دائماً (AUTOINCREMENT) فكل ما بعد آخر
+# معرف مفهرس جديد حتى بعد حذف كلمات صورة مستبدلة
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL,
+    enhanced_path TEXT,
+    processing_time REAL,
+    total_texts_found INTEGER,
+    error TEXT,
+    timestamp TEXT
+);
+CREATE TABLE IF NOT EXISTS words (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    image_id INTEGER NOT NULL REFERENCES images (id),
+    engine TEXT NOT NULL,
+    text TEXT NOT NULL,
+    confidence REAL,
+    x0 REAL,
+    y0 REAL,
+    x1 REAL,
+    y1 REAL
+);
+CREATE INDEX IF NOT EXISTS words_image ON words (image_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5 (
+    text, content='words', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+class WordMatch(NamedTuple):
+    """كلمة مطابقة لاستعلام البحث"""
+    path: str
+    engine: str
+    text: str
+    confidence: Optional[float]
+    bbox: Tuple[float, float, float, float]
+
+def word_box(engine: str, bbox) -> Tuple[float, float, float, float]:
+    """
+    توحيد صندوق الكلمة إلى (x0, y0, x1, y1)
+
+    EasyOCR يعيد أربع نقاط الزوايا، وTesseract يعيد (left, top, width, height).
+    """
+    if engine == 'tesseract':
+        left, top, width, height = (float(value) for value in bbox)
+        return left, top, left + width, top + height
+    xs = [float(point[0]) for point in bbox]
+    ys = [float(point[1]) for point in bbox]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def result_rows(result: Dict) -> Tuple[tuple, List[tuple]]:
+    """
+    تحويل نتيجة صورة إلى صف الصورة وصفوف كلماتها
+
+    Returns:
+        tuple: (صف images دون المعرف، صفوف words دون معرف الصورة)
+    """
+    image_row = (str(result['image_path']), result['status'], result.get('enhanced_path'),
+                 result.get('processing_time'), result.get('total_texts_found'),
+                 result.get('error'), result.get('timestamp'))
+    words = []
+    for engine, key in ENGINES:
+        for word in result.get(key) or ():
+            confidence = word.get('confidence')
+            words.append((engine, str(word['text']), None if confidence is None else float(confidence))
+                         + word_box(engine, word['bbox']))
+    return image_row, words
+
+def fts_query(text: str) -> str:
+    """
+    تحويل نص البحث إلى استعلام FTS5 آمن
+
+    كل كلمة تُقتبس كعبارة (فرقم مثل INV-2024/001 يطابق رموزه المتتالية ولا يُفسر
+    "-" كعامل)، والنجمة في آخر الكلمة تبقى للبحث بالبادئة.
+    """
+    terms = []
+    for term in text.split():
+        prefix = term.endswith('*')
+        term = term.rstrip('*')
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+class ResultsStore:
+    """
+    مخزن نتائج المعالجة في SQLite: صف لكل صورة وصف لكل كلمة (النص والثقة
+    والصندوق والمحرك) مع فهرس FTS5 على نص الكلمات
+
+    الإضافة تحوّل النتيجة إلى صفوف وترسلها لخيط كتابة مخصص يجمعها في معاملات
+    (كل batch_size صورة أو flush_interval ثانية)، فلا تنتظر المعالجة القرص.
+    إضافة صورة موجودة تستبدل صفها وكلماتها.
+    """
+
+    def __init__(self, db_path, batch_size: int = 1000, flush_interval: float = 1.0,
+                 queue_size: int = 1024):
+        """
+        Args:
+            db_path: مسار قاعدة البيانات
+            batch_size: عدد الصور في المعاملة الواحدة
+            flush_interval: أقصى مدة قبل تثبيت المعاملة (ثانية)
+            queue_size: عدد النتائج المنتظرة قبل حجب المرسل
+        """
+        self.db_path = str(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.images_stored = 0
+        self.words_stored = 0
+        self.write_time = 0.0
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=wal")
+        self.connection.executescript(SCHEMA)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._error = None
+        self._closed = False
+
+    def add(self, result: Dict) -> None:
+        """إرسال نتيجة صورة للكتابة (الخيط يبدأ مع أول إضافة)"""
+        if self._error is not None:
+            raise RuntimeError(f"فشل مخزن النتائج: {self._error}")
+        if self._closed:
+            raise RuntimeError("مخزن النتائج مغلق")
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer_loop, name='results-store', daemon=True)
+            self._thread.start()
+        # التحويل هنا: النتيجة قد تُعدل لاحقاً في خيط المعالجة
+        self._queue.put(result_rows(result))
+
+    def add_many(self, results: Iterable[Dict]) -> None:
+        for result in results:
+            self.add(result)
+
+    def _writer_loop(self):
+        """خيط الكتابة: يملك اتصال الكتابة ويثبت الصفوف على دفعات"""
+        connection = sqlite3.connect(self.db_path, timeout=30.0)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        pending = 0
+        last_commit = time.monotonic()
+        # بعد كل تثبيت تكون كل الكلمات مفهرسة
+        indexed = connection.execute("SELECT COALESCE(MAX(id), 0) FROM words").fetchone()[0]
+
+        def flush():
+            nonlocal pending, last_commit, indexed
+            if pending:
+                start = time.perf_counter()
+                connection.execute("INSERT INTO words_fts (rowid, text) SELECT id, text FROM words "
+                                   "WHERE id > ?", (indexed,))
+                indexed = connection.execute("SELECT COALESCE(MAX(id), 0) FROM words").fetchone()[0]
+                connection.commit()
+                self.write_time += time.perf_counter() - start
+                self.images_stored += pending
+                pending = 0
+            last_commit = time.monotonic()
+
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    flush()
+                    continue
+                if item is None:
+                    break
+                start = time.perf_counter()
+                image_row, words = item
+                image_id = self._upsert_image(connection, image_row, indexed)
+                connection.executemany(
+                    "INSERT INTO words (image_id, engine, text, confidence, x0, y0, x1, y1) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [(image_id,) + word for word in words])
+                self.write_time += time.perf_counter() - start
+                self.words_stored += len(words)
+                pending += 1
+                if pending >= self.batch_size or time.monotonic() - last_commit > self.flush_interval:
+                    flush()
+        except Exception as e:
+            self._error = e
+            # تفريغ الطابور حتى لا يُحجب المرسلون
+            while self._queue.get() is not None:
+                pass
+        finally:
+            try:
+                # بعد الخطأ قد تكون الدفعة الجارية ناقصة والاتصال معطوباً: تُلغى بدل تثبيتها
+                if self._error is None:
+                    flush()
+                else:
+                    connection.rollback()
+            except Exception as e:
+                if self._error is None:
+                    self._error = e
+            finally:
+                connection.close()
+
+    @staticmethod
+    def _upsert_image(connection, image_row, indexed: int) -> int:
+        """إدراج صف الصورة أو تحديثه وحذف كلماتها السابقة (ومن الفهرس ما فُهرس منها)"""
+        row = connection.execute("SELECT id FROM images WHERE path = ?", (image_row[0],)).fetchone()
+        if row is None:
+            return connection.execute(
+                "INSERT INTO images (path, status, enhanced_path, processing_time, total_texts_found, "
+                "error, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)", image_row).lastrowid
+        connection.execute(
+            "UPDATE images SET status = ?, enhanced_path = ?, processing_time = ?, "
+            "total_texts_found = ?, error = ?, timestamp = ? WHERE id = ?", image_row[1:] + (row[0],))
+        connection.execute("INSERT INTO words_fts (words_fts, rowid, text) SELECT 'delete', id, text "
+                           "FROM words WHERE image_id = ? AND id <= ?", (row[0], indexed))
+        connection.execute("DELETE FROM words WHERE image_id = ?", (row[0],))
+        return row[0]
+
+    def flush(self) -> None:
+        """انتظار كتابة كل النتائج المرسلة (يغلق خيط الكتابة؛ الإضافة التالية تبدأ خيطاً جديداً)"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            raise RuntimeError(f"فشل مخزن النتائج: {self._error}")
+
+    def search(self, query: str, limit: Optional[int] = 100, raw: bool = False) -> List[WordMatch]:
+        """
+        البحث في نص الكلمات المستخرجة
+
+        Args:
+            query: كلمات البحث (كل كلمة عبارة، والنجمة في آخرها للبادئة)
+            limit: الحد الأقصى للنتائج (None لكل النتائج)
+            raw: تمرير الاستعلام بصيغة FTS5 كما هو (AND/OR/NOT/NEAR)
+
+        Returns:
+            List[WordMatch]: الكلمات المطابقة مع صورها وصناديقها، الأقرب مطابقة أولاً
+        """
+        match = query if raw else fts_query(query)
+        if not match:
+            return []
+        sql = ("SELECT images.path, words.engine, words.text, words.confidence, "
+               "words.x0, words.y0, words.x1, words.y1 FROM words_fts "
+               "JOIN words ON words.id = words_fts.rowid JOIN images ON images.id = words.image_id "
+               "WHERE words_fts MATCH ? ORDER BY words_fts.rank")
+        params = [match]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [WordMatch(path, engine, text, confidence, (x0, y0, x1, y1))
+                for path, engine, text, confidence, x0, y0, x1, y1 in self.connection.execute(sql, params)]
+
+    def search_images(self, query: str, limit: Optional[int] = 100, raw: bool = False) -> Dict[str, List[WordMatch]]:
+        """
+        مثل search لكن مجمعة حسب الصورة
+
+        Returns:
+            Dict[str, List[WordMatch]]: مسار الصورة ← كلماتها المطابقة
+        """
+        images: Dict[str, List[WordMatch]] = {}
+        for word in self.search(query, limit, raw):
+            images.setdefault(word.path, []).append(word)
+        return images
+
+    def count(self) -> Tuple[int, int]:
+        """(عدد الصور، عدد الكلمات)"""
+        return (self.connection.execute("SELECT COUNT(*) FROM images").fetchone()[0],
+                self.connection.execute("SELECT COUNT(*) FROM words").fetchone()[0])
+
+    def stats(self) -> Dict:
+        return {'results_db_images': self.images_stored, 'results_db_words': self.words_stored,
+                'results_db_write_time': self.write_time}
+
+    def close(self):
+        """انتظار كتابة كل النتائج وإغلاق القاعدة"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.flush()
+        finally:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def iter_results_file(results_file) -> Iterator[Dict]:
+    """قراءة نتائج محفوظة بـ save_results (JSON قائمة أو JSONL سجل في كل سطر)"""
+    results_file = Path(results_file)
+    with open(results_file, 'r', encoding='utf-8') as f:
+        if results_file.suffix.lower() == '.jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+def main():
+    """الدالة الرئيسية"""
+    parser = argparse.ArgumentParser(description='البحث في نتائج استخراج النصوص')
+    parser.add_argument('db', help='مسار قاعدة النتائج')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    search = subparsers.add_parser('search', help='البحث عن الصور التي تحتوي نصاً')
+    search.add_argument('query', help='كلمات البحث (النجمة في آخر الكلمة للبادئة)')
+    search.add_argument('--limit', type=int, default=100, help='الحد الأقصى للكلمات المطابقة')
+    search.add_argument('--raw', action='store_true', help='استعلام بصيغة FTS5 كما هو')
+
+    import_parser = subparsers.add_parser('import', help='استيراد ملفات نتائج JSON/JSONL')
+    import_parser.add_argument('results_files', nargs='+', help='ملفات النتائج')
+
+    args = parser.parse_args()
+
+    with ResultsStore(args.db) as store:
+        if args.command == 'import':
+            for results_file in args.results_files:
+                store.add_many(iter_results_file(results_file))
+            store.flush()
+            images, words = store.count()
+            print(f"Stored images: {images}, words: {words}")
+        else:
+            start = time.perf_counter()
+            images = store.search_images(args.query, args.limit, args.raw)
+            elapsed = time.perf_counter() - start
+            for path, words in images.items():
+                print(path)
+                for word in words:
+                    x0, y0, x1, y1 = word.bbox
+                    print(f"  [{word.engine}] {word.text} ({word.confidence:.2f}) "
+                          f"@ {x0:.0f},{y0:.0f},{x1:.0f},{y1:.0f}")
+            print(f"{len(images)} images in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
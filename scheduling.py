@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+جدولة الصور حسب التكلفة المقدرة
+Cost-Aware Image Scheduling
+"""
+
+import math
+from typing import List, Dict, Iterable, Sequence
+from image_probe import probe_image
+from document_pages import document_path, split_page_path, stat_image
+
+# سياسات الجدولة المدعومة:
+#   path: ترتيب المسارات كما هو (السلوك الافتراضي)
+#   largest_first: الأكبر أولاً (LPT) لتقليل الزمن الكلي للدفعة
+#   shortest_first: الأصغر أولاً (SJF) لظهور النتائج الأولى بسرعة
+SCHEDULING_POLICIES = ('path', 'largest_first', 'shortest_first')
+COST_ESTIMATES = ('file_size', 'pixels')
+
+def estimate_image_cost(image_path, method: str = 'file_size') -> float:
+    """
+    تقدير تكلفة معالجة صورة دون فك ترميزها
+
+    Args:
+        image_path: مسار الصورة
+        method: طريقة التقدير ("file_size" أو "pixels" من ترويسة الملف)
+
+    Returns:
+        float: التكلفة المقدرة (0 إذا تعذر التقدير)
+    """
+    try:
+        if method == 'pixels':
+            # الأبعاد من الترويسة فقط (مع تخزين مؤقت حسب الحجم وتاريخ التعديل)
+            info = probe_image(document_path(image_path))
+            if info is None:
+                return 0.0
+            # صفحة واحدة من مستند متعدد الصفحات تكلف صفحة واحدة فقط
+            return float(info.pixels * (1 if split_page_path(image_path) else info.pages))
+        return float(stat_image(image_path)[0])
+    except (OSError, ValueError):
+        return 0.0
+
+def order_by_policy(image_paths: Iterable, policy: str = 'path',
+                    cost_method: str = 'file_size') -> List:
+    """
+    ترتيب الصور حسب سياسة الجدولة
+
+    Args:
+        image_paths: مسارات الصور
+        policy: سياسة الجدولة (انظر SCHEDULING_POLICIES)
+        cost_method: طريقة تقدير التكلفة
+
+    Returns:
+        List: المسارات بترتيب الإرسال
+    """
+    if policy not in SCHEDULING_POLICIES:
+        raise ValueError(f"سياسة جدولة غير مدعومة: {policy}")
+
+    image_paths = list(image_paths)
+    if policy == 'path':
+        return image_paths
+
+    costs = {path: estimate_image_cost(path, cost_method) for path in image_paths}
+    return sorted(image_paths, key=lambda path: costs[path],
+                  reverse=(policy == 'largest_first'))
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """حساب النسبة المئوية (nearest-rank) لقائمة قيم"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def summarize_completion_times(completion_times: Sequence[float]) -> Dict:
+    """
+    ملخص أزمنة ظهور النتائج منذ بداية الدفعة
+
+    Args:
+        completion_times: زمن اكتمال كل صورة منذ بداية الدفعة (ثانية)
+
+    Returns:
+        Dict: الزمن الكلي للدفعة وزمن أول نتيجة والنسب المئوية
+    """
+    if not completion_times:
+        return {}
+
+    return {
+        'makespan': max(completion_times),
+        'time_to_first_result': min(completion_times),
+        'p50_latency': percentile(completion_times, 50),
+        'p99_latency': percentile(completion_times, 99)
+    }
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+لغة استعلام لاختيار الصور تجمع الاسم والحجم والتاريخ والأبعاد في مرور واحد
+Composable Image Selection Query Language
+
+مثال:
+    name~invoice AND size<5MB AND mtime>2025-01-01 AND width>=2000
+    (ext=.tif OR ext=.tiff) AND NOT path~/drafts/
+
+الحقول: name, path, ext, size, mtime, width, height, channels, dpi, pages
+العمليات: = != < <= > >= ~ (يحتوي، دون تمييز حالة الأحرف)
+"""
+
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+from image_probe import ImageInfo, probe_image
+from image_discovery import walk_images, SUPPORTED_FORMATS, DEFAULT_DISCOVERY_WORKERS
+
+# تكلفة تقييم الحقل: الاسم مجاني، الحجم والتاريخ يحتاجان stat، الأبعاد تحتاج قراءة الترويسة
+COST_NAME = 0
+COST_STAT = 1
+COST_PROBE = 2
+
+_SIZE_UNITS = {'': 1, 'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3, 'tb': 1024 ** 4}
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<paren>[()])
+      | (?P<compare>(?P<field>[A-Za-z_]+)\s*(?P<op><=|>=|!=|=|<|>|~)\s*
+                    (?P<value>"[^"]*"|'[^']*'|[^\s()]+))
+      | (?P<keyword>AND|OR|NOT)(?![\w.])
+    )""", re.VERBOSE | re.IGNORECASE)
+
+class QueryError(ValueError):
+    """خطأ في صياغة الاستعلام"""
+
+class ImageCandidate:
+    """صورة مرشحة تُحسب خصائصها عند الحاجة فقط (stat ثم الترويسة)"""
+
+    __slots__ = ('path', 'name', '_size', '_mtime_ns', '_info')
+
+    def __init__(self, path, size: Optional[int] = None, mtime_ns: Optional[int] = None):
+        self.path = os.fspath(path)
+        self.name = os.path.basename(self.path)
+        self._size = size
+        self._mtime_ns = mtime_ns
+        self._info = False
+
+    def _stat(self):
+        stat = os.stat(self.path)
+        self._size, self._mtime_ns = stat.st_size, stat.st_mtime_ns
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._stat()
+        return self._size
+
+    @property
+    def mtime_ns(self) -> int:
+        if self._mtime_ns is None:
+            self._stat()
+        return self._mtime_ns
+
+    @property
+    def info(self) -> Optional[ImageInfo]:
+        """معلومات الترويسة (None إذا تعذرت القراءة)"""
+        if self._info is False:
+            self._info = probe_image(self.path, self.size, self.mtime_ns)
+        return self._info
+
+    def header_field(self, name: str):
+        info = self.info
+        return getattr(info, name) if info is not None else None
+
+# الحقل: (التكلفة، دالة القراءة، عمود الفهرس، نوع القيمة)
+FIELDS = {
+    'name': (COST_NAME, lambda c: c.name, 'name', 'text'),
+    'path': (COST_NAME, lambda c: c.path, 'path', 'text'),
+    'ext': (COST_NAME, lambda c: os.path.splitext(c.name)[1].lower(), 'extension', 'ext'),
+    'size': (COST_STAT, lambda c: c.size, 'size', 'size'),
+    'mtime': (COST_STAT, lambda c: c.mtime_ns, 'mtime_ns', 'date'),
+    'width': (COST_PROBE, lambda c: c.header_field('width'), 'width', 'int'),
+    'height': (COST_PROBE, lambda c: c.header_field('height'), 'height', 'int'),
+    'channels': (COST_PROBE, lambda c: c.header_field('channels'), 'channels', 'int'),
+    'dpi': (COST_PROBE, lambda c: c.header_field('dpi_x'), 'dpi_x', 'float'),
+    'pages': (COST_PROBE, lambda c: c.header_field('pages'), 'pages', 'int'),
+}
+
+def parse_size(text: str) -> int:
+    """تحويل حجم مثل 5MB أو 512KB إلى بايت"""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([a-z]*)', text.strip().lower())
+    if not match or match.group(2) not in _SIZE_UNITS:
+        raise QueryError(f"حجم غير صالح: {text}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+def parse_date(text: str) -> datetime:
+    """تحويل تاريخ ISO (YYYY-MM-DD أو YYYY-MM-DDTHH:MM) إلى datetime"""
+    try:
+        return datetime.fromisoformat(text.strip())
+    except ValueError:
+        raise QueryError(f"تاريخ غير صالح: {text}")
+
+def _to_ns(value: datetime) -> int:
+    return int(value.timestamp() * 1e9)
+
+class Compare:
+    """مقارنة حقل بقيمة"""
+
+    def __init__(self, field: str, op: str, raw: str):
+        field = field.lower()
+        if field not in FIELDS:
+            raise QueryError(f"حقل غير معروف: {field} (المتاح: {', '.join(FIELDS)})")
+        self.field = field
+        self.op = op
+        self.cost, self._getter, self.column, kind = FIELDS[field]
+        if op == '~' and kind not in ('text', 'ext'):
+            raise QueryError(f"العملية ~ للحقول النصية فقط: {field}")
+
+        self.day_range = None
+        if kind == 'size':
+            self.value = parse_size(raw)
+        elif kind in ('int', 'float'):
+            try:
+                self.value = int(raw) if kind == 'int' else float(raw)
+            except ValueError:
+                raise QueryError(f"قيمة رقمية غير صالحة: {raw}")
+        elif kind == 'date':
+            date = parse_date(raw)
+            self.value = _to_ns(date)
+            if op in ('=', '!=') and len(raw.strip()) == 10:
+                # المساواة مع تاريخ دون وقت تعني اليوم كاملاً
+                self.day_range = (self.value, _to_ns(date + timedelta(days=1)))
+        elif kind == 'ext':
+            raw = raw.lower()
+            self.value = raw if raw.startswith('.') or op == '~' else '.' + raw
+        else:
+            self.value = raw.lower() if op == '~' else raw
+
+    def evaluate(self, candidate: ImageCandidate) -> bool:
+        try:
+            actual = self._getter(candidate)
+        except OSError:
+            return False
+        if actual is None:
+            return False
+        if self.day_range is not None:
+            inside = self.day_range[0] <= actual < self.day_range[1]
+            return inside if self.op == '=' else not inside
+
+        op, value = self.op, self.value
+        if op == '~':
+            return value in actual.lower()
+        if op == '=':
+            return actual == value
+        if op == '!=':
+            return actual != value
+        if op == '<':
+            return actual < value
+        if op == '<=':
+            return actual <= value
+        if op == '>':
+            return actual > value
+        return actual >= value
+
+    def to_sql(self) -> Tuple[str, list]:
+        if self.day_range is not None:
+            clause = f"({self.column} >= ? AND {self.column} < ?)"
+            return (clause if self.op == '=' else f"NOT {clause}"), list(self.day_range)
+        if self.op == '~':
+            escaped = self.value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            return f"{self.column} LIKE ? ESCAPE '\\'", [f"%{escaped}%"]
+        return f"{self.column} {self.op} ?", [self.value]
+
+    def fields(self) -> set:
+        return {self.field}
+
+    def __repr__(self):
+        return f"{self.field}{self.op}{self.value}"
+
+class And:
+    """كل الشروط (تُقيّم الأرخص أولاً ويتوقف التقييم عند أول شرط خاطئ)"""
+
+    def __init__(self, children: List):
+        self.children = sorted(children, key=lambda child: child.cost)
+        self.cost = max(child.cost for child in self.children)
+
+    def evaluate(self, candidate) -> bool:
+        return all(child.evaluate(candidate) for child in self.children)
+
+    def to_sql(self) -> Tuple[str, list]:
+        parts = [child.to_sql() for child in self.children]
+        return "(" + " AND ".join(p[0] for p in parts) + ")", [v for p in parts for v in p[1]]
+
+    def fields(self) -> set:
+        return set().union(*(child.fields() for child in self.children))
+
+class Or(And):
+    """أي شرط (تُقيّم الأرخص أولاً ويتوقف التقييم عند أول شرط صحيح)"""
+
+    def evaluate(self, candidate) -> bool:
+        return any(child.evaluate(candidate) for child in self.children)
+
+    def to_sql(self) -> Tuple[str, list]:
+        parts = [child.to_sql() for child in self.children]
+        return "(" + " OR ".join(p[0] for p in parts) + ")", [v for p in parts for v in p[1]]
+
+class Not:
+    """نفي شرط"""
+
+    def __init__(self, child):
+        self.child = child
+        self.cost = child.cost
+
+    def evaluate(self, candidate) -> bool:
+        return not self.child.evaluate(candidate)
+
+    def to_sql(self) -> Tuple[str, list]:
+        # الحقل المجهول (NULL) يجعل الشرط خاطئاً في evaluate، فنفيه صحيح في SQL أيضاً
+        clause, params = self.child.to_sql()
+        return f"NOT COALESCE({clause}, 0)", params
+
+    def fields(self) -> set:
+        return self.child.fields()
+
+class _Parser:
+    """محلل تنازلي: or := and (OR and)* ; and := unary (AND? unary)* ; unary := NOT unary | (or) | compare"""
+
+    def __init__(self, text: str):
+        self.tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if not match or match.end() == position:
+                raise QueryError(f"صياغة غير صالحة عند: {text[position:].strip()}")
+            self.tokens.append(match)
+            position = match.end()
+        self.index = 0
+
+    def _peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def _keyword(self, token) -> Optional[str]:
+        return token.group('keyword').upper() if token is not None and token.group('keyword') else None
+
+    def parse(self):
+        if not self.tokens:
+            raise QueryError("الاستعلام فارغ")
+        node = self._or()
+        if self._peek() is not None:
+            raise QueryError(f"رمز غير متوقع: {self._peek().group(0).strip()}")
+        return node
+
+    def _or(self):
+        children = [self._and()]
+        while self._keyword(self._peek()) == 'OR':
+            self.index += 1
+            children.append(self._and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def _and(self):
+        children = [self._unary()]
+        while True:
+            token = self._peek()
+            if token is None or self._keyword(token) == 'OR' or token.group('paren') == ')':
+                break
+            if self._keyword(token) == 'AND':
+                self.index += 1
+            children.append(self._unary())
+        return children[0] if len(children) == 1 else And(children)
+
+    def _unary(self):
+        token = self._peek()
+        if token is None:
+            raise QueryError("الاستعلام ينتهي بشكل غير متوقع")
+        self.index += 1
+        if self._keyword(token) == 'NOT':
+            return Not(self._unary())
+        if token.group('paren') == '(':
+            node = self._or()
+            closing = self._peek()
+            if closing is None or closing.group('paren') != ')':
+                raise QueryError("قوس غير مغلق")
+            self.index += 1
+            return node
+        if token.group('compare'):
+            raw = token.group('value')
+            if raw[:1] in ('"', "'"):
+                raw = raw[1:-1]
+            return Compare(token.group('field'), token.group('op'), raw)
+        raise QueryError(f"رمز غير متوقع: {token.group(0).strip()}")
+
+class SelectionQuery:
+    """
+    استعلام اختيار مُجمّع في شرط واحد
+
+    يُقيّم الشرط على كل صورة مرة واحدة أثناء المسح؛ الشروط الأرخص (الاسم
+    والامتداد) تُقيّم أولاً، ولا يُستدعى stat أو قراءة الترويسة إلا للصور
+    التي اجتازتها.
+    """
+
+    def __init__(self, root, text: str = ''):
+        self.root = root
+        self.text = text
+
+    @classmethod
+    def parse(cls, text: str) -> 'SelectionQuery':
+        return cls(_Parser(text).parse(), text.strip())
+
+    @classmethod
+    def from_criteria(cls, pattern: Optional[str] = None, min_size: Optional[int] = None,
+                      max_size: Optional[int] = None, start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None) -> Optional['SelectionQuery']:
+        """بناء استعلام من معايير منفصلة (None إذا لم يوجد أي معيار)"""
+        conditions = []
+        if pattern:
+            conditions.append(Compare('name', '~', pattern))
+        if min_size is not None:
+            conditions.append(Compare('size', '>=', str(int(min_size))))
+        if max_size is not None and max_size != float('inf'):
+            conditions.append(Compare('size', '<=', str(int(max_size))))
+        if start_date is not None:
+            conditions.append(Compare('mtime', '>=', start_date.isoformat()))
+        if end_date is not None:
+            conditions.append(Compare('mtime', '<=', end_date.isoformat()))
+        if not conditions:
+            return None
+        root = conditions[0] if len(conditions) == 1 else And(conditions)
+        return cls(root, ' AND '.join(repr(condition) for condition in conditions))
+
+    @classmethod
+    def all_of(cls, queries: Iterable['SelectionQuery']) -> Optional['SelectionQuery']:
+        """دمج عدة استعلامات بـ AND (None إذا لم يوجد أي استعلام)"""
+        queries = [query for query in queries if query is not None]
+        if not queries:
+            return None
+        if len(queries) == 1:
+            return queries[0]
+        return cls(And([query.root for query in queries]), ' AND '.join(f"({q.text})" for q in queries))
+
+    @property
+    def fields(self) -> set:
+        return self.root.fields()
+
+    @property
+    def needs_probe(self) -> bool:
+        return self.root.cost >= COST_PROBE
+
+    def matches(self, candidate) -> bool:
+        if not isinstance(candidate, ImageCandidate):
+            candidate = ImageCandidate(candidate)
+        return self.root.evaluate(candidate)
+
+    def to_sql(self) -> Tuple[str, list]:
+        """تحويل الاستعلام إلى شرط WHERE لفهرس الملفات"""
+        return self.root.to_sql()
+
+    def __repr__(self):
+        return f"SelectionQuery({self.text!r})"
+
+def iter_matching_images(directory, query: Optional[SelectionQuery], recursive: bool = True,
+                         extensions: Iterable[str] = SUPPORTED_FORMATS,
+                         workers: int = DEFAULT_DISCOVERY_WORKERS) -> Iterator[Path]:
+    """
+    اختيار الصور المطابقة للاستعلام في مرور واحد على الاكتشاف
+
+    Yields:
+        Path: الصور المطابقة بترتيب الاكتشاف
+    """
+    for image in walk_images(directory, recursive, extensions, workers, with_stat=False):
+        if query is None or query.root.evaluate(ImageCandidate(image.path)):
+            yield Path(image.path)
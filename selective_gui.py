@@ -9,6 +9,7 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import os
+import sqlite3
 from pathlib import Path
 import json
 import csv
@@ -17,7 +18,9 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
 from selective_processor import SelectiveProcessor
-import random
+from file_index import FileIndex
+from image_discovery import DiscoveredImage
+from image_sampling import sample_images
 
 class SelectiveProcessorGUI:
     def __init__(self, root):
@@ -32,6 +35,8 @@ class SelectiveProcessorGUI:
         self.is_processing = False
         self.selected_images = []
         self.all_images = []
+        self.image_info = {}
+        self.index_available = False
         
         self.setup_ui()
     
@@ -104,7 +109,8 @@ class SelectiveProcessorGUI:
         tk.Label(selection_frame, text="نمط الاختيار:", font=("Arial", 10)).pack(side=tk.LEFT, padx=(20,5))
         self.selection_mode = tk.StringVar(value="random")
         selection_combo = ttk.Combobox(selection_frame, textvariable=self.selection_mode, 
-                                      values=["random", "first", "last", "pattern"], width=10)
+                                      values=["random", "random_folder", "random_extension", "random_size",
+                                              "first", "last", "pattern"], width=16)
         selection_combo.pack(side=tk.LEFT, padx=5)
         
         # نمط البحث
@@ -141,6 +147,12 @@ class SelectiveProcessorGUI:
                                       values=["flat", "by_date", "by_name", "by_size"], width=10)
         structure_combo.pack(side=tk.LEFT, padx=5)
         
+        # بذرة العينة العشوائية (فارغة لعينة مختلفة في كل مرة)
+        tk.Label(advanced_frame, text="البذرة:", font=("Arial", 10)).pack(side=tk.LEFT, padx=(20,5))
+        self.seed_var = tk.StringVar()
+        seed_entry = tk.Entry(advanced_frame, textvariable=self.seed_var, width=8)
+        seed_entry.pack(side=tk.LEFT, padx=5)
+        
         # حفظ الصور المحسنة
         self.save_enhanced_var = tk.BooleanVar(value=True)
         save_check = tk.Checkbutton(
@@ -393,11 +405,19 @@ class SelectiveProcessorGUI:
             # إنشاء معالج مؤقت للفحص
             temp_processor = SelectiveProcessor()
             
-            # البحث عن الصور
-            self.all_images = temp_processor.find_images_in_directory(
-                input_path, 
-                self.recursive_var.get()
-            )
+            # البحث عن الصور عبر الفهرس الدائم (يُعاد قراءة المجلدات المعدلة فقط)
+            try:
+                with temp_processor.open_file_index(input_path, self.recursive_var.get()) as index:
+                    records = index.query(input_path, self.recursive_var.get(),
+                                          extensions=temp_processor.get_supported_formats())
+                self.all_images = [Path(record.path) for record in records]
+                self.image_info = {Path(record.path): (record.size, record.mtime_ns) for record in records}
+                self.index_available = True
+            except (sqlite3.Error, OSError):
+                # تعذر فتح الفهرس (مجلد تخزين مؤقت غير قابل للكتابة): مسح مباشر
+                self.all_images = temp_processor.find_images_in_directory(input_path, self.recursive_var.get())
+                self.image_info = {}
+                self.index_available = False
             
             # تحديث الواجهة
             self.root.after(0, self._update_available_images)
@@ -405,6 +425,14 @@ class SelectiveProcessorGUI:
         except Exception as e:
             self.root.after(0, lambda: self._show_error(f"خطأ في فحص الصور: {str(e)}"))
     
+    def _get_image_info(self, image_path):
+        """الحجم وتاريخ التعديل من الفهرس، أو من stat للصور غير المفهرسة"""
+        info = self.image_info.get(image_path)
+        if info is None:
+            stat = image_path.stat()
+            info = (stat.st_size, stat.st_mtime_ns)
+        return info
+    
     def _update_available_images(self):
         """تحديث قائمة الصور المتاحة"""
         # مسح القائمة السابقة
@@ -413,8 +441,8 @@ class SelectiveProcessorGUI:
         # إضافة الصور الجديدة
         for image_path in self.all_images:
             try:
-                file_size = image_path.stat().st_size
-                file_date = datetime.fromtimestamp(image_path.stat().st_mtime).strftime("%Y-%m-%d %H:%M")
+                file_size, mtime_ns = self._get_image_info(image_path)
+                file_date = datetime.fromtimestamp(mtime_ns / 1e9).strftime("%Y-%m-%d %H:%M")
                 
                 # تحويل الحجم إلى KB/MB
                 if file_size < 1024:
@@ -457,18 +485,27 @@ class SelectiveProcessorGUI:
             # إنشاء معالج مؤقت للاختيار
             temp_processor = SelectiveProcessor()
             
-            if pattern:
-                # اختيار بناءً على النمط
-                self.selected_images = temp_processor.select_images_by_pattern(
-                    Path(self.input_var.get()), pattern, self.recursive_var.get()
-                )
+            if pattern and self.index_available:
+                # اختيار بناءً على النمط من الفهرس الذي بناه الفحص دون إعادة المسح
+                input_path = Path(self.input_var.get())
+                with FileIndex.for_directory(input_path) as index:
+                    self.selected_images = index.select(
+                        input_path, self.recursive_var.get(), pattern=pattern,
+                        extensions=temp_processor.get_supported_formats()
+                    )
+            elif pattern:
+                # دون فهرس: تصفية نتيجة الفحص بالاسم (دون تمييز حالة الأحرف كالفهرس)
+                self.selected_images = [path for path in self.all_images
+                                        if pattern.lower() in path.name.lower()]
             else:
                 # اختيار بناءً على النمط المحدد
-                if selection_mode == "random":
-                    if len(self.all_images) > max_images:
-                        self.selected_images = random.sample(self.all_images, max_images)
-                    else:
-                        self.selected_images = self.all_images.copy()
+                if selection_mode.startswith("random"):
+                    # عينة خزان (بحصص متساوية لكل طبقة عند الطلب) دون نسخ القائمة
+                    by = selection_mode.partition("_")[2] or None
+                    images = (DiscoveredImage(str(path), *self.image_info.get(path, (None, None)))
+                              for path in self.all_images)
+                    self.selected_images = sample_images(images, max_images, by,
+                                                         self.seed_var.get().strip() or None)
                 elif selection_mode == "first":
                     self.selected_images = self.all_images[:max_images]
                 elif selection_mode == "last":
@@ -490,8 +527,8 @@ class SelectiveProcessorGUI:
         # إضافة الصور المختارة
         for image_path in self.selected_images:
             try:
-                file_size = image_path.stat().st_size
-                file_date = datetime.fromtimestamp(image_path.stat().st_mtime).strftime("%Y-%m-%d %H:%M")
+                file_size, mtime_ns = self._get_image_info(image_path)
+                file_date = datetime.fromtimestamp(mtime_ns / 1e9).strftime("%Y-%m-%d %H:%M")
                 
                 # تحويل الحجم إلى KB/MB
                 if file_size < 1024:
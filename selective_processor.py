@@ -5,38 +5,47 @@
 Selective Image Processor
 """
 
-import cv2
 import numpy as np
 import os
 import json
 import csv
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 import threading
 import time
 from datetime import datetime
 import argparse
 from image_enhancer import ImageEnhancer
+from image_discovery import find_images, walk_images
+from image_sampling import STRATA, sample_images
+from binary_image import write_enhanced_image
+from file_index import FileIndex
+from selection_query import SelectionQuery, iter_matching_images, parse_date
 import logging
-from typing import List, Dict, Optional, Callable
+from typing import List, Dict, Optional, Callable, Iterable, Iterator
 
 class SelectiveProcessor:
-    def __init__(self, max_workers=4, use_multiprocessing=False):
+    def __init__(self, max_workers=4, use_multiprocessing=False, use_index=False, index_path=None):
         """
         تهيئة معالج الصور الانتقائي
         
         Args:
             max_workers: عدد العمال المتوازيين
             use_multiprocessing: استخدام multiprocessing بدلاً من threading
+            use_index: اختيار الصور من فهرس SQLite دائم يُحدَّث تزايدياً بدلاً من المسح
+            index_path: مسار قاعدة الفهرس (افتراضياً في مجلد التخزين المؤقت للمستخدم)
         """
         self.max_workers = max_workers
         self.use_multiprocessing = use_multiprocessing
+        self.use_index = use_index
+        self.index_path = index_path
         self.enhancer = ImageEnhancer()
         self.results = []
         self.progress_callback = None
         self.total_images = 0
         self.processed_images = 0
         self.selected_images = []
+        self.time_to_first_result = None
         
         # إعداد logging
         logging.basicConfig(
@@ -63,65 +72,77 @@ class SelectiveProcessor:
         if not directory.exists():
             raise ValueError(f"المجلد غير موجود: {directory}")
         
-        supported_formats = self.get_supported_formats()
-        images = []
+        return find_images(directory, recursive, self.get_supported_formats())
+    
+    def iter_selected_images(self, directory: Path, recursive: bool = True, pattern: str = None,
+                             min_size: int = None, max_size: int = None,
+                             start_date: datetime = None, end_date: datetime = None,
+                             query=None) -> Iterator[Path]:
+        """
+        اختيار الصور أثناء المسح (مولّد)
         
-        if recursive:
-            pattern = "**/*"
-        else:
-            pattern = "*"
+        كل المعايير تُجمع في استعلام واحد يُقيّم على كل صورة فور اكتشافها: الاسم
+        أولاً، ثم stat للحجم والتاريخ، ثم الترويسة للأبعاد، وفقط عند الحاجة.
         
-        for file_path in directory.glob(pattern):
-            if file_path.is_file() and file_path.suffix.lower() in supported_formats:
-                images.append(file_path)
+        Args:
+            query: استعلام إضافي (نص مثل "name~invoice AND width>=2000" أو SelectionQuery)
         
-        return sorted(images)
+        Yields:
+            Path: الصور المطابقة بترتيب الاكتشاف (مرتبة داخل كل مجلد)
+        """
+        directory = Path(directory)
+        if not directory.exists():
+            raise ValueError(f"المجلد غير موجود: {directory}")
+        
+        if isinstance(query, str):
+            query = SelectionQuery.parse(query)
+        combined = SelectionQuery.all_of([
+            SelectionQuery.from_criteria(pattern, min_size, max_size, start_date, end_date), query
+        ])
+        return iter_matching_images(directory, combined, recursive, self.get_supported_formats())
+    
+    def open_file_index(self, directory: Path, recursive: bool = True) -> FileIndex:
+        """فتح فهرس المجلد وتحديثه تزايدياً (stat واحد لكل مجلد لم يتغير)"""
+        directory = Path(directory)
+        if not directory.exists():
+            raise ValueError(f"المجلد غير موجود: {directory}")
+        
+        index = FileIndex.for_directory(directory, self.index_path)
+        index.refresh(directory, recursive, self.get_supported_formats())
+        return index
+    
+    def _select_from_index(self, directory: Path, recursive: bool, **filters) -> List[Path]:
+        with self.open_file_index(directory, recursive) as index:
+            return index.select(directory, recursive, extensions=self.get_supported_formats(), **filters)
     
     def select_images_by_pattern(self, directory: Path, pattern: str, recursive: bool = True) -> List[Path]:
         """اختيار الصور بناءً على نمط معين"""
-        all_images = self.find_images_in_directory(directory, recursive)
-        selected = []
-        
-        for image_path in all_images:
-            if pattern.lower() in image_path.name.lower():
-                selected.append(image_path)
-        
-        return selected
+        if self.use_index:
+            return self._select_from_index(directory, recursive, pattern=pattern)
+        return sorted(self.iter_selected_images(directory, recursive, pattern=pattern))
     
     def select_images_by_size(self, directory: Path, min_size: int = 0, max_size: int = float('inf'), 
                             recursive: bool = True) -> List[Path]:
         """اختيار الصور بناءً على الحجم"""
-        all_images = self.find_images_in_directory(directory, recursive)
-        selected = []
-        
-        for image_path in all_images:
-            try:
-                file_size = image_path.stat().st_size
-                if min_size <= file_size <= max_size:
-                    selected.append(image_path)
-            except OSError:
-                continue
-        
-        return selected
+        if self.use_index:
+            return self._select_from_index(directory, recursive, min_size=min_size,
+                                           max_size=None if max_size == float('inf') else max_size)
+        return sorted(self.iter_selected_images(directory, recursive, min_size=min_size, max_size=max_size))
     
     def select_images_by_date(self, directory: Path, start_date: datetime = None, 
                             end_date: datetime = None, recursive: bool = True) -> List[Path]:
         """اختيار الصور بناءً على تاريخ الإنشاء"""
-        all_images = self.find_images_in_directory(directory, recursive)
-        selected = []
-        
-        for image_path in all_images:
-            try:
-                file_time = datetime.fromtimestamp(image_path.stat().st_mtime)
-                if start_date and file_time < start_date:
-                    continue
-                if end_date and file_time > end_date:
-                    continue
-                selected.append(image_path)
-            except OSError:
-                continue
-        
-        return selected
+        if self.use_index:
+            return self._select_from_index(directory, recursive, start_date=start_date, end_date=end_date)
+        return sorted(self.iter_selected_images(directory, recursive,
+                                                start_date=start_date, end_date=end_date))
+    
+    def select_images_by_dimensions(self, directory: Path, min_width: int = None, min_height: int = None,
+                                    max_width: int = None, max_height: int = None,
+                                    recursive: bool = True) -> List[Path]:
+        """اختيار الصور بناءً على الأبعاد (من الفهرس، تُقرأ الأبعاد من ترويسة الصور)"""
+        return self._select_from_index(directory, recursive, min_width=min_width, min_height=min_height,
+                                       max_width=max_width, max_height=max_height)
     
     def select_images_by_list(self, image_paths: List[str]) -> List[Path]:
         """اختيار الصور من قائمة مسارات"""
@@ -136,16 +157,24 @@ class SelectiveProcessor:
         
         return selected
     
-    def select_images_interactive(self, directory: Path, max_images: int = 5000) -> List[Path]:
-        """اختيار الصور بشكل تفاعلي"""
-        all_images = self.find_images_in_directory(directory, True)
+    def select_images_interactive(self, directory: Path, max_images: int = 5000, by: str = None,
+                                  seed=None, recursive: bool = True) -> List[Path]:
+        """
+        اختيار عينة عشوائية من الصور أثناء المسح
         
-        if len(all_images) <= max_images:
-            return all_images
+        لا تُحفظ إلا العينة (عينة خزان)، فتبقى الذاكرة بحجم max_images مهما كبر المجلد.
         
-        # إذا كان عدد الصور أكبر من الحد الأقصى، اختر عشوائياً
-        import random
-        return random.sample(all_images, max_images)
+        Args:
+            max_images: حجم العينة (تُرجع كل الصور إذا كانت أقل)
+            by: حصص متساوية لكل 'folder' أو 'extension' أو 'size' (فئة الحجم)
+            seed: بذرة لإعادة إنتاج العينة نفسها
+        """
+        directory = Path(directory)
+        if not directory.exists():
+            raise ValueError(f"المجلد غير موجود: {directory}")
+        
+        images = walk_images(directory, recursive, self.get_supported_formats(), with_stat=(by == 'size'))
+        return sample_images(images, max_images, by, seed)
     
     def create_output_structure(self, base_output_dir: Path, structure_type: str = "flat") -> Path:
         """
@@ -228,7 +257,7 @@ class SelectiveProcessor:
                     enhanced_filename = f"enhanced_{image_path.name}"
                 
                 enhanced_path = output_dir / enhanced_filename
-                cv2.imwrite(str(enhanced_path), enhanced_image)
+                write_enhanced_image(enhanced_path, enhanced_image)
             
             processing_time = time.time() - start_time
             
@@ -257,13 +286,14 @@ class SelectiveProcessor:
                 'timestamp': datetime.now().isoformat()
             }
     
-    def process_selected_images(self, selected_images: List[Path], output_dir: Path = None, 
+    def process_selected_images(self, selected_images: Iterable[Path], output_dir: Path = None, 
                               save_enhanced: bool = True, structure_type: str = "flat") -> List[Dict]:
         """
         معالجة الصور المختارة
         
         Args:
-            selected_images: قائمة الصور المختارة
+            selected_images: قائمة الصور المختارة أو مولّد (مثل iter_selected_images)؛
+                             المولّد يُستهلك أثناء المعالجة فتبدأ النتائج قبل انتهاء المسح
             output_dir: مجلد الحفظ
             save_enhanced: حفظ الصور المحسنة
             structure_type: نوع هيكل المجلدات
@@ -271,16 +301,25 @@ class SelectiveProcessor:
         Returns:
             list: قائمة النتائج
         """
-        self.selected_images = selected_images
-        self.total_images = len(selected_images)
+        streaming = not hasattr(selected_images, '__len__')
+        if streaming and output_dir and structure_type == "by_size":
+            # اسم مجلد by_size يحتاج عدد الصور قبل الحفظ، فيُجمع المولّد أولاً
+            selected_images = list(selected_images)
+            streaming = False
+        self.selected_images = [] if streaming else selected_images
+        self.total_images = 0 if streaming else len(selected_images)
         self.processed_images = 0
         self.results = []
+        self.time_to_first_result = None
         
-        if not selected_images:
+        if not streaming and not selected_images:
             self.logger.warning("لا توجد صور مختارة للمعالجة")
             return []
         
-        self.logger.info(f"بدء معالجة {self.total_images} صورة مختارة")
+        if streaming:
+            self.logger.info("بدء معالجة الصور المختارة أثناء المسح")
+        else:
+            self.logger.info(f"بدء معالجة {self.total_images} صورة مختارة")
         
         # إنشاء هيكل مجلدات الإخراج
         if output_dir:
@@ -294,41 +333,55 @@ class SelectiveProcessor:
         else:
             executor_class = ThreadPoolExecutor
         
+        batch_start = time.time()
+        paths_iter = iter(selected_images)
+        
         with executor_class(max_workers=self.max_workers) as executor:
-            # إرسال المهام
-            future_to_path = {
-                executor.submit(
-                    self.process_single_image, 
-                    path, 
-                    final_output_dir, 
-                    save_enhanced
-                ): path for path in selected_images
-            }
+            future_to_path = {}
             
-            # جمع النتائج
-            for future in as_completed(future_to_path):
-                path = future_to_path[future]
-                try:
-                    result = future.result()
-                    self.results.append(result)
-                    self.processed_images += 1
-                    
-                    # تحديث التقدم
-                    if self.progress_callback:
-                        progress = (self.processed_images / self.total_images) * 100
-                        self.progress_callback(progress, self.processed_images, self.total_images)
-                    
-                except Exception as e:
-                    error_result = {
-                        'image_path': str(path),
-                        'status': 'failed',
-                        'error': str(e),
-                        'processing_time': 0,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    self.results.append(error_result)
-                    self.processed_images += 1
-                    self.logger.error(f"خطأ في معالجة {path}: {e}")
+            while True:
+                # إرسال المهام على نافذة محدودة حتى لا يُنتظر انتهاء المسح
+                while len(future_to_path) < self.max_workers * 2:
+                    path = next(paths_iter, None)
+                    if path is None:
+                        break
+                    if streaming:
+                        self.selected_images.append(path)
+                        self.total_images += 1
+                    future = executor.submit(self.process_single_image, path, final_output_dir, save_enhanced)
+                    future_to_path[future] = path
+                
+                if not future_to_path:
+                    break
+                
+                done, _ = wait(future_to_path, return_when=FIRST_COMPLETED)
+                if self.time_to_first_result is None:
+                    self.time_to_first_result = time.time() - batch_start
+                
+                # جمع النتائج
+                for future in done:
+                    path = future_to_path.pop(future)
+                    try:
+                        result = future.result()
+                        self.results.append(result)
+                        self.processed_images += 1
+                        
+                        # تحديث التقدم
+                        if self.progress_callback:
+                            progress = (self.processed_images / self.total_images) * 100
+                            self.progress_callback(progress, self.processed_images, self.total_images)
+                        
+                    except Exception as e:
+                        error_result = {
+                            'image_path': str(path),
+                            'status': 'failed',
+                            'error': str(e),
+                            'processing_time': 0,
+                            'timestamp': datetime.now().isoformat()
+                        }
+                        self.results.append(error_result)
+                        self.processed_images += 1
+                        self.logger.error(f"خطأ في معالجة {path}: {e}")
         
         self.logger.info(f"تمت معالجة {self.processed_images} من {self.total_images} صورة")
         return self.results
@@ -418,8 +471,32 @@ class SelectiveProcessor:
         print(f"Average processing time: {stats['average_processing_time']:.2f} seconds")
         print(f"Total texts found: {stats['total_texts_found']}")
         print(f"Average texts per image: {stats['average_texts_per_image']:.1f}")
+        if self.time_to_first_result is not None:
+            print(f"Time to first result: {self.time_to_first_result:.2f} seconds")
         print("=" * 60)
 
+def parse_date_range(value: str):
+    """
+    تحليل نطاق تاريخ بصيغة start..end (أو start-end بتواريخ كاملة)
+    
+    Returns:
+        tuple: (تاريخ البداية، تاريخ النهاية) وأي منهما قد يكون None
+    """
+    if '..' in value:
+        start, end = value.split('..', 1)
+    elif len(value) == 21 and value[10] == '-':
+        start, end = value[:10], value[11:]
+    else:
+        start, end = value, ''
+    start_date = parse_date(start) if start.strip() else None
+    end_date = None
+    if end.strip():
+        end_date = parse_date(end)
+        if len(end.strip()) == 10:
+            # نهاية النطاق تشمل اليوم كاملاً
+            end_date = end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return start_date, end_date
+
 def progress_callback(progress, processed, total):
     """دالة callback لتتبع التقدم"""
     print(f"\rProgress: {progress:.1f}% ({processed}/{total})", end='', flush=True)
@@ -431,9 +508,15 @@ def main():
     parser.add_argument('-o', '--output', help='مجلد الحفظ')
     parser.add_argument('-p', '--pattern', help='نمط اختيار الصور')
     parser.add_argument('-s', '--size', help='حجم الصور (min-max)')
-    parser.add_argument('-d', '--date', help='تاريخ الصور (start-end)')
+    parser.add_argument('-d', '--date',
+                       help='تاريخ تعديل الصور: start..end بصيغة YYYY-MM-DD (يمكن ترك أحد الطرفين فارغاً)')
+    parser.add_argument('-q', '--query',
+                       help='استعلام اختيار مثل "name~invoice AND size<5MB AND mtime>2025-01-01 AND width>=2000"')
     parser.add_argument('-l', '--list', help='قائمة مسارات الصور')
     parser.add_argument('-m', '--max', type=int, default=5000, help='الحد الأقصى للصور')
+    parser.add_argument('--sample-by', choices=sorted(STRATA),
+                       help='عينة بحصص متساوية لكل مجلد أو امتداد أو فئة حجم')
+    parser.add_argument('--seed', help='بذرة لإعادة إنتاج العينة نفسها')
     parser.add_argument('-r', '--recursive', action='store_true', 
                        help='البحث في المجلدات الفرعية')
     parser.add_argument('-w', '--workers', type=int, default=4,
@@ -446,13 +529,16 @@ def main():
                        default='flat', help='نوع هيكل مجلدات الإخراج')
     parser.add_argument('--format', choices=['json', 'csv', 'txt'], 
                        default='json', help='تنسيق ملف النتائج')
+    parser.add_argument('--index', action='store_true',
+                       help='الاختيار من فهرس SQLite دائم بدلاً من إعادة المسح')
     
     args = parser.parse_args()
     
     # إنشاء معالج الصور الانتقائي
     processor = SelectiveProcessor(
         max_workers=args.workers,
-        use_multiprocessing=args.multiprocessing
+        use_multiprocessing=args.multiprocessing,
+        use_index=args.index
     )
     
     # تعيين callback للتقدم
@@ -466,32 +552,40 @@ def main():
         # معالجة صورة واحدة
         selected_images = [input_path]
     elif input_path.is_dir():
-        # اختيار الصور بناءً على المعايير
-        if args.pattern:
-            selected_images = processor.select_images_by_pattern(input_path, args.pattern, args.recursive)
-        elif args.size:
-            min_size, max_size = map(int, args.size.split('-'))
-            selected_images = processor.select_images_by_size(input_path, min_size, max_size, args.recursive)
-        elif args.list:
+        # اختيار الصور بناءً على المعايير: النمط والحجم والتاريخ والاستعلام تُجمع في شرط
+        # واحد يُطبق أثناء المسح وتبدأ المعالجة فوراً (أو استعلام SQL واحد مع --index)
+        min_size, max_size = map(int, args.size.split('-')) if args.size else (None, None)
+        start_date, end_date = parse_date_range(args.date) if args.date else (None, None)
+        query = SelectionQuery.all_of([
+            SelectionQuery.from_criteria(args.pattern, min_size, max_size, start_date, end_date),
+            SelectionQuery.parse(args.query) if args.query else None
+        ])
+        
+        if args.list:
             with open(args.list, 'r') as f:
                 image_paths = [line.strip() for line in f if line.strip()]
             selected_images = processor.select_images_by_list(image_paths)
+            if query is not None:
+                selected_images = [path for path in selected_images if query.matches(path)]
+        elif query is not None and args.index:
+            with processor.open_file_index(input_path, args.recursive) as index:
+                selected_images = index.select_matching(query, input_path, args.recursive,
+                                                        extensions=processor.get_supported_formats())
+        elif query is not None:
+            selected_images = processor.iter_selected_images(input_path, args.recursive, query=query)
         else:
-            # اختيار جميع الصور مع حد أقصى
-            all_images = processor.find_images_in_directory(input_path, args.recursive)
-            if len(all_images) > args.max:
-                selected_images = processor.select_images_interactive(input_path, args.max)
-            else:
-                selected_images = all_images
+            # اختيار جميع الصور مع حد أقصى (عينة أثناء المسح إذا زاد العدد)
+            selected_images = processor.select_images_interactive(input_path, args.max, args.sample_by,
+                                                                  args.seed, args.recursive)
     else:
         print(f"خطأ: المسار غير صحيح: {input_path}")
         return
     
-    if not selected_images:
-        print("لم يتم العثور على صور للمعالجة")
-        return
-    
-    print(f"تم اختيار {len(selected_images)} صورة للمعالجة")
+    if isinstance(selected_images, list):
+        if not selected_images:
+            print("لم يتم العثور على صور للمعالجة")
+            return
+        print(f"تم اختيار {len(selected_images)} صورة للمعالجة")
     
     # معالجة الصور المختارة
     results = processor.process_selected_images(
@@ -501,6 +595,10 @@ def main():
         args.structure
     )
     
+    if not results:
+        print("لم يتم العثور على صور للمعالجة")
+        return
+    
     # طباعة الإحصائيات
     processor.print_statistics(results)
     
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+حفظ الصور المحسنة في أرشيفات TAR مجزأة محدودة الحجم بدلاً من ملايين الملفات الصغيرة
+Sharded TAR Output for Enhanced Images (WebDataset-Style)
+"""
+
+import io
+import os
+import re
+import json
+import queue
+import sqlite3
+import tarfile
+import argparse
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from result_records import export_default
+
+DEFAULT_SHARD_BYTES = 1024 * 1024 * 1024
+DEFAULT_PREFIX = 'enhanced'
+_BLOCK = tarfile.BLOCKSIZE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (
+    source_path TEXT PRIMARY KEY,
+    shard TEXT NOT NULL,
+    key TEXT NOT NULL,
+    image_name TEXT NOT NULL,
+    image_offset INTEGER NOT NULL,
+    image_size INTEGER NOT NULL,
+    metadata_offset INTEGER,
+    metadata_size INTEGER
+);
+"""
+
+def _padded(size: int) -> int:
+    return -(-size // _BLOCK) * _BLOCK
+
+def index_path_for(output_dir, prefix: str = DEFAULT_PREFIX) -> Path:
+    return Path(output_dir) / f"{prefix}-index.db"
+
+class ShardWriter:
+    """
+    كاتب الأجزاء: الصور والبيانات الوصفية تُلحق بأجزاء TAR عبر خيط كتابة مخصص
+
+    كل صورة تُخزن كعضوين بالمفتاح نفسه (<key>.png و<key>.json) كما في WebDataset،
+    والفهرس (SQLite) يربط المسار المصدر بالجزء وموضع البيانات للوصول العشوائي.
+    الجزء يُحدد عند الإرسال، فيُعاد مسار archive!member فوراً دون انتظار الكتابة.
+    """
+
+    def __init__(self, output_dir, prefix: str = DEFAULT_PREFIX,
+                 max_shard_bytes: int = DEFAULT_SHARD_BYTES, queue_size: int = 64):
+        """
+        Args:
+            output_dir: مجلد الأجزاء والفهرس
+            prefix: بادئة أسماء الأجزاء (<prefix>-000000.tar)
+            max_shard_bytes: الحد الأقصى لحجم الجزء (قد يتجاوزه جزء بصورة واحدة كبيرة)
+            queue_size: عدد الصور المنتظرة قبل حجب المرسل (ضغط عكسي على المعالجة)
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.max_shard_bytes = max_shard_bytes
+        self.shards_written = 0
+        self.images_written = 0
+
+        # الترقيم يبدأ بعد آخر جزء موجود حتى لا تُستبدل أجزاء تشغيل سابق
+        pattern = re.compile(rf"^{re.escape(prefix)}-(\d+)\.tar$")
+        existing = [int(m.group(1)) for m in map(pattern.match, os.listdir(self.output_dir)) if m]
+        self._shard_number = max(existing) + 1 if existing else 0
+        self._shard_bytes = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer_loop, name='shard-writer', daemon=True)
+        self._thread.start()
+
+    def shard_path(self, number: int) -> Path:
+        return self.output_dir / f"{self.prefix}-{number:06d}.tar"
+
+    def write(self, source_path, data: bytes, extension: str = '.png',
+              metadata: Optional[Dict] = None) -> str:
+        """
+        إرسال صورة مرمزة للكتابة
+
+        Returns:
+            str: مسار الصورة داخل الجزء (shard.tar!key.png)
+        """
+        if self._error is not None:
+            raise RuntimeError(f"فشل كاتب الأجزاء: {self._error}")
+        if self._closed:
+            raise RuntimeError("كاتب الأجزاء مغلق")
+        # نتائج OCR قد تحوي أنواع NumPy (صناديق int32 من EasyOCR)
+        metadata_bytes = (json.dumps(metadata, ensure_ascii=False, default=export_default).encode('utf-8')
+                          if metadata else b'')
+        entry_bytes = _BLOCK + _padded(len(data)) + (_BLOCK + _padded(len(metadata_bytes)) if metadata_bytes else 0)
+
+        with self._lock:
+            if self._shard_bytes and self._shard_bytes + entry_bytes > self.max_shard_bytes:
+                self._shard_number += 1
+                self._shard_bytes = 0
+            self._shard_bytes += entry_bytes
+            shard_number = self._shard_number
+            key = f"{self._sequence:09d}"
+            self._sequence += 1
+            # الإدراج تحت القفل نفسه يحفظ ترتيب الأجزاء؛ الجزء المغلق لا يُعاد فتحه
+            self._queue.put((shard_number, key, str(source_path), data, extension, metadata_bytes))
+        return f"{self.shard_path(shard_number)}!{key}{extension}"
+
+    def _writer_loop(self):
+        """خيط الكتابة: يملك ملفات الأجزاء واتصال الفهرس"""
+        connection = sqlite3.connect(index_path_for(self.output_dir, self.prefix))
+        connection.executescript(_SCHEMA)
+        tar = None
+        current = None
+        pending = []
+        last_commit = time.monotonic()
+
+        def add(name, payload):
+            info = tarfile.TarInfo(name)
+            info.size = len(payload)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(payload))
+            # موضع البيانات = نهاية العضو ناقص حجمه المبطن (يصح مع أي طول للترويسة)
+            return tar.offset - _padded(len(payload))
+
+        def flush():
+            nonlocal pending, last_commit
+            if pending:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO members VALUES (?, ?, ?, ?, ?, ?, ?, ?)", pending)
+                connection.commit()
+                pending = []
+            last_commit = time.monotonic()
+
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                shard_number, key, source_path, data, extension, metadata_bytes = item
+                if shard_number != current:
+                    if tar is not None:
+                        tar.close()
+                    flush()
+                    current = shard_number
+                    tar = tarfile.open(self.shard_path(current), 'w', format=tarfile.USTAR_FORMAT)
+                    self.shards_written += 1
+
+                image_offset = add(key + extension, data)
+                metadata_offset = add(key + '.json', metadata_bytes) if metadata_bytes else None
+                pending.append((source_path, self.shard_path(current).name, key, key + extension,
+                                image_offset, len(data), metadata_offset,
+                                len(metadata_bytes) if metadata_bytes else None))
+                self.images_written += 1
+                if len(pending) >= 1000 or time.monotonic() - last_commit > 1.0:
+                    flush()
+        except Exception as e:
+            self._error = e
+            # تفريغ الطابور حتى لا يُحجب المرسلون
+            while self._queue.get() is not None:
+                pass
+        finally:
+            if tar is not None:
+                tar.close()
+            flush()
+            connection.close()
+
+    def close(self):
+        """انتظار كتابة كل الصور المرسلة وإغلاق الجزء الأخير والفهرس"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError(f"فشل كاتب الأجزاء: {self._error}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_sharded_image(output_dir, source_path, prefix: str = DEFAULT_PREFIX) -> Tuple[bytes, Optional[Dict]]:
+    """
+    قراءة الصورة المحسنة وبياناتها الوصفية حسب المسار المصدر (وصول عشوائي عبر الفهرس)
+
+    Raises:
+        KeyError: إذا لم تكن الصورة في الفهرس
+    """
+    output_dir = Path(output_dir)
+    connection = sqlite3.connect(index_path_for(output_dir, prefix))
+    try:
+        row = connection.execute(
+            "SELECT shard, image_offset, image_size, metadata_offset, metadata_size "
+            "FROM members WHERE source_path = ?", (str(source_path),)).fetchone()
+    finally:
+        connection.close()
+    if row is None:
+        raise KeyError(f"الصورة غير موجودة في فهرس الأجزاء: {source_path}")
+
+    shard, image_offset, image_size, metadata_offset, metadata_size = row
+    fd = os.open(output_dir / shard, os.O_RDONLY)
+    try:
+        data = os.pread(fd, image_size, image_offset)
+        metadata = None
+        if metadata_offset is not None:
+            metadata = json.loads(os.pread(fd, metadata_size, metadata_offset).decode('utf-8'))
+    finally:
+        os.close(fd)
+    return data, metadata
+
+def main():
+    """الدالة الرئيسية"""
+    parser = argparse.ArgumentParser(description='قراءة الصور المحسنة من الأجزاء')
+    parser.add_argument('output_dir', help='مجلد الأجزاء')
+    parser.add_argument('source_path', help='المسار المصدر للصورة')
+    parser.add_argument('-o', '--output', help='حفظ الصورة في ملف')
+    parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='بادئة أسماء الأجزاء')
+    args = parser.parse_args()
+
+    data, metadata = read_sharded_image(args.output_dir, args.source_path, args.prefix)
+    if args.output:
+        Path(args.output).write_bytes(data)
+        print(f"تم حفظ الصورة في: {args.output}")
+    print(json.dumps(metadata, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
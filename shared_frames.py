@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+نقل الصور بين العمليات عبر الذاكرة المشتركة
+Zero-Copy Shared-Memory Frame Transport
+"""
+
+import sys
+import queue
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict, Optional
+from binary_image import BinaryImage
+
+# مرفقات الذاكرة المشتركة المفتوحة في العملية الحالية (حسب الاسم)
+_attached_blocks = {}
+
+def _attach_block(name: str) -> shared_memory.SharedMemory:
+    """فتح كتلة ذاكرة مشتركة بالاسم مرة واحدة لكل عملية"""
+    block = _attached_blocks.get(name)
+    if block is None:
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            block = shared_memory.SharedMemory(name=name)
+            # العملية المالكة وحدها مسؤولة عن الحذف
+            resource_tracker.unregister(block._name, 'shared_memory')
+        _attached_blocks[name] = block
+    return block
+
+def frame_from_descriptor(descriptor: Dict, copy: bool = False) -> np.ndarray:
+    """
+    الحصول على مصفوفة الصورة من واصف دون نسخ
+
+    Args:
+        descriptor: الواصف (name, shape, dtype, offset)
+        copy: إرجاع نسخة مستقلة عن الشريحة
+
+    Returns:
+        np.ndarray: الصورة
+    """
+    block = _attach_block(descriptor['name'])
+    frame = np.ndarray(descriptor['shape'], dtype=np.dtype(descriptor['dtype']),
+                       buffer=block.buf, offset=descriptor['offset'])
+    return frame.copy() if copy else frame
+
+def write_frame(descriptor: Dict, image: np.ndarray) -> Dict:
+    """
+    كتابة صورة في الشريحة المحددة بالواصف (من أي عملية)
+
+    Args:
+        descriptor: واصف الشريحة (name, offset, capacity)
+        image: الصورة المراد كتابتها
+
+    Returns:
+        Dict: واصف الصورة المكتوبة
+    """
+    image = np.ascontiguousarray(image)
+    if image.nbytes > descriptor['capacity']:
+        raise ValueError(
+            f"حجم الصورة {image.nbytes} بايت أكبر من سعة الشريحة {descriptor['capacity']}"
+        )
+
+    written = dict(descriptor, shape=image.shape, dtype=image.dtype.str)
+    target = frame_from_descriptor(written)
+    target[...] = image
+    return written
+
+class SharedFrameRing:
+    """
+    حلقة من الشرائح المحجوزة مسبقاً داخل كتلة ذاكرة مشتركة واحدة
+
+    تُرسل عبر IPC الواصفات فقط (name, shape, dtype, offset) بينما تبقى
+    بيانات الصور في الذاكرة المشتركة. العملية المالكة وحدها تحجز الشرائح وتحررها.
+    """
+
+    def __init__(self, slots: int = 8, slot_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            slots: عدد الشرائح (الحد الأقصى للصور قيد النقل)
+            slot_bytes: سعة الشريحة الواحدة بالبايت
+        """
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.block = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        _attached_blocks[self.block.name] = self.block
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+    @property
+    def name(self) -> str:
+        return self.block.name
+
+    def acquire(self, timeout: Optional[float] = None) -> Dict:
+        """
+        حجز شريحة فارغة (ينتظر إذا كانت كل الشرائح مشغولة)
+
+        Returns:
+            Dict: واصف الشريحة
+        """
+        slot = self._free.get(timeout=timeout)
+        return {
+            'name': self.block.name,
+            'slot': slot,
+            'offset': slot * self.slot_bytes,
+            'capacity': self.slot_bytes
+        }
+
+    def release(self, descriptor: Dict):
+        """تحرير الشريحة لإعادة الاستخدام"""
+        self._free.put(descriptor['slot'])
+
+    def put(self, image: np.ndarray, timeout: Optional[float] = None) -> Dict:
+        """حجز شريحة وكتابة الصورة فيها"""
+        descriptor = self.acquire(timeout)
+        try:
+            return write_frame(descriptor, image)
+        except Exception:
+            self.release(descriptor)
+            raise
+
+    def close(self):
+        """إغلاق الكتلة وحذفها"""
+        _attached_blocks.pop(self.block.name, None)
+        self.block.close()
+        self.block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+# معزز الصور داخل كل عامل (بدون تحميل نموذج EasyOCR)
+_worker_enhancer = None
+
+def enhance_shared_frame(descriptor: Dict) -> Dict:
+    """
+    تحسين صورة موجودة في الذاكرة المشتركة وكتابة الناتج في نفس الشريحة
+
+    Args:
+        descriptor: واصف الصورة المدخلة
+
+    Returns:
+        Dict: واصف الصورة المحسنة
+    """
+    global _worker_enhancer
+    if _worker_enhancer is None:
+        from image_enhancer import ImageEnhancer
+        _worker_enhancer = ImageEnhancer(lazy_reader=True)
+
+    enhanced = _worker_enhancer.enhance_image_pipeline(frame_from_descriptor(descriptor), packed=True)
+    # المدخل لم يعد مطلوباً بعد التحسين، فيُكتب الناتج فوقه (محزوماً: ثُمن حجم uint8)
+    result = write_frame(descriptor, enhanced.bits)
+    result['packed_width'] = enhanced.width
+    return result
+
+class SharedFramePool:
+    """
+    مجمّع عمليات لتحسين الصور ينقل الإطارات عبر SharedFrameRing
+
+    submit_enhance تكتب الصورة في شريحة وترسل واصفها، والنتيجة تُقرأ من
+    نفس الشريحة ثم تُحرر تلقائياً. يُستخدم عند الطلب فقط (AsyncBatchProcessor
+    مع use_multiprocessing)؛ وضع العمليات في BatchProcessor ينفذ الصورة كاملة
+    في العامل ولا ينقل الإطارات.
+    """
+
+    def __init__(self, max_workers: int = 4, slots: Optional[int] = None,
+                 slot_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_workers: عدد العمليات
+            slots: عدد الشرائح (افتراضياً ضعف عدد العمليات)
+            slot_bytes: سعة الشريحة الواحدة بالبايت
+        """
+        self.ring = SharedFrameRing(slots or max_workers * 2, slot_bytes)
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    def submit_enhance(self, image: np.ndarray) -> Future:
+        """
+        إرسال صورة للتحسين في عملية منفصلة
+
+        Returns:
+            Future: تعطي الصورة المحسنة (نسخة مستقلة عن الشريحة)
+        """
+        descriptor = self.ring.put(image)
+        try:
+            inner = self.executor.submit(enhance_shared_frame, descriptor)
+        except Exception:
+            # مجمّع متوقف أو معطوب: لن يحرر أي callback الشريحة
+            self.ring.release(descriptor)
+            raise
+        outer = Future()
+
+        def _done(future):
+            try:
+                result = future.result()
+                if 'packed_width' in result:
+                    # فك الحزم ينتج مصفوفة مستقلة عن الشريحة
+                    frame = BinaryImage(frame_from_descriptor(result), result['packed_width']).to_array()
+                else:
+                    frame = frame_from_descriptor(result, copy=True)
+                outer.set_result(frame)
+            except Exception as e:
+                outer.set_exception(e)
+            finally:
+                self.ring.release(descriptor)
+
+        inner.add_done_callback(_done)
+        return outer
+
+    def shutdown(self):
+        """إيقاف العمليات وتحرير الذاكرة المشتركة"""
+        self.executor.shutdown(wait=True)
+        self.ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
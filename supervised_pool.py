@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مجمّع عمليات مُراقَب مع مهلة لكل صورة وحد للذاكرة وعزل الصور المعطوبة
+Supervised Worker Pool with Per-Image Timeouts, Memory Caps and Quarantine
+"""
+
+import os
+import json
+import time
+import logging
+import multiprocessing
+from multiprocessing.connection import wait
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Callable, Iterable, Iterator, Optional, Tuple
+import psutil
+
+_DONE = object()
+
+def _worker_main(connection, worker_fn):
+    """حلقة العامل: استقبال مسار، معالجته، وإرسال النتيجة"""
+    while True:
+        try:
+            item = connection.recv()
+        except EOFError:
+            return
+        if item is None:
+            return
+        try:
+            result = worker_fn(item)
+        except Exception as e:
+            result = {
+                'image_path': str(item),
+                'status': 'failed',
+                'error': str(e),
+                'processing_time': 0,
+                'timestamp': datetime.now().isoformat()
+            }
+        connection.send(result)
+
+class _Worker:
+    """عملية عاملة واحدة مع الصورة الجارية وموعدها النهائي"""
+
+    def __init__(self, context, worker_fn):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection, worker_fn), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.handle = psutil.Process(self.process.pid)
+        self.item = None
+        self.deadline = None
+        self.started = None
+
+    def assign(self, item, timeout):
+        self.item = item
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout if timeout else None
+        self.connection.send(item)
+
+    def rss_mb(self) -> float:
+        try:
+            return self.handle.memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.connection.close()
+
+class SupervisedPool:
+    """
+    مجمّع عمليات يراقب كل صورة على حدة
+
+    لكل صورة مهلة زمنية، ولكل عامل حد لذاكرة RSS. عند تجاوز أحدهما يُقتل
+    العامل ويُستبدل بعامل جديد وتُعاد محاولة الصورة حتى max_retries مرة، ثم
+    تُعزل في قائمة الحجر (quarantine) وتُرجع بحالة 'timeout' أو 'oom'، بينما
+    تستمر بقية الصور في التدفق.
+    """
+
+    def __init__(self, worker_fn: Callable, workers: int = 4, timeout: Optional[float] = None,
+                 memory_limit_mb: Optional[float] = None, max_retries: int = 1,
+                 quarantine_file: Optional[str] = None, poll_interval: float = 0.2):
+        """
+        Args:
+            worker_fn: دالة المعالجة (تُستدعى داخل العامل وتُرجع dict النتيجة)
+            workers: عدد العمليات
+            timeout: المهلة القصوى لكل صورة (ثانية)
+            memory_limit_mb: الحد الأقصى لذاكرة RSS لكل عامل (MB)
+            max_retries: عدد إعادة المحاولات قبل العزل
+            quarantine_file: ملف JSONL لحفظ الصور المعزولة وتخطيها في التشغيلات اللاحقة
+            poll_interval: فترة فحص المهل والذاكرة (ثانية)
+        """
+        self.worker_fn = worker_fn
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_retries = max_retries
+        self.quarantine_file = quarantine_file
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger(__name__)
+        self.context = multiprocessing.get_context()
+        self.quarantine = self._load_quarantine()
+        self.workers_recycled = 0
+
+    def _load_quarantine(self) -> Dict[str, Dict]:
+        quarantine = {}
+        if self.quarantine_file and os.path.exists(self.quarantine_file):
+            with open(self.quarantine_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        quarantine[entry['image_path']] = entry
+        return quarantine
+
+    def _add_to_quarantine(self, item, reason: str, attempts: int) -> Dict:
+        entry = {
+            'image_path': str(item),
+            'status': reason,
+            'attempts': attempts,
+            'timestamp': datetime.now().isoformat()
+        }
+        self.quarantine[str(item)] = entry
+        if self.quarantine_file:
+            Path(self.quarantine_file).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.quarantine_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.logger.warning(f"تم عزل الصورة {item} ({reason}) بعد {attempts} محاولة")
+        return entry
+
+    @staticmethod
+    def _quarantined_result(entry: Dict) -> Dict:
+        reason = entry['status']
+        return {
+            'image_path': entry['image_path'],
+            'status': reason,
+            'error': {'timeout': 'تجاوزت المعالجة المهلة المحددة',
+                      'oom': 'تجاوز العامل حد الذاكرة'}.get(reason, 'توقف العامل بشكل غير متوقع'),
+            'attempts': entry['attempts'],
+            'processing_time': 0,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def run(self, items: Iterable) -> Iterator[Tuple[object, Dict]]:
+        """
+        معالجة العناصر وإرجاع (العنصر، النتيجة) حسب ترتيب الاكتمال
+
+        Yields:
+            Tuple: العنصر ونتيجته
+        """
+        queue = []
+        source = iter(items)
+        attempts = {}
+        idle = [_Worker(self.context, self.worker_fn) for _ in range(self.workers)]
+        busy = {}
+
+        def next_item():
+            # إرجاع (العنصر، سجل العزل إن وُجد)
+            if queue:
+                return queue.pop(0), None
+            for item in source:
+                return item, self.quarantine.get(str(item))
+            return _DONE, None
+
+        try:
+            while True:
+                # إسناد الصور للعمال الخاملين
+                while idle:
+                    item, quarantined = next_item()
+                    if item is _DONE:
+                        break
+                    if quarantined is not None:
+                        yield item, self._quarantined_result(quarantined)
+                        continue
+                    worker = idle.pop()
+                    attempts[str(item)] = attempts.get(str(item), 0) + 1
+                    worker.assign(item, self.timeout)
+                    busy[worker.connection] = worker
+
+                if not busy:
+                    break
+
+                # استقبال النتائج الجاهزة
+                for connection in wait(list(busy), timeout=self.poll_interval):
+                    worker = busy.pop(connection)
+                    try:
+                        result = connection.recv()
+                    except (EOFError, OSError):
+                        # العامل انتهى دون نتيجة (segfault أو قتل من النظام)
+                        outcome = self._handle_failure(worker, 'crashed', queue, attempts)
+                        if outcome is not None:
+                            yield outcome
+                        idle.append(_Worker(self.context, self.worker_fn))
+                        continue
+                    item = worker.item
+                    worker.item = None
+                    attempts.pop(str(item), None)
+                    idle.append(worker)
+                    yield item, result
+
+                # فحص المهل وحد الذاكرة
+                now = time.monotonic()
+                for connection, worker in list(busy.items()):
+                    reason = None
+                    if worker.deadline is not None and now > worker.deadline:
+                        reason = 'timeout'
+                    elif self.memory_limit_mb and worker.rss_mb() > self.memory_limit_mb:
+                        reason = 'oom'
+                    elif not worker.process.is_alive() and not connection.poll():
+                        reason = 'crashed'
+                    if reason is None:
+                        continue
+
+                    del busy[connection]
+                    outcome = self._handle_failure(worker, reason, queue, attempts)
+                    if outcome is not None:
+                        yield outcome
+                    idle.append(_Worker(self.context, self.worker_fn))
+        finally:
+            for worker in idle:
+                worker.stop()
+            for worker in busy.values():
+                worker.kill()
+
+    def _handle_failure(self, worker: _Worker, reason: str, queue: list, attempts: Dict):
+        """قتل العامل وإعادة المحاولة أو عزل الصورة"""
+        item = worker.item
+        elapsed = time.monotonic() - worker.started
+        worker.kill()
+        self.workers_recycled += 1
+        self.logger.warning(f"تم إيقاف العامل على الصورة {item} ({reason}) بعد {elapsed:.1f} ثانية")
+
+        tried = attempts.get(str(item), 1)
+        if tried <= self.max_retries:
+            queue.append(item)
+            return None
+
+        attempts.pop(str(item), None)
+        entry = self._add_to_quarantine(item, reason, tried)
+        return item, self._quarantined_result(entry)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار التحجيم التكيفي للعمال
+Test Adaptive Worker Scaling
+"""
+
+import time
+import threading
+from pathlib import Path
+from performance_optimizer import AdaptiveWorkerController, PerformanceOptimizer
+
+def _controller(**kwargs):
+    optimizer = PerformanceOptimizer()
+    optimizer.system_info['cpu_count'] = 8
+    return AdaptiveWorkerController(1, 6, initial_workers=2, optimizer=optimizer, **kwargs)
+
+def _window(controller, cpu, completed, seconds=1.0):
+    """ملء نافذة قرار بعينات وصور مكتملة ثم إعادة الحساب"""
+    controller._on_sample({'cpu_usage': cpu, 'memory_usage': 40})
+    for _ in range(completed):
+        controller.record_completion(0.1)
+    controller._window_start = time.time() - seconds
+    return controller.rescale()
+
+def test_scale_up_back_off_and_bounds():
+    """الزيادة عند انخفاض الحمل، والتراجع عن زيادة لم تحسن الإنتاجية، والبقاء ضمن الحدود"""
+    controller = _controller()
+    # لا قرار بدون صور مكتملة
+    assert _window(controller, cpu=10, completed=0) == 2 and controller.history == []
+    assert _window(controller, cpu=10, completed=10) == 4
+    # الزيادة لم ترفع الإنتاجية: رجوع وتثبيت
+    assert _window(controller, cpu=10, completed=10) == 2
+    assert _window(controller, cpu=10, completed=10) == 2
+    assert _window(controller, cpu=95, completed=10) == 1
+    assert _window(controller, cpu=95, completed=10) == 1
+    assert [entry['workers'] for entry in controller.history] == [4, 2, 2, 1, 1]
+    assert controller.history[0]['throughput'] > 9
+
+    controller = _controller()
+    for _ in range(5):
+        _window(controller, cpu=10, completed=10 * (len(controller.history) + 1))
+    assert controller.current_workers == 6
+
+def test_batch_window_follows_controller():
+    """المهام الجارية لا تتجاوز عدد العمال الفعّال، وكل الصور تُعالج"""
+    from batch_processor import BatchProcessor
+    processor = BatchProcessor(max_workers=3, adaptive_workers=True, scaling_interval=0.05)
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def process(path, output_dir=None, save_enhanced=True):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return {'image_path': str(path), 'status': 'success', 'processing_time': 0.02}
+
+    processor.process_single_image = process
+    paths = [Path(f"scan_{i}.png") for i in range(30)]
+    results = processor.process_images_batch(paths, save_enhanced=False)
+    assert sorted(result['image_path'] for result in results) == sorted(map(str, paths))
+    assert 1 <= running[1] <= 3
+    assert processor.scaling_history
+    assert all(1 <= entry['workers'] <= 3 for entry in processor.scaling_history)
+
+def main():
+    """الدالة الرئيسية"""
+    print("Adaptive Workers Test")
+    print("=" * 50)
+    test_scale_up_back_off_and_bounds()
+    test_batch_window_follows_controller()
+    print("All adaptive workers tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار قراءة الصور من الأرشيفات
+Test Reading Images From ZIP/TAR Archives
+"""
+
+import io
+import os
+import tarfile
+import zipfile
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from archive_input import (iter_archive_images, read_archive_member, stat_image, image_name,
+                           get_archive_reader)
+
+def _encoded_images(count=12):
+    """صور PNG/JPEG مرمزة في الذاكرة: {اسم العضو: البايتات}"""
+    members = {}
+    for i in range(count):
+        image = np.full((20 + i, 30, 3), i * 10, dtype=np.uint8)
+        extension = '.png' if i % 2 else '.jpg'
+        members[f"batch_{i % 3}/scan_{i:02d}{extension}"] = cv2.imencode(extension, image)[1].tobytes()
+    return members
+
+def _write_archives(root: Path, members):
+    archives = [root / 'scans.zip', root / 'scans.tar', root / 'scans.tar.gz']
+    with zipfile.ZipFile(archives[0], 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+        archive.writestr('readme.txt', b'not an image')
+    for path, mode in ((archives[1], 'w'), (archives[2], 'w:gz')):
+        with tarfile.open(path, mode) as archive:
+            for name, data in members.items():
+                info = tarfile.TarInfo(name)
+                info.size, info.mtime = len(data), 1_700_000_000
+                archive.addfile(info, io.BytesIO(data))
+    return archives
+
+def test_enumerate_and_read_concurrently():
+    """التعداد يعطي كل الصور، والقراءة المتزامنة تعيد البايتات الأصلية"""
+    members = _encoded_images()
+    with tempfile.TemporaryDirectory() as tmp:
+        for archive in _write_archives(Path(tmp), members):
+            images = list(iter_archive_images(archive))
+            assert sorted(image.path for image in images) == sorted(f"{archive}!{name}" for name in members)
+
+            paths = [image.path for image in images] * 4
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                contents = list(executor.map(read_archive_member, paths))
+            for path, data in zip(paths, contents):
+                assert data == members[path.split('!', 1)[1]]
+
+            first = images[0]
+            assert stat_image(first.path) == (first.size, first.mtime_ns)
+            assert image_name(first.path) == Path(first.path.split('!', 1)[1]).name
+
+def test_replaced_archive_keeps_old_reader_open():
+    """تغير الأرشيف يفتح قارئاً جديداً دون إغلاق القديم أثناء استخدامه"""
+    members = _encoded_images(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / 'scans.zip'
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('old.png', members['batch_0/scan_00.jpg'])
+        old = get_archive_reader(archive)
+        assert old.read('old.png') == members['batch_0/scan_00.jpg']
+
+        replacement = Path(tmp) / 'new.zip'
+        with zipfile.ZipFile(replacement, 'w') as zf:
+            zf.writestr('new.png', members['batch_1/scan_01.png'])
+        os.replace(replacement, archive)
+        new = get_archive_reader(archive)
+        assert new is not old and new.read('new.png') == members['batch_1/scan_01.png']
+        # القارئ القديم ما زال صالحاً لمن يحمله، ويُغلق عند انتهاء استخدامه
+        assert old.read('old.png') == members['batch_0/scan_00.jpg']
+        closer = old._closer
+        del old
+        assert not closer.alive and new._closer.alive
+
+def test_batch_processor_accepts_archives():
+    """find_images_in_directory وload_image يقبلان الأرشيفات مباشرة"""
+    from batch_processor import BatchProcessor
+    members = _encoded_images(4)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = _write_archives(Path(tmp), members)[1]
+        processor = BatchProcessor(max_workers=2)
+        images = processor.find_images_in_directory(archive)
+        assert images == sorted(Path(f"{archive}!{name}") for name in members)
+
+        image = processor.enhancer.load_image(str(images[0]))
+        assert image is not None and image.shape[1] == 30
+
+def main():
+    """الدالة الرئيسية"""
+    print("Archive Input Test")
+    print("=" * 50)
+    test_enumerate_and_read_concurrently()
+    test_replaced_archive_keeps_old_reader_open()
+    test_batch_processor_accepts_archives()
+    print("All archive input tests passed!")
+
+if __name__ == "__main__":
+    main()
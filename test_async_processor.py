@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار المعالج غير المتزامن
+Test Asyncio-Native Image Processor
+"""
+
+import asyncio
+import zipfile
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+from PIL import Image
+from async_processor import AsyncBatchProcessor, iter_input_images
+
+def _write_images(directory: Path, count=5):
+    paths = []
+    for i in range(count):
+        path = directory / f"scan_{i}.png"
+        cv2.imwrite(str(path), np.full((40, 60, 3), 255 - i * 10, dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+def test_parse_tesseract_tsv():
+    """تحويل مخرجات TSV بنفس شكل ImageEnhancer.extract_text_tesseract"""
+    tsv = ("level\tleft\ttop\twidth\theight\tconf\ttext\n"
+           "5\t10\t20\t30\t8\t91.5\tفاتورة\n"
+           "5\t50\t20\t12\t8\t12\tnoise\n"
+           "5\t70\t20\t12\t8\t95\t \n"
+           "4\t0\t0\t100\t30\t-1\t\n")
+    assert AsyncBatchProcessor.parse_tesseract_tsv(tsv) == [
+        {'text': 'فاتورة', 'confidence': 0.91, 'bbox': (10, 20, 30, 8)}]
+    assert AsyncBatchProcessor.parse_tesseract_tsv('') == []
+
+def test_process_stream_directory():
+    """معالجة مجلد صغير عبر تدفق غير متزامن مع ضغط خلفي على المنتج"""
+    async def run(tmp):
+        paths = _write_images(Path(tmp))
+        missing = Path(tmp) / 'missing.png'
+        pulled = []
+
+        async def produce():
+            for path in paths + [missing]:
+                pulled.append(path)
+                yield path
+
+        results = []
+        async with AsyncBatchProcessor(max_concurrency=2, cpu_workers=2) as processor:
+            async for result in processor.process_stream(produce(), Path(tmp) / 'out'):
+                # لا يُسحب أكثر من نافذة التزامن قبل استهلاك النتائج
+                assert len(pulled) <= len(results) + 3
+                results.append(result)
+            single = await processor.process(paths[0], save_enhanced=False)
+        return paths, missing, results, single
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths, missing, results, single = asyncio.run(run(tmp))
+        by_path = {result['image_path']: result for result in results}
+        assert sorted(by_path) == sorted(map(str, paths + [missing]))
+        assert by_path[str(missing)]['status'] == 'failed'
+        for path in paths:
+            result = by_path[str(path)]
+            assert result['status'] == 'success', result
+            assert Path(result['enhanced_path']).exists()
+            assert result['total_texts_found'] == len(result['easyocr_results']) + len(result['tesseract_results'])
+        assert single['status'] == 'success' and single['enhanced_path'] is None
+
+def test_inputs_use_shared_discovery_and_names():
+    """المجلدات الفرعية وصفحات TIFF وأعضاء الأرشيف تُكتشف وتُحفظ بأسماء صالحة"""
+    async def run(paths, output_dir):
+        async with AsyncBatchProcessor(max_concurrency=2, cpu_workers=2) as processor:
+            return [result async for result in processor.process_stream(paths, output_dir)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / 'input'
+        (root / 'nested').mkdir(parents=True)
+        nested = _write_images(root / 'nested', count=1)[0]
+        pages = [Image.fromarray(np.full((40, 60), value, dtype=np.uint8)) for value in (80, 160)]
+        pages[0].save(root / 'doc.tif', save_all=True, append_images=pages[1:])
+        archive = Path(tmp) / 'scans.zip'
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.write(nested, 'scan.png')
+
+        assert sorted(map(str, iter_input_images(root))) == [f"{root / 'doc.tif'}#page={n}" for n in (1, 2)]
+        found = sorted(map(str, iter_input_images(root, recursive=True)))
+        assert found == sorted([f"{root / 'doc.tif'}#page=1", f"{root / 'doc.tif'}#page=2", str(nested)])
+        members = list(iter_input_images(archive))
+        assert list(map(str, members)) == [f"{archive}!scan.png"]
+
+        results = asyncio.run(run(list(iter_input_images(root)) + members, Path(tmp) / 'out'))
+        assert all(result['status'] == 'success' for result in results)
+        names = sorted(Path(result['enhanced_path']).name for result in results)
+        assert names == ['enhanced_doc_page0001.tif', 'enhanced_doc_page0002.tif', 'enhanced_scan.png']
+        assert all(Path(result['enhanced_path']).exists() for result in results)
+
+def main():
+    """الدالة الرئيسية"""
+    print("Async Processor Test")
+    print("=" * 50)
+    test_parse_tesseract_tsv()
+    test_process_stream_directory()
+    test_inputs_use_shared_discovery_and_names()
+    print("All async processor tests passed!")
+
+if __name__ == "__main__":
+    main()
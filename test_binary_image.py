@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار الصور الثنائية المحزومة
+Test Bit-Packed Binary Images
+"""
+
+import io
+import pickle
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+from PIL import Image
+from binary_image import BinaryImage, is_binary, encode_enhanced_image, write_enhanced_image
+
+def _binary_image(height=37, width=53, seed=0):
+    """صورة 0/255 بعرض غير مضاعف لـ 8"""
+    rng = np.random.default_rng(seed)
+    return (rng.random((height, width)) > 0.5).astype(np.uint8) * 255
+
+def test_pack_roundtrip_and_size():
+    """الحزم وفكه يعيدان الصورة نفسها، والحجم والنقل أصغر بـ 8 مرات تقريباً"""
+    image = _binary_image(400, 603)
+    packed = BinaryImage.from_array(image)
+    assert packed.shape == image.shape
+    assert np.array_equal(packed.to_array(), image)
+    assert packed.nbytes == 400 * 76
+    assert pickle.loads(pickle.dumps(packed)) == packed
+    assert len(pickle.dumps(packed)) * 7 < len(pickle.dumps(image))
+
+    assert is_binary(image)
+    assert not is_binary(np.full((4, 4), 128, dtype=np.uint8))
+    assert not is_binary(np.zeros((4, 4, 3), dtype=np.uint8))
+
+def test_bilevel_writers():
+    """PNG بعمق 1 بت وTIFF بضغط G4 يُقرآن بـ OpenCV بالقيم نفسها"""
+    image = _binary_image()
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, mode, compression in (('out.png', '1', None), ('out.tif', '1', 'group4')):
+            path = Path(tmp) / name
+            write_enhanced_image(path, image)
+            with Image.open(path) as written:
+                assert written.mode == mode
+                assert written.info.get('compression') == compression
+            assert np.array_equal(cv2.imread(str(path), cv2.IMREAD_GRAYSCALE), image)
+
+    # الصور غير الثنائية تُكتب كما هي
+    gray = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    decoded = Image.open(io.BytesIO(encode_enhanced_image(gray, '.png')))
+    assert decoded.mode == 'L' and np.array_equal(np.array(decoded), gray)
+
+def main():
+    """الدالة الرئيسية"""
+    print("Binary Image Test")
+    print("=" * 50)
+    test_pack_roundtrip_and_size()
+    test_bilevel_writers()
+    print("All binary image tests passed!")
+
+if __name__ == "__main__":
+    main()
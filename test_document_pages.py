@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار المستندات متعددة الصفحات
+Test Multi-Page TIFF and PDF Input
+"""
+
+import zipfile
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+from PIL import Image
+from document_pages import (count_pages, iter_pages, load_page, split_page_path, page_path,
+                            image_name, assemble_documents, pdf_supported)
+
+def _pages(count=4):
+    """صفحات رمادية مختلفة الأبعاد والقيم"""
+    return [np.full((40 + i * 10, 60, 3), 30 * (i + 1), dtype=np.uint8) for i in range(count)]
+
+def _write_tiff(path: Path, pages):
+    images = [Image.fromarray(cv2.cvtColor(page, cv2.COLOR_BGR2RGB)) for page in pages]
+    images[0].save(path, save_all=True, append_images=images[1:], compression='tiff_lzw')
+
+def test_tiff_pages():
+    """كل صفحة تُعد وتُقرأ وحدها، من القرص ومن داخل أرشيف"""
+    pages = _pages()
+    with tempfile.TemporaryDirectory() as tmp:
+        document = Path(tmp) / 'contract.tif'
+        _write_tiff(document, pages)
+        archive = Path(tmp) / 'docs.zip'
+        with zipfile.ZipFile(archive, 'w') as z:
+            z.write(document, 'inbox/contract.tif')
+
+        for source in (str(document), f"{archive}!inbox/contract.tif"):
+            assert count_pages(source) == 4
+            paths = list(iter_pages(source))
+            assert paths == [page_path(source, n) for n in range(1, 5)]
+            for n, path in enumerate(paths):
+                assert split_page_path(path) == (source, n + 1)
+                assert np.array_equal(load_page(path), pages[n])
+            # الصفحات الموسعة مسبقاً تمر كما هي
+            assert list(iter_pages(paths[2])) == [paths[2]]
+
+        assert image_name(page_path(document, 3)) == 'contract_page0003.tif'
+        assert image_name(page_path(Path(tmp) / 'scan.pdf', 12)) == 'scan_page0012.png'
+
+        single = Path(tmp) / 'single.tif'
+        _write_tiff(single, pages[:1])
+        assert list(iter_pages(single)) == [str(single)]
+        assert split_page_path('notes#page=2') is None
+
+def test_high_bit_depth_pages():
+    """صفحات TIFF بعمق 16 بت و32 بت تُنقل إلى 8 بت بدل قصها إلى الأبيض"""
+    with tempfile.TemporaryDirectory() as tmp:
+        document = Path(tmp) / 'scan16.tif'
+        values = np.linspace(0, 65535, 60 * 40).reshape(40, 60).astype(np.uint16)
+        pages = [Image.fromarray(values), Image.fromarray(np.full((40, 60), 40000, dtype=np.uint16))]
+        assert pages[0].mode == 'I;16'
+        pages[0].save(document, save_all=True, append_images=pages[1:])
+
+        first = load_page(page_path(document, 1))
+        assert first.dtype == np.uint8 and first.shape == (40, 60, 3)
+        assert np.array_equal(first[:, :, 0], (values >> 8).astype(np.uint8))
+        assert (first == 255).mean() < 0.01
+        assert np.all(load_page(page_path(document, 2)) == 40000 >> 8)
+
+        wide = Path(tmp) / 'scan32.tif'
+        Image.fromarray(values.astype(np.int32)).save(wide)
+        assert np.array_equal(load_page(wide)[:, :, 0], (values >> 8).astype(np.uint8))
+
+def test_assemble_documents():
+    """نتائج الصفحات تُجمع لكل مستند بترتيب الصفحات"""
+    results = [
+        {'image_path': 'a.tif#page=2', 'status': 'success', 'processing_time': 1.0, 'total_texts_found': 2},
+        {'image_path': 'b.png', 'status': 'success', 'processing_time': 1.0, 'total_texts_found': 1},
+        {'image_path': 'a.tif#page=1', 'status': 'success', 'processing_time': 0.5, 'total_texts_found': 3},
+        {'image_path': 'c.pdf#page=1', 'status': 'failed', 'processing_time': 0},
+    ]
+    documents = {d['document_path']: d for d in assemble_documents(results)}
+    assert set(documents) == {'a.tif', 'c.pdf'}
+    assert documents['a.tif']['status'] == 'success' and documents['a.tif']['pages'] == 2
+    assert [r['image_path'] for r in documents['a.tif']['page_results']] == ['a.tif#page=1', 'a.tif#page=2']
+    assert documents['a.tif']['total_texts_found'] == 5
+    assert documents['c.pdf']['status'] == 'failed' and documents['c.pdf']['failed_pages'] == [1]
+
+def test_batch_processor_pages():
+    """المعالج المجمع يعالج الصفحات كمهام مستقلة ويجمعها لكل مستند"""
+    from batch_processor import BatchProcessor
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'source'
+        source.mkdir()
+        _write_tiff(source / 'report.tif', _pages(3))
+        cv2.imwrite(str(source / 'cover.png'), _pages(1)[0])
+
+        processor = BatchProcessor(max_workers=3)
+        paths = [str(path) for path in processor.iter_images_in_directory(source)]
+        assert paths == [str(source / 'cover.png')] + [page_path(source / 'report.tif', n) for n in (1, 2, 3)]
+
+        results = processor.process_images_batch(processor.find_images_in_directory(source), Path(tmp) / 'out')
+        assert len(results) == 4 and all(r['status'] == 'success' for r in results)
+        assert len(processor.document_results) == 1
+        document = processor.document_results[0]
+        assert document['document_path'] == str(source / 'report.tif') and document['pages'] == 3
+        assert sorted(p.name for p in (Path(tmp) / 'out').iterdir()) == [
+            'enhanced_cover.png', 'enhanced_report_page0001.tif',
+            'enhanced_report_page0002.tif', 'enhanced_report_page0003.tif']
+
+def test_pdf_pages():
+    """صفحات PDF تُحول واحدة واحدة (عند توفر مكتبة التحويل)"""
+    if not pdf_supported():
+        print("تخطي اختبار PDF: لا تتوفر pypdfium2 أو PyMuPDF")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        document = Path(tmp) / 'scan.pdf'
+        images = [Image.fromarray(cv2.cvtColor(page, cv2.COLOR_BGR2RGB)) for page in _pages(3)]
+        images[0].save(document, save_all=True, append_images=images[1:], resolution=72)
+        assert count_pages(document) == 3
+        for path in iter_pages(document):
+            page = load_page(path, dpi=72)
+            assert page.ndim == 3 and page.shape[2] == 3
+
+def main():
+    """الدالة الرئيسية"""
+    print("Document Pages Test")
+    print("=" * 50)
+    test_tiff_pages()
+    test_high_bit_depth_pages()
+    test_assemble_documents()
+    test_batch_processor_pages()
+    test_pdf_pages()
+    print("All document page tests passed!")
+
+if __name__ == "__main__":
+    main()
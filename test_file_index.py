@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار فهرس الملفات
+Test Persistent File Index
+"""
+
+import os
+import time
+import tempfile
+from pathlib import Path
+import numpy as np
+import cv2
+from file_index import FileIndex, default_index_path
+
+def _age(path: Path, seconds: float = 10):
+    """إرجاع تاريخ تعديل المجلد للماضي حتى لا يُعتبر معدلاً للتو"""
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+def test_incremental_refresh_and_queries():
+    """الاستعلامات تطابق الملفات، والتحديث يقرأ المجلدات المعدلة فقط"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for d in range(3):
+            subdir = root / f"scans_{d}"
+            subdir.mkdir()
+            for i in range(4):
+                cv2.imwrite(str(subdir / f"page_{i}.png"), np.zeros((10 + i, 20 + d), dtype=np.uint8))
+            (subdir / 'notes.txt').write_text('x')
+            _age(subdir)
+
+        with FileIndex.for_directory(root) as index:
+            _age(root)
+            stats = index.refresh(root)
+            assert stats['added'] == 12 and index.count() == 12
+
+            assert len(index.select(root, pattern='PAGE_3')) == 3
+            assert len(index.select(root, min_width=21)) == 8
+            assert len(index.select(root, min_height=12, max_width=20)) == 2
+            assert index.select(root / 'scans_1', min_size=1) == sorted(
+                (root / 'scans_1').glob('*.png'))
+
+            # دون تغيير: stat للمجلدات فقط
+            stats = index.refresh(root)
+            assert stats['directories_scanned'] == 0 and stats['added'] == 0
+
+            # إضافة وحذف في مجلد واحد
+            os.remove(root / 'scans_0' / 'page_0.png')
+            cv2.imwrite(str(root / 'scans_0' / 'new.png'), np.zeros((5, 5), dtype=np.uint8))
+            stats = index.refresh(root)
+            assert stats['directories_scanned'] == 1
+            assert (stats['added'], stats['removed']) == (1, 1)
+
+            # حذف مجلد كامل
+            for path in (root / 'scans_2').iterdir():
+                path.unlink()
+            (root / 'scans_2').rmdir()
+            stats = index.refresh(root)
+            assert stats['removed'] == 4 and index.count() == 8
+
+def test_default_index_outside_directory():
+    """الفهرس الافتراضي في مجلد التخزين المؤقت للمستخدم، ولا يُكتب شيء داخل مجلد الصور"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / 'images'
+        root.mkdir()
+        cv2.imwrite(str(root / 'page.png'), np.zeros((10, 10), dtype=np.uint8))
+        cache = Path(tmp) / 'cache'
+        previous = os.environ.get('XDG_CACHE_HOME')
+        os.environ['XDG_CACHE_HOME'] = str(cache)
+        try:
+            path = default_index_path(root)
+            assert cache in path.parents and default_index_path(root / '.') == path
+            assert default_index_path(Path(tmp) / 'other') != path
+            with FileIndex.for_directory(root) as index:
+                index.refresh(root)
+                assert index.count() == 1
+            assert path.exists() and [p.name for p in root.iterdir()] == ['page.png']
+        finally:
+            if previous is None:
+                del os.environ['XDG_CACHE_HOME']
+            else:
+                os.environ['XDG_CACHE_HOME'] = previous
+
+def main():
+    """الدالة الرئيسية"""
+    print("File Index Test")
+    print("=" * 50)
+    test_incremental_refresh_and_queries()
+    test_default_index_outside_directory()
+    print("All file index tests passed!")
+
+if __name__ == "__main__":
+    main()
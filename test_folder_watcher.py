@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار مراقبة المجلد والمعالجة التزايدية
+Test Watch-Folder Daemon
+"""
+
+import json
+import time
+import threading
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+from folder_watcher import FolderWatcher, InotifySource
+
+class _Processor:
+    """معالج وهمي يسجل الصور المرسلة وحجمها لحظة المعالجة"""
+
+    max_workers = 2
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def process_single_image(self, path, output_dir=None, save_enhanced=True):
+        with self._lock:
+            self.calls.append((str(path), path.stat().st_size))
+        return {'image_path': str(path), 'status': 'success', 'processing_time': 0,
+                'easyocr_results': [{'text': 'x', 'confidence': 0.9, 'bbox': [[np.int32(1), 2]]}]}
+
+def _png_bytes():
+    return cv2.imencode('.png', np.full((40, 60, 3), 200, dtype=np.uint8))[1].tobytes()
+
+def test_partial_file_is_debounced():
+    """الملف قيد الكتابة لا يُعالج حتى يستقر حجمه وتاريخ تعديله"""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = Path(tmp) / 'input'
+        input_dir.mkdir()
+        output_dir = Path(tmp) / 'output'
+        output_dir.mkdir()
+        data = _png_bytes()
+        path = input_dir / 'scan.png'
+        path.write_bytes(data[:len(data) // 2])
+
+        processor = _Processor()
+        watcher = FolderWatcher(processor, input_dir, output_dir, settle_seconds=0.2, use_inotify=False)
+        watcher.pending[path] = None
+        watcher._check_pending()
+        time.sleep(0.3)
+        # اكتمال الكتابة بعد مدة الاستقرار يعيد المؤقت
+        path.write_bytes(data)
+        watcher._check_pending()
+        watcher._check_pending()
+        assert processor.calls == [] and path in watcher.pending
+        time.sleep(0.3)
+        watcher._check_pending()
+        watcher.executor.shutdown(wait=True)
+        assert processor.calls == [(str(path), len(data))]
+
+        signature = (path.stat().st_size, path.stat().st_mtime_ns)
+        assert watcher.processed == {str(path): signature}
+        result = json.loads((output_dir / 'watch_results.jsonl').read_text(encoding='utf-8'))
+        assert result['status'] == 'success' and result['easyocr_results'][0]['bbox'] == [[1, 2]]
+
+        # بعد إعادة التشغيل لا تُعاد معالجة الصورة غير المعدلة
+        restarted = FolderWatcher(processor, input_dir, output_dir, settle_seconds=0, use_inotify=False)
+        assert restarted.processed == watcher.processed
+        restarted._catch_up()
+        restarted._check_pending()
+        restarted._check_pending()
+        restarted.executor.shutdown(wait=True)
+        assert len(processor.calls) == 1
+
+def test_run_processes_new_files():
+    """التشغيل الكامل يلتقط الملفات الجديدة بعد استقرارها (inotify وpolling)"""
+    sources = [False] + ([True] if InotifySource.available() else [])
+    for use_inotify in sources:
+        with tempfile.TemporaryDirectory() as tmp:
+            input_dir = Path(tmp) / 'input'
+            (input_dir / 'nested').mkdir(parents=True)
+            processor = _Processor()
+            watcher = FolderWatcher(processor, input_dir, Path(tmp) / 'output', settle_seconds=0.3,
+                                    poll_interval=0.05, use_inotify=use_inotify)
+            thread = threading.Thread(target=watcher.run)
+            thread.start()
+            data = _png_bytes()
+            path = input_dir / 'nested' / 'scan.png'
+            try:
+                time.sleep(0.1)
+                with open(path, 'wb') as f:
+                    f.write(data[:100])
+                    f.flush()
+                    time.sleep(0.15)
+                    f.write(data[100:])
+                (input_dir / 'notes.txt').write_text('ignored')
+                deadline = time.monotonic() + 10
+                while str(path) not in watcher.processed and time.monotonic() < deadline:
+                    time.sleep(0.05)
+            finally:
+                watcher.stop()
+                thread.join()
+            assert processor.calls == [(str(path), len(data))], (use_inotify, processor.calls)
+
+def test_output_inside_input_is_ignored():
+    """مخرجات مجلد إخراج داخل المجلد المراقب لا تُعاد معالجتها، وwrite_shard تُستدعى لكل نتيجة"""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = Path(tmp) / 'input'
+        output_dir = input_dir / 'out'
+        (output_dir / 'nested').mkdir(parents=True)
+        data = _png_bytes()
+        path = input_dir / 'scan.png'
+        path.write_bytes(data)
+        (output_dir / 'enhanced_scan.png').write_bytes(data)
+        (output_dir / 'nested' / 'enhanced_old.png').write_bytes(data)
+
+        processor = _Processor()
+        shards = []
+        processor.write_shard = lambda result: shards.append(result['image_path'])
+        watcher = FolderWatcher(processor, input_dir, output_dir, settle_seconds=0, use_inotify=False)
+        watcher._catch_up()
+        assert list(watcher.pending) == [path]
+        assert not watcher._is_image(output_dir / 'enhanced_scan.png')
+        assert not watcher._is_image(input_dir / '.' / 'out' / 'enhanced_scan.png')
+        watcher._check_pending()
+        watcher._check_pending()
+        watcher.executor.shutdown(wait=True)
+        assert processor.calls == [(str(path), len(data))] and shards == [str(path)]
+
+def main():
+    """الدالة الرئيسية"""
+    print("Folder Watcher Test")
+    print("=" * 50)
+    test_partial_file_is_debounced()
+    test_run_processes_new_files()
+    test_output_inside_input_is_ignored()
+    print("All folder watcher tests passed!")
+
+if __name__ == "__main__":
+    main()
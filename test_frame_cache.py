@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار التخزين المؤقت للإطارات المفكوكة
+Test Memory-Mapped Decoded-Frame Cache
+"""
+
+import os
+import time
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+from frame_cache import FrameCache
+from image_enhancer import ImageEnhancer
+
+def _write_images(directory: Path, count=5, size=(120, 160)):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        path = directory / f"scan_{i}.png"
+        cv2.imwrite(str(path), rng.integers(0, 256, size + (3,), dtype=np.uint8))
+        paths.append(str(path))
+    return paths
+
+def test_hit_skips_decode():
+    """الإطار المخزن مطابق لفك الترميز، ومربوط بالذاكرة، ولا يُفك الترميز مرة ثانية"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_images(Path(tmp))[0]
+        enhancer = ImageEnhancer(lazy_reader=True, frame_cache=FrameCache(Path(tmp) / 'cache'))
+        expected = cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2GRAY)
+
+        first = enhancer.load_frame(path)
+        assert np.array_equal(first, expected)
+
+        # عملية أخرى (أو تشغيل لاحق) تقرأ الإطار دون فك ترميز
+        cache = pickle.loads(pickle.dumps(enhancer.frame_cache))
+        frame = cache.get_or_decode(path, lambda: (_ for _ in ()).throw(AssertionError("decoded")))
+        assert isinstance(frame, np.memmap) and not frame.flags.writeable
+        assert np.array_equal(frame, expected)
+        assert cache.hits == 1 and enhancer.frame_cache.misses == 1
+
+        # المفتاح من المحتوى: نسخة الملف بمسار آخر تصيب، وتعديله يخطئ
+        copy = Path(tmp) / 'copy.png'
+        shutil.copyfile(path, copy)
+        assert cache.get(copy) is not None
+        cv2.imwrite(str(copy), np.zeros((10, 10, 3), dtype=np.uint8))
+        assert cache.get(copy) is None
+
+def test_size_capped_eviction():
+    """عند تجاوز الحد تُحذف الإطارات الأقدم استخداماً"""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write_images(Path(tmp), count=6)
+        frame_bytes = 120 * 160 + 128
+        cache = FrameCache(Path(tmp) / 'cache', max_bytes=frame_bytes * 4)
+        enhancer = ImageEnhancer(lazy_reader=True, frame_cache=cache)
+        for path in paths[:4]:
+            enhancer.load_frame(path)
+            time.sleep(0.01)
+        # استخدام الإطار الأول يجعله الأحدث
+        assert cache.get(paths[0]) is not None
+        for path in paths[4:]:
+            time.sleep(0.01)
+            enhancer.load_frame(path)
+
+        assert cache.size <= cache.max_bytes and cache.evictions >= 2
+        assert cache.get(paths[0]) is not None and cache.get(paths[5]) is not None
+        assert cache.get(paths[1]) is None
+        on_disk = sum(len(files) for _, _, files in os.walk(Path(tmp) / 'cache'))
+        assert on_disk == 6 - cache.evictions
+
+def test_batch_processor_reuses_frames():
+    """التشغيل الثاني للمعالج المجمع يقرأ كل الإطارات من التخزين المؤقت"""
+    from batch_processor import BatchProcessor
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [Path(path) for path in _write_images(Path(tmp), count=3)]
+        cache_dir = Path(tmp) / 'cache'
+        runs = []
+        for _ in range(2):
+            processor = BatchProcessor(max_workers=2, frame_cache_dir=cache_dir)
+            results = processor.process_images_batch(paths, save_enhanced=False)
+            assert all(result['status'] == 'success' for result in results)
+            runs.append(processor.run_metrics)
+        assert runs[0]['frame_cache_misses'] == 3 and runs[1]['frame_cache_hits'] == 3
+
+def main():
+    """الدالة الرئيسية"""
+    print("Frame Cache Test")
+    print("=" * 50)
+    test_hit_skips_decode()
+    test_size_capped_eviction()
+    test_batch_processor_reuses_frames()
+    print("All frame cache tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار اكتشاف الصور شبه المتطابقة
+Test Perceptual-Hash Near-Duplicate Detection
+"""
+
+import random
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+from image_dedup import (BKTree, DuplicateDetector, HASH_METHODS, DEFAULT_MAX_DISTANCE, hamming,
+                         find_duplicates, frames_match, verification_frame)
+
+def _page(seed: int, size=(300, 240)):
+    """صفحة نصية مختلفة لكل بذرة"""
+    rng = np.random.default_rng(seed)
+    page = np.full(size + (3,), 255, dtype=np.uint8)
+    for line in range(6):
+        y = 30 + line * 40
+        x = int(rng.integers(10, 60))
+        cv2.putText(page, f"{seed}-{rng.integers(10**5)}", (x, y), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.8 + rng.random() * 0.4, (0, 0, 0), 2)
+    cv2.rectangle(page, (int(rng.integers(0, 120)), 250), (int(rng.integers(130, 240)), 290), (0, 0, 0), -1)
+    return page
+
+def _invoice(number: str, name: str, size=(1100, 850)):
+    """فاتورة بقالب ثابت: يختلف الرقم واسم العميل فقط"""
+    page = np.full(size + (3,), 255, dtype=np.uint8)
+    cv2.rectangle(page, (40, 40), (810, 140), (0, 0, 0), 3)
+    cv2.putText(page, 'INVOICE', (60, 110), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 4)
+    cv2.putText(page, f"No. {number}", (500, 110), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+    cv2.putText(page, f"Customer: {name}", (60, 220), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+    for row in range(8):
+        y = 320 + row * 70
+        cv2.line(page, (40, y), (810, y), (0, 0, 0), 2)
+        cv2.putText(page, f"Item {row + 1}", (60, y + 45), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 0), 2)
+        cv2.putText(page, '10.00', (650, y + 45), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 0), 2)
+    return page
+
+def _reencode(page, quality):
+    """إعادة ترميز JPEG بجودة أخرى وتغيير طفيف في السطوع (إعادة مسح)"""
+    shifted = cv2.add(page, np.full(page.shape, 3, dtype=np.uint8))
+    return cv2.imdecode(cv2.imencode('.jpg', shifted, [cv2.IMWRITE_JPEG_QUALITY, quality])[1], cv2.IMREAD_COLOR)
+
+def test_bk_tree_matches_linear_scan():
+    """نتائج البحث في الشجرة مطابقة للمقارنة الخطية"""
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(2000)]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+    for query in values[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        for distance in (0, 6, 20):
+            expected = sorted((hamming(query, v), i) for i, v in enumerate(values) if hamming(query, v) <= distance)
+            assert sorted(tree.search(query, distance)) == expected
+
+def test_hashes_separate_duplicates_from_distinct_pages():
+    """إعادة الترميز قريبة، والصفحات المختلفة بعيدة، لكلا نوعي البصمة"""
+    pages = [_page(seed) for seed in range(8)]
+    for method, hash_function in HASH_METHODS.items():
+        gray = lambda image: cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        hashes = [hash_function(gray(page)) for page in pages]
+        copies = [hamming(value, hash_function(gray(_reencode(page, 60)))) for page, value in zip(pages, hashes)]
+        distinct = [hamming(a, b) for i, a in enumerate(hashes) for b in hashes[i + 1:]]
+        assert max(copies) < DEFAULT_MAX_DISTANCE < min(distinct), (method, max(copies), min(distinct))
+
+def test_same_template_pages_are_not_duplicates():
+    """فواتير بنفس القالب تتطابق بصمتها، والتأكيد بالإطار يفصلها ويقبل إعادة الترميز"""
+    gray = lambda image: cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    first = gray(_invoice('INV-1001', 'Alice Smith'))
+    others = [gray(_invoice('INV-1002', 'Bob Jones')), gray(_invoice('INV-1002', 'Alice Smith'))]
+    copy = gray(_reencode(_invoice('INV-1001', 'Alice Smith'), 50))
+    for method, hash_function in HASH_METHODS.items():
+        # البصمة وحدها لا تميزها (هذا سبب التأكيد)
+        assert hamming(hash_function(first), hash_function(others[0])) <= DEFAULT_MAX_DISTANCE, method
+    for other in others:
+        assert not frames_match(verification_frame(first), verification_frame(other))
+    assert frames_match(verification_frame(first), verification_frame(copy))
+    # نفس الصفحة بدقة مسح أقل
+    half = cv2.resize(first, (first.shape[1] // 2 + 1, first.shape[0] // 2), interpolation=cv2.INTER_AREA)
+    assert frames_match(verification_frame(first), verification_frame(half))
+
+    for method in HASH_METHODS:
+        detector = DuplicateDetector(max_distance=DEFAULT_MAX_DISTANCE, method=method)
+        assert detector.match_image(first, 'a.png') is None
+        assert detector.match_image(others[0], 'b.png') is None
+        assert detector.match_image(others[1], 'c.png') is None
+        assert detector.match_image(copy, 'd.png')[0] == 'a.png'
+        assert detector.originals == 3 and detector.duplicates == 1 and detector.rejected >= 2
+
+def test_detector_and_find_duplicates():
+    """الكاشف يسجل الأصل ويعيده للنسخ، وfind_duplicates يجمعها"""
+    detector = DuplicateDetector(max_distance=4)
+    assert detector.match_or_add(0b1011, 'a.png') is None
+    assert detector.match_or_add(0b1010, 'b.png') == ('a.png', 1)
+    assert detector.match_or_add(0xFFFF, 'c.png') is None
+    assert detector.duplicates == 1 and detector.originals == 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for seed in range(3):
+            page = _page(seed)
+            for copy, image in enumerate((page, _reencode(page, 70))):
+                path = Path(tmp) / f"page{seed}_{copy}.jpg"
+                cv2.imwrite(str(path), image)
+                paths.append(str(path))
+        groups = find_duplicates(paths)
+        assert groups == {paths[i]: [paths[i + 1]] for i in (0, 2, 4)}
+
+def test_batch_processor_reuses_results():
+    """النسخ تأخذ نتائج الأصل دون تشغيل خط الأنابيب وتُسجل نسبة التكرار"""
+    from batch_processor import BatchProcessor
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for seed in range(2):
+            page = _page(seed)
+            for copy, image in enumerate((page, _reencode(page, 80), _reencode(page, 50))):
+                path = Path(tmp) / f"page{seed}_{copy}.png"
+                cv2.imwrite(str(path), image)
+                paths.append(path)
+
+        processor = BatchProcessor(max_workers=1, dedup_distance=4)
+        results = processor.process_images_batch(paths, Path(tmp) / 'out')
+        assert all(result['status'] == 'success' for result in results)
+        by_path = {Path(result['image_path']): result for result in results}
+        for copy in (paths[1], paths[2], paths[4], paths[5]):
+            original = by_path[paths[0] if copy in paths[1:3] else paths[3]]
+            assert by_path[copy]['duplicate_of'] == original['image_path']
+            assert by_path[copy]['easyocr_results'] == original['easyocr_results']
+            assert by_path[copy]['enhanced_path'] == original['enhanced_path']
+        assert processor.run_metrics['duplicates'] == 4
+        assert abs(processor.run_metrics['dedup_ratio'] - 4 / 6) < 1e-9
+        assert len(list((Path(tmp) / 'out').iterdir())) == 2
+
+        # فاتورتان بنفس القالب لا تتشاركان النتائج
+        invoices = [Path(tmp) / 'inv_1.png', Path(tmp) / 'inv_2.png']
+        cv2.imwrite(str(invoices[0]), _invoice('INV-1001', 'Alice Smith'))
+        cv2.imwrite(str(invoices[1]), _invoice('INV-1002', 'Bob Jones'))
+        results = processor.process_images_batch(invoices, Path(tmp) / 'invoices')
+        assert all(result['status'] == 'success' and 'duplicate_of' not in result for result in results)
+        assert processor.run_metrics['duplicates'] == 0 and processor.run_metrics['dedup_rejected'] == 1
+        assert len(list((Path(tmp) / 'invoices').iterdir())) == 2
+
+def main():
+    """الدالة الرئيسية"""
+    print("Image Dedup Test")
+    print("=" * 50)
+    test_bk_tree_matches_linear_scan()
+    test_hashes_separate_duplicates_from_distinct_pages()
+    test_same_template_pages_are_not_duplicates()
+    test_detector_and_find_duplicates()
+    test_batch_processor_reuses_results()
+    print("All image dedup tests passed!")
+
+if __name__ == "__main__":
+    main()
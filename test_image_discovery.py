@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار اكتشاف الصور
+Test Parallel Image Discovery
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from image_discovery import walk_images, find_images
+
+def _make_tree(root: Path):
+    """شجرة صغيرة بامتدادات مختلطة ومجلدات متداخلة"""
+    for d in range(5):
+        subdir = root / f"dir_{d}" / "nested"
+        subdir.mkdir(parents=True)
+        for i in range(20):
+            (subdir / f"img_{i}.PNG").write_bytes(b'x' * (i + 1))
+            (subdir / f"note_{i}.txt").write_bytes(b'')
+    (root / 'top.jpg').write_bytes(b'')
+    (root / 'fake.png').mkdir()  # مجلد بامتداد صورة لا يُحسب
+
+def test_matches_glob_and_caches_stat():
+    """النتائج تطابق glob + is_file، ومعلومات stat تطابق الملف"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _make_tree(root)
+        expected = sorted(p for p in root.glob('**/*')
+                          if p.is_file() and p.suffix.lower() in ('.png', '.jpg'))
+
+        for workers in (1, 4):
+            assert find_images(root, workers=workers) == expected
+
+        for image in walk_images(root, workers=4):
+            stat = os.stat(image.path)
+            assert (image.size, image.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+        assert find_images(root, recursive=False) == [root / 'top.jpg']
+
+def main():
+    """الدالة الرئيسية"""
+    print("Image Discovery Test")
+    print("=" * 50)
+    test_matches_glob_and_caches_stat()
+    print("All image discovery tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار قراءة ترويسات الصور
+Test Header-Only Image Probing
+"""
+
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+from PIL import Image
+from image_probe import read_image_header, probe_image, clear_probe_cache
+
+def _make_images(root: Path):
+    """صور بصيغ وعمق ودقة مختلفة مع القيم المتوقعة"""
+    rgb = Image.fromarray(np.zeros((30, 40, 3), dtype=np.uint8))
+    grey16 = Image.fromarray(np.zeros((12, 7), dtype=np.uint16))
+
+    rgb.save(root / 'rgb.png', dpi=(300, 300))
+    grey16.save(root / 'grey16.png')
+    rgb.save(root / 'baseline.jpg', dpi=(72, 72))
+    rgb.save(root / 'progressive.jpg', progressive=True)
+    rgb.save(root / 'image.bmp')
+    rgb.save(root / 'pages.tif', save_all=True, compression='tiff_lzw', dpi=(200, 150),
+             append_images=[rgb.rotate(90, expand=True)] * 2)
+    rgb.convert('1').save(root / 'fax.tif', compression='group4')
+
+    return {
+        'rgb.png': ('PNG', 40, 30, 3, 8, 300.0, 1),
+        'grey16.png': ('PNG', 7, 12, 1, 16, None, 1),
+        'baseline.jpg': ('JPEG', 40, 30, 3, 8, 72.0, 1),
+        'progressive.jpg': ('JPEG', 40, 30, 3, 8, None, 1),
+        'image.bmp': ('BMP', 40, 30, 3, 8, 96.01, 1),
+        'pages.tif': ('TIFF', 40, 30, 3, 8, 200.0, 3),
+        'fax.tif': ('TIFF', 40, 30, 1, 1, None, 1),
+    }
+
+def test_header_matches_pil():
+    """الأبعاد والقنوات والدقة وعدد الصفحات تطابق PIL"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for name, expected in _make_images(root).items():
+            info = read_image_header(root / name)
+            actual = (info.format, info.width, info.height, info.channels,
+                      info.bit_depth, info.dpi_x, info.pages)
+            assert actual == expected, (name, actual)
+            with Image.open(root / name) as image:
+                assert image.size == (info.width, info.height)
+                assert getattr(image, 'n_frames', 1) == info.pages
+
+def test_cache_follows_file_changes():
+    """التخزين المؤقت يُبطل عند تغير الحجم أو تاريخ التعديل"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'image.png'
+        Image.new('RGB', (10, 10)).save(path)
+        clear_probe_cache()
+        assert probe_image(path).width == 10
+
+        Image.new('RGB', (25, 10)).save(path)
+        os.utime(path, ns=(0, 10**9))
+        assert probe_image(path).width == 25
+
+        path.write_bytes(b'not an image')
+        assert probe_image(path) is None
+        assert probe_image(Path(tmp) / 'missing.png') is None
+
+def main():
+    """الدالة الرئيسية"""
+    print("Image Probe Test")
+    print("=" * 50)
+    test_header_matches_pil()
+    test_cache_follows_file_changes()
+    print("All image probe tests passed!")
+
+if __name__ == "__main__":
+    main()
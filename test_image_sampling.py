@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار اختيار العينات أثناء المسح
+Test Streaming Reservoir and Stratified Sampling
+"""
+
+import random
+from collections import Counter
+from image_discovery import DiscoveredImage
+import image_sampling
+from image_sampling import stratified_sample, sample_images
+
+def _images(folders):
+    """صور وهمية: {المجلد: العدد}"""
+    return [DiscoveredImage(f"/data/{folder}/img_{i:05d}.png", 1000 * (i + 1))
+            for folder, n in folders.items() for i in range(n)]
+
+def test_simple_sample_is_reproducible():
+    """البذرة تعطي العينة نفسها مهما كان ترتيب المسح، والعينة الصغيرة جزء من الكبيرة"""
+    images = _images({'a': 5000})
+    shuffled = images[:]
+    random.Random(1).shuffle(shuffled)
+
+    sample = sample_images(iter(images), 100, seed=7)
+    assert len(sample) == len(set(sample)) == 100
+    assert sample_images(iter(shuffled), 100, seed=7) == sample
+    assert set(sample_images(iter(images), 40, seed=7)) <= set(sample)
+    assert sample_images(iter(images), 100, seed=8) != sample
+
+    # أقل من k: كل الصور
+    assert len(sample_images(iter(images[:30]), 100)) == 30
+    assert sample_images(iter(images), 0) == []
+
+def test_stratified_equal_shares():
+    """الطبقات الصغيرة تدخل كاملة والباقي يوزع بالتساوي"""
+    images = _images({'tiny': 3, 'big': 10000, 'medium': 400})
+    random.Random(2).shuffle(images)
+
+    sample = sample_images(iter(images), 101, by='folder', seed=1)
+    per_folder = Counter(path.parent.name for path in sample)
+    assert len(sample) == 101
+    assert per_folder['tiny'] == 3
+    assert {per_folder['big'], per_folder['medium']} == {49}
+
+def test_sampling_is_uniform_within_stratum():
+    """كل عنصر له الفرصة نفسها تقريباً (دون بذرة)"""
+    hits = Counter()
+    for _ in range(2000):
+        hits.update(stratified_sample(range(20), 5))
+    assert min(hits.values()) > 350 and max(hits.values()) < 650
+
+def test_many_strata_scan_is_linear():
+    """مع طبقات أكثر من k لا تُعاد حساب الحصص لكل عنصر (مسح خطي)"""
+    images = _images({f"folder_{i:05d}": 3 for i in range(16000)})
+    calls = 0
+    equal_share = image_sampling._equal_share
+
+    def counting(counts, k):
+        nonlocal calls
+        calls += 1
+        return equal_share(counts, k)
+
+    image_sampling._equal_share = counting
+    try:
+        sample = sample_images(iter(images), 100, by='folder', seed=3)
+    finally:
+        image_sampling._equal_share = equal_share
+    assert len(sample) == 100 and len({path.parent for path in sample}) == 100
+    # عدد مرات التقليص لوغاريتمي في عدد الطبقات وليس خطياً في عدد الصور
+    assert calls < 30, calls
+
+def main():
+    """الدالة الرئيسية"""
+    print("Image Sampling Test")
+    print("=" * 50)
+    test_simple_sample_is_reproducible()
+    test_stratified_equal_shares()
+    test_sampling_is_uniform_within_stratum()
+    test_many_strata_scan_is_linear()
+    print("All image sampling tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار كتابة الصور في الخلفية وإعدادات الترميز
+Test Write-Behind Image Writer and Encoder Presets
+"""
+
+import os
+import threading
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+import image_writer
+from image_writer import AsyncImageWriter, ENCODER_PRESETS, encode_with_preset
+
+def _binary_image(height=120, width=91, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.random((height, width)) > 0.5).astype(np.uint8) * 255
+
+def test_presets_roundtrip():
+    """كل إعداد يُرمز الصورة الثنائية دون فقد، وضغط PNG الأعلى لا يكبر الحجم"""
+    image = _binary_image()
+    sizes = {}
+    for preset in ENCODER_PRESETS:
+        data = encode_with_preset(image, preset)
+        sizes[preset] = len(data)
+        decoded = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        assert np.array_equal(decoded, image), preset
+    assert sizes['png-small'] <= sizes['png-fast']
+
+def test_write_behind_and_stats():
+    """الصور المسلمة تُكتب كلها عند الإغلاق بامتداد الإعداد، والإحصاءات تعكس ذلك"""
+    image = _binary_image()
+    with tempfile.TemporaryDirectory() as tmp:
+        with AsyncImageWriter(workers=3, queue_size=4, preset='tiff') as writer:
+            paths = [writer.submit(Path(tmp) / f"enhanced_{i}.png", image) for i in range(20)]
+        assert all(path.endswith('.tif') for path in paths)
+        for path in paths:
+            assert np.array_equal(cv2.imread(path, cv2.IMREAD_GRAYSCALE), image)
+
+        stats = writer.stats()
+        assert stats['images_written'] == 20 and stats['write_failures'] == 0
+        assert stats['bytes_written'] == sum(os.path.getsize(path) for path in paths)
+        assert stats['writer_backlog'] == 0 and 1 <= stats['writer_max_backlog'] <= 4
+        assert stats['encode_time'] > 0
+
+        # فشل الكتابة يُسجل ولا يوقف الكاتب
+        with AsyncImageWriter(workers=1) as writer:
+            missing = writer.submit(Path(tmp) / 'missing' / 'out.png', image)
+            writer.submit(Path(tmp) / 'ok.png', image)
+        assert list(writer.failed) == [missing]
+        assert writer.images_written == 1
+
+def test_queue_is_bounded():
+    """المرسل يُحجب عند امتلاء الطابور حتى يتقدم الكاتب"""
+    release = threading.Event()
+    original = image_writer.encode_enhanced_image
+
+    def slow_encode(*args, **kwargs):
+        release.wait()
+        return original(*args, **kwargs)
+
+    image_writer.encode_enhanced_image = slow_encode
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = AsyncImageWriter(workers=1, queue_size=2)
+            submitted = []
+
+            def producer():
+                for i in range(6):
+                    submitted.append(writer.submit(Path(tmp) / f"{i}.png", _binary_image()))
+
+            thread = threading.Thread(target=producer)
+            thread.start()
+            thread.join(timeout=0.5)
+            # صورة قيد الترميز + صورتان في الطابور، والرابعة محجوبة
+            assert thread.is_alive() and len(submitted) == 3
+            release.set()
+            thread.join()
+            writer.close()
+            assert writer.images_written == 6
+    finally:
+        image_writer.encode_enhanced_image = original
+
+def test_batch_processor_write_behind():
+    """المعالج المجمع يكتب عبر الكاتب في الخلفية ويسجل إحصاءاته"""
+    from batch_processor import BatchProcessor
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'source'
+        source.mkdir()
+        for i in range(4):
+            image = np.full((60, 80, 3), 255, dtype=np.uint8)
+            cv2.putText(image, str(i), (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+            cv2.imwrite(str(source / f"scan_{i}.jpg"), image)
+
+        processor = BatchProcessor(max_workers=2, enhanced_format='png-fast', writer_threads=2)
+        results = processor.process_images_batch(sorted(source.glob('*.jpg')), Path(tmp) / 'out')
+        assert processor.image_writer is None
+        assert processor.run_metrics['images_written'] == 4
+        for result in results:
+            assert result['enhanced_path'].endswith('.png') and os.path.exists(result['enhanced_path'])
+
+def main():
+    """الدالة الرئيسية"""
+    print("Image Writer Test")
+    print("=" * 50)
+    test_presets_roundtrip()
+    test_write_behind_and_stats()
+    test_queue_is_bounded()
+    test_batch_processor_write_behind()
+    print("All image writer tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار إعادة التشغيل التزايدية
+Test Incremental Re-Run
+"""
+
+import os
+import json
+import threading
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+from batch_processor import BatchProcessor
+
+def _counting_processor(**kwargs):
+    """معالج يسجل الصور التي عولجت فعلاً"""
+    processor = BatchProcessor(max_workers=2, **kwargs)
+    processed = []
+    lock = threading.Lock()
+    process_single_image = processor.process_single_image
+
+    def process(image_path, *args):
+        with lock:
+            processed.append(Path(image_path).name)
+        return process_single_image(image_path, *args)
+
+    processor.process_single_image = process
+    return processor, processed
+
+def _write(path: Path, value: int):
+    cv2.imwrite(str(path), np.full((40, 60, 3), value, dtype=np.uint8))
+
+def test_rerun_skips_unchanged_images():
+    """الصور التي لم تتغير تُنقل نتائجها، والجديدة والمعدلة فقط تُعالج"""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = Path(tmp) / 'input'
+        input_dir.mkdir()
+        for i in range(3):
+            _write(input_dir / f"scan_{i}.png", 200 + i)
+
+        processor, processed = _counting_processor()
+        first = processor.process_directory(input_dir, save_enhanced=False)
+        assert sorted(processed) == ['scan_0.png', 'scan_1.png', 'scan_2.png']
+        assert all(result['file_size'] and result['pipeline_fingerprint'] for result in first)
+        results_file = Path(tmp) / 'results.jsonl'
+        processor.save_results(first, results_file, 'jsonl')
+
+        # تعديل صورة (حجم مختلف) وأخرى بتاريخ تعديل فقط، وإضافة صورة جديدة
+        cv2.imwrite(str(input_dir / 'scan_1.png'), np.random.default_rng(0).integers(
+            0, 256, (40, 60, 3), dtype=np.uint8))
+        stat = (input_dir / 'scan_2.png').stat()
+        os.utime(input_dir / 'scan_2.png', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        _write(input_dir / 'scan_3.png', 50)
+
+        processor, processed = _counting_processor()
+        second = processor.process_directory(input_dir, save_enhanced=False, previous_results=results_file)
+        assert sorted(processed) == ['scan_1.png', 'scan_2.png', 'scan_3.png']
+        by_name = {Path(result['image_path']).name: result for result in second}
+        assert sorted(by_name) == ['scan_0.png', 'scan_1.png', 'scan_2.png', 'scan_3.png']
+        previous = processor.load_previous_results(results_file)[str(input_dir / 'scan_0.png')]
+        assert by_name['scan_0.png']['timestamp'] == previous['timestamp']
+
+        # ملف JSON يعمل أيضاً، وتغيير إعدادات خط الأنابيب يُبطل كل النتائج السابقة
+        json_file = Path(tmp) / 'results.json'
+        processor.save_results(second, json_file, 'json')
+        processor, processed = _counting_processor()
+        assert len(processor.process_directory(input_dir, save_enhanced=False, previous_results=json_file)) == 4
+        assert processed == []
+
+        processor, processed = _counting_processor()
+        processor.enhancer.PIPELINE_CONFIG = dict(processor.enhancer.PIPELINE_CONFIG, version=-1)
+        processor.process_directory(input_dir, save_enhanced=False, previous_results=json_file)
+        assert len(processed) == 4
+
+def test_failed_and_missing_records_are_reprocessed():
+    """السجلات الفاشلة تُعاد معالجتها، وملف النتائج المفقود يعني معالجة كاملة"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'scan.png'
+        _write(path, 100)
+        processor, _ = _counting_processor()
+        stat = path.stat()
+        previous = {str(path): {'image_path': str(path), 'status': 'success', 'file_size': stat.st_size,
+                                'file_mtime_ns': stat.st_mtime_ns,
+                                'pipeline_fingerprint': processor.enhancer.pipeline_fingerprint()}}
+        assert processor.split_unchanged_images([path], previous) == ([], [previous[str(path)]])
+        failed_file = Path(tmp) / 'failed.jsonl'
+        failed_file.write_text(json.dumps(dict(previous[str(path)], status='failed')) + '\n', encoding='utf-8')
+        assert processor.load_previous_results(failed_file) == {}
+        assert processor.load_previous_results(Path(tmp) / 'missing.json') == {}
+
+        # صورة لها سجل ناجح لكنها حُذفت: تُعالج وتُسجل كفشل بدلاً من إسقاطها
+        gone = Path(tmp) / 'gone.png'
+        previous[str(gone)] = dict(previous[str(path)], image_path=str(gone))
+        to_process, carried_over = processor.split_unchanged_images([path, gone], previous)
+        assert to_process == [gone] and carried_over == [previous[str(path)]]
+        results = processor.process_images_batch(to_process, save_enhanced=False)
+        assert [result['status'] for result in results] == ['failed']
+
+def main():
+    """الدالة الرئيسية"""
+    print("Incremental Re-Run Test")
+    print("=" * 50)
+    test_rerun_skips_unchanged_images()
+    test_failed_and_missing_records_are_reprocessed()
+    print("All incremental re-run tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار خادم الاستدلال وتجميع الطلبات
+Test Local Inference Server and Micro-Batching
+"""
+
+import json
+import threading
+import urllib.request
+from urllib.error import HTTPError
+from http.server import ThreadingHTTPServer
+import cv2
+import numpy as np
+from inference_server import EasyOCRMicroBatcher, InferenceRequestHandler, InferenceService, to_jsonable
+
+class _Reader:
+    """قارئ EasyOCR وهمي يسجل الاستدعاءات"""
+
+    def __init__(self):
+        self.calls = []
+
+    def readtext(self, image):
+        self.calls.append(('single', 1))
+        return [([[np.int32(0), 0], [10, 0], [10, 10], [0, 10]], 'word', 0.9),
+                ([[0, 0], [5, 0], [5, 5], [0, 5]], 'noise', 0.2)]
+
+    def readtext_batched(self, images, batch_size=1):
+        if any(image.max() == 99 for image in images):
+            raise RuntimeError('bad batch')
+        self.calls.append(('batched', len(images)))
+        return [[([[0, 0], [10, 0], [10, 10], [0, 10]], f"page{int(image.max())}", 0.9)] for image in images]
+
+def test_micro_batching():
+    """الطلبات المتزامنة متطابقة الأبعاد تُشغل في دفعة واحدة"""
+    reader = _Reader()
+    batcher = EasyOCRMicroBatcher(reader, max_batch_size=4, max_wait=0.5)
+    futures = [batcher.submit(np.full((20, 30), i, dtype=np.uint8)) for i in range(3)]
+    futures.append(batcher.submit(np.zeros((40, 30), dtype=np.uint8)))
+    assert [future.result(timeout=5)[0]['text'] for future in futures[:3]] == ['page0', 'page1', 'page2']
+    # صورة بأبعاد مختلفة تُشغل وحدها، والنصوص منخفضة الثقة تُستبعد
+    assert [word['text'] for word in futures[3].result(timeout=5)] == ['word']
+    assert sorted(reader.calls) == [('batched', 3), ('single', 1)]
+    assert batcher.batches_run == 1 and batcher.images_run == 4
+
+    # خطأ الدفعة يصل إلى كل طلباتها ولا يوقف الخيط
+    failing = [batcher.submit(np.full((20, 30), 99, dtype=np.uint8)) for _ in range(2)]
+    for future in failing:
+        try:
+            future.result(timeout=5)
+            assert False, "batch error should propagate"
+        except RuntimeError as e:
+            assert str(e) == 'bad batch'
+    assert batcher.submit(np.zeros((8, 8), dtype=np.uint8)).result(timeout=5)[0]['text'] == 'word'
+
+    assert to_jsonable({'box': (np.int32(1), np.float64(0.5)), 'array': np.arange(2)}) == {
+        'box': [1, 0.5], 'array': [0, 1]}
+
+def _request(url, data=None, headers=None):
+    request = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def test_http_server():
+    """الخادم يعالج بايتات الصورة ويعيد نتيجة JSON بشكل process_single_image"""
+    InferenceRequestHandler.service = InferenceService(max_batch_size=4, max_wait=0.01)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), InferenceRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        image = np.full((60, 80, 3), 255, dtype=np.uint8)
+        cv2.putText(image, 'OCR', (5, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+        body = cv2.imencode('.png', image)[1].tobytes()
+        status, result = _request(f"{base}/ocr?tesseract=0", body, {'Content-Type': 'image/png'})
+        assert status == 200 and result['status'] == 'success'
+        assert result['tesseract_results'] == []
+        assert result['total_texts_found'] == len(result['easyocr_results'])
+
+        status, result = _request(f"{base}/ocr", b'not an image', {'Content-Type': 'image/png'})
+        assert status == 400 and result['status'] == 'failed'
+        status, health = _request(f"{base}/health")
+        assert status == 200 and health['images_run'] == 1
+        assert _request(f"{base}/missing")[0] == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def main():
+    """الدالة الرئيسية"""
+    print("Inference Server Test")
+    print("=" * 50)
+    test_micro_batching()
+    test_http_server()
+    print("All inference server tests passed!")
+
+if __name__ == "__main__":
+    main()
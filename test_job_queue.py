@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار طابور المهام
+Test SQLite Job Queue
+"""
+
+import os
+import time
+import tempfile
+import multiprocessing
+from pathlib import Path
+from job_queue import JobQueue, run_worker
+
+def fake_process(image_path):
+    """معالجة وهمية تفشل مرة واحدة للصور التي يحتوي اسمها على flaky"""
+    time.sleep(0.01)
+    marker = Path(image_path + '.tried')
+    if 'flaky' in image_path and not marker.exists():
+        marker.touch()
+        return {'image_path': image_path, 'status': 'failed', 'error': 'transient'}
+    return {'image_path': image_path, 'status': 'success', 'worker_pid': os.getpid()}
+
+def test_multiple_workers_process_each_job_once():
+    """عدة عمليات عاملة على نفس القاعدة تعالج كل مهمة مرة واحدة"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'jobs.db')
+        paths = [os.path.join(tmp, f"image_{i:03d}.png") for i in range(40)]
+        paths.append(os.path.join(tmp, 'flaky.png'))
+
+        with JobQueue(db_path) as queue:
+            assert queue.enqueue(paths) == len(paths)
+            assert queue.enqueue(paths) == 0  # لا تكرار
+
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(db_path,), kwargs={
+                'worker_id': f"worker-{i}", 'process_fn': fake_process,
+                'exit_when_empty': True, 'poll_interval': 0.05
+            })
+            for i in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+
+        with JobQueue(db_path) as queue:
+            status = queue.get_status()
+            results = queue.get_results()
+
+        print(f"Queue status: {status}")
+        assert status['done'] == len(paths)
+        assert sorted(r['image_path'] for r in results) == sorted(paths)
+        assert len({r['worker_pid'] for r in results}) > 1
+
+def test_expired_lease_is_retried():
+    """مهمة عامل توقف دون تجديد العقد تعود للطابور بعد انتهاء صلاحيته"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'jobs.db')
+        with JobQueue(db_path) as queue:
+            queue.enqueue(['a.png'], max_attempts=2)
+
+            job = queue.lease('crashed', lease_seconds=0.05)
+            assert job['attempt'] == 1
+            assert queue.lease('other', lease_seconds=0.05) is None
+
+            time.sleep(0.1)
+            retry = queue.lease('other', lease_seconds=0.05)
+            assert retry['id'] == job['id'] and retry['attempt'] == 2
+            assert not queue.heartbeat(job['id'], 'crashed')
+            assert not queue.complete(job['id'], 'crashed', {})
+
+            # بعد استنفاد المحاولات تُعلَّم المهمة كفاشلة
+            time.sleep(0.1)
+            assert queue.lease('third') is None
+            assert queue.get_status()['failed'] == 1
+
+def test_lease_order_and_plan():
+    """الحجز بترتيب id بين المهام الجديدة والعقود المنتهية، ورأس الطابور من الفهرس دون ترتيب"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with JobQueue(os.path.join(tmp, 'jobs.db')) as queue:
+            queue.enqueue([f"image_{i}.png" for i in range(5)])
+            first = queue.lease('a', lease_seconds=0.05)
+            second = queue.lease('a', lease_seconds=60)
+            assert (first['image_path'], second['image_path']) == ('image_0.png', 'image_1.png')
+            time.sleep(0.1)
+            # العقد المنتهي (id أصغر) يسبق المهام الجديدة
+            retried = queue.lease('b')
+            assert retried['id'] == first['id'] and retried['attempt'] == 2
+            assert [queue.lease('b')['image_path'] for _ in range(3)] == ['image_2.png', 'image_3.png', 'image_4.png']
+            assert queue.lease('b') is None
+
+            plan = ' '.join(row[-1] for row in queue.connection.execute(
+                "EXPLAIN QUERY PLAN SELECT id, image_path, attempts FROM jobs "
+                "WHERE status = 'pending' ORDER BY id LIMIT 1"))
+            assert 'jobs_queue' in plan and 'TEMP B-TREE' not in plan, plan
+
+def main():
+    """الدالة الرئيسية"""
+    print("Job Queue Test")
+    print("=" * 50)
+    test_multiple_workers_process_each_job_once()
+    test_expired_lease_is_retried()
+    test_lease_order_and_plan()
+    print("All job queue tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار القراءة المسبقة للصور
+Test Readahead Prefetcher
+"""
+
+import time
+import threading
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+from prefetch import Prefetcher, read_image_bytes
+
+def _write_images(directory: Path, count=10):
+    paths = []
+    for i in range(count):
+        path = directory / f"scan_{i:02d}.png"
+        cv2.imwrite(str(path), np.full((30, 40, 3), i * 20, dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+def test_readahead_depth_and_bytes():
+    """المسارات تُمرر بالترتيب، والبايتات مطابقة، والقراءة لا تتجاوز العمق"""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write_images(Path(tmp))
+        started = []
+        lock = threading.Lock()
+
+        def reader(path):
+            with lock:
+                started.append(path)
+            return read_image_bytes(path)
+
+        prefetcher = Prefetcher(paths, depth=3, io_threads=2, reader=reader)
+        first = next(prefetcher)
+        assert first == paths[0]
+        # أول مسار لا ينتظر مسح النافذة
+        time.sleep(0.1)
+        assert started == paths[:1]
+        second = next(prefetcher)
+        # المسار المسحوب + 3 مسارات قادمة فقط
+        time.sleep(0.1)
+        assert second == paths[1] and sorted(started) == paths[:5]
+
+        assert prefetcher.take(first) == first.read_bytes()
+        remaining = [second] + list(prefetcher)
+        assert remaining == paths[1:]
+        for path in remaining:
+            decoded = cv2.imdecode(np.frombuffer(prefetcher.take(path), dtype=np.uint8), cv2.IMREAD_COLOR)
+            assert np.array_equal(decoded, cv2.imread(str(path)))
+        assert prefetcher.take(paths[0]) is None
+        prefetcher.close()
+        assert prefetcher.stats()['prefetch_bytes'] == sum(path.stat().st_size for path in paths)
+
+def test_read_failure_falls_back():
+    """فشل القراءة المسبقة يعيد None فيعود العامل للتحميل العادي"""
+    def reader(path):
+        raise OSError("disk error")
+
+    prefetcher = Prefetcher(['a.png'], depth=2, reader=reader)
+    path = next(prefetcher)
+    assert prefetcher.take(path) is None
+    prefetcher.close()
+
+def test_batch_processor_readahead():
+    """المعالج المجمع يفك ترميز البايتات المقروءة مسبقاً"""
+    from batch_processor import BatchProcessor
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write_images(Path(tmp), count=6)
+        processor = BatchProcessor(max_workers=2, readahead=4, io_threads=2)
+        results = processor.process_images_batch(paths, save_enhanced=False)
+        assert len(results) == 6 and all(result['status'] == 'success' for result in results)
+        assert processor.prefetcher is None
+        assert processor.run_metrics['prefetch_bytes'] == sum(path.stat().st_size for path in paths)
+
+def main():
+    """الدالة الرئيسية"""
+    print("Prefetch Test")
+    print("=" * 50)
+    test_readahead_depth_and_bytes()
+    test_read_failure_falls_back()
+    test_batch_processor_readahead()
+    print("All prefetch tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار سجلات النتائج المضغوطة
+Test Compact Typed Result Records
+"""
+
+import json
+import pickle
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+from result_records import ImageResult, WordArray, compact_result, export_default
+
+def _result():
+    return {
+        'image_path': 'scan.png',
+        'enhanced_path': None,
+        'status': 'success',
+        'processing_time': 0.25,
+        'easyocr_results': [
+            {'text': 'فاتورة', 'confidence': 0.93, 'bbox': [[np.int32(1), np.int32(2)], [50, 2], [50, 20], [1, 20]]},
+            {'text': 'INV-17', 'confidence': 0.71, 'bbox': [[60, 2], [120, 2], [120, 20], [60, 20]]},
+        ],
+        'tesseract_results': [{'text': 'Total', 'confidence': 0.88, 'bbox': (5, 30, 40, 12)}],
+        'total_texts_found': 3,
+        'timestamp': '2026-01-01T00:00:00'
+    }
+
+def test_words_compact_and_expand():
+    """الكلمات تُخزن كمصفوفات وتُعاد بالشكل الأصلي"""
+    words = WordArray.from_words(_result()['easyocr_results'])
+    assert isinstance(words, WordArray) and len(words) == 2
+    assert words.boxes.shape == (2, 4, 2) and words.boxes.dtype == np.int32
+    assert words.text(1) == 'INV-17'
+    assert words[0] == {'text': 'فاتورة', 'confidence': 0.93, 'bbox': [[1, 2], [50, 2], [50, 20], [1, 20]]}
+    assert words[-1]['text'] == 'INV-17' and [w['text'] for w in words[:1]] == ['فاتورة']
+    assert words == _result()['easyocr_results']
+
+    float_boxes = WordArray.from_words([{'text': 'a', 'confidence': 0.5, 'bbox': (1.5, 2, 3, 4)}])
+    assert float_boxes.boxes.dtype == np.float64 and float_boxes[0]['bbox'] == [1.5, 2.0, 3.0, 4.0]
+    # أشكال غير متجانسة أو مفاتيح إضافية تبقى كما هي
+    ragged = [{'text': 'a', 'confidence': 1, 'bbox': [1, 2]}, {'text': 'b', 'confidence': 1, 'bbox': [1]}]
+    assert WordArray.from_words(ragged) is ragged
+    extra = [{'text': 'a', 'confidence': 1, 'bbox': [1, 2], 'lang': 'ar'}]
+    assert WordArray.from_words(extra) is extra
+    assert WordArray.from_words([]) == []
+
+def test_record_behaves_like_result_dict():
+    """السجل يُقرأ ويُعدل كالقاموس ويُصدر بنفس شكل JSON"""
+    original = _result()
+    record = compact_result(original)
+    assert isinstance(record, ImageResult) and not hasattr(record, '__dict__')
+    assert record['status'] == 'success' and record.get('file_size') is None
+    assert 'file_size' not in record and 'timestamp' in record
+    assert isinstance(record['tesseract_results'], WordArray)
+
+    record['duplicate_of'] = 'other.png'
+    record['enhanced_path'] = 'out.png'
+    assert record.pop('duplicate_of') == 'other.png' and 'duplicate_of' not in record
+    record['enhanced_path'] = None
+    assert record == original and list(record) == list(original)
+
+    expected = json.loads(json.dumps(original, default=export_default))
+    assert json.loads(json.dumps(record, default=export_default)) == expected
+    assert pickle.loads(pickle.dumps(record)).to_dict() == record.to_dict()
+
+    failed = compact_result({'image_path': 'x.png', 'status': 'failed', 'error': 'boom', 'processing_time': 0})
+    assert failed['error'] == 'boom' and set(failed.to_dict()) == {'image_path', 'status', 'error', 'processing_time'}
+
+def test_batch_processor_exports_same_json():
+    """المعالج يحفظ سجلات مضغوطة ويصدر نفس النتائج التي يصدرها بالقواميس"""
+    from batch_processor import BatchProcessor
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(3):
+            path = Path(tmp) / f"scan_{i}.png"
+            cv2.imwrite(str(path), np.full((40, 60, 3), 255, dtype=np.uint8))
+            paths.append(path)
+        exported = []
+        for compact in (True, False):
+            processor = BatchProcessor(max_workers=2, compact_results=compact)
+            results = processor.process_images_batch(paths, save_enhanced=False)
+            assert all(isinstance(result, ImageResult) == compact for result in results)
+            results_file = Path(tmp) / f"results_{compact}.jsonl"
+            processor.save_results(results, results_file, 'jsonl')
+            records = [json.loads(line) for line in open(results_file, encoding='utf-8')]
+            for record in records:
+                del record['processing_time'], record['timestamp']
+            exported.append(sorted(records, key=lambda record: record['image_path']))
+        assert exported[0] == exported[1]
+
+def main():
+    """الدالة الرئيسية"""
+    print("Result Records Test")
+    print("=" * 50)
+    test_words_compact_and_expand()
+    test_record_behaves_like_result_dict()
+    test_batch_processor_exports_same_json()
+    print("All result records tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار مخزن النتائج والبحث النصي
+Test SQLite FTS5 Results Store
+"""
+
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+import results_store
+from results_store import ResultsStore, fts_query, iter_results_file, word_box
+
+def _result(path, easyocr=(), tesseract=(), status='success'):
+    return {
+        'image_path': path,
+        'enhanced_path': None,
+        'status': status,
+        'processing_time': 0.5,
+        'easyocr_results': [{'text': text, 'confidence': np.float64(0.9),
+                             'bbox': [[np.int32(x), np.int32(10)], [x + 50, 10], [x + 50, 30], [x, 30]]}
+                            for x, text in easyocr],
+        'tesseract_results': [{'text': text, 'confidence': 0.8, 'bbox': (x, 40, 60, 20)}
+                              for x, text in tesseract],
+        'total_texts_found': len(easyocr) + len(tesseract),
+        'timestamp': '2026-01-01T00:00:00'
+    }
+
+def test_boxes_and_query_escaping():
+    """توحيد الصناديق واقتباس كلمات البحث"""
+    assert word_box('easyocr', [[5, 8], [40, 6], [42, 20], [4, 22]]) == (4.0, 6.0, 42.0, 22.0)
+    assert word_box('tesseract', (10, 20, 30, 5)) == (10.0, 20.0, 40.0, 25.0)
+    assert fts_query('INV-2024/001 فات*') == '"INV-2024/001" "فات"*'
+    assert fts_query('say "hi"') == '"say" """hi"""'
+    assert fts_query('  ') == ''
+
+def test_search_and_replace():
+    """البحث يعيد الصور والصناديق، وإعادة إضافة الصورة تستبدل كلماتها"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with ResultsStore(Path(tmp) / 'results.db', batch_size=2) as store:
+            store.add(_result('a.png', easyocr=[(0, 'Invoice INV-2024/001')], tesseract=[(5, 'Total')]))
+            store.add(_result('b.png', easyocr=[(0, 'فاتورة رقم 17')]))
+            store.add(_result('c.png', tesseract=[(0, 'invoices')]))
+            store.add({'image_path': 'd.png', 'status': 'failed', 'error': 'boom', 'processing_time': 0})
+            store.flush()
+            assert store.count() == (4, 4)
+
+            matches = store.search('inv-2024/001')
+            assert [(m.path, m.engine, m.bbox) for m in matches] == [('a.png', 'easyocr', (0.0, 10.0, 50.0, 30.0))]
+            assert set(store.search_images('invoice*')) == {'a.png', 'c.png'}
+            assert store.search('فاتورة')[0].path == 'b.png'
+            assert store.search('total')[0].bbox == (5.0, 40.0, 65.0, 60.0)
+            assert store.search('invoice OR total', raw=True, limit=1)[0].path == 'a.png'
+
+            store.add(_result('a.png', easyocr=[(0, 'Receipt')]))
+            store.flush()
+            assert store.search('invoice') == [] and store.search('total') == []
+            assert store.search('receipt')[0].path == 'a.png'
+            assert store.count() == (4, 3)
+        # القاعدة تبقى للتشغيلات اللاحقة
+        with ResultsStore(Path(tmp) / 'results.db') as store:
+            assert store.search('receipt')[0].path == 'a.png'
+
+def test_import_results_file():
+    """استيراد ملف JSONL محفوظ"""
+    with tempfile.TemporaryDirectory() as tmp:
+        results_file = Path(tmp) / 'results.jsonl'
+        with open(results_file, 'w', encoding='utf-8') as f:
+            for i in range(3):
+                result = _result(f"{i}.png", tesseract=[(0, f"word{i}")])
+                f.write(json.dumps(result) + '\n')
+        with ResultsStore(Path(tmp) / 'results.db') as store:
+            store.add_many(iter_results_file(results_file))
+            store.flush()
+            assert [m.path for m in store.search('word2')] == ['2.png']
+
+class _FailingConnection:
+    """اتصال يفشل في عملية محددة ويسجل إغلاقه"""
+
+    def __init__(self, connection, failing):
+        self._connection = connection
+        self._failing = failing
+        self.closed = False
+
+    def __getattr__(self, name):
+        if name == self._failing:
+            def fail(*args):
+                raise sqlite3.OperationalError(f"{name} failed")
+            return fail
+        return getattr(self._connection, name)
+
+    def close(self):
+        self.closed = True
+        self._connection.close()
+
+def test_writer_errors_close_connection():
+    """خطأ الكتابة أو التثبيت يُبلغ عنه كما هو ويُغلق اتصال الخيط دون تثبيت دفعة ناقصة"""
+    original_connect = results_store.sqlite3.connect
+    for failing in ('executemany', 'commit'):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ResultsStore(Path(tmp) / 'results.db')
+            connections = []
+
+            def connect(*args, **kwargs):
+                connections.append(_FailingConnection(original_connect(*args, **kwargs), failing))
+                return connections[-1]
+
+            results_store.sqlite3.connect = connect
+            try:
+                store.add(_result('a.png', tesseract=[(0, 'Total')]))
+                try:
+                    store.flush()
+                    assert False, "flush should raise"
+                except RuntimeError as e:
+                    assert f"{failing} failed" in str(e)
+            finally:
+                results_store.sqlite3.connect = original_connect
+            assert connections[0].closed
+            assert store.count() == (0, 0)
+            try:
+                store.close()
+            except RuntimeError:
+                pass
+
+def test_batch_processor_writes_store():
+    """المعالج المجمع يكتب كل نتيجة وكلماتها في القاعدة"""
+    from batch_processor import BatchProcessor
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(4):
+            path = Path(tmp) / f"scan_{i}.png"
+            cv2.imwrite(str(path), np.full((40, 60, 3), 255, dtype=np.uint8))
+            paths.append(path)
+        db_path = Path(tmp) / 'results.db'
+        processor = BatchProcessor(max_workers=2, results_db=db_path)
+        results = processor.process_images_batch(paths, save_enhanced=False)
+        assert processor.results_store is None
+        assert processor.run_metrics['results_db_images'] == 4
+        with ResultsStore(db_path) as store:
+            images, words = store.count()
+            assert images == 4
+            assert words == sum(result['total_texts_found'] for result in results)
+
+def main():
+    """الدالة الرئيسية"""
+    print("Results Store Test")
+    print("=" * 50)
+    test_boxes_and_query_escaping()
+    test_search_and_replace()
+    test_import_results_file()
+    test_writer_errors_close_connection()
+    test_batch_processor_writes_store()
+    print("All results store tests passed!")
+
+if __name__ == "__main__":
+    main()
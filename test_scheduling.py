@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار جدولة الصور حسب التكلفة
+Test Cost-Aware Image Scheduling
+"""
+
+import tempfile
+import threading
+from pathlib import Path
+import cv2
+import numpy as np
+from scheduling import estimate_image_cost, order_by_policy, percentile, summarize_completion_times
+
+def _write_images(directory: Path):
+    """صور بأبعاد وأحجام ملفات مختلفة: الضوضاء تكبر ملف PNG الصغير"""
+    rng = np.random.default_rng(0)
+    images = {
+        'small_noisy.png': rng.integers(0, 256, (60, 60), dtype=np.uint8),
+        'large_flat.png': np.zeros((300, 400), dtype=np.uint8),
+        'medium_flat.png': np.zeros((100, 100), dtype=np.uint8),
+    }
+    paths = {}
+    for name, image in images.items():
+        paths[name] = directory / name
+        cv2.imwrite(str(paths[name]), image)
+    return paths
+
+def test_order_by_policy():
+    """LPT يرسل الأكبر أولاً وSJF الأصغر أولاً، وpath يحافظ على الترتيب"""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write_images(Path(tmp))
+        given = list(paths.values())
+        assert order_by_policy(iter(given), 'path') == given
+
+        by_size = sorted(given, key=lambda path: path.stat().st_size)
+        assert order_by_policy(given, 'shortest_first') == by_size
+        assert order_by_policy(given, 'largest_first') == by_size[::-1]
+
+        assert estimate_image_cost(paths['large_flat.png'], 'pixels') == 300 * 400
+        by_pixels = [paths['small_noisy.png'], paths['medium_flat.png'], paths['large_flat.png']]
+        assert order_by_policy(given, 'shortest_first', 'pixels') == by_pixels
+        assert order_by_policy(given, 'largest_first', 'pixels') == by_pixels[::-1]
+
+        # الملف المفقود تكلفته صفر فيُرسل أولاً في SJF
+        missing = Path(tmp) / 'missing.png'
+        assert order_by_policy(given + [missing], 'shortest_first', 'pixels')[0] == missing
+        try:
+            order_by_policy(given, 'random')
+            assert False, "unknown policy should raise"
+        except ValueError:
+            pass
+
+def test_completion_summary():
+    """الزمن الكلي وزمن أول نتيجة والنسب المئوية"""
+    assert summarize_completion_times([]) == {}
+    times = [float(i) for i in range(1, 101)]
+    summary = summarize_completion_times(times[::-1])
+    assert summary == {'makespan': 100.0, 'time_to_first_result': 1.0,
+                       'p50_latency': 50.0, 'p99_latency': 99.0}
+    assert percentile([3.0], 99) == 3.0
+
+def test_batch_submits_in_policy_order():
+    """المعالج يرسل الصور بترتيب السياسة ويسجل مقاييس الدفعة"""
+    from batch_processor import BatchProcessor
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write_images(Path(tmp))
+        expected = [paths['large_flat.png'], paths['medium_flat.png'], paths['small_noisy.png']]
+        processor = BatchProcessor(max_workers=1, scheduling_policy='largest_first', cost_estimate='pixels')
+        submitted = []
+        lock = threading.Lock()
+
+        def process(path, output_dir=None, save_enhanced=True):
+            with lock:
+                submitted.append(path)
+            return {'image_path': str(path), 'status': 'success', 'processing_time': 0}
+
+        processor.process_single_image = process
+        processor.process_images_batch(list(paths.values()), save_enhanced=False)
+        assert submitted == expected
+        assert processor.run_metrics['scheduling_policy'] == 'largest_first'
+        assert 0 <= processor.run_metrics['time_to_first_result'] <= processor.run_metrics['makespan']
+
+def main():
+    """الدالة الرئيسية"""
+    print("Scheduling Test")
+    print("=" * 50)
+    test_order_by_policy()
+    test_completion_summary()
+    test_batch_submits_in_policy_order()
+    print("All scheduling tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار لغة استعلام الاختيار
+Test Selection Query Language
+"""
+
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+import cv2
+from selection_query import SelectionQuery, ImageCandidate, QueryError, iter_matching_images
+from file_index import FileIndex
+
+class CountingCandidate(ImageCandidate):
+    """مرشح يحسب استدعاءات stat"""
+    __slots__ = ('stat_calls',)
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.stat_calls = 0
+
+    def _stat(self):
+        self.stat_calls += 1
+        super()._stat()
+
+def test_parse_and_short_circuit():
+    """الشروط الرخيصة تُقيّم أولاً ولا يُستدعى stat عند فشل الاسم"""
+    query = SelectionQuery.parse("size<5MB AND name~INVOICE AND NOT ext=bmp")
+    assert query.fields == {'size', 'name', 'ext'}
+
+    candidate = CountingCandidate('/nonexistent/receipt_01.png')
+    assert not query.matches(candidate)
+    assert candidate.stat_calls == 0
+
+    for invalid in ("colour=red", "(name~a OR", "size~big"):
+        try:
+            SelectionQuery.parse(invalid)
+        except QueryError:
+            continue
+        raise AssertionError(f"expected QueryError for {invalid!r}")
+
+def test_streaming_and_index_agree():
+    """نفس الاستعلام يعطي نفس النتائج أثناء المسح ومن الفهرس"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for i, (name, shape) in enumerate([('invoice_a.png', (40, 300)), ('invoice_b.png', (40, 100)),
+                                            ('receipt.png', (40, 300)), ('invoice_c.bmp', (40, 300))]):
+            cv2.imwrite(str(root / name), np.full(shape, i * 60, dtype=np.uint8))
+
+        text = "name~invoice AND (width>=200 OR ext=.bmp) AND size<1MB AND mtime>2000-01-01"
+        query = SelectionQuery.parse(text)
+        streamed = sorted(iter_matching_images(root, query))
+        assert [p.name for p in streamed] == ['invoice_a.png', 'invoice_c.bmp']
+
+        with FileIndex(os.path.join(tmp, 'index.db')) as index:
+            index.refresh(root)
+            assert index.select_matching(query, root) == streamed
+
+def test_not_unknown_fields_agree():
+    """نفي شرط على حقل مجهول (ترويسة غير مقروءة) صحيح أثناء المسح ومن الفهرس"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        cv2.imwrite(str(root / 'wide.png'), np.zeros((40, 300), dtype=np.uint8))
+        (root / 'broken.png').write_bytes(b'not an image')
+
+        with FileIndex(os.path.join(tmp, 'index.db')) as index:
+            index.refresh(root)
+            for text, expected in [("NOT width>=200", ['broken.png']),
+                                   ("NOT (width>=200 OR name~wide)", ['broken.png']),
+                                   ("NOT NOT width>=200", ['wide.png'])]:
+                query = SelectionQuery.parse(text)
+                streamed = sorted(iter_matching_images(root, query))
+                assert [p.name for p in streamed] == expected, (text, streamed)
+                assert index.select_matching(query, root) == streamed, text
+
+def main():
+    """الدالة الرئيسية"""
+    print("Selection Query Test")
+    print("=" * 50)
+    test_parse_and_short_circuit()
+    test_streaming_and_index_agree()
+    test_not_unknown_fields_agree()
+    print("All selection query tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار حفظ الصور في أجزاء TAR
+Test Sharded TAR Output
+"""
+
+import json
+import time
+import tarfile
+import threading
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from shard_output import ShardWriter, read_sharded_image
+from archive_input import read_archive_member
+
+def test_shards_are_bounded_and_indexed():
+    """الأجزاء محدودة الحجم، والفهرس ومسارات archive!member تعيد البايتات نفسها"""
+    with tempfile.TemporaryDirectory() as tmp:
+        images = {f"/scans/batch_{i % 4}/page.png#{i}": bytes([i % 251]) * (3000 + i) for i in range(60)}
+
+        with ShardWriter(tmp, max_shard_bytes=40_000, queue_size=4) as writer:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                paths = dict(zip(images, executor.map(
+                    lambda source: writer.write(source, images[source], metadata={'source': source}),
+                    images)))
+
+        shards = sorted(Path(tmp).glob('enhanced-*.tar'))
+        assert len(shards) > 1
+        assert all(shard.stat().st_size <= 40_000 + 10240 for shard in shards)
+
+        for source, data in images.items():
+            stored, metadata = read_sharded_image(tmp, source)
+            assert stored == data and metadata == {'source': source}
+            assert read_archive_member(paths[source]) == data
+
+        # كل صورة عضوان بالمفتاح نفسه (WebDataset)
+        with tarfile.open(shards[0]) as tar:
+            names = tar.getnames()
+        assert names[0].endswith('.png') and names[1] == names[0][:-4] + '.json'
+
+        # تشغيل لاحق لا يستبدل الأجزاء السابقة
+        with ShardWriter(tmp) as writer:
+            path = writer.write('/scans/new.png', b'new')
+        assert path.split('!')[0] == str(Path(tmp) / f"enhanced-{len(shards):06d}.tar")
+        assert read_sharded_image(tmp, '/scans/new.png')[0] == b'new'
+
+def test_batch_processor_shards_numpy_results():
+    """المعالج المجمع يكتب الأجزاء مع نتائج OCR بأنواع NumPy (صناديق int32 من EasyOCR)"""
+    from batch_processor import BatchProcessor
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = Path(tmp) / 'input'
+        input_dir.mkdir()
+        for i in range(3):
+            cv2.imwrite(str(input_dir / f"scan_{i}.png"), np.full((40, 60, 3), 255, dtype=np.uint8))
+        output_dir = Path(tmp) / 'output'
+
+        processor = BatchProcessor(max_workers=2, output_format='shards')
+        processor.enhancer.extract_text_easyocr = lambda image: [
+            {'text': 'INV-17', 'confidence': np.float64(0.9),
+             'bbox': [[np.int32(0), np.int32(0)], [np.int32(10), np.int32(0)],
+                      [np.int32(10), np.int32(5)], [np.int32(0), np.int32(5)]]}]
+        results = processor.process_directory(input_dir, output_dir)
+        assert len(results) == 3 and all(result['status'] == 'success' for result in results)
+        for result in results:
+            data, metadata = read_sharded_image(output_dir, result['image_path'])
+            assert cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED) is not None
+            assert metadata['easyocr_results'][0]['bbox'][2] == [10, 5]
+            assert 'enhanced_data' not in metadata
+
+def test_watch_mode_writes_shards():
+    """في وضع المراقبة تُلحق الصور بالأجزاء ولا تدخل بايتاتها سطر النتائج"""
+    from batch_processor import BatchProcessor
+    from folder_watcher import FolderWatcher
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = Path(tmp) / 'input'
+        input_dir.mkdir()
+        output_dir = Path(tmp) / 'output'
+        processor = BatchProcessor(max_workers=2, output_format='shards')
+        processor.shard_writer = ShardWriter(output_dir)
+        watcher = FolderWatcher(processor, input_dir, output_dir, settle_seconds=0.1,
+                                poll_interval=0.05, use_inotify=False)
+        thread = threading.Thread(target=watcher.run)
+        thread.start()
+        try:
+            cv2.imwrite(str(input_dir / 'scan.png'), np.full((40, 60, 3), 255, dtype=np.uint8))
+            deadline = time.monotonic() + 10
+            while str(input_dir / 'scan.png') not in watcher.processed and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            watcher.stop()
+            thread.join()
+            processor.shard_writer.close()
+
+        lines = (output_dir / 'watch_results.jsonl').read_text(encoding='utf-8').splitlines()
+        result = json.loads(lines[0])
+        assert result['status'] == 'success' and 'enhanced_data' not in result
+        assert '!' in result['enhanced_path']
+        assert read_sharded_image(output_dir, str(input_dir / 'scan.png'))[0]
+
+def main():
+    """الدالة الرئيسية"""
+    print("Shard Output Test")
+    print("=" * 50)
+    test_shards_are_bounded_and_indexed()
+    test_batch_processor_shards_numpy_results()
+    test_watch_mode_writes_shards()
+    print("All shard output tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار نقل الصور عبر الذاكرة المشتركة
+Test Shared-Memory Frame Transport
+"""
+
+import queue
+import numpy as np
+from shared_frames import SharedFrameRing, SharedFramePool, frame_from_descriptor
+
+def test_ring_reuses_slots():
+    """الشرائح تُحجز وتُحرر وتُعاد، والواصف يعيد الصورة دون نسخ"""
+    with SharedFrameRing(slots=2, slot_bytes=4096) as ring:
+        first = ring.put(np.arange(12, dtype=np.uint8).reshape(3, 4))
+        second = ring.put(np.full((2, 2), 7, dtype=np.uint16))
+        assert {first['slot'], second['slot']} == {0, 1}
+        assert frame_from_descriptor(first).tolist() == np.arange(12).reshape(3, 4).tolist()
+        view = frame_from_descriptor(second)
+        assert view.dtype == np.uint16 and view.base is not None
+
+        ring.release(first)
+        third = ring.put(np.ones((5, 5), dtype=np.uint8))
+        assert third['slot'] == first['slot'] and third['offset'] == first['offset']
+        assert frame_from_descriptor(third, copy=True).sum() == 25
+
+def test_capacity_errors_keep_slots():
+    """الصورة الأكبر من الشريحة ترفض دون حجز شريحة، والحلقة الممتلئة تنتظر ثم تفشل"""
+    with SharedFrameRing(slots=1, slot_bytes=100) as ring:
+        try:
+            ring.put(np.zeros((20, 20), dtype=np.uint8))
+            assert False, "oversized frame should raise"
+        except ValueError:
+            pass
+        held = ring.put(np.zeros((10, 10), dtype=np.uint8))
+        try:
+            ring.acquire(timeout=0.05)
+            assert False, "exhausted ring should raise"
+        except queue.Empty:
+            pass
+        ring.release(held)
+        ring.release(ring.acquire(timeout=0.05))
+
+def test_pool_round_trip_and_shutdown():
+    """التحسين في عملية منفصلة يطابق التحسين المحلي، والإرسال بعد الإيقاف لا يسرب شريحة"""
+    from image_enhancer import ImageEnhancer
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (60, 80, 3), dtype=np.uint8) for _ in range(3)]
+    enhancer = ImageEnhancer(lazy_reader=True)
+    pool = SharedFramePool(max_workers=2, slots=2, slot_bytes=60 * 80 * 3)
+    try:
+        futures = [pool.submit_enhance(image) for image in images]
+        for image, future in zip(images, futures):
+            assert np.array_equal(future.result(timeout=120), enhancer.enhance_image_pipeline(image))
+        pool.executor.shutdown(wait=True)
+        try:
+            pool.submit_enhance(images[0])
+            assert False, "submit after shutdown should raise"
+        except RuntimeError:
+            pass
+        assert pool.ring._free.qsize() == 2
+    finally:
+        pool.shutdown()
+
+def main():
+    """الدالة الرئيسية"""
+    print("Shared Frames Test")
+    print("=" * 50)
+    test_ring_reuses_slots()
+    test_capacity_errors_keep_slots()
+    test_pool_round_trip_and_shutdown()
+    print("All shared frames tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار بث الصور المكتشفة إلى المعالجة قبل انتهاء المسح
+Test Streaming Discovery Into the Executor
+"""
+
+import types
+import threading
+import tempfile
+from pathlib import Path
+import cv2
+import numpy as np
+
+def _write_tree(root: Path):
+    paths = []
+    for folder in ('a', 'b/c'):
+        (root / folder).mkdir(parents=True)
+        for name in ('2.png', '1.png'):
+            path = root / folder / name
+            cv2.imwrite(str(path), np.full((20, 30, 3), 128, dtype=np.uint8))
+            paths.append(path)
+    (root / 'a' / 'notes.txt').write_text('ignored')
+    return paths
+
+def _gated(paths, started: threading.Event, seen: list):
+    """مولّد يتوقف بعد أول مسار حتى تبدأ معالجته (كمسح مجلد بطيء)"""
+    yield paths[0]
+    seen.append(started.wait(timeout=10))
+    yield from paths[1:]
+
+def _fake_process(started: threading.Event, processed: list):
+    def process(self, path, output_dir=None, save_enhanced=True):
+        processed.append(Path(path))
+        started.set()
+        return {'image_path': str(path), 'status': 'success', 'processing_time': 0}
+    return process
+
+def test_batch_starts_before_scan_finishes():
+    """المعالج المجمع يعالج أول صورة بينما المسح لم ينته، ويعد الصور أثناء الاكتشاف"""
+    from batch_processor import BatchProcessor
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write_tree(Path(tmp))
+        processor = BatchProcessor(max_workers=2)
+        started, seen, processed = threading.Event(), [], []
+        processor.process_single_image = types.MethodType(_fake_process(started, processed), processor)
+
+        results = processor.process_images_batch(_gated(paths, started, seen), save_enhanced=False)
+        assert seen == [True]
+        assert sorted(processed) == sorted(paths) and len(results) == 4
+        assert processor.total_images == 4 and 'discovery_time' in processor.run_metrics
+
+        # المسح نفسه مولّد مرتب داخل كل مجلد ويتجاهل غير الصور
+        images = processor.iter_images_in_directory(tmp)
+        assert not isinstance(images, list)
+        images = list(images)
+        assert sorted(images) == sorted(paths)
+        for folder in ('a', 'b/c'):
+            assert [p.name for p in images if p.parent == Path(tmp) / folder] == ['1.png', '2.png']
+
+        processor.process_single_image = types.MethodType(_fake_process(threading.Event(), []), processor)
+        assert len(processor.process_directory(tmp, save_enhanced=False)) == 4
+
+def test_selective_streams_selected_images():
+    """المعالج الانتقائي يستهلك مولّد الاختيار أثناء المعالجة"""
+    from selective_processor import SelectiveProcessor
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write_tree(Path(tmp))
+        processor = SelectiveProcessor(max_workers=1)
+        started, seen, processed = threading.Event(), [], []
+        processor.process_single_image = types.MethodType(_fake_process(started, processed), processor)
+
+        results = processor.process_selected_images(_gated(paths, started, seen), save_enhanced=False)
+        assert seen == [True] and len(results) == 4
+        assert processor.selected_images == paths and processor.total_images == 4
+        assert processor.time_to_first_result is not None
+
+        selected = processor.iter_selected_images(Path(tmp), pattern='1')
+        assert sorted(selected) == sorted(p for p in paths if p.name == '1.png')
+
+        # by_size يسمي المجلد بعدد الصور حتى مع مولّد
+        output_dir = Path(tmp) / 'out'
+        results = processor.process_selected_images(iter(paths), output_dir, save_enhanced=False,
+                                                    structure_type='by_size')
+        assert len(results) == 4 and [p.name for p in output_dir.iterdir()] == ['batch_4']
+
+def main():
+    """الدالة الرئيسية"""
+    print("Streaming Discovery Test")
+    print("=" * 50)
+    test_batch_starts_before_scan_finishes()
+    test_selective_streams_selected_images()
+    print("All streaming discovery tests passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار المجمّع المُراقَب (المهلة وحد الذاكرة والعزل)
+Test Supervised Worker Pool
+"""
+
+import os
+import time
+import tempfile
+from supervised_pool import SupervisedPool
+
+def fake_process(item):
+    """معالجة وهمية: hang تتوقف، big تستهلك الذاكرة، والبقية تنجح"""
+    if item.startswith('hang'):
+        time.sleep(60)
+    if item.startswith('big'):
+        hog = bytearray(400 * 1024 * 1024)
+        time.sleep(60)
+    time.sleep(0.01)
+    return {'image_path': item, 'status': 'success', 'processing_time': 0.01}
+
+def test_timeouts_and_memory_limits_are_quarantined():
+    """الصور المعطوبة تُعزل بينما تكتمل الصور السليمة"""
+    with tempfile.TemporaryDirectory() as tmp:
+        quarantine_file = os.path.join(tmp, 'quarantine.jsonl')
+        items = ['hang.tif', 'big.tif'] + [f"ok_{i}.png" for i in range(20)]
+
+        pool = SupervisedPool(fake_process, workers=3, timeout=1.0, memory_limit_mb=300,
+                              max_retries=1, quarantine_file=quarantine_file, poll_interval=0.05)
+        start = time.time()
+        results = dict(pool.run(items))
+        elapsed = time.time() - start
+
+        print(f"Finished {len(results)} items in {elapsed:.1f}s, recycled {pool.workers_recycled} workers")
+        assert len(results) == len(items)
+        assert results['hang.tif']['status'] == 'timeout'
+        assert results['big.tif']['status'] == 'oom'
+        assert all(results[item]['status'] == 'success' for item in items[2:])
+        assert pool.workers_recycled == 4  # محاولة أولى + إعادة لكل صورة معطوبة
+        assert elapsed < 20
+
+        # الصور المعزولة تُتخطى في التشغيل التالي دون إعادة معالجتها
+        pool = SupervisedPool(fake_process, workers=1, timeout=1.0,
+                              quarantine_file=quarantine_file, poll_interval=0.05)
+        start = time.time()
+        results = dict(pool.run(['hang.tif', 'ok_0.png']))
+        assert results['hang.tif']['status'] == 'timeout'
+        assert pool.workers_recycled == 0
+        assert time.time() - start < 5
+
+def main():
+    """الدالة الرئيسية"""
+    print("Supervised Pool Test")
+    print("=" * 50)
+    test_timeouts_and_memory_limits_are_quarantined()
+    print("All supervised pool tests passed!")
+
+if __name__ == "__main__":
+    main()